@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Assistant Client
+
+Cliente síncrono do serviço de assistente (python -m server). Oferece a mesma
+interface usada pela interface gráfica no OpenAIClient — stream_response() e
+memory.clear() —, então a janela pode conversar com o serviço local em vez de
+chamar a API diretamente (variável de ambiente ASSISTANT_SERVICE_URL).
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import base64
+import json
+
+import httpx
+
+from api.http_transport import get_shared_http_client
+
+
+class RemoteConversation:
+    """Histórico da conversa mantido pelo serviço; clear() o esquece."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def clear(self):
+        try:
+            self.client._session_request("DELETE", "/history")
+        except httpx.HTTPError as e:
+            print(f"Erro ao limpar o histórico no serviço: {e}")
+
+
+class AssistantServiceClient:
+    ERROR_MESSAGE = "Desculpe, ocorreu um erro ao processar sua solicitação."
+
+    def __init__(self, base_url, http_client=None, timeout=60.0):
+        """
+        base_url: endereço do serviço (ex.: http://127.0.0.1:8765). A sessão é
+        criada na construção; se expirar no serviço, é recriada no próximo pedido.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.http_client = http_client or get_shared_http_client()
+        self.timeout = timeout
+        self.session_id = None
+        self.memory = RemoteConversation(self)
+        self._create_session()
+
+    def _create_session(self):
+        response = self.http_client.post(f"{self.base_url}/v1/sessions", timeout=self.timeout)
+        response.raise_for_status()
+        self.session_id = response.json()["session_id"]
+
+    def _session_request(self, method, suffix=""):
+        response = self.http_client.request(method, f"{self.base_url}/v1/sessions/{self.session_id}{suffix}",
+                                            timeout=self.timeout)
+        if response.status_code != 404:
+            response.raise_for_status()
+        return response
+
+    def stream_events(self, prompt, audio=False):
+        """
+        Gera os eventos da resposta (ver server.assistant_service); nos eventos
+        "audio", data já vem decodificado em bytes.
+        """
+        for attempt in range(2):
+            with self.http_client.stream(
+                "POST", f"{self.base_url}/v1/sessions/{self.session_id}/messages",
+                json={"text": prompt, "audio": audio}, timeout=self.timeout
+            ) as response:
+                if response.status_code == 404 and attempt == 0:
+                    # Sessão expirada no serviço: cria outra e tenta de novo
+                    self._create_session()
+                    continue
+                if response.status_code >= 400:
+                    response.read()
+                    raise RuntimeError(f"serviço recusou o pedido ({response.status_code}): "
+                                       f"{response.json().get('error', '')}")
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event.get("type") == "audio":
+                        event["data"] = base64.b64decode(event["data"])
+                    yield event
+                return
+
+    def stream_response(self, prompt):
+        """
+        Gera a resposta em pedaços, como OpenAIClient.stream_response: se o pedido
+        falhar antes do primeiro pedaço, gera a mensagem de erro padrão.
+        """
+        received = False
+        try:
+            for event in self.stream_events(prompt):
+                if event["type"] == "text":
+                    received = True
+                    yield event["delta"]
+                elif event["type"] == "error":
+                    raise RuntimeError(event.get("message"))
+        except Exception as e:
+            print(f"Erro ao obter resposta do serviço: {e}")
+            if not received:
+                yield self.ERROR_MESSAGE
+
+    def close(self):
+        try:
+            self._session_request("DELETE")
+        except httpx.HTTPError as e:
+            print(f"Erro ao encerrar a sessão no serviço: {e}")
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Conversation
+
+Memória de conversa do OpenAIClient. Guarda as mensagens com a contagem de
+tokens calculada uma única vez por mensagem, monta cada requisição dentro de
+um orçamento de tokens e, quando o histórico passa de um limite, resume os
+turnos mais antigos em um resumo acumulado (gerado em segundo plano e
+reutilizado nas requisições seguintes). Assim o tamanho do prompt fica
+praticamente constante em sessões longas.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import collections
+import re
+import threading
+
+# Custo aproximado da formatação de cada mensagem no formato de chat
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def estimate_tokens(text):
+    """
+    Estima o número de tokens do texto. Usa o tiktoken se estiver instalado;
+    caso contrário, aproxima por palavras e pontuação (palavras longas contam mais).
+    """
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return sum(1 + len(piece) // 6 for piece in _TOKEN_PATTERN.findall(text))
+
+
+_encoder = None
+_encoder_loaded = False
+
+
+def _get_encoder():
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = None
+    return _encoder
+
+
+class ConversationMemory:
+    """
+    Histórico limitado da conversa.
+
+    token_budget: máximo de tokens de entrada por requisição (sistema, resumo,
+    histórico e pergunta atual). summary_threshold: quando o histórico não
+    resumido passa desse total, os turnos mais antigos (exceto os keep_recent
+    últimos) são enviados a summarizer(resumo_anterior, mensagens), que retorna
+    o novo resumo.
+    """
+
+    def __init__(self, system_prompt, token_budget=2000, summary_threshold=1200, keep_recent=6,
+                 summarizer=None, count_tokens=estimate_tokens, background=True):
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.summary_threshold = summary_threshold
+        self.keep_recent = keep_recent
+        self.summarizer = summarizer
+        self.count_tokens = count_tokens
+        self.background = background
+        self.summary = ""
+        self.summary_tokens = 0
+        self.summaries_made = 0
+        self._messages = collections.deque()  # dicionários role/content/tokens
+        self._history_tokens = 0
+        self._system_tokens = count_tokens(system_prompt) + MESSAGE_OVERHEAD_TOKENS
+        self._lock = threading.Lock()
+        self._summarizing = False
+        self._summary_thread = None
+        self._generation = 0  # Incrementado por clear(), invalida resumos em andamento
+
+    @property
+    def history_tokens(self):
+        return self._history_tokens
+
+    def __len__(self):
+        return len(self._messages)
+
+    def _make_message(self, role, content):
+        return {"role": role, "content": content,
+                "tokens": self.count_tokens(content) + MESSAGE_OVERHEAD_TOKENS}
+
+    def add(self, role, content):
+        """Adiciona uma mensagem ao histórico (a contagem de tokens é feita aqui, uma vez)."""
+        message = self._make_message(role, content)
+        with self._lock:
+            self._messages.append(message)
+            self._history_tokens += message["tokens"]
+
+    def has_context(self):
+        """Indica se há histórico ou resumo, isto é, se a resposta depende da conversa."""
+        with self._lock:
+            return bool(self._messages or self.summary)
+
+    def add_turn(self, user_text, assistant_text):
+        """Registra um turno completo e, se necessário, dispara o resumo dos turnos antigos."""
+        self.add("user", user_text)
+        self.add("assistant", assistant_text)
+        self.maybe_summarize()
+
+    def build_messages(self, prompt):
+        """
+        Monta a lista de mensagens da requisição: sistema (com o resumo, se houver),
+        o histórico mais recente que couber no orçamento e a pergunta atual.
+        """
+        prompt_message = self._make_message("user", prompt)
+        with self._lock:
+            system_content = self.system_prompt
+            used = self._system_tokens + prompt_message["tokens"]
+            if self.summary:
+                system_content += f"\n\nResumo da conversa até agora:\n{self.summary}"
+                used += self.summary_tokens
+
+            recent = []
+            for message in reversed(self._messages):
+                if used + message["tokens"] > self.token_budget:
+                    break
+                recent.append({"role": message["role"], "content": message["content"]})
+                used += message["tokens"]
+
+        # O histórico deve começar por uma pergunta do usuário
+        recent.reverse()
+        while recent and recent[0]["role"] != "user":
+            recent.pop(0)
+        return [{"role": "system", "content": system_content}] + recent + \
+            [{"role": "user", "content": prompt}]
+
+    def estimate_request_tokens(self, messages):
+        return sum(self.count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+    def maybe_summarize(self):
+        """Resume os turnos antigos se o histórico passou do limite (em segundo plano, se configurado)."""
+        if not self.summarizer:
+            return
+        with self._lock:
+            if self._summarizing or self._history_tokens <= self.summary_threshold:
+                return
+            if len(self._messages) <= self.keep_recent:
+                return
+            self._summarizing = True
+        if self.background:
+            self._summary_thread = threading.Thread(target=self._summarize, daemon=True)
+            self._summary_thread.start()
+        else:
+            self._summarize()
+
+    def wait_for_summary(self, timeout=None):
+        """Aguarda o resumo em andamento (útil nos testes e no benchmark)."""
+        thread = self._summary_thread
+        if thread:
+            thread.join(timeout)
+
+    def _summarize(self):
+        try:
+            with self._lock:
+                count = len(self._messages) - self.keep_recent
+                # Mantém turnos inteiros: o trecho resumido termina em uma resposta
+                while count > 0 and self._messages[count - 1]["role"] != "assistant":
+                    count -= 1
+                to_fold = [self._messages[i] for i in range(count)]
+                previous_summary = self.summary
+                generation = self._generation
+            if not to_fold:
+                return
+
+            try:
+                new_summary = self.summarizer(
+                    previous_summary, [{"role": m["role"], "content": m["content"]} for m in to_fold]
+                )
+            except Exception as e:
+                print(f"Erro ao resumir a conversa: {e}")
+                return
+            if not new_summary:
+                return
+
+            with self._lock:
+                if generation != self._generation:
+                    return
+                for _ in to_fold:
+                    removed = self._messages.popleft()
+                    self._history_tokens -= removed["tokens"]
+                self.summary = new_summary.strip()
+                self.summary_tokens = self.count_tokens(self.summary)
+                self.summaries_made += 1
+        finally:
+            with self._lock:
+                self._summarizing = False
+
+    def clear(self):
+        with self._lock:
+            self._messages.clear()
+            self._history_tokens = 0
+            self.summary = ""
+            self.summary_tokens = 0
+            self._generation += 1
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Hedging
+
+Requisições com reserva ("hedged requests"): a chamada principal é aberta e,
+se o primeiro pedaço da resposta não chegar dentro do prazo (normalmente o p95
+da latência até o primeiro token), uma segunda chamada idêntica é disparada. A
+que responder primeiro é usada e a outra é cancelada — o stream é fechado, o
+que interrompe a resposta HTTP e devolve a conexão ao pool. Assim, a cauda da
+latência deixa de depender de uma única chamada lenta, ao custo de poucas
+requisições extras (só as mais lentas que o p95 ganham reserva).
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import queue
+import threading
+
+
+class StreamAttempt:
+    """
+    Uma tentativa: abre o stream em uma thread própria e lê até o primeiro
+    pedaço aceito por is_ready. Depois disso, o restante é lido por quem
+    escolheu a tentativa, pela mesma iteração (chunks()).
+    """
+
+    def __init__(self, index, open_stream, is_ready, results):
+        self.index = index
+        self.stream = None
+        self._open_stream = open_stream
+        self._is_ready = is_ready
+        self._results = results
+        self._iterator = None
+        self._received = []
+        self._lock = threading.Lock()
+        self._cancelled = False
+        threading.Thread(target=self._run, name=f"hedge-{index}", daemon=True).start()
+
+    def _run(self):
+        try:
+            stream = self._open_stream()
+            with self._lock:
+                self.stream = stream
+                cancelled = self._cancelled
+            if cancelled:
+                stream.close()
+                return
+            self._iterator = iter(stream)
+            for chunk in self._iterator:
+                self._received.append(chunk)
+                if self._is_ready(chunk):
+                    break
+            self._results.put((self, None))
+        except Exception as e:
+            with self._lock:
+                if self._cancelled:
+                    return  # Erro provocado pelo próprio cancelamento
+            self._results.put((self, e))
+
+    def cancel(self):
+        """Cancela a tentativa, fechando o stream se ele já foi aberto."""
+        with self._lock:
+            self._cancelled = True
+            stream = self.stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass  # A thread da tentativa pode estar lendo o mesmo stream
+
+    def chunks(self):
+        """Gera os pedaços já recebidos e continua a leitura do stream."""
+        yield from self._received
+        if self._iterator is not None:
+            yield from self._iterator
+
+
+def first_ready(open_stream, hedge_after, is_ready=lambda chunk: True):
+    """
+    Abre open_stream() e, se nenhum pedaço aceito por is_ready chegar em
+    hedge_after segundos, abre uma segunda tentativa. Retorna (tentativa
+    vencedora, se houve reserva); a outra é cancelada. Se todas as tentativas
+    falharem, propaga o erro da primeira.
+    """
+    results = queue.Queue()
+    attempts = [StreamAttempt(0, open_stream, is_ready, results)]
+    errors = []
+    while True:
+        waiting_hedge = len(attempts) == 1 and not errors
+        try:
+            attempt, error = results.get(timeout=hedge_after if waiting_hedge else None)
+        except queue.Empty:
+            attempts.append(StreamAttempt(1, open_stream, is_ready, results))
+            continue
+        if error is None:
+            for other in attempts:
+                if other is not attempt:
+                    other.cancel()
+            return attempt, len(attempts) > 1
+        errors.append(error)
+        if len(errors) == len(attempts):
+            raise errors[0]
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: HTTP Transport
+
+Camada de transporte HTTP usada pelo OpenAIClient: um único httpx.Client
+compartilhado com pool de conexões e keep-alive, timeouts explícitos, nova
+tentativa com backoff exponencial e jitter em falhas temporárias, aquecimento
+da conexão em segundo plano e métricas de latência por chamada. As chamadas aos
+provedores conhecidos passam pelo agendador de limites (api.scheduler).
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import collections
+import random
+import threading
+import time
+
+import httpx
+
+from api.scheduler import ScheduledTransport, get_default_scheduler
+
+# Status que indicam falha temporária do servidor ou limite de requisições
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Erros que podem ocorrer depois de o servidor receber (e processar) a requisição:
+# só são repetidos em métodos idempotentes
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+# Métodos que podem ser repetidos sem efeito duplicado
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"}
+
+# Para os demais (POST das respostas e das imagens, cobradas por chamada), só o
+# que garante que a requisição não foi processada: a conexão nem chegou a abrir,
+# ou o servidor a recusou (limite de requisições ou indisponibilidade)
+UNSAFE_RETRY_STATUSES = {429, 503}
+UNSAFE_RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+class TransportConfig:
+    """Configuração do transporte HTTP (pool, timeouts e novas tentativas)."""
+
+    def __init__(self, max_connections=20, max_keepalive_connections=10, keepalive_expiry=120.0,
+                 http2=False, connect_timeout=5.0, read_timeout=60.0, write_timeout=10.0,
+                 pool_timeout=5.0, max_retries=3, backoff_base=0.5, backoff_max=8.0):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self.pool_timeout = pool_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def timeout(self):
+        return httpx.Timeout(connect=self.connect_timeout, read=self.read_timeout,
+                             write=self.write_timeout, pool=self.pool_timeout)
+
+    def limits(self):
+        return httpx.Limits(max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_keepalive_connections,
+                            keepalive_expiry=self.keepalive_expiry)
+
+
+def percentile(values, fraction):
+    """Percentil por interpolação linear (values não precisa estar ordenado)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = (len(ordered) - 1) * fraction
+    lower = int(index)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (index - lower)
+
+
+class LatencyMetrics:
+    """Registra a latência de cada chamada por endpoint (mantém as últimas max_samples)."""
+
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, seconds, status=None, attempts=1):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    "latencies": collections.deque(maxlen=self.max_samples),
+                    "calls": 0, "errors": 0, "retries": 0,
+                }
+            stats["latencies"].append(seconds)
+            stats["calls"] += 1
+            stats["retries"] += attempts - 1
+            if status is None or status >= 400:
+                stats["errors"] += 1
+
+    def summary(self):
+        """Retorna, por endpoint: chamadas, erros, novas tentativas e latências (s)."""
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._endpoints.items():
+                latencies = list(stats["latencies"])
+                result[endpoint] = {
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "retries": stats["retries"],
+                    "p50": percentile(latencies, 0.50),
+                    "p95": percentile(latencies, 0.95),
+                    "max": max(latencies),
+                    "last": latencies[-1],
+                }
+            return result
+
+
+class RetryTransport(httpx.BaseTransport):
+    """
+    Transporte httpx que repete a requisição em erros de conexão e em status
+    429/5xx, com backoff exponencial e "full jitter" (respeitando Retry-After),
+    e registra a latência total de cada chamada nas métricas. Requisições não
+    idempotentes (POST) só são repetidas quando certamente não foram
+    processadas, para não gerar (e cobrar) a mesma chamada duas vezes.
+    """
+
+    def __init__(self, transport, config, metrics, sleep=time.sleep):
+        self._transport = transport
+        self.config = config
+        self.metrics = metrics
+        self._sleep = sleep
+
+    def backoff_delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.config.backoff_max)
+        ceiling = min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def handle_request(self, request):
+        endpoint = request.url.path
+        if request.method in IDEMPOTENT_METHODS:
+            retry_statuses, retry_exceptions = RETRY_STATUSES, RETRY_EXCEPTIONS
+        else:
+            retry_statuses, retry_exceptions = UNSAFE_RETRY_STATUSES, UNSAFE_RETRY_EXCEPTIONS
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = self._transport.handle_request(request)
+            except retry_exceptions:
+                if attempt >= self.config.max_retries:
+                    self.metrics.record(endpoint, time.perf_counter() - start, None, attempt + 1)
+                    raise
+                self._sleep(self.backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code not in retry_statuses or attempt >= self.config.max_retries:
+                self.metrics.record(endpoint, time.perf_counter() - start, response.status_code, attempt + 1)
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            response.close()
+            self._sleep(self.backoff_delay(attempt, retry_after))
+            attempt += 1
+
+    def close(self):
+        self._transport.close()
+
+
+def parse_retry_after(value):
+    """Converte o cabeçalho Retry-After (em segundos) para float; ignora datas HTTP."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def create_http_client(config=None, metrics=None, scheduler=None):
+    """
+    Cria um httpx.Client com pool de conexões, timeouts e novas tentativas.
+    scheduler (OutboundScheduler) limita as chamadas por provedor; por padrão,
+    usa o agendador compartilhado, para que todos os clientes respeitem a mesma cota.
+    """
+    config = config or TransportConfig()
+    metrics = metrics or LatencyMetrics()
+    http2 = config.http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("Pacote 'h2' não instalado; usando HTTP/1.1.")
+            http2 = False
+    inner = ScheduledTransport(httpx.HTTPTransport(http2=http2, limits=config.limits()),
+                               scheduler or get_default_scheduler())
+    client = httpx.Client(transport=RetryTransport(inner, config, metrics), timeout=config.timeout())
+    client.metrics = metrics
+    return client
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_http_client(config=None):
+    """Retorna o httpx.Client compartilhado pela aplicação (criado no primeiro uso)."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None or _shared_client.is_closed:
+            _shared_client = create_http_client(config)
+        return _shared_client
+
+
+def start_warm_up(http_client, base_url, api_key=None):
+    """
+    Abre a conexão (DNS, TCP e TLS) em segundo plano com uma requisição leve,
+    para que a primeira pergunta do usuário reutilize uma conexão pronta.
+    """
+    def warm_up():
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        try:
+            http_client.get(str(base_url).rstrip("/") + "/models", headers=headers)
+        except Exception as e:
+            print(f"Falha ao aquecer a conexão com a API: {e}")
+
+    thread = threading.Thread(target=warm_up, name="http-warm-up", daemon=True)
+    thread.start()
+    return thread
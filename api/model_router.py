@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Model Router
+
+Roteamento de prompts entre dois níveis de modelo: um rápido, para conversa
+curta ("olá", "obrigado", perguntas simples), e um forte, para pedidos longos
+ou complexos (código, explicações, comparações, várias perguntas). A decisão
+usa heurísticas baratas de tamanho e complexidade e também define o
+max_tokens da resposta: respostas curtas não reservam o mesmo orçamento de
+uma explicação detalhada.
+
+O roteador guarda a latência observada por nível (até o primeiro token e
+total), que alimenta o relatório de desempenho e o prazo das requisições com
+reserva (hedging): com ele ativo, uma chamada que passa do p95 do seu nível
+ganha uma segunda chamada idêntica.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import collections
+import os
+import re
+import threading
+
+from api.http_transport import percentile
+from utils.telemetry import get_telemetry
+
+FAST_MODEL = os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini")
+STRONG_MODEL = os.getenv("OPENAI_STRONG_MODEL", "gpt-4")
+
+# Palavras que indicam tarefa complexa (português e inglês)
+COMPLEX_PATTERN = re.compile(
+    r"\b(explique|explica|expli[cq]ue-me|por ?que|como funciona|compare|comparar|diferen[çc]a|analis[ae]|"
+    r"an[áa]lise|c[óo]digo|algoritmo|passo a passo|demonstre|calcule|resuma|resumo|escreva|implemente|"
+    r"otimiz[ae]|traduza|planeje|explain|why|how does|difference|analy[sz]e|code|algorithm|"
+    r"step by step|prove|calculate|summari[sz]e|write|implement|optimi[sz]e|translate)\b",
+    re.IGNORECASE
+)
+# Trechos de código ou fórmulas
+CODE_PATTERN = re.compile(
+    r"```|^\s*(def|class|import|SELECT|for|if)\b|[{};]\s*$|=>|\w+\([^)]*\)\s*[{:]|\d+\s*[-+*/^]\s*\d+",
+    re.MULTILINE
+)
+
+
+class ModelTier:
+    """Um nível de modelo e o seu orçamento de tokens (base + por palavra, até o limite)."""
+
+    def __init__(self, name, model, base_tokens, tokens_per_word, max_tokens):
+        self.name = name
+        self.model = model
+        self.base_tokens = base_tokens
+        self.tokens_per_word = tokens_per_word
+        self.max_tokens = max_tokens
+
+    def tokens_for(self, words):
+        return min(self.max_tokens, self.base_tokens + self.tokens_per_word * words)
+
+
+class RouteDecision:
+    """Resultado do roteamento de um prompt."""
+
+    def __init__(self, tier, model, max_tokens, reason):
+        self.tier = tier
+        self.model = model
+        self.max_tokens = max_tokens
+        self.reason = reason
+
+    def __repr__(self):
+        return f"RouteDecision({self.tier!r}, {self.model!r}, max_tokens={self.max_tokens}, reason={self.reason!r})"
+
+
+class ModelRouter:
+    """
+    Escolhe o nível de modelo de cada prompt e registra a latência por nível.
+
+    hedging ativa as requisições com reserva: hedge_delay(tier) retorna o prazo
+    (percentil hedge_quantile da latência até o primeiro token) depois de
+    hedge_min_samples medições, e None enquanto não há dados suficientes ou se
+    as reservas já passaram de max_hedge_ratio das requisições do nível.
+    """
+
+    def __init__(self, fast=None, strong=None, long_prompt_words=40, hedging=False, hedge_quantile=0.95,
+                 hedge_min_samples=20, max_hedge_ratio=0.1, window=500):
+        self.fast = fast or ModelTier("fast", FAST_MODEL, base_tokens=64, tokens_per_word=3, max_tokens=200)
+        self.strong = strong or ModelTier("strong", STRONG_MODEL, base_tokens=256, tokens_per_word=4,
+                                          max_tokens=800)
+        self.tiers = {self.fast.name: self.fast, self.strong.name: self.strong}
+        self.long_prompt_words = long_prompt_words
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self._lock = threading.Lock()
+        self._reasons = collections.Counter()
+        self._stats = {
+            name: {
+                "decisions": 0, "requests": 0, "errors": 0, "hedged": 0, "hedge_wins": 0,
+                "first_token": collections.deque(maxlen=window), "total": collections.deque(maxlen=window),
+            }
+            for name in self.tiers
+        }
+
+    def classify(self, prompt):
+        """Retorna (nome do nível, motivo) do prompt."""
+        words = len(prompt.split())
+        if words > self.long_prompt_words:
+            return self.strong.name, "longo"
+        if CODE_PATTERN.search(prompt):
+            return self.strong.name, "código ou cálculo"
+        if COMPLEX_PATTERN.search(prompt):
+            return self.strong.name, "complexo"
+        if prompt.count("?") > 1:
+            return self.strong.name, "várias perguntas"
+        return self.fast.name, "curto"
+
+    def route(self, prompt, max_tokens=None):
+        """Decide o modelo e o max_tokens do prompt (max_tokens explícito prevalece)."""
+        name, reason = self.classify(prompt)
+        tier = self.tiers[name]
+        with self._lock:
+            self._stats[name]["decisions"] += 1
+            self._reasons[f"{name}:{reason}"] += 1
+        get_telemetry().increment(f"router.{name}")
+        return RouteDecision(name, tier.model, max_tokens or tier.tokens_for(len(prompt.split())), reason)
+
+    def hedge_delay(self, tier):
+        """Prazo para disparar a reserva do nível, ou None se o hedging não se aplica agora."""
+        if not self.hedging:
+            return None
+        with self._lock:
+            stats = self._stats[tier]
+            samples = list(stats["first_token"])
+            over_budget = stats["hedged"] >= self.max_hedge_ratio * max(1, stats["requests"])
+        if len(samples) < self.hedge_min_samples or over_budget:
+            return None
+        return percentile(samples, self.hedge_quantile)
+
+    def record(self, tier, first_token=None, total=None, hedged=False, hedge_won=False, error=None):
+        """Registra uma chamada do nível: latências em segundos e o resultado da reserva."""
+        with self._lock:
+            stats = self._stats[tier]
+            stats["requests"] += 1
+            if error is not None:
+                stats["errors"] += 1
+            if hedged:
+                stats["hedged"] += 1
+            if hedge_won:
+                stats["hedge_wins"] += 1
+            if first_token is not None:
+                stats["first_token"].append(first_token)
+            if total is not None:
+                stats["total"].append(total)
+        telemetry = get_telemetry()
+        if first_token is not None:
+            telemetry.record(f"llm.{tier}.first_token", first_token)
+        if hedged:
+            telemetry.increment("llm.hedged")
+
+    def stats(self):
+        """Decisões de roteamento, latência (p50/p95) e reservas por nível."""
+        with self._lock:
+            tiers = {}
+            for name, stats in self._stats.items():
+                first_token, total = list(stats["first_token"]), list(stats["total"])
+                tiers[name] = {
+                    "model": self.tiers[name].model,
+                    "decisions": stats["decisions"],
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "hedged": stats["hedged"],
+                    "hedge_wins": stats["hedge_wins"],
+                    "first_token_p50": percentile(first_token, 0.50),
+                    "first_token_p95": percentile(first_token, 0.95),
+                    "total_p50": percentile(total, 0.50),
+                    "total_p95": percentile(total, 0.95),
+                }
+            return {"tiers": tiers, "reasons": dict(self._reasons)}
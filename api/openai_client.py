@@ -1,44 +1,306 @@
+import base64
 import os
+import time
 from openai import OpenAI
 from dotenv import load_dotenv
+from api.http_transport import TransportConfig, create_http_client, get_shared_http_client, start_warm_up
+from api.conversation import ConversationMemory
+from api.hedging import first_ready
+from api.model_router import RouteDecision
+from api.scheduler import BACKGROUND, INTERACTIVE, outbound_priority
+from utils.telemetry import get_telemetry
+
+
+def _has_content(chunk):
+    """Pedaço do streaming com texto da resposta."""
+    return bool(chunk.choices and chunk.choices[0].delta.content)
 
-# Carrega as variáveis de ambiente do arquivo .env
-load_dotenv()
 
 class OpenAIClient:
-    def __init__(self):
+    SYSTEM_PROMPT = "Você é uma assistente virtual chamada Gysin IA, desenvolvida para ser útil, criativa e amigável."
+    ERROR_MESSAGE = "Desculpe, ocorreu um erro ao processar sua solicitação."
+    SUMMARY_PROMPT = (
+        "Resuma a conversa abaixo entre o usuário e a Gysin IA em no máximo 120 palavras, "
+        "preservando nomes, preferências, fatos e pedidos em aberto. Responda só com o resumo."
+    )
+
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    DEFAULT_MAX_TOKENS = 150
+
+    # Timeouts por chamada (segundos): respostas curtas de chat e geração de imagens
+    RESPONSE_TIMEOUT = 30.0
+    IMAGE_TIMEOUT = 120.0
+
+    def __init__(self, api_key=None, base_url=None, model="gpt-4", transport_config=None, warm_up=False,
+                 memory=None, response_cache=None, http_client=None, router=None):
+        """
+        transport_config (TransportConfig) cria um pool de conexões exclusivo; sem ele,
+        usa o httpx.Client compartilhado pela aplicação. http_client reutiliza um pool
+        já criado com create_http_client (ex.: um por serviço, para várias sessões). Com warm_up=True, a conexão
+        com a API é aberta em segundo plano. memory (ConversationMemory) substitui a
+        memória de conversa padrão. response_cache (ResponseCache) ativa o cache de
+        respostas: perguntas repetidas são respondidas sem chamar a API. router
+        (ModelRouter) escolhe o modelo e o max_tokens de cada prompt; sem ele,
+        todas as respostas usam model e DEFAULT_MAX_TOKENS.
+        """
+        if not api_key:
+            # Carrega as variáveis de ambiente do arquivo .env
+            load_dotenv()
         # Obtém a chave da API das variáveis de ambiente
-        self.api_key = os.getenv('OPENAI_API_KEY')
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("A chave da API OpenAI não foi encontrada nas variáveis de ambiente.")
-        
-        # Inicializa o cliente OpenAI
-        self.client = OpenAI(api_key=self.api_key)
+        self.model = model  # Ou outro modelo disponível
 
-    def get_response(self, prompt, max_tokens=150):
-        try:
+        # As novas tentativas ficam a cargo do transporte (backoff com jitter), não do SDK
+        if http_client is not None:
+            transport_config = transport_config or TransportConfig()
+            self.http_client = http_client
+        elif transport_config:
+            self.http_client = create_http_client(transport_config)
+        else:
+            transport_config = TransportConfig()
+            self.http_client = get_shared_http_client(transport_config)
+
+        # Inicializa o cliente OpenAI (base_url permite apontar para um servidor compatível local)
+        self.client = OpenAI(api_key=self.api_key, base_url=base_url, http_client=self.http_client,
+                             max_retries=0, timeout=transport_config.timeout())
+        if warm_up:
+            self.warm_up_thread = start_warm_up(self.http_client, self.client.base_url, self.api_key)
+
+        # Histórico da conversa, limitado por um orçamento de tokens
+        self.memory = memory or ConversationMemory(self.SYSTEM_PROMPT, summarizer=self.summarize)
+        self.response_cache = response_cache
+        self.router = router
+
+    @property
+    def metrics(self):
+        """Métricas de latência por endpoint (LatencyMetrics) do transporte em uso."""
+        return self.http_client.metrics
+
+    def _build_messages(self, prompt):
+        return self.memory.build_messages(prompt)
+
+    def summarize(self, previous_summary, messages):
+        """Gera o resumo acumulado da conversa (usado pela ConversationMemory)."""
+        transcript = "\n".join(
+            f"{'Usuário' if m['role'] == 'user' else 'Gysin IA'}: {m['content']}" for m in messages
+        )
+        if previous_summary:
+            transcript = f"Resumo anterior: {previous_summary}\n\n{transcript}"
+        # O resumo é feito em segundo plano e cede a vez às respostas do chat
+        with outbound_priority(BACKGROUND):
             response = self.client.chat.completions.create(
-                model="gpt-4",  # Ou outro modelo disponível
+                model=self.model,
                 messages=[
-                    {"role": "system", "content": "Você é uma assistente virtual chamada Gysin IA, desenvolvida para ser útil, criativa e amigável."},
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": self.SUMMARY_PROMPT},
+                    {"role": "user", "content": transcript}
                 ],
-                max_tokens=max_tokens
+                max_tokens=200,
+                timeout=self.RESPONSE_TIMEOUT
+            )
+        return response.choices[0].message.content.strip()
+
+    def embed(self, text):
+        """Retorna o vetor de embedding do texto (usado na busca por similaridade do cache)."""
+        response = self.client.embeddings.create(model=self.EMBEDDING_MODEL, input=text,
+                                                 timeout=self.RESPONSE_TIMEOUT)
+        return response.data[0].embedding
+
+    def _use_cache(self):
+        """
+        O cache só vale para perguntas sem contexto: com histórico ou resumo, a
+        mesma pergunta ("e quanto custa?") depende da conversa.
+        """
+        return self.response_cache is not None and not self.memory.has_context()
+
+    def _cached_reply(self, prompt, model):
+        """
+        Retorna (resposta em cache ou None, embedding da pergunta). Se a busca
+        falhar (por exemplo, no embedding), a pergunta segue sem o cache.
+        """
+        try:
+            return self.response_cache.lookup(prompt, self.SYSTEM_PROMPT, model)
+        except Exception as e:
+            print(f"Erro ao consultar o cache de respostas: {e}")
+            return None, None
+
+    def _store_reply(self, prompt, model, reply, latency, vector):
+        try:
+            self.response_cache.put(prompt, self.SYSTEM_PROMPT, model, reply, latency, vector)
+        except Exception as e:
+            print(f"Erro ao gravar a resposta no cache: {e}")
+
+    def _route(self, prompt, max_tokens):
+        """Modelo e max_tokens do prompt: escolhidos pelo roteador, se houver, ou os valores fixos."""
+        if self.router is None:
+            return RouteDecision(None, self.model, max_tokens or self.DEFAULT_MAX_TOKENS, None)
+        return self.router.route(prompt, max_tokens)
+
+    def _open_stream(self, route, messages, timeout):
+        """
+        Abre o streaming da resposta. Com hedging ativo no roteador, dispara uma
+        chamada de reserva se o primeiro token passar do p95 do nível e cancela a
+        que perder. Retorna (stream, pedaços, houve reserva, a reserva venceu).
+        """
+        def open_stream():
+            # A prioridade é definida aqui porque a reserva abre o stream em outra thread
+            with outbound_priority(INTERACTIVE):
+                return self.client.chat.completions.create(
+                    model=route.model,
+                    messages=messages,
+                    max_tokens=route.max_tokens,
+                    stream=True,
+                    timeout=timeout
+                )
+
+        hedge_after = self.router.hedge_delay(route.tier) if self.router else None
+        if hedge_after is None:
+            stream = open_stream()
+            return stream, stream, False, False
+        attempt, hedged = first_ready(open_stream, hedge_after, is_ready=_has_content)
+        return attempt.stream, attempt.chunks(), hedged, attempt.index > 0
+
+    def _request_reply(self, prompt, route, timeout):
+        messages = self._build_messages(prompt)
+        start = time.perf_counter()
+        if self.router and self.router.hedging:
+            # A reserva só pode ser cancelada no meio da resposta por streaming
+            stream, chunks, hedged, hedge_won = self._open_stream(route, messages, timeout)
+            parts, first_token = [], None
+            try:
+                for chunk in chunks:
+                    if _has_content(chunk):
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
+                        parts.append(chunk.choices[0].delta.content)
+            finally:
+                stream.close()
+            self.router.record(route.tier, first_token, time.perf_counter() - start, hedged, hedge_won)
+            return "".join(parts).strip()
+        with outbound_priority(INTERACTIVE):
+            response = self.client.chat.completions.create(
+                model=route.model,
+                messages=messages,
+                max_tokens=route.max_tokens,
+                timeout=timeout
             )
-            return response.choices[0].message.content.strip()
+        if self.router:
+            self.router.record(route.tier, total=time.perf_counter() - start)
+        return response.choices[0].message.content.strip()
+
+    def get_response(self, prompt, max_tokens=None, timeout=RESPONSE_TIMEOUT):
+        """
+        Retorna a resposta completa. Sem max_tokens, o roteador (se houver) escolhe
+        o limite conforme o prompt; sem roteador, usa DEFAULT_MAX_TOKENS.
+        """
+        route = self._route(prompt, max_tokens)
+        span = get_telemetry().span("llm.response", model=route.model)
+        if route.tier:
+            span.set_attribute("tier", route.tier)
+        use_cache = self._use_cache()
+        try:
+            reply, vector = self._cached_reply(prompt, route.model) if use_cache else (None, None)
+            if reply is None:
+                start = time.perf_counter()
+                reply = self._request_reply(prompt, route, timeout)
+                if use_cache and reply:
+                    self._store_reply(prompt, route.model, reply, time.perf_counter() - start, vector)
+            self.memory.add_turn(prompt, reply)
+            return reply
         except Exception as e:
             print(f"Erro ao obter resposta da API OpenAI: {e}")
-            return "Desculpe, ocorreu um erro ao processar sua solicitação."
+            span.set_error(e)
+            if self.router:
+                self.router.record(route.tier, error=e)
+            return self.ERROR_MESSAGE
+        finally:
+            span.end()
+
+    def stream_response(self, prompt, max_tokens=None, timeout=RESPONSE_TIMEOUT):
+        """
+        Gera a resposta da IA em pedaços (deltas) à medida que chegam da API.
 
-    def generate_image(self, prompt):
+        Se a chamada falhar antes do primeiro pedaço, gera a mensagem de erro padrão;
+        se falhar no meio do streaming, encerra com o texto recebido até então.
+        Respostas presentes no cache são geradas de uma só vez. Com um roteador,
+        o modelo e o max_tokens dependem do prompt (ver api.model_router).
+
+        Registra na telemetria o tempo até o primeiro pedaço (llm.first_token) e o
+        total (llm.stream); o span não fica ativo entre os yields, já que o
+        consumidor pode fazer outras medições na mesma thread.
+        """
+        parts = []
+        stream = None
+        vector = None
+        route = self._route(prompt, max_tokens)
+        telemetry = get_telemetry()
+        span = telemetry.span("llm.stream", model=route.model)
+        if route.tier:
+            span.set_attribute("tier", route.tier)
+        use_cache = self._use_cache()
+        first_token = None
         try:
+            if use_cache:
+                cached, vector = self._cached_reply(prompt, route.model)
+                if cached is not None:
+                    span.set_attribute("cached", True)
+                    span.end()
+                    self.memory.add_turn(prompt, cached)
+                    yield cached
+                    return
+            start = time.perf_counter()
+            stream, chunks, hedged, hedge_won = self._open_stream(route, self._build_messages(prompt), timeout)
+            span.set_attribute("hedged", hedged)
+            for chunk in chunks:
+                if _has_content(chunk):
+                    delta = chunk.choices[0].delta.content
+                    if not parts:
+                        first_token = time.perf_counter() - start
+                        telemetry.record("llm.first_token", first_token, model=route.model)
+                    parts.append(delta)
+                    yield delta
+            reply = "".join(parts).strip()
+            if self.router:
+                self.router.record(route.tier, first_token, time.perf_counter() - start, hedged, hedge_won)
+            self.memory.add_turn(prompt, reply)
+            if use_cache and reply:
+                self._store_reply(prompt, route.model, reply, time.perf_counter() - start, vector)
+        except Exception as e:
+            print(f"Erro ao obter resposta da API OpenAI: {e}")
+            span.set_error(e)
+            if self.router:
+                self.router.record(route.tier, first_token, error=e)
+            if not parts:
+                yield self.ERROR_MESSAGE
+        finally:
+            # Devolve a conexão ao pool mesmo se o consumidor interromper o streaming
+            if stream is not None:
+                stream.close()
+            span.set_attribute("chunks", len(parts))
+            span.end()
+
+    def generate_images(self, prompt, n=1, size="1024x1024", response_format="url", timeout=IMAGE_TIMEOUT):
+        """
+        Gera n imagens para o prompt e retorna a lista de resultados: URLs
+        (response_format="url") ou os bytes das imagens ("b64_json"). Os erros são
+        propagados, para que o pipeline de imagens possa reportá-los.
+        """
+        with get_telemetry().span("image.generate", size=size, n=n), outbound_priority(BACKGROUND):
             response = self.client.images.generate(
                 prompt=prompt,
-                n=1,
-                size="1024x1024"
+                n=n,
+                size=size,
+                response_format=response_format,
+                timeout=timeout
             )
-            image_url = response.data[0].url
-            return image_url
+        if response_format == "b64_json":
+            return [base64.b64decode(item.b64_json) for item in response.data]
+        return [item.url for item in response.data]
+
+    def generate_image(self, prompt, size="1024x1024", timeout=IMAGE_TIMEOUT):
+        try:
+            return self.generate_images(prompt, size=size, timeout=timeout)[0]
         except Exception as e:
             print(f"Erro ao gerar imagem com a API OpenAI: {e}")
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Response Cache
+
+Cache opcional de respostas do OpenAIClient, persistido em SQLite. A busca
+exata usa o hash de (pergunta normalizada, prompt de sistema, modelo); se uma
+função de embeddings for fornecida, perguntas parecidas também são atendidas
+pela similaridade de cosseno entre os vetores armazenados, acima de um limiar
+ajustável. As entradas expiram após um TTL e, acima do limite de entradas, as
+menos usadas recentemente são removidas (LRU).
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+from utils.telemetry import get_telemetry
+
+DEFAULT_CACHE_PATH = os.getenv(
+    "RESPONSE_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".gysin_ia", "response_cache.sqlite3")
+)
+DEFAULT_TTL = 7 * 24 * 3600  # 7 dias
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    scope TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    response TEXT NOT NULL,
+    embedding BLOB,
+    latency REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_scope ON responses (scope);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+def normalize_prompt(prompt):
+    """Normaliza Unicode, maiúsculas, espaços e pontuação final da pergunta."""
+    text = unicodedata.normalize("NFC", prompt).casefold()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip(" ?!.¿¡")
+
+
+class ResponseCache:
+    """
+    Cache de respostas com busca exata e, opcionalmente, por similaridade.
+
+    embed(texto) deve retornar o vetor de embedding da pergunta (lista ou
+    array); sem ele, só a busca exata é usada. É seguro para uso a partir de
+    várias threads. stats() informa a taxa de acertos e o tempo economizado
+    (latência original das respostas servidas do cache).
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 embed=None, similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self._clock = clock
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.latency_saved = 0.0
+        self._lock = threading.Lock()
+        self._vectors = {}  # escopo -> (chaves, matriz normalizada), carregado sob demanda
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._purge_expired()
+
+    @staticmethod
+    def make_scope(system_prompt, model):
+        payload = json.dumps([system_prompt, model], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_key(prompt, system_prompt, model):
+        """Gera a chave (hash SHA-256) da busca exata."""
+        payload = json.dumps([normalize_prompt(prompt), system_prompt, model], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _embed(self, prompt):
+        try:
+            vector = np.asarray(self.embed(normalize_prompt(prompt)), dtype=np.float32)
+        except Exception as e:
+            print(f"Erro ao gerar o embedding da pergunta: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def get(self, prompt, system_prompt, model):
+        """Retorna a resposta em cache ou None, registrando acerto/falha."""
+        return self.lookup(prompt, system_prompt, model)[0]
+
+    def lookup(self, prompt, system_prompt, model):
+        """Retorna (resposta ou None, embedding calculado), para reaproveitar o vetor no put."""
+        with get_telemetry().span("cache.response_lookup") as span:
+            response, vector, result = self._lookup(prompt, system_prompt, model)
+            span.set_attribute("result", result)
+        return response, vector
+
+    def _lookup(self, prompt, system_prompt, model):
+        start = time.perf_counter()
+        key = self.make_key(prompt, system_prompt, model)
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, latency FROM responses WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl)
+            ).fetchone()
+            if row:
+                self._touch(key, now)
+                self.exact_hits += 1
+                self.latency_saved += max(0.0, row[1] - (time.perf_counter() - start))
+                return row[0], None, "exact"
+
+        vector = None
+        if self.embed is not None:
+            vector = self._embed(prompt)
+            if vector is not None:
+                with self._lock:
+                    row = self._nearest(self.make_scope(system_prompt, model), vector, now)
+                    if row:
+                        self._touch(row[0], now)
+                        self.semantic_hits += 1
+                        self.latency_saved += max(0.0, row[2] - (time.perf_counter() - start))
+                        return row[1], vector, "semantic"
+
+        with self._lock:
+            self.misses += 1
+        return None, vector, "miss"
+
+    def _nearest(self, scope, vector, now):
+        """Procura a entrada mais parecida do escopo (acima do limiar e dentro do TTL)."""
+        keys, matrix = self._load_vectors(scope)
+        if not keys or matrix.shape[1] != vector.shape[0]:
+            return None
+        scores = matrix @ vector
+        for index in np.argsort(-scores):
+            if scores[index] < self.similarity_threshold:
+                return None
+            row = self._conn.execute(
+                "SELECT key, response, latency FROM responses WHERE key = ? AND created_at > ?",
+                (keys[index], now - self.ttl)
+            ).fetchone()
+            if row:
+                return row
+        return None
+
+    def _load_vectors(self, scope):
+        if scope not in self._vectors:
+            keys, vectors = [], []
+            for key, blob in self._conn.execute(
+                "SELECT key, embedding FROM responses WHERE scope = ? AND embedding IS NOT NULL", (scope,)
+            ):
+                keys.append(key)
+                vectors.append(np.frombuffer(blob, dtype=np.float32))
+            matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+            self._vectors[scope] = (keys, matrix)
+        return self._vectors[scope]
+
+    def _touch(self, key, now):
+        self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+
+    def put(self, prompt, system_prompt, model, response, latency=0.0, vector=None):
+        """
+        Armazena a resposta; latency é o tempo (s) que a chamada à API levou e
+        vector, o embedding já calculado na busca (se houver).
+        """
+        key = self.make_key(prompt, system_prompt, model)
+        scope = self.make_scope(system_prompt, model)
+        if vector is None and self.embed is not None:
+            vector = self._embed(prompt)
+        blob = vector.tobytes() if vector is not None else None
+        now = self._clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, scope, prompt, response, embedding, latency, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, scope, prompt, response, blob, latency, now, now)
+            )
+            self._vectors.pop(scope, None)
+            self._evict()
+            self._conn.commit()
+
+    def get_or_create(self, prompt, system_prompt, model, create):
+        """Retorna a resposta em cache ou chama create() e armazena o resultado."""
+        response, vector = self.lookup(prompt, system_prompt, model)
+        if response is not None:
+            return response
+        start = time.perf_counter()
+        response = create()
+        self.put(prompt, system_prompt, model, response, time.perf_counter() - start, vector)
+        return response
+
+    def _evict(self):
+        """Remove as entradas menos usadas até respeitar o limite."""
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_used LIMIT ?)", (excess,)
+            )
+            self.evictions += excess
+            self._vectors.clear()
+
+    def _purge_expired(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE created_at <= ?", (self._clock() - self.ttl,))
+            self._conn.commit()
+            self._vectors.clear()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._vectors.clear()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self):
+        """Retorna os contadores do cache."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "latency_saved": self.latency_saved,
+                "evictions": self.evictions,
+                "entries": entries,
+            }
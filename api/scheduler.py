@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Scheduler
+
+Agendador central das chamadas externas (OpenAI, Google Cloud TTS e STT).
+Cada provedor tem limites em baldes de fichas ("token buckets"): requisições
+por minuto e tokens (ou caracteres) por minuto. Uma chamada só sai quando há
+fichas nos dois baldes; se não houver, quem chamou espera (contrapressão) em
+vez de receber um erro 429.
+
+As chamadas esperam em uma fila de prioridade por provedor: respostas do chat
+(INTERACTIVE) passam à frente da síntese de voz (NORMAL) e de trabalhos em
+segundo plano, como imagens e resumos (BACKGROUND). Dentro da mesma
+prioridade, a ordem é de chegada.
+
+Os limites se ajustam aos cabeçalhos de limite das respostas
+(x-ratelimit-limit-*, x-ratelimit-remaining-*, x-ratelimit-reset-*), e um 429
+pausa o provedor pelo tempo indicado (Retry-After). A profundidade das filas e
+o tempo de espera por prioridade ficam em stats() e na telemetria
+(scheduler.<provedor>.wait).
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+import httpx
+
+from utils.telemetry import get_telemetry
+
+# Prioridades (menor sai primeiro)
+INTERACTIVE = 0
+NORMAL = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", NORMAL: "normal", BACKGROUND: "background"}
+
+# Limites padrão por provedor: (requisições/min, tokens ou caracteres/min, hosts)
+DEFAULT_LIMITS = {
+    "openai": (int(os.getenv("OPENAI_RPM", "500")), int(os.getenv("OPENAI_TPM", "200000")), ("api.openai.com",)),
+    "google_tts": (1000, 150000, ()),
+    "google_stt": (300, None, ()),
+}
+
+_priority = contextvars.ContextVar("outbound_priority", default=NORMAL)
+
+
+class SchedulerTimeoutError(TimeoutError):
+    """Lançada por acquire() quando timeout é informado e a vez não chega a tempo."""
+
+
+@contextlib.contextmanager
+def outbound_priority(priority):
+    """Define a prioridade das chamadas externas feitas dentro do bloco (na thread atual)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+def parse_duration(value):
+    """Converte durações dos cabeçalhos de limite ("1s", "6m0s", "20ms") para segundos."""
+    if not value:
+        return None
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", value)
+    if not parts:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+
+def _parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Balde reabastecido continuamente a `per_minute` fichas por minuto. A
+    capacidade (rajada) é de burst_seconds de reabastecimento: o minuto inteiro
+    por padrão, ou menos para provedores que limitam rajadas curtas.
+    """
+
+    def __init__(self, per_minute, now, burst_seconds=60.0):
+        self.burst_seconds = burst_seconds
+        self._set_rate(per_minute)
+        self.level = self.capacity
+        self.updated = now
+
+    def _set_rate(self, per_minute):
+        self.limit = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * self.burst_seconds)
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Segundos até haver `amount` fichas (pedidos maiores que o balde esperam o balde cheio)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def sync(self, limit, remaining, now):
+        """Ajusta o balde aos valores informados pelo provedor."""
+        self._refill(now)
+        if limit and limit != self.limit:
+            self._set_rate(limit)
+        if remaining is not None:
+            # Só reduz: chamadas já liberadas aqui podem não ter chegado ao provedor
+            self.level = min(self.level, float(remaining))
+
+
+class _Provider:
+    def __init__(self, name, requests, tokens, hosts, burst_seconds):
+        self.name = name
+        self.burst_seconds = burst_seconds
+        self.requests = requests
+        self.tokens = tokens
+        self.hosts = set(hosts)
+        self.paused_until = 0.0
+        self.queue = []  # heap de [prioridade, ordem de chegada]
+        self.max_queue_depth = 0
+        self.granted = 0
+        self.throttled = 0
+        self.waits = {priority: deque(maxlen=1000) for priority in PRIORITY_NAMES}
+
+    def wait_time(self, tokens, now):
+        wait = max(0.0, self.paused_until - now)
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def take(self, tokens, now):
+        if self.requests:
+            self.requests.take(1, now)
+        if self.tokens and tokens:
+            self.tokens.take(tokens, now)
+
+
+class OutboundScheduler:
+    """
+    Agendador de chamadas externas com limites por provedor e fila de prioridade.
+
+    Uso direto:
+
+        scheduler.acquire("google_tts", tokens=len(text), priority=NORMAL)
+        ...chamada...
+
+    Chamadas HTTP passam pelo ScheduledTransport, que faz o acquire e lê os
+    cabeçalhos de limite de cada resposta. Provedores não configurados não são
+    limitados.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._providers = {}
+        self._hosts = {}
+        self._order = itertools.count()
+
+    def configure(self, provider, requests_per_minute=None, tokens_per_minute=None, hosts=(), burst_seconds=60.0):
+        """
+        Define (ou redefine) os limites de um provedor e os hosts HTTP que o
+        identificam. burst_seconds é a rajada permitida, em segundos de cota.
+        """
+        now = self._clock()
+        with self._cond:
+            self._providers[provider] = _Provider(
+                provider,
+                TokenBucket(requests_per_minute, now, burst_seconds) if requests_per_minute else None,
+                TokenBucket(tokens_per_minute, now, burst_seconds) if tokens_per_minute else None,
+                hosts,
+                burst_seconds,
+            )
+            for host in hosts:
+                self._hosts[host] = provider
+            self._cond.notify_all()
+
+    def provider_for(self, host):
+        return self._hosts.get(host)
+
+    def acquire(self, provider, tokens=0, priority=None, timeout=None):
+        """
+        Espera a vez da chamada (prioridade e limites do provedor) e consome as
+        fichas. Retorna o tempo de espera em segundos. Sem timeout, espera o
+        quanto for preciso; com timeout, lança SchedulerTimeoutError.
+        """
+        priority = current_priority() if priority is None else priority
+        with self._cond:
+            state = self._providers.get(provider)
+            if state is None:
+                return 0.0
+            entry = [priority, next(self._order)]
+            heapq.heappush(state.queue, entry)
+            state.max_queue_depth = max(state.max_queue_depth, len(state.queue))
+            start = self._clock()
+            deadline = start + timeout if timeout is not None else None
+            while True:
+                now = self._clock()
+                wait = None
+                if state.queue[0] is entry:
+                    wait = state.wait_time(tokens, now)
+                    if wait <= 0:
+                        state.take(tokens, now)
+                        heapq.heappop(state.queue)
+                        state.granted += 1
+                        waited = now - start
+                        state.waits[priority].append(waited)
+                        # O próximo da fila passa a ser a cabeça
+                        self._cond.notify_all()
+                        break
+                if deadline is not None:
+                    if now >= deadline:
+                        state.queue.remove(entry)
+                        heapq.heapify(state.queue)
+                        self._cond.notify_all()
+                        raise SchedulerTimeoutError(f"limite de {provider} não liberou a chamada a tempo")
+                    wait = deadline - now if wait is None else min(wait, deadline - now)
+                self._cond.wait(wait)
+        telemetry = get_telemetry()
+        telemetry.record(f"scheduler.{provider}.wait", waited, priority=PRIORITY_NAMES.get(priority, priority))
+        return waited
+
+    def update_from_headers(self, provider, headers, status=None):
+        """Ajusta os limites pelos cabeçalhos da resposta; um 429 pausa o provedor."""
+        now = self._clock()
+        with self._cond:
+            state = self._providers.get(provider)
+            if state is None:
+                return
+            resets = []
+            for kind in ("requests", "tokens"):
+                limit = _parse_int(headers.get(f"x-ratelimit-limit-{kind}"))
+                remaining = _parse_int(headers.get(f"x-ratelimit-remaining-{kind}"))
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                bucket = getattr(state, kind)
+                if bucket is None and limit:
+                    bucket = TokenBucket(limit, now, state.burst_seconds)
+                    setattr(state, kind, bucket)
+                if bucket is not None:
+                    bucket.sync(limit, remaining, now)
+                if remaining == 0 and reset:
+                    resets.append(reset)
+            if status == 429:
+                retry_after = parse_duration(headers.get("retry-after"))
+                self._pause(state, retry_after or max(resets, default=1.0), now)
+            self._cond.notify_all()
+
+    def report_throttled(self, provider, retry_after=None):
+        """Registra um 429 (ou cota esgotada) fora do HTTP, por exemplo nas bibliotecas do Google."""
+        now = self._clock()
+        with self._cond:
+            state = self._providers.get(provider)
+            if state is not None:
+                self._pause(state, retry_after or 1.0, now)
+                self._cond.notify_all()
+
+    def _pause(self, state, seconds, now):
+        state.throttled += 1
+        state.paused_until = max(state.paused_until, now + seconds)
+        get_telemetry().increment(f"scheduler.{state.name}.throttled")
+
+    def stats(self):
+        """Profundidade das filas, chamadas liberadas, 429s e espera (p50/p95) por prioridade."""
+        from api.http_transport import percentile
+
+        now = self._clock()
+        with self._cond:
+            result = {}
+            for name, state in self._providers.items():
+                result[name] = {
+                    "queue_depth": len(state.queue),
+                    "max_queue_depth": state.max_queue_depth,
+                    "granted": state.granted,
+                    "throttled": state.throttled,
+                    "paused_for": max(0.0, state.paused_until - now),
+                    "wait": {
+                        PRIORITY_NAMES[priority]: {
+                            "count": len(waits),
+                            "p50": percentile(list(waits), 0.50),
+                            "p95": percentile(list(waits), 0.95),
+                            "max": max(waits, default=None),
+                        }
+                        for priority, waits in state.waits.items() if waits
+                    },
+                }
+            return result
+
+
+def is_throttling_error(error):
+    """Erros de cota esgotada das bibliotecas dos provedores (ex.: ResourceExhausted do Google)."""
+    return int(getattr(error, "code", 0) or 0) == 429 or type(error).__name__ in ("ResourceExhausted",
+                                                                                  "TooManyRequests")
+
+
+@contextlib.contextmanager
+def scheduled_call(provider, tokens=0, priority=None, scheduler=None):
+    """
+    Para chamadas fora do HTTP da aplicação (SDKs do Google): espera a vez da
+    chamada e, se ela falhar por cota esgotada, pausa o provedor.
+    """
+    scheduler = scheduler or get_default_scheduler()
+    scheduler.acquire(provider, tokens, priority)
+    try:
+        yield
+    except Exception as e:
+        if is_throttling_error(e):
+            scheduler.report_throttled(provider)
+        raise
+
+
+def estimate_tokens(request):
+    """
+    Estimativa conservadora dos tokens de uma chamada à OpenAI: o corpo inteiro
+    (cerca de 4 caracteres por token) mais o max_tokens pedido.
+    """
+    try:
+        content = request.content
+    except httpx.RequestNotRead:
+        return 0
+    if not content:
+        return 0
+    try:
+        body = json.loads(content)
+    except ValueError:
+        return len(content) // 4
+    max_tokens = body.get("max_tokens") if isinstance(body, dict) else None
+    return len(content) // 4 + (max_tokens or 0)
+
+
+class ScheduledTransport(httpx.BaseTransport):
+    """
+    Transporte httpx que passa cada requisição para um provedor conhecido (pelo
+    host) pelo agendador e lê os cabeçalhos de limite da resposta. Fica abaixo
+    do RetryTransport: cada nova tentativa também espera a sua vez.
+    """
+
+    def __init__(self, transport, scheduler):
+        self._transport = transport
+        self.scheduler = scheduler
+
+    def handle_request(self, request):
+        provider = self.scheduler.provider_for(request.url.host)
+        if provider is None:
+            return self._transport.handle_request(request)
+        self.scheduler.acquire(provider, estimate_tokens(request))
+        response = self._transport.handle_request(request)
+        self.scheduler.update_from_headers(provider, response.headers, response.status_code)
+        return response
+
+    def close(self):
+        self._transport.close()
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler():
+    """Retorna o agendador compartilhado pela aplicação, com os limites de DEFAULT_LIMITS."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = OutboundScheduler()
+            for provider, (requests_per_minute, tokens_per_minute, hosts) in DEFAULT_LIMITS.items():
+                _default_scheduler.configure(provider, requests_per_minute, tokens_per_minute, hosts)
+        return _default_scheduler
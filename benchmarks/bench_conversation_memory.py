@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: tamanho do prompt ao longo de uma sessão longa
+
+Simula N turnos de conversa e compara os tokens enviados por requisição com
+histórico completo (cresce sem limite) e com a ConversationMemory (orçamento
+de tokens e resumo acumulado). O resumo usa um resumidor local simulado, sem
+acesso à rede.
+
+Uso:
+    python -m benchmarks.bench_conversation_memory --turns 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.conversation import ConversationMemory, MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+from api.openai_client import OpenAIClient
+
+WORDS = ("a assistente responde sobre clima viagens receitas música programação história "
+         "ciência saúde esportes livros filmes trabalho estudo família planos ideias").split()
+
+
+def random_text(rng, min_words, max_words):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))) + "."
+
+
+def fake_summarizer(previous_summary, messages):
+    """Resumidor simulado: mantém um resumo de tamanho limitado (~120 palavras)."""
+    words = (previous_summary + " " + " ".join(m["content"] for m in messages)).split()
+    return " ".join(words[-120:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--budget", type=int, default=2000)
+    parser.add_argument("--threshold", type=int, default=1200)
+    parser.add_argument("--report-every", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    memory = ConversationMemory(OpenAIClient.SYSTEM_PROMPT, token_budget=args.budget,
+                                summary_threshold=args.threshold, summarizer=fake_summarizer,
+                                background=False)
+    full_history_tokens = estimate_tokens(OpenAIClient.SYSTEM_PROMPT) + MESSAGE_OVERHEAD_TOKENS
+    bounded, build_times = [], []
+
+    print(f"{'turno':>6} {'histórico completo':>20} {'memória limitada':>18} {'resumos':>8}")
+    for turn in range(1, args.turns + 1):
+        prompt = random_text(rng, 5, 30)
+        reply = random_text(rng, 20, 80)
+
+        start = time.perf_counter()
+        messages = memory.build_messages(prompt)
+        build_times.append(time.perf_counter() - start)
+        request_tokens = memory.estimate_request_tokens(messages)
+        bounded.append(request_tokens)
+
+        prompt_tokens = estimate_tokens(prompt) + MESSAGE_OVERHEAD_TOKENS
+        full_request_tokens = full_history_tokens + prompt_tokens
+        full_history_tokens += prompt_tokens + estimate_tokens(reply) + MESSAGE_OVERHEAD_TOKENS
+
+        memory.add_turn(prompt, reply)
+        if turn == 1 or turn % args.report_every == 0:
+            print(f"{turn:>6} {full_request_tokens:>20} {request_tokens:>18} {memory.summaries_made:>8}")
+
+    tail = bounded[len(bounded) // 2:]
+    print(f"\nMemória limitada: máximo {max(bounded)} tokens, média na 2ª metade {sum(tail) / len(tail):.0f}")
+    print(f"Montagem da requisição: média {sum(build_times) / len(build_times) * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: histórico de conversas em SQLite (gravação em lote e busca FTS5)
+
+Grava N mensagens pelo ConversationStore (lotes em uma thread dedicada) e
+compara com um INSERT + commit por mensagem; depois mede a latência da busca
+de texto completo e da carga de uma página de sessão antiga.
+
+Uso:
+    python -m benchmarks.bench_conversation_store --messages 100000
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.http_transport import percentile
+from utils.conversation_store import ConversationStore
+
+SYLLABLES = ("ba be bi bo bu ca ce ci co cu da de di do du fa fe fi fo fu la le li lo lu "
+             "ma me mi mo mu na ne ni no nu pa pe pi po pu ra re ri ro ru sa se si so su "
+             "ta te ti to tu va ve vi vo vu ção são ões").split()
+
+
+def make_vocabulary(rng, size=20000):
+    """Vocabulário sintético; as palavras são sorteadas com frequência de Zipf, como em texto real."""
+    words = {"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))) for _ in range(size)}
+    words = sorted(words)
+    rng.shuffle(words)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    return words, cum_weights
+
+
+def random_text(rng, vocabulary):
+    words, cum_weights = vocabulary
+    return " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(5, 40)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--per-session", type=int, default=200)
+    parser.add_argument("--unbatched", type=int, default=2000, help="mensagens no teste com commit individual")
+    parser.add_argument("--searches", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    vocabulary = make_vocabulary(rng)
+    with tempfile.TemporaryDirectory() as directory:
+        texts = [random_text(rng, vocabulary) for _ in range(args.messages)]
+        store = ConversationStore(os.path.join(directory, "batched.sqlite3"))
+        start = time.perf_counter()
+        enqueue_time = 0.0
+        sessions = []
+        for i in range(args.messages):
+            if i % args.per_session == 0:
+                sessions.append(store.new_session())
+            t = time.perf_counter()
+            store.add_message(sessions[-1], "Você" if i % 2 == 0 else "Gysin IA", texts[i], "pt")
+            enqueue_time += time.perf_counter() - t
+        store.flush()
+        elapsed = time.perf_counter() - start
+        print(f"Gravação em lote: {args.messages / elapsed:,.0f} mensagens/s "
+              f"({store.batches_written} transações; {enqueue_time / args.messages * 1e6:.1f} µs por "
+              "add_message na thread da interface)")
+
+        conn = sqlite3.connect(os.path.join(directory, "unbatched.sqlite3"))
+        conn.execute("CREATE TABLE messages (id INTEGER PRIMARY KEY, session_id, sender, text, language, created_at)")
+        start = time.perf_counter()
+        for i in range(args.unbatched):
+            conn.execute("INSERT INTO messages (session_id, sender, text, language, created_at) VALUES (?, ?, ?, ?, ?)",
+                         (1, "Você", texts[i % len(texts)], "pt", time.time()))
+            conn.commit()
+        elapsed = time.perf_counter() - start
+        print(f"Commit por mensagem (sem WAL, sem FTS): {args.unbatched / elapsed:,.0f} mensagens/s")
+        conn.close()
+
+        latencies = []
+        for _ in range(args.searches):
+            query = random_text(rng, vocabulary).split()[:rng.randint(1, 3)]
+            query = " ".join(word[:max(3, len(word) - 1)] for word in query)
+            start = time.perf_counter()
+            store.search(query)
+            latencies.append(time.perf_counter() - start)
+        print(f"Busca FTS5 em {args.messages:,} mensagens: p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:.2f} ms")
+
+        latencies = []
+        for _ in range(args.searches):
+            session = rng.choice(sessions)
+            start = time.perf_counter()
+            page = store.load_messages(session, limit=50)
+            store.load_messages(session, before_id=page[0]["id"], limit=50)
+            latencies.append(time.perf_counter() - start)
+        print(f"Duas páginas de uma sessão antiga: p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:.2f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: pipeline de geração de imagens
+
+Compara a geração bloqueante (generate_image seguido do download, um pedido
+por vez, como antes) com o ImagePipeline (pool de threads, agrupamento de
+prompts iguais em andamento e cache em disco). Os pedidos repetem parte dos
+prompts, como vários usuários pedindo a mesma ilustração. A API é o
+FakeOpenAIServer, com latência de geração configurável.
+
+Uso:
+    python -m benchmarks.bench_image_pipeline --requests 12 --unique 4 --latency-ms 500
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.http_transport import percentile
+from api.openai_client import OpenAIClient
+from tests.fake_openai_server import FakeOpenAIServer
+from utils.image_cache import ImageCache
+from utils.image_pipeline import ImagePipeline, download_image
+
+
+def run_blocking(client, prompts, size):
+    """Retorna o tempo até cada imagem estar disponível, um pedido por vez."""
+    start = time.perf_counter()
+    latencies = []
+    for prompt in prompts:
+        download_image(client.generate_image(prompt, size=size))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_pipeline(client, prompts, size, workers):
+    """Retorna o tempo até a miniatura e até a imagem completa de cada pedido."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        pipeline = ImagePipeline(lambda prompt, size: client.generate_images(prompt, size=size)[0],
+                                 cache=ImageCache(cache_dir), max_workers=workers)
+        start = time.perf_counter()
+        thumbnails, images = [], []
+        jobs = [pipeline.submit(prompt, size,
+                                on_thumbnail=lambda _: thumbnails.append(time.perf_counter() - start),
+                                on_image=lambda _: images.append(time.perf_counter() - start))
+                for prompt in prompts]
+        for job in jobs:
+            job.result()
+        stats = pipeline.stats()
+        pipeline.close()
+    return thumbnails, images, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=12)
+    parser.add_argument("--unique", type=int, default=4, help="prompts diferentes entre os pedidos")
+    parser.add_argument("--latency-ms", type=float, default=500, help="latência da geração")
+    parser.add_argument("--size", default="1024x1024")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    prompts = [f"Ilustração {i % args.unique}" for i in range(args.requests)]
+    with FakeOpenAIServer(image_delay=args.latency_ms / 1000) as fake:
+        client = OpenAIClient(api_key="test", base_url=fake.base_url)
+        blocking = run_blocking(client, prompts, args.size)
+        calls_before = len(fake.requests)
+        thumbnails, images, stats = run_pipeline(client, prompts, args.size, args.workers)
+        pipeline_calls = sum(1 for request in fake.requests[calls_before:]
+                             if request["path"].endswith("/images/generations"))
+
+    print(f"{'':>22} {'p50 (ms)':>10} {'p95 (ms)':>10} {'total (s)':>10} {'gerações':>9}")
+    print(f"{'bloqueante':>22} {percentile(blocking, 0.5) * 1000:>10.0f} {percentile(blocking, 0.95) * 1000:>10.0f} "
+          f"{blocking[-1]:>10.2f} {len(prompts):>9}")
+    print(f"{'pipeline (miniatura)':>22} {percentile(thumbnails, 0.5) * 1000:>10.0f} "
+          f"{percentile(thumbnails, 0.95) * 1000:>10.0f} {max(thumbnails):>10.2f} {pipeline_calls:>9}")
+    print(f"{'pipeline (completa)':>22} {percentile(images, 0.5) * 1000:>10.0f} "
+          f"{percentile(images, 0.95) * 1000:>10.0f} {max(images):>10.2f} {pipeline_calls:>9}")
+    print(f"pedidos agrupados: {stats['deduplicated']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: detecção de idioma (n-gramas x langdetect)
+
+Mede a primeira chamada (inclui o carregamento dos perfis), o tempo médio por
+texto, a detecção em lote e o memo LRU, e a precisão de cada abordagem nas
+frases rotuladas de tests/test_language_detection.py.
+
+Uso:
+    python -m benchmarks.bench_language_detection --repeat 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="passadas sobre as frases rotuladas")
+    args = parser.parse_args()
+
+    # A importação do módulo já carrega a tabela de n-gramas
+    _, import_time = timed(__import__, "gui.language_utils")
+    from gui import language_utils
+    from tests.test_language_detection import SAMPLES
+
+    texts = [text for text, _ in SAMPLES]
+    detector = language_utils._detector
+
+    _, langdetect_first = timed(language_utils.detect_language_langdetect, texts[0])
+    _, ngram_first = timed(detector.detect, texts[0])
+    print(f"Importação do módulo (carrega a tabela): {import_time * 1000:.1f} ms")
+    print(f"Primeira chamada: langdetect {langdetect_first * 1000:.1f} ms | n-gramas {ngram_first * 1000:.2f} ms\n")
+
+    calls = len(texts) * args.repeat
+    rows = [
+        ("langdetect", lambda: [language_utils.detect_language_langdetect(t) for t in texts]),
+        ("n-gramas", lambda: [detector.detect(t) for t in texts]),
+        ("n-gramas (lote)", lambda: detector.detect_many(texts)),
+        ("n-gramas (memo LRU)", lambda: [language_utils.detect_language(t) for t in texts]),
+    ]
+    for name, run in rows:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            run()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<22} {elapsed / calls * 1e6:9.1f} µs por texto")
+
+    print()
+    for name, detect in (("langdetect", language_utils.detect_language_langdetect),
+                         ("n-gramas", detector.detect)):
+        correct = sum(detect(text) == expected for text, expected in SAMPLES)
+        print(f"Precisão {name:<12} {correct}/{len(SAMPLES)} ({correct / len(SAMPLES):.0%})")
+
+
+if __name__ == "__main__":
+    main()
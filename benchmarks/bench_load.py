@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: teste de carga do pipeline de voz e chat, sem interface gráfica
+
+Simula N sessões simultâneas, cada uma com T turnos de conversa falada:
+microfone -> reconhecimento de fala (STT) -> detecção de idioma ->
+OpenAIClient.stream_response -> SpeechPipeline (TTS) -> AudioPlayback.
+Os módulos são os reais; só os backends externos são falsos e locais
+(FakeOpenAIServer, FakeSpeechRecognizer, FakeTTS e NullSink), com latência e
+falhas sorteadas de distribuições configuráveis, então roda sem rede.
+
+Relata vazão (turnos/s), erros, percentis de latência por turno (primeiro
+token, primeiro áudio desde o fim da fala e turno completo), o resumo da
+telemetria por etapa e o pico de memória (RSS). Com --max-p95-ms, termina com
+código 1 se o p95 do primeiro áudio passar do limite (para uso antes de
+publicar uma versão).
+
+Uso:
+    python -m benchmarks.bench_load --sessions 8 --turns 5
+    python -m benchmarks.bench_load --llm-latency lognormal:0.4:0.5 --tts-failure-rate 0.05 --json
+    python -m benchmarks.bench_load --time-scale 0 --max-p95-ms 1500
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import utils.telemetry as telemetry_module
+from api.http_transport import TransportConfig, percentile
+from api.openai_client import OpenAIClient
+from tests.fake_backends import Distribution, FakeSpeechRecognizer, FakeTTS, NullSink, fake_microphone
+from tests.fake_openai_server import FakeOpenAIServer
+from utils.languages import language_code_for
+from utils.playback import AudioPlayback
+from utils.telemetry import Telemetry
+from utils.tts_pipeline import SpeechPipeline
+
+TRANSCRIPTS = [
+    "Qual é a previsão do tempo para amanhã em São Paulo?",
+    "Você pode me recomendar um livro de ficção científica?",
+    "What is the weather forecast for tomorrow?",
+    "Kannst du mir ein gutes Buch empfehlen?",
+    "¿Cuál es el pronóstico del tiempo para mañana?",
+]
+
+REPLY = (
+    "Claro! Amanhã o dia deve começar nublado, com sol à tarde. "
+    "A temperatura máxima fica perto de vinte e seis graus. "
+    "Quer que eu avise se a previsão mudar?"
+)
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo em MB (None se não disponível)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS, em bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def latency_summary(values):
+    return {
+        "count": len(values),
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "max": max(values) if values else None,
+    }
+
+
+class Session:
+    """Uma sessão simulada: cliente, reconhecedor, TTS e reprodução próprios."""
+
+    def __init__(self, index, server, options, results):
+        seed = None if options["seed"] is None else options["seed"] * 1000 + index
+        rng = random.Random(seed)
+        self.index = index
+        self.options = options
+        self.results = results
+        self.recognizer = FakeSpeechRecognizer(TRANSCRIPTS, options["stt_latency"], options["stt_failure_rate"],
+                                               rng=rng)
+        self.tts = FakeTTS(options["tts_latency"], options["tts_failure_rate"], rng=rng)
+        self.client = OpenAIClient(
+            api_key="test", base_url=server.base_url,
+            transport_config=TransportConfig(max_connections=2, max_retries=options["retries"], backoff_base=0.05)
+        )
+        self._first_audio_at = None
+        self.sink = NullSink(options["time_scale"], on_start=self._on_audio_start)
+        self.playback = AudioPlayback(self.sink)
+
+    def _on_audio_start(self, clip):
+        if self._first_audio_at is None:
+            self._first_audio_at = time.perf_counter()
+
+    def _microphone(self, marks):
+        for chunk in fake_microphone(self.options["speech_seconds"], time_scale=self.options["time_scale"]):
+            yield chunk
+        marks["speech_end"] = time.perf_counter()
+
+    def run(self, barrier):
+        barrier.wait()
+        try:
+            for _ in range(self.options["turns"]):
+                self.run_turn()
+        finally:
+            self.playback.close()
+            self.client.http_client.close()
+
+    def run_turn(self):
+        telemetry = telemetry_module.get_telemetry()
+        telemetry.new_trace()
+        marks = {}
+        self._first_audio_at = None
+        errors = []
+
+        try:
+            with telemetry.span("recording"):
+                transcript = self.recognizer.recognize(self._microphone(marks), 16000)
+            telemetry.record("transcription.final", time.perf_counter() - marks["speech_end"])
+        except Exception as e:
+            self.results.add(errors=["stt"])
+            print(f"Sessão {self.index}: erro no reconhecimento de fala: {e}")
+            return
+
+        pipeline = SpeechPipeline(self.tts.synthesize, playback=self.playback,
+                                  language_code=language_code_for(transcript),
+                                  on_error=lambda message: errors.append("tts"))
+        first_token = None
+        reply = []
+        for delta in self.client.stream_response(transcript):
+            if first_token is None:
+                first_token = time.perf_counter() - marks["speech_end"]
+            reply.append(delta)
+            pipeline.feed(delta)
+        pipeline.finish()
+        pipeline.wait()
+        if "".join(reply) == OpenAIClient.ERROR_MESSAGE:
+            errors.append("llm")
+
+        end = time.perf_counter()
+        first_audio = self._first_audio_at - marks["speech_end"] if self._first_audio_at else None
+        self.results.add(first_token=first_token, first_audio=first_audio, turn=end - marks["speech_end"],
+                         errors=sorted(set(errors)))
+
+
+class LoadResults:
+    """Medições dos turnos, agregadas a partir das threads das sessões."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.errors = {"stt": 0, "llm": 0, "tts": 0}
+        self.first_token = []
+        self.first_audio = []
+        self.turn = []
+
+    def add(self, first_token=None, first_audio=None, turn=None, errors=()):
+        with self._lock:
+            for kind in errors:
+                self.errors[kind] += 1
+            if turn is None:
+                return
+            self.completed += 1
+            self.turn.append(turn)
+            if first_token is not None:
+                self.first_token.append(first_token)
+            if first_audio is not None:
+                self.first_audio.append(first_audio)
+
+
+def run_load_test(sessions=4, turns=3, time_scale=1.0, speech_seconds=1.5,
+                  llm_latency="0.05", llm_first_chunk="lognormal:0.3:0.4", llm_chunk="0.01", llm_failure_rate=0.0,
+                  stt_latency="lognormal:0.2:0.3", stt_failure_rate=0.0,
+                  tts_latency="lognormal:0.15:0.3", tts_failure_rate=0.0, retries=3, seed=None):
+    """
+    Executa o teste de carga e retorna o relatório (dicionário). As latências
+    são descrições de Distribution (em segundos); time_scale acelera a fala
+    simulada e a reprodução (0 elimina a espera de tempo real).
+    """
+    options = {
+        "turns": turns, "time_scale": time_scale, "speech_seconds": speech_seconds, "retries": retries,
+        "stt_latency": stt_latency, "stt_failure_rate": stt_failure_rate,
+        "tts_latency": tts_latency, "tts_failure_rate": tts_failure_rate, "seed": seed,
+    }
+    server_rng = random.Random(seed)
+    results = LoadResults()
+    previous_telemetry = telemetry_module._default_telemetry
+    telemetry = telemetry_module._default_telemetry = Telemetry()
+    server = FakeOpenAIServer(
+        reply=REPLY,
+        latency=Distribution(llm_latency, server_rng),
+        first_chunk_delay=Distribution(llm_first_chunk, server_rng),
+        chunk_delay=Distribution(llm_chunk, server_rng),
+        failure_rate=llm_failure_rate, seed=seed,
+    )
+    try:
+        with server:
+            workers = [Session(i, server, options, results) for i in range(sessions)]
+            barrier = threading.Barrier(sessions + 1)
+            threads = [threading.Thread(target=worker.run, args=(barrier,), name=f"session-{i}")
+                       for i, worker in enumerate(workers)]
+            for thread in threads:
+                thread.start()
+            barrier.wait()
+            start = time.perf_counter()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        return {
+            "sessions": sessions,
+            "turns": sessions * turns,
+            "completed": results.completed,
+            "errors": dict(results.errors),
+            "llm_requests": len(server.requests),
+            "elapsed": elapsed,
+            "throughput": results.completed / elapsed if elapsed else None,
+            "latency": {
+                "first_token": latency_summary(results.first_token),
+                "first_audio": latency_summary(results.first_audio),
+                "turn": latency_summary(results.turn),
+            },
+            "stages": telemetry.summary(),
+            "counters": telemetry.counters(),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+    finally:
+        telemetry_module._default_telemetry = previous_telemetry
+
+
+def format_ms(seconds):
+    return "       -" if seconds is None else f"{seconds * 1000:8.1f}"
+
+
+def print_report(report):
+    print(f"Sessões: {report['sessions']} | turnos: {report['completed']}/{report['turns']} concluídos "
+          f"em {report['elapsed']:.2f} s | vazão: {report['throughput']:.2f} turnos/s")
+    errors = report["errors"]
+    print(f"Erros: STT {errors['stt']} | LLM {errors['llm']} | TTS {errors['tts']} "
+          f"({report['llm_requests']} requisições ao LLM, com novas tentativas)")
+    if report["peak_rss_mb"] is not None:
+        print(f"Pico de memória (RSS): {report['peak_rss_mb']:.1f} MB")
+    print()
+    print(f"{'Turno (desde o fim da fala)':<32} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8}")
+    for name, label in (("first_token", "primeiro token"), ("first_audio", "primeiro áudio"),
+                        ("turn", "turno completo")):
+        stats = report["latency"][name]
+        print(f"{label:<32} {format_ms(stats['p50'])} {format_ms(stats['p95'])} {format_ms(stats['max'])}")
+    print()
+    print(f"{'Etapa':<32} {'medições':>8} {'erros':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, stage in report["stages"].items():
+        print(f"{name:<32} {stage['count']:>8} {stage['errors']:>8} {format_ms(stage['p50'])} "
+              f"{format_ms(stage['p95'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=4, help="sessões simultâneas")
+    parser.add_argument("--turns", type=int, default=3, help="turnos por sessão")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="fator de tempo da fala e da reprodução simuladas (0 = sem espera)")
+    parser.add_argument("--speech-seconds", type=float, default=1.5, help="duração de cada fala do usuário (s)")
+    parser.add_argument("--llm-latency", default="0.05", help="atraso até o servidor do LLM responder")
+    parser.add_argument("--llm-first-chunk", default="lognormal:0.3:0.4", help="atraso até o primeiro token")
+    parser.add_argument("--llm-chunk", default="0.01", help="atraso entre tokens")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="fração de requisições com erro 503")
+    parser.add_argument("--stt-latency", default="lognormal:0.2:0.3", help="finalização do reconhecimento")
+    parser.add_argument("--stt-failure-rate", type=float, default=0.0)
+    parser.add_argument("--tts-latency", default="lognormal:0.15:0.3", help="latência de cada síntese")
+    parser.add_argument("--tts-failure-rate", type=float, default=0.0)
+    parser.add_argument("--retries", type=int, default=3, help="novas tentativas do transporte HTTP")
+    parser.add_argument("--seed", type=int, default=None, help="semente para sorteios reproduzíveis")
+    parser.add_argument("--json", action="store_true", help="imprime o relatório em JSON")
+    parser.add_argument("--max-p95-ms", type=float, default=None,
+                        help="falha (código 1) se o p95 do primeiro áudio passar deste valor")
+    args = parser.parse_args()
+
+    report = run_load_test(
+        sessions=args.sessions, turns=args.turns, time_scale=args.time_scale, speech_seconds=args.speech_seconds,
+        llm_latency=args.llm_latency, llm_first_chunk=args.llm_first_chunk, llm_chunk=args.llm_chunk,
+        llm_failure_rate=args.llm_failure_rate, stt_latency=args.stt_latency,
+        stt_failure_rate=args.stt_failure_rate, tts_latency=args.tts_latency,
+        tts_failure_rate=args.tts_failure_rate, retries=args.retries, seed=args.seed,
+    )
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+    if args.max_p95_ms is not None:
+        p95 = report["latency"]["first_audio"]["p95"]
+        if p95 is None or p95 * 1000 > args.max_p95_ms:
+            print(f"Regressão: p95 do primeiro áudio = {format_ms(p95).strip()} ms "
+                  f"(limite {args.max_p95_ms:.0f} ms)", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
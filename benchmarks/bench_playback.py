@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: intervalo entre áudios consecutivos
+
+Compara a reprodução antiga (um vlc.MediaPlayer novo por áudio, consultando o
+estado a cada 50 ms) com o AudioPlayback, que reutiliza o mesmo player e
+prepara o próximo áudio enquanto o atual toca. A saída é simulada com atrasos
+configuráveis (criação do player, abertura da mídia e duração de cada áudio),
+sem dispositivo de som; o resultado é o silêncio entre o fim de um áudio e o
+início do seguinte.
+
+Uso:
+    python -m benchmarks.bench_playback --clips 20 --clip-ms 300 --setup-ms 40 --prepare-ms 25
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.playback import AudioPlayback
+
+
+class SimulatedSink:
+    """Saída simulada: prepare custa prepare_ms e cada áudio toca por clip_ms."""
+
+    def __init__(self, args):
+        self.args = args
+        self.starts = []
+        self.ends = []
+
+    def prepare(self, data):
+        time.sleep(self.args.prepare_ms / 1000)
+        return data
+
+    def play(self, data, should_stop):
+        self.starts.append(time.perf_counter())
+        time.sleep(self.args.clip_ms / 1000)
+        self.ends.append(time.perf_counter())
+
+    def discard(self, data):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+    def close(self):
+        pass
+
+
+def per_clip_player(args):
+    """Fluxo antigo: cria o player, abre a mídia e consulta o estado até o fim."""
+    sink = SimulatedSink(args)
+    poll = args.poll_ms / 1000
+    for _ in range(args.clips):
+        time.sleep(args.setup_ms / 1000)  # vlc.MediaPlayer(arquivo)
+        sink.prepare(b"")
+        start = time.perf_counter()
+        sink.starts.append(start)
+        end = start + args.clip_ms / 1000
+        while time.perf_counter() < end:  # while player.get_state() not in (...): sleep(0.05)
+            time.sleep(poll)
+        sink.ends.append(end)
+    return gaps(sink)
+
+
+def shared_playback(args):
+    """Fluxo novo: um AudioPlayback com o próximo áudio preparado durante o atual."""
+    time.sleep(args.setup_ms / 1000)  # Player criado uma única vez
+    sink = SimulatedSink(args)
+    playback = AudioPlayback(sink)
+    items = [playback.enqueue(b"audio") for _ in range(args.clips)]
+    items[-1].wait()
+    playback.close()
+    return gaps(sink)
+
+
+def gaps(sink):
+    return [(start - end) * 1000 for end, start in zip(sink.ends, sink.starts[1:])]
+
+
+def report(name, values):
+    print(f"{name:<22} média {statistics.mean(values):7.1f} ms   "
+          f"p95 {sorted(values)[int(len(values) * 0.95) - 1]:7.1f} ms   máx {max(values):7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=20)
+    parser.add_argument("--clip-ms", type=float, default=300)
+    parser.add_argument("--setup-ms", type=float, default=40, help="criação de um player do VLC")
+    parser.add_argument("--prepare-ms", type=float, default=25, help="abertura/decodificação da mídia")
+    parser.add_argument("--poll-ms", type=float, default=50, help="intervalo de consulta do fluxo antigo")
+    args = parser.parse_args()
+
+    print(f"{args.clips} áudios de {args.clip_ms:.0f} ms; intervalo entre o fim de um e o início do próximo:")
+    report("player por áudio", per_clip_player(args))
+    report("AudioPlayback", shared_playback(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: perguntas repetidas com e sem o cache de respostas
+
+Envia um conjunto de perguntas (com repetições e pequenas variações de escrita)
+a um servidor local compatível com a OpenAI que simula a latência da API, e
+compara o tempo por pergunta sem cache, com cache exato e com cache por
+similaridade.
+
+Uso:
+    python -m benchmarks.bench_response_cache --latency 1.0 --questions 30
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.http_transport import percentile
+from api.openai_client import OpenAIClient
+from api.response_cache import ResponseCache
+from tests.fake_openai_server import FakeOpenAIServer
+
+QUESTIONS = [
+    "Qual é a capital do Brasil?",
+    "Como está o tempo hoje?",
+    "Me conte uma piada.",
+    "Quem escreveu Dom Casmurro?",
+    "Quantos planetas existem no sistema solar?",
+]
+
+VARIATIONS = [
+    lambda q: q,
+    lambda q: q.lower(),
+    lambda q: "  " + q.rstrip("?.") + "  ",
+    lambda q: "Por favor, " + q[0].lower() + q[1:],
+]
+
+
+def run(server, questions, cache):
+    client = OpenAIClient(api_key="test", base_url=server.base_url)
+    client.response_cache = cache
+    latencies = []
+    for question in questions:
+        client.memory.clear()
+        start = time.perf_counter()
+        client.get_response(question)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name, latencies, cache=None):
+    line = (f"{name:<22} p50 {percentile(latencies, 0.5) * 1000:8.1f} ms   "
+            f"p95 {percentile(latencies, 0.95) * 1000:8.1f} ms   total {sum(latencies):6.2f} s")
+    if cache is not None:
+        stats = cache.stats()
+        line += f"   acertos {stats['hit_rate']:.0%}   economizado {stats['latency_saved']:.2f} s"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=1.0, help="latência simulada da API (s)")
+    parser.add_argument("--questions", type=int, default=30)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    questions = [rng.choice(VARIATIONS)(rng.choice(QUESTIONS)) for _ in range(args.questions)]
+
+    with FakeOpenAIServer(reply="Resposta simulada.", latency=args.latency) as server, \
+            tempfile.TemporaryDirectory() as directory:
+        report("sem cache", run(server, questions, None))
+
+        exact = ResponseCache(os.path.join(directory, "exact.sqlite3"))
+        report("cache exato", run(server, questions, exact), exact)
+
+        # Embeddings locais (saco de palavras), para medir só o custo da busca vetorial
+        semantic = ResponseCache(os.path.join(directory, "semantic.sqlite3"),
+                                 embed=FakeOpenAIServer.embedding, similarity_threshold=0.85)
+        report("cache por similaridade", run(server, questions, semantic), semantic)
+
+
+if __name__ == "__main__":
+    main()
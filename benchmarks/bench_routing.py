@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: roteamento entre modelos e requisições com reserva
+
+Uma mistura de prompts (conversa curta e pedidos complexos) é enviada ao
+FakeOpenAIServer, em que cada modelo tem o seu perfil de latência até o
+primeiro token (lognormal, com cauda longa). Compara três configurações:
+tudo no modelo forte (como antes), roteamento por nível e roteamento com
+hedging no p95. Mostra o tempo até o primeiro token (p50/p95/p99), as
+requisições extras e as decisões por nível.
+
+Uso:
+    python -m benchmarks.bench_routing --requests 200 --fast lognormal:0.15:0.5 --strong lognormal:0.6:0.5
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.http_transport import TransportConfig, create_http_client, percentile
+from api.model_router import ModelRouter, ModelTier
+from api.openai_client import OpenAIClient
+from tests.fake_backends import Distribution
+from tests.fake_openai_server import FakeOpenAIServer
+
+SHORT_PROMPTS = ["Olá!", "Obrigado", "Bom dia, tudo bem?", "Que horas são?", "Me conte uma piada"]
+COMPLEX_PROMPTS = [
+    "Explique como funciona o protocolo TCP, passo a passo.",
+    "Compare Python e Java para um servidor web.",
+    "Escreva uma função que ordena uma lista de números.",
+]
+
+
+def run(base_url, prompts, router, concurrency):
+    """Envia os prompts com `concurrency` usuários; retorna os tempos até o primeiro token."""
+    http_client = create_http_client(TransportConfig(max_connections=4 * concurrency))
+    latencies = []
+    lock = threading.Lock()
+    pending = list(prompts)
+
+    def user():
+        client = OpenAIClient(api_key="test", base_url=base_url, model="strong-model",
+                              http_client=http_client, router=router)
+        while True:
+            with lock:
+                if not pending:
+                    return
+                prompt = pending.pop()
+            client.memory.clear()
+            start = time.perf_counter()
+            stream = client.stream_response(prompt)
+            next(stream)
+            elapsed = time.perf_counter() - start
+            list(stream)
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=user) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    http_client.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--complex-share", type=float, default=0.3, help="fração de pedidos complexos")
+    parser.add_argument("--fast", default="lognormal:0.15:0.5", help="latência até o primeiro token do modelo rápido")
+    parser.add_argument("--strong", default="lognormal:0.6:0.5", help="latência até o primeiro token do modelo forte")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    prompts = [rng.choice(COMPLEX_PROMPTS if rng.random() < args.complex_share else SHORT_PROMPTS)
+               for _ in range(args.requests)]
+    profiles = {
+        "fast-model": {"first_chunk_delay": Distribution(args.fast, random.Random(args.seed))},
+        "strong-model": {"first_chunk_delay": Distribution(args.strong, random.Random(args.seed))},
+    }
+    tiers = lambda: (ModelTier("fast", "fast-model", 64, 3, 200), ModelTier("strong", "strong-model", 256, 4, 800))
+
+    print(f"{'configuração':>22} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'requisições':>12}")
+    with FakeOpenAIServer(reply="Claro! Posso ajudar com isso.", model_profiles=profiles) as fake:
+        routers = {}
+        for name, router in [("só modelo forte", None),
+                             ("roteamento", ModelRouter(*tiers())),
+                             ("roteamento + hedging", ModelRouter(*tiers(), hedging=True))]:
+            before = len(fake.requests)
+            latencies = run(fake.base_url, prompts, router, args.concurrency)
+            print(f"{name:>22} {percentile(latencies, 0.50) * 1000:>9.0f} {percentile(latencies, 0.95) * 1000:>9.0f} "
+                  f"{percentile(latencies, 0.99) * 1000:>9.0f} {len(fake.requests) - before:>12}")
+            routers[name] = router
+
+    stats = routers["roteamento + hedging"].stats()
+    print()
+    for name, tier in stats["tiers"].items():
+        print(f"{name:>8}: {tier['decisions']} pedidos, p95 até o primeiro token "
+              f"{tier['first_token_p95'] * 1000:.0f} ms, {tier['hedged']} reservas ({tier['hedge_wins']} venceram)")
+    print(f"motivos: {stats['reasons']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: agendador de chamadas externas sob cota
+
+Usuários de chat (prioridade interativa) e trabalhos em segundo plano
+(geração de imagens) disputam a cota de requisições do FakeOpenAIServer, que
+responde 429 a quem passa dela. Compara o transporte sem agendador (só novas
+tentativas com backoff) e com o agendador: 429s recebidos, chamadas que
+falharam e a latência das respostas do chat (p50/p95), além da espera na fila
+por prioridade.
+
+Uso:
+    python -m benchmarks.bench_scheduler --chat 40 --images 40 --rpm 1200 --burst 0.5
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.http_transport import TransportConfig, create_http_client, percentile
+from api.openai_client import OpenAIClient
+from api.scheduler import OutboundScheduler
+from tests.fake_openai_server import FakeOpenAIServer
+
+
+def run(base_url, scheduler, chat, images, concurrency):
+    """Executa as chamadas; retorna (latências do chat, falhas)."""
+    http_client = create_http_client(TransportConfig(max_connections=4 * concurrency, backoff_max=2.0),
+                                     scheduler=scheduler)
+    latencies = []
+    failures = [0]
+    lock = threading.Lock()
+    pending = ["chat"] * chat + ["image"] * images
+
+    def user():
+        client = OpenAIClient(api_key="test", base_url=base_url, http_client=http_client)
+        while True:
+            with lock:
+                if not pending:
+                    return
+                kind = pending.pop(0 if len(pending) % 2 else -1)
+            start = time.perf_counter()
+            if kind == "chat":
+                client.memory.clear()
+                ok = client.get_response("Olá", max_tokens=20) != client.ERROR_MESSAGE
+            else:
+                ok = client.generate_image("Um farol ao entardecer", size="64x64") is not None
+            with lock:
+                if not ok:
+                    failures[0] += 1
+                elif kind == "chat":
+                    latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=user) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    http_client.close()
+    return latencies, failures[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chat", type=int, default=40, help="respostas de chat")
+    parser.add_argument("--images", type=int, default=40, help="gerações de imagem em segundo plano")
+    parser.add_argument("--rpm", type=int, default=1200, help="cota de requisições por minuto do servidor")
+    parser.add_argument("--burst", type=float, default=0.5, help="rajada permitida, em segundos de cota")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{'configuração':>15} {'429s':>6} {'falhas':>7} {'chat p50 (ms)':>14} {'chat p95 (ms)':>14}")
+    for name, configured in [("sem agendador", False), ("com agendador", True)]:
+        scheduler = OutboundScheduler()
+        if configured:
+            scheduler.configure("openai", args.rpm, hosts=("127.0.0.1",), burst_seconds=args.burst)
+        with FakeOpenAIServer(reply="Claro!", rate_limit_requests=args.rpm, rate_limit_burst=args.burst) as fake:
+            latencies, failures = run(fake.base_url, scheduler, args.chat, args.images, args.concurrency)
+        print(f"{name:>15} {fake.rate_limited:>6} {failures:>7} {percentile(latencies, 0.50) * 1000:>14.0f} "
+              f"{percentile(latencies, 0.95) * 1000:>14.0f}")
+
+    print()
+    for priority, wait in scheduler.stats()["openai"]["wait"].items():
+        print(f"espera na fila ({priority}): p50 {wait['p50'] * 1000:.0f} ms, p95 {wait['p95'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: vazão do serviço de assistente com várias sessões
+
+Mede respostas por segundo do serviço (server.assistant_service pela API
+HTTP local) contra o FakeOpenAIServer, com 1, 2, 4, ... sessões simultâneas.
+Com um pedido por vez (como na janela única), a vazão fica presa em
+1 / latência; com o serviço, cresce com o número de sessões até o limite de
+respostas simultâneas (--max-concurrent).
+
+Uso:
+    python -m benchmarks.bench_service --sessions 1 4 16 --requests 4 --first-chunk-ms 300
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+
+from api.assistant_client import AssistantServiceClient
+from api.openai_client import OpenAIClient
+from server.assistant_service import AssistantService
+from server.http_api import AssistantHTTPServer
+from tests.fake_backends import FakeTTS
+from tests.fake_openai_server import FakeOpenAIServer
+
+REPLY = "Claro! Amanhã o dia deve começar nublado, com sol à tarde. Quer que eu avise se mudar?"
+
+
+def measure(base_url, sessions, requests):
+    """Cada sessão faz `requests` perguntas em sequência; retorna respostas por segundo."""
+    with httpx.Client(limits=httpx.Limits(max_connections=sessions)) as http_client:
+        clients = [AssistantServiceClient(base_url, http_client=http_client) for _ in range(sessions)]
+
+        def run(client):
+            for i in range(requests):
+                "".join(client.stream_response(f"Pergunta {i}"))
+
+        threads = [threading.Thread(target=run, args=(client,)) for client in clients]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        for client in clients:
+            client.close()
+    return sessions * requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=4, help="perguntas por sessão")
+    parser.add_argument("--first-chunk-ms", type=float, default=300, help="latência até o primeiro token")
+    parser.add_argument("--chunk-ms", type=float, default=5, help="atraso entre tokens")
+    parser.add_argument("--max-concurrent", type=int, default=16)
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(reply=REPLY, first_chunk_delay=args.first_chunk_ms / 1000,
+                          chunk_delay=args.chunk_ms / 1000) as fake:
+        service = AssistantService(
+            client_factory=lambda http_client: OpenAIClient(api_key="test", base_url=fake.base_url,
+                                                            http_client=http_client),
+            synthesize=FakeTTS().synthesize, max_concurrent=args.max_concurrent,
+        )
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        server = asyncio.run_coroutine_threadsafe(AssistantHTTPServer(service, port=0).start(), loop).result()
+        base_url = f"http://127.0.0.1:{server.port}"
+        try:
+            baseline = None
+            print(f"{'sessões':>8} {'respostas/s':>12} {'ganho':>8}")
+            for sessions in args.sessions:
+                throughput = measure(base_url, sessions, args.requests)
+                baseline = baseline or throughput
+                print(f"{sessions:>8} {throughput:>12.2f} {throughput / baseline:>7.1f}x")
+        finally:
+            asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            service.close()
+
+
+if __name__ == "__main__":
+    main()
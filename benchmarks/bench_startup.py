@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: inicialização a frio da aplicação
+
+1. Executa `python -X importtime -c "import gui.main_window"` e mostra o tempo
+   total de importação e os módulos importados diretamente que mais custam.
+2. Abre a janela principal em processos novos e mede, a partir do início do
+   processo, o tempo até a primeira pintura (a partir daí o usuário já pode
+   digitar), até o cliente da IA ficar pronto e até todos os serviços estarem
+   prontos, além do maior intervalo sem atender eventos na thread da
+   interface enquanto os serviços carregam. Com --eager, todos os módulos e
+   serviços são carregados antes de a janela aparecer, como a aplicação fazia
+   antes.
+
+A API da OpenAI é simulada por um servidor local. Sem display, a janela usa a
+plataforma "offscreen" do Qt.
+
+Uso:
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Adicione o diretório principal ao sys.path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+# Intervalo das verificações na thread da interface (s)
+TICK = 0.01
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_times(module="gui.main_window"):
+    """Retorna (tempo cumulativo do módulo, [(módulo filho direto, tempo cumulativo)]) em ms."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, env=child_env()
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total, children = 0.0, []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)) / 1000, len(match.group(3)), match.group(4)
+        if name == module:
+            total = cumulative
+        elif depth == 2:  # Importações feitas diretamente pelo módulo
+            children.append((name, cumulative))
+    return total, sorted(children, key=lambda item: -item[1])
+
+
+def child_env(base_url=None):
+    env = dict(os.environ)
+    if not (env.get("DISPLAY") or env.get("WAYLAND_DISPLAY")):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    if base_url:
+        env["OPENAI_BASE_URL"] = base_url
+    env.setdefault("CONVERSATION_DB_PATH", os.path.join(tempfile.gettempdir(), "bench_startup.sqlite3"))
+    return env
+
+
+def run_child(eager):
+    """Executado no processo filho: abre a janela e imprime os tempos em JSON."""
+    started = float(os.environ["BENCH_STARTED_AT"])
+    from PySide6.QtCore import QEvent, QObject, QTimer
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication(sys.argv)
+    from gui.main_window import MainWindow
+
+    marks = {"imported": time.time()}
+
+    if eager:
+        import api.openai_client  # noqa: F401
+        import gui.language_utils  # noqa: F401
+        import utils.playback  # noqa: F401
+
+    class FirstPaint(QObject):
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Paint and "first_paint" not in marks:
+                # A pintura dos filhos acontece logo após, no mesmo ciclo
+                QTimer.singleShot(0, lambda: marks.setdefault("first_paint", time.time()))
+            return False
+
+    window = MainWindow()
+    if eager:
+        window.services.wait_all()
+    paint_filter = FirstPaint()
+    window.installEventFilter(paint_filter)
+    window.show()
+
+    stalls = [0.0]
+    last_tick = [None]
+
+    def check():
+        now = time.time()
+        if "first_paint" in marks:
+            if last_tick[0] is not None:
+                stalls[0] = max(stalls[0], now - last_tick[0] - TICK)
+            last_tick[0] = now
+            if "client" not in marks and window.services.is_ready("openai"):
+                marks["client"] = now
+            if "client" in marks and window.services.wait_all(0):
+                marks["services"] = now
+                window.close()
+                app.quit()
+                return
+        QTimer.singleShot(int(TICK * 1000), check)
+
+    QTimer.singleShot(0, check)
+    app.exec()
+    times = {name: (value - started) * 1000 for name, value in marks.items()}
+    times["max_stall"] = stalls[0] * 1000
+    print(json.dumps(times))
+
+
+def cold_start(eager, base_url):
+    env = child_env(base_url)
+    env["BENCH_STARTED_AT"] = repr(time.time())
+    args = [sys.executable, "-m", "benchmarks.bench_startup", "--child"] + (["--eager"] if eager else [])
+    result = subprocess.run(args, cwd=ROOT, capture_output=True, text=True, env=env)
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="módulos mostrados no -X importtime")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.eager)
+        return
+
+    total, children = import_times()
+    print(f"-X importtime: import gui.main_window = {total:.0f} ms")
+    for name, cumulative in children[:args.top]:
+        print(f"    {name:<40} {cumulative:8.1f} ms")
+
+    from tests.fake_openai_server import FakeOpenAIServer
+
+    server = FakeOpenAIServer().start()
+    try:
+        print(f"\nInicialização a frio (mediana de {args.runs} execuções, desde o início do processo):")
+        for label, eager in (("carregamento antecipado", True), ("sob demanda", False)):
+            runs = [cold_start(eager, server.base_url) for _ in range(args.runs)]
+            medians = {key: statistics.median(run[key] for run in runs)
+                       for key in ("imported", "first_paint", "client", "services", "max_stall")}
+            print(f"{label}:")
+            print(f"    importação da janela {medians['imported']:6.0f} ms")
+            print(f"    primeira pintura     {medians['first_paint']:6.0f} ms   (interativa)")
+            print(f"    cliente da IA pronto {medians['client']:6.0f} ms")
+            print(f"    serviços prontos     {medians['services']:6.0f} ms")
+            print(f"    maior travamento     {medians['max_stall']:6.0f} ms   (após a primeira pintura)")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: acréscimo de mensagens na conversa
+
+Acrescenta N mensagens à TranscriptView (modelo/visão) e, opcionalmente, a um
+QTextEdit com HTML (como a janela fazia antes), medindo a latência de cada
+acréscimo (incluindo o processamento de eventos e a pintura) e a memória
+residente (RSS) do processo ao longo do caminho.
+
+Uso:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_transcript --messages 50000 --legacy 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PySide6.QtGui import QTextCursor
+from PySide6.QtWidgets import QApplication, QTextEdit
+
+from api.http_transport import percentile
+from gui.transcript import TranscriptView
+
+COLORS = ("#E6F3FF", "#F0FFF0", "#444444")
+SENDERS = ("Você", "Gysin IA", "Sistema")
+
+
+def rss_mb():
+    """Memória residente atual do processo (Linux); None em outros sistemas."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return None
+
+
+def message_text(i):
+    return f"Mensagem número {i}. " + "Texto de exemplo para a conversa. " * (1 + i % 6)
+
+
+def run(app, name, append, count, report_every):
+    latencies = []
+    print(f"\n{name}")
+    print(f"{'mensagens':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'máx (ms)':>9} {'RSS (MB)':>9}")
+    window = []
+    for i in range(count):
+        start = time.perf_counter()
+        append(SENDERS[i % 3], message_text(i), COLORS[i % 3])
+        app.processEvents()
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        window.append(elapsed)
+        if (i + 1) % report_every == 0:
+            rss = rss_mb()
+            print(f"{i + 1:>10} {percentile(window, 0.5) * 1000:>9.3f} {percentile(window, 0.95) * 1000:>9.3f} "
+                  f"{max(window) * 1000:>9.3f} {rss if rss is not None else float('nan'):>9.1f}")
+            window = []
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--max-messages", type=int, default=5000, help="limite de mensagens mantidas na visão")
+    parser.add_argument("--legacy", type=int, default=0, help="mensagens no QTextEdit antigo (0 desativa)")
+    parser.add_argument("--report-every", type=int, default=5000)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    view = TranscriptView(max_messages=args.max_messages)
+    view.resize(800, 600)
+    view.show()
+    run(app, f"TranscriptView (limite de {args.max_messages} mensagens)", view.add_message,
+        args.messages, args.report_every)
+    print(f"Alturas calculadas pelo delegate: {view.height_computations}")
+    view.close()
+
+    if args.legacy:
+        text_edit = QTextEdit()
+        text_edit.setReadOnly(True)
+        text_edit.resize(800, 600)
+        text_edit.show()
+
+        def append_html(sender, message, color):
+            text_edit.append(f'<div style="background-color: {color}; padding: 5px; margin: 5px 0;">'
+                             f'<b>{sender}:</b> {message}</div>')
+            text_edit.moveCursor(QTextCursor.End)
+            text_edit.ensureCursorVisible()
+
+        run(app, "QTextEdit com HTML (implementação anterior)", append_html, args.legacy,
+            max(1, min(args.report_every, args.legacy // 5)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: coalescência e lotes na síntese de voz
+
+Várias sessões pedem, ao mesmo tempo, frases curtas que em parte se repetem
+(saudações, confirmações). Compara chamar o backend a cada pedido com o
+CoalescingTTS (pedidos idênticos compartilham a síntese e frases curtas do
+mesmo idioma vão em lotes). O backend é o FakeTTS, com latência por chamada e
+um limite de chamadas simultâneas, como a cota de um serviço real.
+
+Uso:
+    python -m benchmarks.bench_tts_coalescing --sessions 16 --sentences 6 --latency-ms 150
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.fake_backends import FakeTTS
+from utils.tts_coalescing import CoalescingTTS
+
+SENTENCES = [
+    ("Olá!", "pt-BR"), ("Claro, posso ajudar.", "pt-BR"), ("Um momento, por favor.", "pt-BR"),
+    ("Entendi.", "pt-BR"), ("Mais alguma coisa?", "pt-BR"), ("Obrigado!", "pt-BR"),
+    ("Sure, I can help.", "en-US"), ("Got it.", "en-US"), ("Anything else?", "en-US"),
+    ("Klar, ich helfe gern.", "de-DE"), ("¡Claro que sí!", "es-ES"),
+]
+
+
+class LimitedBackend:
+    """FakeTTS com no máximo `concurrency` chamadas ao mesmo tempo."""
+
+    def __init__(self, latency_ms, concurrency):
+        self.tts = FakeTTS(latency=str(latency_ms / 1000))
+        self._slots = threading.Semaphore(concurrency)
+
+    def synthesize(self, text, language_code, voice=None):
+        with self._slots:
+            return self.tts.synthesize(text, language_code, voice)
+
+    def synthesize_batch(self, texts, language_code, voice=None):
+        with self._slots:
+            return self.tts.synthesize_batch(texts, language_code, voice)
+
+
+def run(synthesize, workload):
+    """Cada sessão sintetiza as suas frases em sequência; retorna (tempo total, p95 por frase)."""
+    latencies = []
+    lock = threading.Lock()
+
+    def session(sentences):
+        for text, language_code in sentences:
+            start = time.perf_counter()
+            synthesize(text, language_code)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(sentences,)) for sentences in workload]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return time.perf_counter() - start, latencies[int(0.95 * (len(latencies) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--sentences", type=int, default=6, help="frases por sessão")
+    parser.add_argument("--latency-ms", type=float, default=150, help="latência de cada chamada ao backend")
+    parser.add_argument("--concurrency", type=int, default=4, help="chamadas simultâneas permitidas")
+    parser.add_argument("--window-ms", type=float, default=15, help="janela de agrupamento dos lotes")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workload = [[rng.choice(SENTENCES) for _ in range(args.sentences)] for _ in range(args.sessions)]
+
+    direct = LimitedBackend(args.latency_ms, args.concurrency)
+    direct_time, direct_p95 = run(direct.synthesize, workload)
+
+    backend = LimitedBackend(args.latency_ms, args.concurrency)
+    coalescing = CoalescingTTS(backend.synthesize, backend.synthesize_batch, batch_window=args.window_ms / 1000)
+    coalesced_time, coalesced_p95 = run(coalescing.synthesize, workload)
+    stats = coalescing.stats()
+    coalescing.close()
+
+    requests = args.sessions * args.sentences
+    print(f"{requests} pedidos de {args.sessions} sessões, backend com {args.latency_ms:.0f} ms por chamada "
+          f"e {args.concurrency} chamadas simultâneas")
+    print(f"Direto:        {direct.tts.calls:4d} chamadas | {direct_time * 1000:8.1f} ms no total | "
+          f"p95 por frase {direct_p95 * 1000:7.1f} ms")
+    print(f"Coalescência:  {backend.tts.calls:4d} chamadas | {coalesced_time * 1000:8.1f} ms no total | "
+          f"p95 por frase {coalesced_p95 * 1000:7.1f} ms")
+    print(f"Pedidos compartilhados: {stats['coalesced']} | lotes: {stats['batches']} "
+          f"(média {stats['avg_batch_size']:.1f}, máx. {stats['max_batch_size']}) | "
+          f"fila máx.: {stats['max_queue_depth']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: tempo até o primeiro áudio (time-to-first-audio)
+
+Compara a abordagem antiga (esperar a resposta inteira da IA, sintetizar tudo
+e só então reproduzir) com o SpeechPipeline, que sintetiza frase a frase
+enquanto a resposta ainda está sendo gerada. Usa um LLM e um TTS simulados
+com atrasos configuráveis, sem acesso à rede.
+
+Uso:
+    python -m benchmarks.bench_tts_pipeline --token-delay 0.03 --tts-delay 0.4
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.tts_pipeline import SpeechPipeline
+
+REPLY = (
+    "Claro, posso ajudar com isso. A fotossíntese é o processo pelo qual as plantas "
+    "convertem luz em energia química. Ela acontece principalmente nas folhas, dentro "
+    "dos cloroplastos. O resultado é glicose e oxigênio, essenciais para a vida na Terra. "
+    "Quer saber mais sobre alguma etapa específica?"
+)
+
+
+def fake_llm_stream(reply, token_delay):
+    """Simula o streaming de tokens da API."""
+    for i, word in enumerate(reply.split(" ")):
+        time.sleep(token_delay)
+        yield word if i == 0 else " " + word
+
+
+def make_fake_tts(base_delay, per_char_delay):
+    """TTS simulado: latência fixa de rede mais um custo proporcional ao texto."""
+    def synthesize(text, language_code):
+        time.sleep(base_delay + per_char_delay * len(text))
+        return text
+    return synthesize
+
+
+def whole_reply_first_audio(args):
+    """Fluxo antigo: resposta completa -> text_to_speech do texto inteiro -> play_audio."""
+    synthesize = make_fake_tts(args.tts_delay, args.tts_char_delay)
+    start = time.perf_counter()
+    response = "".join(fake_llm_stream(REPLY, args.token_delay))
+    synthesize(response, 'pt-BR')
+    return time.perf_counter() - start
+
+
+def pipelined_first_audio(args):
+    """Fluxo novo: frases sintetizadas em paralelo enquanto a resposta chega."""
+    synthesize = make_fake_tts(args.tts_delay, args.tts_char_delay)
+    first_audio = threading.Event()
+    first_audio_at = []
+
+    def play(audio, should_stop):
+        if not first_audio.is_set():
+            first_audio_at.append(time.perf_counter())
+            first_audio.set()
+
+    start = time.perf_counter()
+    pipeline = SpeechPipeline(synthesize, play, max_parallel=args.max_parallel)
+    for delta in fake_llm_stream(REPLY, args.token_delay):
+        pipeline.feed(delta)
+    pipeline.finish()
+    pipeline.wait()
+    return first_audio_at[0] - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--token-delay", type=float, default=0.03, help="atraso por token do LLM (s)")
+    parser.add_argument("--tts-delay", type=float, default=0.4, help="latência fixa de cada chamada TTS (s)")
+    parser.add_argument("--tts-char-delay", type=float, default=0.002, help="custo do TTS por caractere (s)")
+    parser.add_argument("--max-parallel", type=int, default=SpeechPipeline.DEFAULT_MAX_PARALLEL)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    whole = [whole_reply_first_audio(args) for _ in range(args.runs)]
+    pipelined = [pipelined_first_audio(args) for _ in range(args.runs)]
+
+    print(f"Resposta: {len(REPLY)} caracteres, {len(REPLY.split())} tokens")
+    print(f"Resposta inteira  -> primeiro áudio em {statistics.median(whole) * 1000:8.1f} ms (mediana)")
+    print(f"Pipeline por frase -> primeiro áudio em {statistics.median(pipelined) * 1000:8.1f} ms (mediana)")
+    print(f"Ganho: {statistics.median(whole) / statistics.median(pipelined):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
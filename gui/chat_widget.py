@@ -11,14 +11,16 @@ Data: 15/10/2024 13:11 (horário de Zurique)
 """
 
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QLineEdit,
-    QPushButton, QScrollArea, QTimer, QMessageBox
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
+    QPushButton, QMessageBox
 )
-from PySide6.QtCore import Qt, Signal, Slot
-from PySide6.QtGui import QFont, QTextCursor, QKeyEvent
+from PySide6.QtCore import Qt, Signal, Slot, QTimer
+from PySide6.QtGui import QFont, QKeyEvent
+from collections import deque
 from typing import Optional
-from html import escape
 from gui.language_utils import detect_language
+from gui.transcript import TranscriptView
+from utils.telemetry import get_telemetry
 
 class ChatWidget(QWidget):
     """
@@ -35,35 +37,36 @@ class ChatWidget(QWidget):
     BUTTON_COLOR = "#4CAF50"
     MAX_HISTORY = 100
     MAX_MESSAGE_LENGTH = 500  # Limite máximo de caracteres por mensagem
+    MESSAGE_COLOR = "#ffffff"
 
     # Sinal emitido quando uma mensagem é enviada
     message_sent = Signal(str)
 
-    def __init__(self, parent: Optional[QWidget] = None):
-        """Inicializa o widget de chat."""
+    def __init__(self, parent: Optional[QWidget] = None, store=None):
+        """
+        Inicializa o widget de chat. store (ConversationStore) grava as mensagens
+        e fornece o histórico de entradas das sessões anteriores.
+        """
         super().__init__(parent)
-        self._message_history: list[str] = []
-        self._history_index: int = -1
+        self.store = store
+        self._session_id: Optional[int] = None
+        self._message_history: deque[str] = deque(
+            store.recent_inputs(self.MAX_HISTORY) if store else (), maxlen=self.MAX_HISTORY
+        )
+        self._history_index: int = len(self._message_history)
         self._init_ui()
 
     def _init_ui(self):
         """Configura a interface do usuário do widget."""
         layout = QVBoxLayout(self)
 
-        # Configuração da área de exibição do chat
-        self.chat_display = QTextEdit()
-        self.chat_display.setReadOnly(True)
-        self.chat_display.setFont(QFont("Arial", self.FONT_SIZE))
+        # Configuração da área de exibição do chat (já rolável e virtualizada)
+        self.chat_display = TranscriptView(QFont("Arial", self.FONT_SIZE))
         self.chat_display.setStyleSheet(
             f"background-color: {self.BACKGROUND_COLOR}; "
             f"border: 1px solid {self.BORDER_COLOR}; border-radius: 5px;"
         )
-
-        # Adição de uma área de rolagem para o chat
-        scroll_area = QScrollArea()
-        scroll_area.setWidget(self.chat_display)
-        scroll_area.setWidgetResizable(True)
-        layout.addWidget(scroll_area)
+        layout.addWidget(self.chat_display)
 
         # Layout para entrada de texto e botão de envio
         input_layout = QHBoxLayout()
@@ -110,6 +113,7 @@ class ChatWidget(QWidget):
                 self.add_message("Você", message)
                 self.message_sent.emit(message)
                 self.add_to_history(message)
+                self.save_message("Você", message, detected_language)
                 self.user_input.clear()
             except Exception as e:
                 self.add_error_message(f"Erro ao enviar mensagem: {str(e)}")
@@ -124,27 +128,24 @@ class ChatWidget(QWidget):
     def add_message(self, sender: str, message: str, background_color: Optional[str] = None):
         """Adiciona uma mensagem à área de exibição do chat."""
         try:
-            cursor = self.chat_display.textCursor()
-            cursor.movePosition(QTextCursor.End)
-            self.chat_display.setTextCursor(cursor)
-
-            if background_color:
-                formatted_message = f'<p style="background-color: {background_color};"><strong>{escape(sender)}:</strong> {escape(message)}</p>'
-            else:
-                formatted_message = f"<p><strong>{escape(sender)}:</strong> {escape(message)}</p>"
-            
-            self.chat_display.insertHtml(formatted_message)
-            
-            # Rola para o final da área de chat
-            self.chat_display.verticalScrollBar().setValue(
-                self.chat_display.verticalScrollBar().maximum()
-            )
+            # O texto é desenhado como texto simples (sem HTML), então não precisa de escape
+            self.chat_display.add_message(sender, message, background_color or self.MESSAGE_COLOR)
         except Exception as e:
             print(f"Erro ao adicionar mensagem: {str(e)}")
+            get_telemetry().record("chat.add_message", 0.0, error=e)
 
     def add_ai_response(self, response: str):
         """Adiciona uma resposta da IA ao chat."""
         self.add_message("Gysin IA", response)
+        self.save_message("Gysin IA", response, detect_language(response))
+
+    def save_message(self, sender: str, message: str, language: Optional[str] = None):
+        """Grava a mensagem no histórico persistente, se houver um."""
+        if not self.store:
+            return
+        if self._session_id is None:
+            self._session_id = self.store.new_session(title=message[:80])
+        self.store.add_message(self._session_id, sender, message, language)
 
     def add_system_message(self, message: str):
         """Adiciona uma mensagem do sistema ao chat."""
@@ -178,10 +179,8 @@ class ChatWidget(QWidget):
             super().keyPressEvent(event)
 
     def add_to_history(self, message: str):
-        """Adiciona uma mensagem ao histórico."""
+        """Adiciona uma mensagem ao histórico (o deque descarta a mais antiga em O(1))."""
         self._message_history.append(message)
-        if len(self._message_history) > self.MAX_HISTORY:
-            self._message_history.pop(0)
         self._history_index = len(self._message_history)
 
     def navigate_history(self, direction: str):
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Debug Panel
+
+Painel de desempenho: mostra, para cada etapa instrumentada do pipeline
+(gravação, transcrição, detecção de idioma, LLM, TTS, caches e reprodução),
+a quantidade de medições, os erros e as latências p50/p95/última, além dos
+contadores. Os valores são atualizados periodicamente enquanto o painel está
+visível.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+from PySide6.QtCore import QTimer, Slot
+from PySide6.QtWidgets import (
+    QDialog, QHBoxLayout, QHeaderView, QLabel, QPushButton, QTableWidget, QTableWidgetItem, QVBoxLayout
+)
+
+COLUMNS = ("Etapa", "Medições", "Erros", "p50 (ms)", "p95 (ms)", "Última (ms)")
+
+
+def format_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+class TelemetryPanel(QDialog):
+    """Janela não modal com o resumo da telemetria."""
+
+    REFRESH_INTERVAL_MS = 1000
+
+    def __init__(self, telemetry, parent=None):
+        super().__init__(parent)
+        self.telemetry = telemetry
+        self.setWindowTitle("Desempenho")
+        self.resize(640, 420)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        self.counters_label = QLabel()
+        self.counters_label.setWordWrap(True)
+        layout.addWidget(self.counters_label)
+
+        exporter = getattr(telemetry, "exporter", None)
+        export_label = QLabel(f"Exportação: {exporter.path}" if exporter else "Exportação desativada")
+        export_label.setWordWrap(True)
+        layout.addWidget(export_label)
+
+        buttons = QHBoxLayout()
+        self.reset_button = QPushButton("Limpar medições")
+        self.reset_button.clicked.connect(self.reset)
+        buttons.addStretch()
+        buttons.addWidget(self.reset_button)
+        layout.addLayout(buttons)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_INTERVAL_MS)
+        self._timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self._timer.start()
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
+
+    @Slot()
+    def refresh(self):
+        """Atualiza a tabela com o resumo atual da telemetria."""
+        summary = self.telemetry.summary()
+        self.table.setRowCount(len(summary))
+        for row, (name, stage) in enumerate(summary.items()):
+            values = (name, str(stage["count"]), str(stage["errors"]),
+                      format_ms(stage["p50"]), format_ms(stage["p95"]), format_ms(stage["last"]))
+            for column, value in enumerate(values):
+                item = self.table.item(row, column)
+                if item is None:
+                    self.table.setItem(row, column, QTableWidgetItem(value))
+                elif item.text() != value:
+                    item.setText(value)
+        counters = self.telemetry.counters()
+        self.counters_label.setText(
+            "Contadores: " + ", ".join(f"{name} = {value}" for name, value in sorted(counters.items()))
+            if counters else "Contadores: nenhum"
+        )
+
+    @Slot()
+    def reset(self):
+        self.telemetry.reset()
+        self.refresh()
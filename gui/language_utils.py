@@ -1,15 +1,188 @@
-from langdetect import detect, DetectorFactory
+# -*- coding: utf-8 -*-
+"""
+Módulo: Language Utils
+
+Detecção de idioma restrita aos idiomas que a aplicação mapeia para vozes
+(pt, en, de, es). Usa uma tabela pré-calculada de frequências de n-gramas de
+caracteres (1 a 3), pontuada com um classificador bayesiano ingênuo em NumPy:
+o resultado é determinístico e rápido mesmo para textos curtos. A tabela é
+carregada uma única vez, na importação do módulo, e as detecções repetidas
+passam por um memo LRU.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import functools
+import json
+import os
+import re
+
+import numpy as np
+
+from utils.telemetry import get_telemetry
+
+SUPPORTED_LANGUAGES = ("pt", "en", "de", "es")
+PROFILES_PATH = os.path.join(os.path.dirname(__file__), "language_profiles.json")
+MAX_NGRAM = 3
+MIN_TEXT_LENGTH = 3
+
+# Fração da menor contagem observada atribuída a n-gramas ausentes do perfil
+MISSING_NGRAM_FACTOR = 0.02
+
+# Tudo que não é letra vira espaço (números, pontuação, emojis)
+_NON_LETTERS = re.compile(r"[\W\d_]+", re.UNICODE)
+
+
+def normalize_text(text):
+    """Minúsculas e apenas letras separadas por um espaço, com espaço nas bordas."""
+    return " " + _NON_LETTERS.sub(" ", text.lower()).strip() + " "
+
+
+def extract_ngrams(text):
+    """Gera os n-gramas de caracteres (1 a MAX_NGRAM) do texto já normalizado."""
+    ngrams = []
+    for n in range(1, MAX_NGRAM + 1):
+        for i in range(len(text) - n + 1):
+            gram = text[i:i + n]
+            if gram != " " * n:
+                ngrams.append(gram)
+    return ngrams
+
+
+class NGramLanguageDetector:
+    """
+    Classificador de idioma por n-gramas de caracteres.
+
+    profiles: {idioma: {"n_words": [total de 1-, 2- e 3-gramas], "freq": {n-grama: contagem}}}.
+    A tabela é convertida em uma matriz (n-gramas x idiomas) de log-probabilidades;
+    n-gramas ausentes no perfil de um idioma recebem uma fração da menor contagem
+    observada (os perfis são podados), o que penaliza os idiomas sem aquele n-grama.
+    """
+
+    def __init__(self, profiles):
+        self.languages = sorted(profiles)
+        vocabulary = sorted({gram for profile in profiles.values() for gram in profile["freq"]})
+        self._index = {gram: i for i, gram in enumerate(vocabulary)}
+        self._log_probs = np.empty((len(vocabulary), len(self.languages)), dtype=np.float64)
+
+        for column, language in enumerate(self.languages):
+            profile = profiles[language]
+            freq = profile["freq"]
+            for n in range(1, MAX_NGRAM + 1):
+                rows = [i for gram, i in self._index.items() if len(gram) == n]
+                counts = np.array([freq.get(vocabulary[i], 0) for i in rows], dtype=np.float64)
+                observed = counts[counts > 0]
+                floor = observed.min() * MISSING_NGRAM_FACTOR if observed.size else 1.0
+                total = profile["n_words"][n - 1]
+                self._log_probs[rows, column] = np.log(np.maximum(counts, floor) / total)
+
+    @classmethod
+    def from_file(cls, path=PROFILES_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["profiles"])
+
+    def _indices(self, text):
+        index = self._index
+        return [i for i in map(index.get, extract_ngrams(normalize_text(text))) if i is not None]
+
+    def scores(self, text):
+        """Retorna {idioma: log-verossimilhança} ou None se não houver n-gramas conhecidos."""
+        indices = self._indices(text)
+        if not indices:
+            return None
+        totals = self._log_probs[indices].sum(axis=0)
+        return dict(zip(self.languages, totals.tolist()))
+
+    def detect(self, text):
+        """Retorna o código do idioma mais provável ou None."""
+        indices = self._indices(text)
+        if not indices:
+            return None
+        return self.languages[int(np.argmax(self._log_probs[indices].sum(axis=0)))]
+
+    def detect_many(self, texts):
+        """Detecta vários textos de uma vez, somando as linhas da matriz por segmento."""
+        segments = [self._indices(text) for text in texts]
+        results = [None] * len(texts)
+        present = [i for i, indices in enumerate(segments) if indices]
+        if not present:
+            return results
+        flat = np.concatenate([segments[i] for i in present])
+        starts = np.cumsum([0] + [len(segments[i]) for i in present[:-1]])
+        totals = np.add.reduceat(self._log_probs[flat], starts, axis=0)
+        for i, best in zip(present, np.argmax(totals, axis=1)):
+            results[i] = self.languages[int(best)]
+        return results
+
+
+def export_langdetect_profiles(path=PROFILES_PATH, languages=SUPPORTED_LANGUAGES):
+    """
+    Gera o arquivo de perfis a partir dos perfis distribuídos com o langdetect,
+    juntando maiúsculas e minúsculas. Usado apenas para regenerar language_profiles.json.
+    """
+    import langdetect
+
+    source = os.path.join(os.path.dirname(langdetect.__file__), "profiles")
+    profiles = {}
+    for language in languages:
+        with open(os.path.join(source, language), encoding="utf-8") as f:
+            profile = json.load(f)
+        freq = {}
+        for gram, count in profile["freq"].items():
+            gram = gram.lower()
+            freq[gram] = freq.get(gram, 0) + count
+        profiles[language] = {"n_words": profile["n_words"], "freq": freq}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"source": "langdetect profiles", "profiles": profiles}, f,
+                  ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+# Carregado na importação, para que a primeira mensagem não pague o custo
+_detector = NGramLanguageDetector.from_file()
+
+
+@functools.lru_cache(maxsize=1024)
+def _detect_cached(text):
+    return _detector.detect(text)
 
-# Configuração para resultados consistentes na detecção de idiomas
-DetectorFactory.seed = 0
 
 def detect_language(text):
     """Detecta o idioma do texto de entrada."""
+    with get_telemetry().span("language_detection") as span:
+        try:
+            if len(text) < MIN_TEXT_LENGTH:
+                print("Texto muito curto para detecção precisa.")
+                return None
+            return _detect_cached(text)
+        except Exception as e:
+            print(f"Erro na detecção do idioma: {e}")
+            span.set_error(e)
+            return None
+
+
+def detect_languages(texts):
+    """Detecta o idioma de vários textos de uma vez (None para textos curtos ou sem letras)."""
+    texts = list(texts)
+    results = [None] * len(texts)
+    pending = [i for i, text in enumerate(texts) if len(text) >= MIN_TEXT_LENGTH]
+    try:
+        for i, language in zip(pending, _detector.detect_many([texts[i] for i in pending])):
+            results[i] = language
+    except Exception as e:
+        print(f"Erro na detecção do idioma: {e}")
+    return results
+
+
+def detect_language_langdetect(text):
+    """Detecção anterior, com o langdetect (mantida para comparação nos testes e benchmarks)."""
+    from langdetect import detect, DetectorFactory
+
+    # Configuração para resultados consistentes na detecção de idiomas
+    DetectorFactory.seed = 0
     try:
-        if len(text) < 3:
-            print("Texto muito curto para detecção precisa.")
+        if len(text) < MIN_TEXT_LENGTH:
             return None
         return detect(text)
     except Exception as e:
         print(f"Erro na detecção do idioma: {e}")
-        return None
\ No newline at end of file
+        return None
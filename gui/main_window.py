@@ -11,22 +11,166 @@ Data: 20/10/2024 15:12 (horário de Zurique)
 
 # Importações necessárias de bibliotecas PySide6 e módulos personalizados
 from PySide6.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QPushButton, QTextEdit, QLineEdit, QApplication, QLabel, QCheckBox
+    QMainWindow, QWidget, QVBoxLayout, QPushButton, QLineEdit, QLabel, QCheckBox
 )
-from PySide6.QtCore import Qt, Slot, QTimer
-from PySide6.QtGui import QFont, QIcon, QTextCursor
-from api.openai_client import OpenAIClient
+from PySide6.QtCore import QSize, QTimer, Signal, Slot
+from PySide6.QtGui import QFont, QIcon, QImage
+from gui.transcript import TranscriptView
+from gui.workers import TaskExecutor, TaskQueueFullError, stream_ai_response
 from dotenv import load_dotenv
-from googlecloud.text_to_speech import text_to_speech
-from utils.audio_utils import record_audio
-from googlecloud.speech_to_text import transcribe_audio
-from gui.language_utils import detect_language 
-import vlc
+from utils.languages import DEFAULT_LANGUAGE_CODE, detect_language, language_code_for
+from utils.service_loader import ServiceLoader
+from utils.speech_recognition import GoogleStreamingRecognizer
+from utils.telemetry import get_telemetry
+from utils.tts_pipeline import SpeechPipeline, google_synthesize
 import os
+import threading
+import time
+
+# SDKs, NumPy, VLC, PyAudio e o histórico (SQLite) são carregados sob demanda (ou
+# pelo ServiceLoader, depois que a janela aparece), para que a inicialização não
+# espere por eles.
 
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
 
+# Grupo de tarefas da resposta atual (LLM, TTS e reprodução), cancelado em conjunto
+REPLY_GROUP = "reply"
+
+# Limite de segurança da gravação; normalmente o VAD encerra antes, no fim da fala
+MAX_RECORDING_SECONDS = 30
+
+# Mensagens carregadas por vez ao reabrir uma sessão antiga
+HISTORY_PAGE_SIZE = 50
+
+# Tamanho das imagens geradas (largura x altura)
+IMAGE_SIZE = "1024x1024"
+
+# Nomes exibidos quando um serviço opcional não pode ser iniciado
+SERVICE_NAMES = {
+    "openai": "Cliente da IA",
+    "store": "Histórico de conversas",
+    "language": "Detecção de idioma",
+    "microphone": "Microfone",
+    "playback": "Reprodução de áudio",
+}
+
+
+def create_openai_client():
+    """
+    Cliente da IA: o serviço local de assistente, se ASSISTANT_SERVICE_URL estiver
+    definida (python -m server), ou a API da OpenAI diretamente.
+    """
+    service_url = os.getenv("ASSISTANT_SERVICE_URL")
+    if service_url:
+        from api.assistant_client import AssistantServiceClient
+
+        return AssistantServiceClient(service_url)
+
+    from api.model_router import ModelRouter
+    from api.openai_client import OpenAIClient
+
+    # Conversa curta vai para o modelo rápido; OPENAI_HEDGING=1 ativa as chamadas de reserva
+    client = OpenAIClient(warm_up=True, router=ModelRouter(hedging=os.getenv("OPENAI_HEDGING") == "1"))
+    if os.getenv("OPENAI_RESPONSE_CACHE") == "1":
+        from api.response_cache import ResponseCache
+
+        # Perguntas repetidas (ou parecidas, pelos embeddings) sem contexto de conversa
+        client.response_cache = ResponseCache(embed=client.embed)
+    return client
+
+
+def open_conversation_store():
+    """Abre o histórico persistente (cria o banco, o esquema e o índice FTS5 na primeira vez)."""
+    from utils.conversation_store import ConversationStore
+
+    # O idioma é detectado na thread de gravação, não na da interface
+    return ConversationStore(language_detector=detect_language)
+
+
+def load_language_detector():
+    """Importa o detector de idioma, que carrega a tabela de n-gramas na importação."""
+    import gui.language_utils
+
+    return gui.language_utils
+
+
+def load_audio_capture():
+    """Importa a captura do microfone (PyAudio) e o VAD, usados pela gravação."""
+    import utils.audio_utils
+    import utils.vad
+
+    return utils.audio_utils
+
+
+def create_playback():
+    from utils.playback import AudioPlayback
+
+    return AudioPlayback()
+
+
+def create_image_pipeline(services):
+    """Pipeline de imagens; o cliente da IA (criado em segundo plano) é obtido na thread do trabalho."""
+    from utils.image_pipeline import ImagePipeline
+
+    def generate(prompt, size):
+        openai_client = services.get("openai")
+        if openai_client is None:
+            raise RuntimeError(f"cliente da IA indisponível ({services.error('openai')})")
+        if not hasattr(openai_client, "generate_images"):
+            raise RuntimeError("geração de imagens indisponível pelo serviço de assistente")
+        return openai_client.generate_images(prompt, size=size)[0]
+
+    return ImagePipeline(generate)
+
+
+def listen_task(handle, recognizer, stop_event):
+    """
+    Tarefa: captura o microfone e transcreve em streaming, sem gravar arquivos.
+    O VAD encerra a captura no fim da fala e o áudio é enviado em 16 kHz mono.
+    As transcrições parciais são reportadas como progresso.
+
+    Telemetria: a gravação inteira (recording), o tempo até a primeira
+    transcrição parcial e o tempo entre o último bloco de áudio e a transcrição
+    final (transcription.final, a espera percebida após o fim da fala).
+    """
+    from utils.audio_utils import MicrophoneStream, RATE, RECOGNIZER_RATE
+    from utils.vad import VoiceActivityDetector
+
+    telemetry = get_telemetry()
+    start = time.perf_counter()
+    last_chunk_at = [start]
+    partials = [0]
+
+    def timed(chunks):
+        for chunk in chunks:
+            yield chunk
+            last_chunk_at[0] = time.perf_counter()
+
+    def on_partial(text):
+        if not partials[0]:
+            telemetry.record("transcription.first_partial", time.perf_counter() - start)
+        partials[0] += 1
+        handle.report_progress(text)
+
+    should_stop = lambda: handle.is_cancelled() or stop_event.is_set()
+    vad = VoiceActivityDetector(sample_rate=RATE)
+    with telemetry.span("recording"):
+        with MicrophoneStream(max_duration=MAX_RECORDING_SECONDS, should_stop=should_stop,
+                              vad=vad, output_rate=RECOGNIZER_RATE) as mic:
+            text = recognizer.recognize(timed(mic), mic.rate, on_partial=on_partial)
+        telemetry.record("transcription.final", time.perf_counter() - last_chunk_at[0])
+        return text
+
+
+def stream_reply_task(handle, services, prompt):
+    """Tarefa: aguarda o cliente da OpenAI (criado em segundo plano) e transmite a resposta."""
+    openai_client = services.get("openai")
+    if openai_client is None:
+        raise RuntimeError(f"cliente da IA indisponível ({services.error('openai')})")
+    return stream_ai_response(handle, openai_client, prompt)
+
+
 class MainWindow(QMainWindow):
     """
     Classe principal que representa a janela da aplicação Gysin IA.
@@ -38,13 +182,39 @@ class MainWindow(QMainWindow):
     BACKGROUND_SYSTEM = "#444444"
     FONT_SIZE = 12
 
+    # Sinais emitidos pela thread de reprodução do pipeline de voz
+    speech_error = Signal(str)
+    speech_finished = Signal()
+    # Emitidos pela thread do ServiceLoader quando um serviço fica pronto ou falha
+    service_ready = Signal(str)
+    service_failed = Signal(str, str)
+    # Emitidos pelas threads do pipeline de imagens: (id da mensagem, QImage ou erro)
+    image_loaded = Signal(int, object)
+    image_failed = Signal(int, str)
+
     def __init__(self):
         """Inicializa a janela principal e configura a interface do usuário."""
         super().__init__()
         self.setWindowTitle("Gysin IA")
         self.setMinimumSize(1080, 720)
+        self._speech_pipeline = None
+        self._recording = None
+        self._stop_recording = threading.Event()
+        self.recognizer = GoogleStreamingRecognizer()
+        self.executor = TaskExecutor(parent=self)
+        self.telemetry = get_telemetry()
+        self._reply_started_at = None
+        self._reply_message_id = None  # Mensagem preenchida pela resposta em streaming
+        self._reply_handle = None  # Tarefa da resposta atual
+        self.services = self.create_services()
+        self._unsaved_messages = []  # Enviadas antes de o histórico ficar pronto
+        self._first_paint_done = False
+        self._debug_panel = None
+        self._image_pipeline = None  # Criado no primeiro pedido de imagem
+        self._session_id = None  # Criada na primeira mensagem, para não gravar sessões vazias
+        self._paging_session = None  # Sessão reaberta com mensagens antigas ainda por carregar
+        self._oldest_loaded_id = None
         self.setup_ui()
-        self.openai_client = OpenAIClient()
         self.add_message("Sistema", "Bem-vindo ao Gysin IA! Como posso ajudar você hoje?", self.BACKGROUND_SYSTEM)
 
     def setup_ui(self):
@@ -53,10 +223,8 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(central_widget)
         main_layout = QVBoxLayout(central_widget)
 
-        # Área de exibição do chat
-        self.chat_display = QTextEdit()
-        self.chat_display.setReadOnly(True)
-        self.chat_display.setFont(QFont("Arial", self.FONT_SIZE))
+        # Área de exibição do chat (virtualizada: só as mensagens visíveis são desenhadas)
+        self.chat_display = TranscriptView(QFont("Arial", self.FONT_SIZE))
         self.chat_display.setStyleSheet("background-color: #393737;")
         main_layout.addWidget(self.chat_display)
 
@@ -65,6 +233,11 @@ class MainWindow(QMainWindow):
         self.typing_label.hide()
         main_layout.addWidget(self.typing_label)
 
+        # Label com a transcrição parcial enquanto o usuário fala
+        self.transcript_label = QLabel()
+        self.transcript_label.hide()
+        main_layout.addWidget(self.transcript_label)
+
         # Opção para habilitar respostas por áudio
         self.audio_response_checkbox = QCheckBox("Habilitar respostas por áudio")
         main_layout.addWidget(self.audio_response_checkbox)
@@ -89,25 +262,94 @@ class MainWindow(QMainWindow):
         self.record_button = QPushButton("Gravar Áudio")
         input_layout.addWidget(self.record_button)
 
+        # Botão para gerar uma imagem a partir do texto digitado
+        self.image_button = QPushButton("Gerar imagem")
+        input_layout.addWidget(self.image_button)
+
+        # Botão para buscar no histórico de conversas
+        self.search_button = QPushButton("Buscar no histórico")
+        self.search_button.setEnabled(False)  # Até o histórico ficar pronto
+        input_layout.addWidget(self.search_button)
+
+        # Botão para o painel de desempenho (latência por etapa do pipeline)
+        self.debug_button = QPushButton("Desempenho")
+        input_layout.addWidget(self.debug_button)
+
+        # Botão para cancelar a gravação ou a resposta em andamento
+        self.cancel_button = QPushButton("Cancelar")
+        self.cancel_button.setEnabled(False)
+        input_layout.addWidget(self.cancel_button)
+
         main_layout.addLayout(input_layout)
 
         # Conexões de sinais e slots
         self.send_button.clicked.connect(self.send_message)
         self.user_input.returnPressed.connect(self.send_message)
         self.record_button.clicked.connect(self.send_audio_message)
+        self.image_button.clicked.connect(self.generate_image_message)
+        self.cancel_button.clicked.connect(self.cancel_current_tasks)
+        self.search_button.clicked.connect(self.open_search)
+        self.debug_button.clicked.connect(self.open_debug_panel)
+        self.chat_display.top_reached.connect(self.load_older_messages)
+        self.executor.pending_changed.connect(self.on_pending_tasks_changed)
+        self.speech_error.connect(
+            lambda message: self.add_message("Erro", f"Erro no áudio: {message}", self.BACKGROUND_SYSTEM)
+        )
+        self.speech_finished.connect(self.on_speech_finished)
+        self.service_ready.connect(self.on_service_ready)
+        self.service_failed.connect(self.on_service_failed)
+        self.image_loaded.connect(self.on_image_loaded)
+        self.image_failed.connect(self.on_image_failed)
 
     @Slot()
     def send_audio_message(self):
-        """Grava e envia uma mensagem de áudio do usuário."""
-        audio_filename = "user_audio.wav"
-        record_audio(audio_filename)
-        user_text = transcribe_audio(audio_filename)
+        """Inicia a gravação com transcrição em streaming, ou a encerra se já estiver gravando."""
+        if self._recording:
+            self._stop_recording.set()
+            self.record_button.setEnabled(False)
+            return
+
+        self._stop_recording = threading.Event()
+        self.telemetry.new_trace()
+        self._recording = self.submit_task(
+            "listen", listen_task, self.recognizer, self._stop_recording,
+            on_progress=self.on_partial_transcript,
+            on_result=self.on_transcription_finished,
+            on_error=self.on_recording_error,
+            on_cancelled=self.reset_record_button
+        )
+        if self._recording:
+            self.record_button.setText("Parar gravação")
+            self.transcript_label.setText("Ouvindo...")
+            self.transcript_label.show()
+
+    @Slot(object)
+    def on_partial_transcript(self, text):
+        """Mostra a transcrição parcial enquanto o usuário ainda está falando."""
+        self.transcript_label.setText(f"Você: {text}...")
+
+    @Slot(object)
+    def on_transcription_finished(self, user_text):
+        """Exibe a transcrição e solicita a resposta da IA."""
+        self.reset_record_button()
         if user_text:
             self.add_message("Você", user_text, self.BACKGROUND_USER)
+            self.save_message("Você", user_text)
             self.get_ai_response(user_text)
         else:
             self.add_message("Sistema", "Não foi possível transcrever o áudio.", self.BACKGROUND_SYSTEM)
 
+    @Slot(str)
+    def on_recording_error(self, message):
+        self.reset_record_button()
+        self.add_message("Sistema", f"Erro ao gravar áudio: {message}", self.BACKGROUND_SYSTEM)
+
+    def reset_record_button(self):
+        self._recording = None
+        self.transcript_label.hide()
+        self.record_button.setEnabled(True)
+        self.record_button.setText("Gravar Áudio")
+
     @Slot()
     def send_message(self):
         """Envia a mensagem do usuário e solicita resposta da IA."""
@@ -115,67 +357,306 @@ class MainWindow(QMainWindow):
         if not user_text:
             return  # Não envia mensagens vazias
 
+        self.telemetry.new_trace()
         self.add_message("Você", user_text, self.BACKGROUND_USER)
+        self.save_message("Você", user_text)
         self.user_input.clear()
-        self.user_input.setEnabled(False)
-        self.send_button.setEnabled(False)
-        self.typing_label.show()
-        QApplication.setOverrideCursor(Qt.WaitCursor)
 
-        # Processa a resposta da IA de forma assíncrona
-        QTimer.singleShot(100, lambda: self.get_ai_response(user_text))
+        # Processa a resposta da IA fora da thread da interface
+        self.get_ai_response(user_text)
 
-    def get_ai_response(self, user_text):
-        """Obtém a resposta da IA e a exibe."""
+    @Slot()
+    def generate_image_message(self):
+        """
+        Gera uma imagem a partir do texto digitado, sem bloquear a janela: a
+        mensagem mostra um marcador, depois a miniatura e por fim a imagem completa.
+        """
+        prompt = self.user_input.text().strip()
+        if not prompt:
+            return
+        self.telemetry.new_trace()
+        self.add_message("Você", prompt, self.BACKGROUND_USER)
+        self.save_message("Você", prompt)
+        self.user_input.clear()
+
+        message_id = self.chat_display.add_message("Gysin IA", f"Imagem: {prompt}", self.BACKGROUND_AI)
+        width, height = (int(value) for value in IMAGE_SIZE.split("x"))
+        self.chat_display.set_message_image(message_id, QSize(width, height))
+        if self._image_pipeline is None:
+            self._image_pipeline = create_image_pipeline(self.services)
+
+        # Os arquivos são decodificados na thread do pipeline; a GUI só recebe o QImage
+        load = lambda path: self.image_loaded.emit(message_id, QImage(path))
+        self._image_pipeline.submit(
+            prompt, IMAGE_SIZE, on_thumbnail=load, on_image=load,
+            on_error=lambda message: self.image_failed.emit(message_id, message)
+        )
+
+    @Slot(int, object)
+    def on_image_loaded(self, message_id, image):
+        if image.isNull():
+            self.on_image_failed(message_id, "arquivo de imagem inválido")
+            return
+        self.chat_display.set_message_image(message_id, image)
+
+    @Slot(int, str)
+    def on_image_failed(self, message_id, message):
+        self.chat_display.set_message_image(message_id, None)
+        self.add_message("Sistema", f"Erro ao gerar imagem: {message}", self.BACKGROUND_SYSTEM)
+
+    def submit_task(self, name, fn, *args, **callbacks):
+        """Agenda uma tarefa no executor, avisando o usuário se a fila estiver cheia."""
         try:
-            response = self.openai_client.get_response(user_text)
-            self.add_message("Gysin IA", response, self.BACKGROUND_AI)
-            
-            # Detectar o idioma da resposta
-            detected_language = detect_language(response)
-            language_code = 'pt-BR'  # Padrão
-
-            # Mapeamento de idiomas detectados para códigos de idioma
-            language_map = {
-                'pt': 'pt-BR',
-                'en': 'en-US',
-                'de': 'de-DE',
-                'es': 'es-ES'
-            }
-            
-            if detected_language in language_map:
-                language_code = language_map[detected_language]
-            
-            # Se habilitado, converter resposta em áudio
-            if self.audio_response_checkbox.isChecked():
-                audio_file = "response_audio.mp3"
-                text_to_speech(response, audio_file, language_code=language_code)
-                self.play_audio(audio_file)
-                
-        except Exception as e:
+            return self.executor.submit(name, fn, *args, **callbacks)
+        except TaskQueueFullError as e:
             self.add_message("Sistema", f"Erro: {str(e)}", self.BACKGROUND_SYSTEM)
-        finally:
-            self.user_input.setEnabled(True)
-            self.send_button.setEnabled(True)
+            return None
+
+    def get_ai_response(self, user_text):
+        """
+        Solicita a resposta da IA em streaming, exibindo cada pedaço à medida que chega.
+        Com as respostas por áudio habilitadas, cada frase completa já é enviada ao
+        pipeline de voz enquanto a IA ainda está gerando o restante.
+        """
+        # Uma nova mensagem substitui a resposta anterior que ainda esteja em andamento
+        self.cancel_reply()
+        self._reply_started_at = time.perf_counter()
+        self._reply_message_id = self.begin_streaming_message("Gysin IA", self.BACKGROUND_AI)
+        self.typing_label.show()
+        if self.audio_response_checkbox.isChecked():
+            # Sem esperar na thread da interface: se a reprodução ainda não estiver
+            # pronta, as frases já são sintetizadas e tocam quando ela ficar (on_service_ready)
+            self._speech_pipeline = SpeechPipeline(
+                synthesize=google_synthesize,
+                playback=self.services.peek("playback"),
+                language_code=DEFAULT_LANGUAGE_CODE,
+                resolve_language=language_code_for,
+                on_error=self.speech_error.emit,
+                on_finished=self.speech_finished.emit
+            )
+            self.cancel_button.setEnabled(True)
+        handle = None
+
+        def on_cancelled():
+            # O aviso chega depois; se a resposta já foi substituída, o indicador é da nova
+            if handle is not None and handle is self._reply_handle:
+                self.typing_label.hide()
+
+        handle = self._reply_handle = self.submit_task(
+            "llm", stream_reply_task, self.services, user_text,
+            group=REPLY_GROUP,
+            on_progress=self.on_ai_response_chunk,
+            on_result=self.on_ai_response_finished,
+            on_error=self.on_ai_response_error,
+            on_cancelled=on_cancelled
+        )
+        if handle is None:
             self.typing_label.hide()
-            QApplication.restoreOverrideCursor()
+
+    @Slot(object)
+    def on_ai_response_chunk(self, text):
+        """Exibe um pedaço da resposta e o encaminha ao pipeline de voz."""
+        if self._reply_started_at is not None:
+            # Do envio da pergunta até o primeiro texto da resposta na tela
+            self.telemetry.record("reply.first_text", time.perf_counter() - self._reply_started_at)
+            self._reply_started_at = None
+        self.chat_display.append_to_message(self._reply_message_id, text)
+        if self._speech_pipeline:
+            self._speech_pipeline.feed(text)
+
+    @Slot(object)
+    def on_ai_response_finished(self, response):
+        """Finaliza a resposta da IA, sintetizando o trecho final pendente."""
+        self.typing_label.hide()
+        if response:
+            self.save_message("Gysin IA", response)
+        if self._speech_pipeline:
+            self._speech_pipeline.finish()
+
+    @Slot()
+    def on_speech_finished(self):
+        self.cancel_button.setEnabled(self.executor.pending_count > 0)
+
+    @Slot(str)
+    def on_ai_response_error(self, message):
+        """Exibe um erro ocorrido durante a resposta da IA."""
+        self.typing_label.hide()
+        if self._speech_pipeline:
+            self._speech_pipeline.finish()
+        self.add_message("Sistema", f"Erro: {message}", self.BACKGROUND_SYSTEM)
+
+    @Slot()
+    def cancel_current_tasks(self):
+        """Cancela a gravação e a resposta em andamento."""
+        if self._recording:
+            self._recording.cancel()
+        self.cancel_reply()
+
+    def cancel_reply(self):
+        """Cancela a geração, a síntese e a reprodução da resposta atual."""
+        self.executor.cancel_group(REPLY_GROUP)
+        self._reply_handle = None
+        self.typing_label.hide()
+        if self._speech_pipeline:
+            self._speech_pipeline.cancel()
+            self._speech_pipeline = None
+
+    @Slot(int)
+    def on_pending_tasks_changed(self, pending):
+        self.cancel_button.setEnabled(pending > 0 or self._speech_pipeline is not None)
 
     def add_message(self, sender, message, background_color):
         """Adiciona uma mensagem à área de chat."""
-        self.chat_display.append(f'<div style="background-color: {background_color}; padding: 5px; margin: 5px 0;">'
-                                 f'<b>{sender}:</b> {message}</div>')
-        self.chat_display.moveCursor(QTextCursor.End)
-        self.chat_display.ensureCursorVisible()
+        self.chat_display.add_message(sender, message, background_color)
+
+    def begin_streaming_message(self, sender, background_color):
+        """Cria uma mensagem vazia que será preenchida pelos pedaços da resposta; retorna o seu id."""
+        return self.chat_display.begin_streaming_message(sender, background_color)
+
+    @property
+    def store(self):
+        """Histórico persistente, ou None enquanto não abriu (ou se falhou): sem ele, nada é salvo."""
+        return self.services.peek("store")
+
+    def create_services(self):
+        """
+        Registra os serviços criados em segundo plano, do mais ao menos urgente.
+        Eles só começam a ser criados depois da primeira pintura da janela.
+        """
+        services = ServiceLoader(on_failed=self.service_failed.emit, on_ready=self.service_ready.emit)
+        services.register("openai", create_openai_client)
+        services.register("store", open_conversation_store)
+        services.register("language", load_language_detector)
+        services.register("microphone", load_audio_capture)
+        services.register("playback", create_playback)
+        return services
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            # Inicia o aquecimento só depois que a janela terminou de aparecer
+            QTimer.singleShot(0, self.services.start)
+
+    @Slot(str)
+    def on_service_ready(self, name):
+        if name == "store":
+            self.search_button.setEnabled(True)
+            unsaved, self._unsaved_messages = self._unsaved_messages, []
+            for sender, text, created_at in unsaved:
+                self.save_message(sender, text, created_at)
+        if name == "playback" and self._speech_pipeline and self._speech_pipeline.playback is None:
+            self._speech_pipeline.attach_playback(self.services.peek("playback"))
+
+    @Slot(str, str)
+    def on_service_failed(self, name, message):
+        """Informa a falha de um serviço opcional; o restante da aplicação continua funcionando."""
+        if name == "store":
+            self._unsaved_messages = []
+        if name == "microphone":
+            self.record_button.setEnabled(False)
+        if name == "playback":
+            self.audio_response_checkbox.setChecked(False)
+            self.audio_response_checkbox.setEnabled(False)
+            if self._speech_pipeline:
+                # A resposta em andamento esperava pela reprodução
+                self._speech_pipeline.cancel()
+                self._speech_pipeline = None
+        self.add_message("Sistema", f"{SERVICE_NAMES.get(name, name)} indisponível: {message}",
+                         self.BACKGROUND_SYSTEM)
+
+    def save_message(self, sender, text, created_at=None):
+        """
+        Grava a mensagem no histórico (em lote, fora da thread da interface). Se o
+        histórico ainda estiver abrindo, ela é gravada quando ele ficar pronto.
+        """
+        store = self.store
+        if store is None:
+            if not self.services.is_ready("store"):
+                self._unsaved_messages.append((sender, text, created_at or time.time()))
+            return
+        if self._session_id is None:
+            self._session_id = store.new_session(title=text[:80])
+        store.add_message(self._session_id, sender, text, created_at=created_at)
+
+    def background_for(self, sender):
+        return {"Você": self.BACKGROUND_USER, "Gysin IA": self.BACKGROUND_AI}.get(sender, self.BACKGROUND_SYSTEM)
+
+    @Slot()
+    def open_search(self):
+        from gui.search_dialog import SearchDialog
+
+        dialog = SearchDialog(self.store, self)
+        dialog.result_selected.connect(self.open_session)
+        dialog.exec()
+
+    @Slot()
+    def open_debug_panel(self):
+        """Mostra o painel de desempenho (p50/p95 por etapa), sem bloquear a janela."""
+        from gui.debug_panel import TelemetryPanel
+
+        if self._debug_panel is None:
+            self._debug_panel = TelemetryPanel(self.telemetry, self)
+        self._debug_panel.show()
+        self._debug_panel.raise_()
+
+    @Slot(int, int)
+    def open_session(self, session_id, message_id=None):
+        """
+        Reabre uma sessão antiga mostrando a última página de mensagens; as
+        anteriores são carregadas ao rolar até o início. Se message_id for
+        informado, carrega páginas até alcançá-la e rola até ela.
+        """
+        self.cancel_reply()
+        self.chat_display.clear()
+        openai_client = self.services.peek("openai")
+        if openai_client:
+            openai_client.memory.clear()
+        self._session_id = session_id
+        self._paging_session = session_id
+        self._oldest_loaded_id = None
+        self.load_older_messages()
+        self.chat_display.scroll_to_bottom()
+        if message_id is None:
+            return
+        while self._paging_session is not None and message_id < self._oldest_loaded_id:
+            self.load_older_messages()
+        if self._oldest_loaded_id is not None and message_id >= self._oldest_loaded_id:
+            # As linhas carregadas são as mensagens da sessão a partir da mais antiga carregada
+            # Todas já foram lidas do banco: a contagem não precisa esperar a gravação
+            row = self.store.count_messages(session_id, self._oldest_loaded_id, message_id, flush=False) - 1
+            self.chat_display.scroll_to_row(row)
+
+    @Slot()
+    def load_older_messages(self):
+        """Carrega a página anterior da sessão reaberta. Retorna quantas mensagens entraram."""
+        if not self.store or self._paging_session is None:
+            return 0
+        # Só a primeira página pode incluir mensagens ainda na fila de gravação; as
+        # anteriores já estão no banco e são lidas sem esperar a thread de gravação
+        page = self.store.load_messages(self._paging_session, before_id=self._oldest_loaded_id,
+                                        limit=HISTORY_PAGE_SIZE, flush=self._oldest_loaded_id is None)
+        inserted = self.chat_display.prepend_messages(
+            (m["sender"], m["text"], self.background_for(m["sender"])) for m in page
+        )
+        if inserted:
+            self._oldest_loaded_id = page[len(page) - inserted]["id"]
+        if len(page) < HISTORY_PAGE_SIZE or inserted < len(page):
+            # Início da sessão (ou limite da visão) alcançado
+            self._paging_session = None
+        return inserted
 
     def closeEvent(self, event):
         """Manipula o evento de fechamento da janela."""
-        # Adiciona qualquer lógica de limpeza necessária aqui
+        self.cancel_current_tasks()
+        self.executor.wait_for_done(2000)
+        store = self.store
+        if store:
+            store.close()
+        playback = self.services.peek("playback")
+        if playback:
+            playback.close()
+        if self._image_pipeline:
+            self._image_pipeline.close()
+        self.telemetry.close()
         event.accept()
-
-    def play_audio(self, audio_file):
-        """Reproduz um arquivo de áudio."""
-        try:
-            player = vlc.MediaPlayer(audio_file)
-            player.play()
-        except Exception as e:
-            self.add_message("Erro", f"Erro ao reproduzir áudio: {str(e)}", self.BACKGROUND_SYSTEM)
\ No newline at end of file
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: SearchDialog
+
+Diálogo de busca no histórico de conversas. A consulta é feita no índice FTS5
+do ConversationStore enquanto o usuário digita (com um pequeno atraso para não
+buscar a cada tecla) e a mensagem escolhida abre a sessão correspondente.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import time
+
+from PySide6.QtCore import Qt, QTimer, Signal, Slot
+from PySide6.QtWidgets import QDialog, QLabel, QLineEdit, QListWidget, QListWidgetItem, QVBoxLayout
+
+
+class SearchDialog(QDialog):
+    """Busca mensagens antigas e emite result_selected(session_id, message_id)."""
+
+    SEARCH_DELAY_MS = 150
+    MAX_RESULTS = 50
+
+    result_selected = Signal(int, int)
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.setWindowTitle("Buscar no histórico")
+        self.resize(600, 400)
+
+        layout = QVBoxLayout(self)
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Digite palavras para buscar nas conversas...")
+        layout.addWidget(self.query_input)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        self.results_list = QListWidget()
+        self.results_list.setWordWrap(True)
+        layout.addWidget(self.results_list)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.SEARCH_DELAY_MS)
+        self._timer.timeout.connect(self.run_search)
+        self.query_input.textChanged.connect(self._timer.start)
+        self.query_input.returnPressed.connect(self.run_search)
+        self.results_list.itemActivated.connect(self.open_result)
+
+    @Slot()
+    def run_search(self):
+        """Executa a busca e preenche a lista de resultados."""
+        self._timer.stop()
+        self.results_list.clear()
+        query = self.query_input.text().strip()
+        if not query:
+            self.status_label.clear()
+            return
+        start = time.perf_counter()
+        try:
+            results = self.store.search(query, limit=self.MAX_RESULTS)
+        except Exception as e:
+            self.status_label.setText(f"Erro na busca: {e}")
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.status_label.setText(f"{len(results)} resultado(s) em {elapsed_ms:.0f} ms")
+        for result in results:
+            when = time.strftime("%d/%m/%Y %H:%M", time.localtime(result["created_at"]))
+            item = QListWidgetItem(f"{when} · {result['sender']}: {result['snippet']}")
+            item.setData(Qt.UserRole, (result["session_id"], result["id"]))
+            self.results_list.addItem(item)
+
+    @Slot(QListWidgetItem)
+    def open_result(self, item):
+        session_id, message_id = item.data(Qt.UserRole)
+        self.result_selected.emit(session_id, message_id)
+        self.accept()
@@ -0,0 +1,618 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Transcript
+
+Exibição da conversa no padrão modelo/visão do Qt. As mensagens ficam em um
+armazenamento compacto (deque de tuplas, com remetentes e cores internados),
+expostas por um QAbstractListModel; a visão só mede (e desenha) as linhas
+visíveis: as demais ficam com uma altura estimada até aparecerem na tela, e as
+medidas são guardadas por largura. Acrescentar uma mensagem ou um pedaço de
+resposta em streaming custa O(1), e o número de
+mensagens mantidas em memória é limitado (as mais antigas são descartadas em
+lotes). Uma mensagem pode ter uma imagem abaixo do texto (imagens geradas):
+primeiro um marcador do tamanho final, depois a miniatura e por fim a imagem
+completa, sempre no mesmo espaço, para que o layout não salte. Um clique
+seleciona a mensagem, que pode ser copiada com Ctrl+C ou pelo menu de contexto.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import bisect
+import collections
+import itertools
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QRect, QSize, Qt, Signal
+from PySide6.QtGui import QColor, QFont, QFontMetrics, QImage, QKeySequence, QPainter
+from PySide6.QtWidgets import (QAbstractScrollArea, QApplication, QMenu, QStyle, QStyleOptionViewItem,
+                               QStyledItemDelegate)
+
+# Papéis de dados expostos pelo modelo, além do Qt.DisplayRole (texto)
+SENDER_ROLE = Qt.UserRole + 1
+COLOR_ROLE = Qt.UserRole + 2
+MESSAGE_ID_ROLE = Qt.UserRole + 3
+IMAGE_ROLE = Qt.UserRole + 4
+
+DEFAULT_MAX_MESSAGES = 5000
+
+# Maior área ocupada por uma imagem na conversa; imagens maiores são reduzidas
+# ao serem anexadas, para limitar a memória
+IMAGE_MAX_SIZE = QSize(384, 384)
+
+
+class TranscriptModel(QAbstractListModel):
+    """
+    Modelo de lista com as mensagens da conversa.
+
+    Cada mensagem é uma tupla (id, índice do remetente, índice da cor, texto).
+    Quando o total passa de max_messages, as mensagens mais antigas são removidas
+    em lotes de evict_batch, para que o custo da remoção seja amortizado. As
+    imagens ficam à parte, por id da mensagem: QImage, ou QSize enquanto a
+    imagem ainda está sendo gerada.
+    """
+
+    def __init__(self, max_messages=DEFAULT_MAX_MESSAGES, evict_batch=None, parent=None):
+        super().__init__(parent)
+        self.max_messages = max_messages
+        self.evict_batch = evict_batch or max(1, max_messages // 10)
+        self.evicted = 0
+        self._messages = collections.deque()
+        self._ids = itertools.count()
+        self._senders = []
+        self._sender_index = {}
+        self._colors = []
+        self._color_index = {}
+        self._images = {}
+
+    def _intern(self, value, values, index):
+        position = index.get(value)
+        if position is None:
+            position = index[value] = len(values)
+            values.append(value)
+        return position
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._messages)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._messages):
+            return None
+        message_id, sender, color, text = self._messages[index.row()]
+        if role == Qt.DisplayRole:
+            return text
+        if role == SENDER_ROLE:
+            return self._senders[sender]
+        if role == COLOR_ROLE:
+            return self._colors[color]
+        if role == MESSAGE_ID_ROLE:
+            return message_id
+        if role == IMAGE_ROLE:
+            return self._images.get(message_id)
+        return None
+
+    def append_message(self, sender, text, color):
+        """Acrescenta uma mensagem ao final e retorna o seu id."""
+        if len(self._messages) >= self.max_messages:
+            self._evict()
+        message_id = next(self._ids)
+        row = len(self._messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._messages.append((message_id, self._intern(sender, self._senders, self._sender_index),
+                               self._intern(color, self._colors, self._color_index), text))
+        self.endInsertRows()
+        return message_id
+
+    def prepend_messages(self, messages):
+        """
+        Insere mensagens antigas (sender, texto, cor) no início, em ordem cronológica,
+        sem ultrapassar max_messages. Retorna quantas foram inseridas.
+        """
+        room = self.max_messages - len(self._messages)
+        messages = list(messages)[-room:] if room > 0 else []
+        if not messages:
+            return 0
+        self.beginInsertRows(QModelIndex(), 0, len(messages) - 1)
+        self._messages.extendleft(
+            (next(self._ids), self._intern(sender, self._senders, self._sender_index),
+             self._intern(color, self._colors, self._color_index), text)
+            for sender, text, color in reversed(messages)
+        )
+        self.endInsertRows()
+        return len(messages)
+
+    def _row_of(self, message_id):
+        """Linha da mensagem, ou None se ela já saiu da lista."""
+        # Streaming e imagens pertencem a mensagens recentes: a busca começa pelo fim
+        for row in range(len(self._messages) - 1, -1, -1):
+            if self._messages[row][0] == message_id:
+                return row
+        return None
+
+    def append_to_message(self, message_id, text):
+        """
+        Acrescenta texto a uma mensagem (usado no streaming da resposta), mesmo
+        que outras tenham sido adicionadas depois dela. Retorna False se a
+        mensagem já saiu da lista.
+        """
+        row = self._row_of(message_id)
+        if row is None:
+            return False
+        message_id, sender, color, current = self._messages[row]
+        self._messages[row] = (message_id, sender, color, current + text)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole])
+        return True
+
+    def image_at(self, row):
+        """Imagem (ou marcador) da mensagem na linha, ou None."""
+        return self._images.get(self._messages[row][0]) if self._images else None
+
+    def set_image(self, message_id, image):
+        """
+        Anexa (ou troca) a imagem de uma mensagem: QImage, ou QSize para reservar
+        o espaço enquanto ela é gerada. Retorna False se a mensagem já saiu da lista.
+        """
+        row = self._row_of(message_id)
+        if row is None:
+            return False
+        self._images[message_id] = image
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [IMAGE_ROLE])
+        return True
+
+    def _evict(self):
+        count = min(self.evict_batch, len(self._messages))
+        self.beginRemoveRows(QModelIndex(), 0, count - 1)
+        for _ in range(count):
+            self._images.pop(self._messages.popleft()[0], None)
+        self.endRemoveRows()
+        self.evicted += count
+
+    def clear(self):
+        self.beginResetModel()
+        self._messages.clear()
+        self._images.clear()
+        self.endResetModel()
+
+
+class MessageDelegate(QStyledItemDelegate):
+    """
+    Desenha uma mensagem como um bloco com fundo colorido, remetente em negrito
+    e texto com quebra de linha, seguido da imagem da mensagem, se houver.
+    sizeHint calcula a altura para uma largura; a TranscriptView guarda o
+    resultado e só volta a pedir quando o texto, a imagem ou a largura mudam.
+    estimate_height dá uma altura aproximada, sem o layout do texto, para as
+    linhas que ainda não apareceram na tela.
+    """
+
+    PADDING = 5
+    MARGIN = 5
+
+    def __init__(self, font, parent=None):
+        super().__init__(parent)
+        self.font = QFont(font)
+        self.bold_font = QFont(font)
+        self.bold_font.setBold(True)
+        self._metrics = QFontMetrics(self.font)
+        self._bold_metrics = QFontMetrics(self.bold_font)
+        self._indents = {}  # remetente -> recuo (em espaços) da primeira linha
+
+    def _indent(self, sender):
+        """O remetente ocupa o início da primeira linha: o texto recebe um recuo equivalente."""
+        indent = self._indents.get(sender)
+        if indent is None:
+            space = self._metrics.horizontalAdvance(" ") or 1
+            sender_width = self._bold_metrics.horizontalAdvance(f"{sender}: ")
+            indent = self._indents[sender] = " " * -(-sender_width // space)
+        return indent
+
+    @staticmethod
+    def _image(index):
+        # Lida direto do modelo, sem passar por QVariant: é consultada para cada linha
+        # estimada, e em algumas versões do PySide6 cada None devolvido por
+        # index.data() desconta uma referência do próprio None
+        return index.model().image_at(index.row())
+
+    @staticmethod
+    def image_size(image, inner_width):
+        """Tamanho da imagem (ou do marcador) na tela: cabe na largura e em IMAGE_MAX_SIZE."""
+        size = image.size() if isinstance(image, QImage) else QSize(image)
+        bounds = QSize(min(inner_width, IMAGE_MAX_SIZE.width()), IMAGE_MAX_SIZE.height())
+        return size.scaled(bounds, Qt.KeepAspectRatio)
+
+    def _inner_width(self, width):
+        return max(1, width - 2 * (self.PADDING + self.MARGIN))
+
+    def estimate_height(self, index, width):
+        """Altura aproximada pelo número de caracteres (sem quebrar o texto em linhas)."""
+        inner = self._inner_width(width)
+        chars_per_line = max(1, inner // max(1, self._metrics.averageCharWidth()))
+        text = index.data(Qt.DisplayRole) or ""
+        lines = text.count("\n") + 1 + (len(index.data(SENDER_ROLE) or "") + len(text)) // chars_per_line
+        height = lines * self._metrics.lineSpacing() + 2 * self.PADDING + self.MARGIN
+        image = self._image(index)
+        if image is not None:
+            height += self.PADDING + self.image_size(image, inner).height()
+        return height
+
+    def sizeHint(self, option, index):
+        width = option.rect.width()
+        inner = self._inner_width(width)
+        text = self._indent(index.data(SENDER_ROLE)) + (index.data(Qt.DisplayRole) or "")
+        bounds = self._metrics.boundingRect(QRect(0, 0, inner, 1 << 20), Qt.TextWordWrap, text)
+        height = max(bounds.height(), self._bold_metrics.height()) + 2 * self.PADDING + self.MARGIN
+        image = self._image(index)
+        if image is not None:
+            height += self.PADDING + self.image_size(image, inner).height()
+        return QSize(width, height)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect.adjusted(self.MARGIN, self.MARGIN // 2, -self.MARGIN, -(self.MARGIN - self.MARGIN // 2))
+        background = QColor(index.data(COLOR_ROLE) or "#ffffff")
+        painter.fillRect(rect, background)
+        if option.state & QStyle.State_Selected:
+            painter.setPen(option.palette.highlight().color())
+            painter.drawRect(rect.adjusted(0, 0, -1, -1))
+        # Texto claro sobre fundos escuros (mensagens do sistema)
+        painter.setPen(QColor("#ffffff") if background.lightness() < 128 else QColor("#000000"))
+
+        sender = index.data(SENDER_ROLE)
+        text_rect = rect.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        painter.setFont(self.bold_font)
+        painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignTop, f"{sender}:")
+        painter.setFont(self.font)
+        painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap,
+                         self._indent(sender) + (index.data(Qt.DisplayRole) or ""))
+
+        image = self._image(index)
+        if image is not None:
+            size = self.image_size(image, text_rect.width())
+            target = QRect(text_rect.left(), text_rect.bottom() + 1 - size.height(), size.width(), size.height())
+            if isinstance(image, QImage):
+                # A miniatura é ampliada para o tamanho final até a imagem completa chegar
+                painter.setRenderHint(QPainter.SmoothPixmapTransform)
+                painter.drawImage(target, image)
+            else:
+                painter.fillRect(target, background.darker(115))
+                painter.drawText(target, Qt.AlignCenter, "…")
+        painter.restore()
+
+
+class TranscriptView(QAbstractScrollArea):
+    """
+    Visão virtualizada da conversa, com a interface add_message,
+    begin_streaming_message e append_to_message usada pelas janelas.
+
+    Guarda a altura de cada linha e a posição vertical acumulada. As linhas
+    novas recebem uma altura estimada (sem layout de texto) e só são medidas
+    pelo delegate quando ficam visíveis; as medidas valem para a largura em que
+    foram feitas e as das últimas larguras ficam guardadas. Assim, carregar uma
+    sessão longa não mede todas as mensagens, acrescentar uma linha ou alterar a
+    última custa O(1) e a pintura percorre só as linhas visíveis (busca binária
+    pela primeira). O QListView refaz o layout de todas as linhas a cada
+    inserção, por isso não é usado aqui. Rola automaticamente para o fim só se
+    o usuário já estava no fim.
+    """
+
+    # Emitido quando o usuário rola até o início (para carregar mensagens antigas)
+    top_reached = Signal()
+
+    # Larguras anteriores cujas medidas são mantidas (por exemplo, janela maximizada e restaurada)
+    CACHED_WIDTHS = 2
+
+    def __init__(self, font=None, max_messages=DEFAULT_MAX_MESSAGES, parent=None):
+        super().__init__(parent)
+        self.transcript_model = TranscriptModel(max_messages, parent=self)
+        self.delegate = MessageDelegate(font or self.font(), self)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        # Barra sempre visível: a largura não muda quando ela aparece, evitando recalcular tudo
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
+        self.verticalScrollBar().setSingleStep(20)
+        # Recebe o foco ao clicar, para copiar a mensagem selecionada com Ctrl+C
+        self.setFocusPolicy(Qt.ClickFocus)
+        self.height_computations = 0
+        self.selected_id = None
+        self._width = self.viewport().width()
+        self._heights = []
+        self._offsets = []  # topo de cada linha
+        self._total_height = 0
+        self._measured = {}  # id da mensagem -> altura medida na largura atual
+        self._width_cache = collections.OrderedDict()  # largura anterior -> medidas
+        self._measuring = False
+
+        model = self.transcript_model
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self._on_rows_removed)
+        model.dataChanged.connect(self._on_data_changed)
+        model.modelReset.connect(self._on_model_reset)
+        self.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+
+    def _message_id(self, row):
+        return self.transcript_model.index(row).data(MESSAGE_ID_ROLE)
+
+    def _row_height(self, row):
+        """Mede a linha com o delegate (layout do texto)."""
+        self.height_computations += 1
+        option = QStyleOptionViewItem()
+        option.rect = QRect(0, 0, self._width, 0)
+        return self.delegate.sizeHint(option, self.transcript_model.index(row)).height()
+
+    def _known_height(self, row):
+        """Altura já medida nesta largura, ou a estimativa."""
+        height = self._measured.get(self._message_id(row))
+        if height is None:
+            height = self.delegate.estimate_height(self.transcript_model.index(row), self._width)
+        return height
+
+    def _measure_visible(self):
+        """
+        Mede as linhas visíveis que ainda têm altura estimada. Se uma linha que
+        começa acima do topo muda de altura, a rolagem acompanha a diferença,
+        para que o conteúdo visível não salte.
+        """
+        if self._measuring:
+            return
+        self._measuring = True
+        try:
+            scroll_bar = self.verticalScrollBar()
+            follow = self._at_bottom()
+            while True:
+                top = scroll_bar.value()
+                bottom = top + self.viewport().height()
+                row = max(0, bisect.bisect_right(self._offsets, top) - 1)
+                shift, changed = 0, False
+                while row < len(self._offsets) and self._offsets[row] < bottom:
+                    message_id = self._message_id(row)
+                    if message_id not in self._measured:
+                        height = self._measured[message_id] = self._row_height(row)
+                        if height != self._heights[row]:
+                            if self._offsets[row] < top:
+                                shift += height - self._heights[row]
+                            self._heights[row] = height
+                            changed = True
+                    row += 1
+                if not changed:
+                    return
+                self._rebuild_offsets()
+                scroll_bar.setValue(scroll_bar.maximum() if follow else top + shift)
+        finally:
+            self._measuring = False
+
+    def _relayout(self):
+        """Refaz as alturas (após reset do modelo ou mudança de largura), medindo só as visíveis."""
+        self._heights = [self._known_height(row) for row in range(self.transcript_model.rowCount())]
+        self._rebuild_offsets()
+        self._measure_visible()
+
+    def _set_width(self, width):
+        """Troca a largura, guardando as medidas da anterior e reaproveitando as da nova."""
+        if self._measured:
+            self._width_cache[self._width] = self._measured
+            self._width_cache.move_to_end(self._width)
+            while len(self._width_cache) > self.CACHED_WIDTHS:
+                self._width_cache.popitem(last=False)
+        self._width = width
+        self._measured = self._width_cache.pop(width, {})
+        self._relayout()
+
+    def _forget(self, message_id):
+        self._measured.pop(message_id, None)
+        for measured in self._width_cache.values():
+            measured.pop(message_id, None)
+
+    def _rebuild_offsets(self):
+        offsets, top = [], 0
+        for height in self._heights:
+            offsets.append(top)
+            top += height
+        self._offsets = offsets
+        self._total_height = top
+        self._update_scroll_bar()
+        self.viewport().update()
+
+    def _on_rows_inserted(self, parent, first, last):
+        if first != len(self._heights):
+            # Páginas antigas inseridas no início: mantém visível o mesmo conteúdo
+            heights = [self._known_height(row) for row in range(first, last + 1)]
+            self._heights[first:first] = heights
+            scroll_bar = self.verticalScrollBar()
+            value = scroll_bar.value()
+            self._rebuild_offsets()
+            if first == 0:
+                scroll_bar.setValue(value + sum(heights))
+            self._measure_visible()
+            return
+        for row in range(first, last + 1):
+            height = self._known_height(row)
+            self._heights.append(height)
+            self._offsets.append(self._total_height)
+            self._total_height += height
+        self._update_scroll_bar()
+        self._update_rows(first, last)
+        self._measure_visible()
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        for row in range(first, last + 1):
+            message_id = self._message_id(row)
+            self._forget(message_id)
+            if message_id == self.selected_id:
+                self.selected_id = None
+
+    def _on_rows_removed(self, parent, first, last):
+        # Remoções acontecem em lotes no início da lista: o custo O(n) fica amortizado
+        del self._heights[first:last + 1]
+        self._rebuild_offsets()
+        self._measure_visible()
+
+    def _on_model_reset(self):
+        self._measured = {}
+        self._width_cache.clear()
+        self.selected_id = None
+        self._relayout()
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            message_id = self._message_id(row)
+            self._forget(message_id)
+            self._heights[row] = self._measured[message_id] = self._row_height(row)
+        if bottom_right.row() == len(self._heights) - 1 and top_left.row() == bottom_right.row():
+            # Caso comum (streaming na última linha): só o total muda
+            self._total_height = self._offsets[-1] + self._heights[-1]
+            self._update_scroll_bar()
+            self._update_rows(bottom_right.row(), bottom_right.row())
+        else:
+            self._rebuild_offsets()
+
+    def _update_scroll_bar(self):
+        scroll_bar = self.verticalScrollBar()
+        page = self.viewport().height()
+        scroll_bar.setPageStep(page)
+        scroll_bar.setRange(0, max(0, self._total_height - page))
+
+    def _update_rows(self, first, last):
+        """Agenda a pintura apenas da faixa ocupada pelas linhas indicadas."""
+        scroll = self.verticalScrollBar().value()
+        top = self._offsets[first] - scroll
+        bottom = self._offsets[last] + self._heights[last] - scroll
+        if bottom > 0 and top < self.viewport().height():
+            self.viewport().update(QRect(0, top, self._width, bottom - top))
+
+    def scrollContentsBy(self, dx, dy):
+        # Reaproveita os pixels já pintados; só a faixa exposta é repintada
+        self.viewport().scroll(0, dy)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.viewport().width() != self._width:
+            follow = self._at_bottom()
+            self._set_width(self.viewport().width())
+            if follow:
+                self.scroll_to_bottom()
+        else:
+            self._update_scroll_bar()
+            self._measure_visible()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        scroll = self.verticalScrollBar().value()
+        area = event.rect()
+        bottom = scroll + area.bottom() + 1
+        row = max(0, bisect.bisect_right(self._offsets, scroll + area.top()) - 1)
+        option = QStyleOptionViewItem()
+        option.palette = self.palette()
+        while row < len(self._offsets) and self._offsets[row] < bottom:
+            index = self.transcript_model.index(row)
+            option.rect = QRect(0, self._offsets[row] - scroll, self._width, self._heights[row])
+            option.state = QStyle.State_Selected if index.data(MESSAGE_ID_ROLE) == self.selected_id \
+                else QStyle.State_None
+            self.delegate.paint(painter, option, index)
+            row += 1
+        painter.end()
+
+    def row_at(self, y):
+        """Retorna a linha na coordenada y do viewport (ou -1)."""
+        position = self.verticalScrollBar().value() + y
+        row = bisect.bisect_right(self._offsets, position) - 1
+        return row if 0 <= row < len(self._offsets) and position < self._total_height else -1
+
+    def select_row(self, row):
+        """Seleciona a mensagem da linha (-1 limpa a seleção)."""
+        selected_id = self._message_id(row) if 0 <= row < len(self._offsets) else None
+        if selected_id != self.selected_id:
+            self.selected_id = selected_id
+            self.viewport().update()
+
+    def copy_message(self, message_id=None):
+        """Copia o texto da mensagem (por padrão, a selecionada); retorna o texto copiado ou None."""
+        message_id = self.selected_id if message_id is None else message_id
+        row = self.transcript_model._row_of(message_id) if message_id is not None else None
+        if row is None:
+            return None
+        text = self.transcript_model.index(row).data(Qt.DisplayRole)
+        QApplication.clipboard().setText(text)
+        return text
+
+    def mousePressEvent(self, event):
+        if event.button() in (Qt.LeftButton, Qt.RightButton):
+            self.select_row(self.row_at(event.position().toPoint().y()))
+        super().mousePressEvent(event)
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy) and self.selected_id is not None:
+            self.copy_message()
+            return
+        super().keyPressEvent(event)
+
+    def contextMenuEvent(self, event):
+        row = self.row_at(event.pos().y())
+        if row < 0:
+            return
+        self.select_row(row)
+        message_id = self.selected_id
+        menu = QMenu(self)
+        menu.addAction("Copiar mensagem", lambda: self.copy_message(message_id))
+        menu.exec(event.globalPos())
+
+    def _on_scrolled(self, value):
+        self._measure_visible()
+        if value == 0 and self._heights:
+            self.top_reached.emit()
+
+    def scroll_to_row(self, row):
+        """Rola até que a linha fique no topo da área visível."""
+        if 0 <= row < len(self._offsets):
+            self.verticalScrollBar().setValue(self._offsets[row])
+            self._measure_visible()
+
+    def _at_bottom(self):
+        scroll_bar = self.verticalScrollBar()
+        return scroll_bar.value() >= scroll_bar.maximum() - 4
+
+    def scroll_to_bottom(self):
+        self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        self._measure_visible()
+
+    def prepend_messages(self, messages):
+        """Insere mensagens antigas (sender, texto, cor) no início; retorna quantas couberam."""
+        return self.transcript_model.prepend_messages(messages)
+
+    def add_message(self, sender, message, background_color):
+        """Adiciona uma mensagem ao fim da conversa e retorna o seu id."""
+        follow = self._at_bottom()
+        message_id = self.transcript_model.append_message(sender, message, background_color)
+        if follow:
+            self.scroll_to_bottom()
+        return message_id
+
+    def set_message_image(self, message_id, image):
+        """
+        Mostra uma imagem abaixo do texto da mensagem (QImage, reduzida para caber
+        em IMAGE_MAX_SIZE), ou um marcador do tamanho indicado (QSize).
+        """
+        if isinstance(image, QImage) and (image.width() > IMAGE_MAX_SIZE.width()
+                                          or image.height() > IMAGE_MAX_SIZE.height()):
+            image = image.scaled(IMAGE_MAX_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        follow = self._at_bottom()
+        updated = self.transcript_model.set_image(message_id, image)
+        if updated and follow:
+            self.scroll_to_bottom()
+        return updated
+
+    def begin_streaming_message(self, sender, background_color):
+        """Cria uma mensagem vazia que será preenchida pelos pedaços da resposta; retorna o seu id."""
+        return self.add_message(sender, "", background_color)
+
+    def append_to_message(self, message_id, text):
+        """Acrescenta texto ao final da mensagem indicada."""
+        follow = self._at_bottom()
+        updated = self.transcript_model.append_to_message(message_id, text)
+        if updated and follow:
+            self.scroll_to_bottom()
+        return updated
+
+    def clear(self):
+        self.transcript_model.clear()
+
+    def message_count(self):
+        return self.transcript_model.rowCount()
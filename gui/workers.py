@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Workers
+
+Este módulo implementa o executor de tarefas da aplicação: gravação, transcrição,
+resposta da IA, síntese de voz e reprodução rodam em um QThreadPool, fora da
+thread da interface gráfica, com cancelamento por tarefa e fila limitada.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import itertools
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class TaskCancelledError(Exception):
+    """Lançada por uma tarefa que percebeu o pedido de cancelamento."""
+
+
+class TaskQueueFullError(RuntimeError):
+    """Lançada quando a fila do executor já atingiu o limite de tarefas pendentes."""
+
+
+class TaskSignals(QObject):
+    """Sinais de uma tarefa (entregues na thread da GUI)."""
+
+    progress = Signal(object)
+    finished = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+
+class TaskHandle:
+    """
+    Identifica uma tarefa agendada. A mesma instância é passada como primeiro
+    argumento para a função da tarefa, que a usa para verificar o cancelamento
+    e reportar progresso.
+    """
+
+    def __init__(self, task_id, name, group, signals):
+        self.task_id = task_id
+        self.name = name
+        self.group = group
+        self.signals = signals
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Solicita o cancelamento da tarefa."""
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def raise_if_cancelled(self):
+        if self.is_cancelled():
+            raise TaskCancelledError(self.name)
+
+    def report_progress(self, value):
+        """Emite um resultado parcial, ignorado se a tarefa já foi cancelada."""
+        if not self.is_cancelled():
+            self.signals.progress.emit(value)
+
+
+class Task(QRunnable):
+    """Executa uma função no QThreadPool e emite o resultado pelos sinais do handle."""
+
+    def __init__(self, handle, fn, args, on_done):
+        super().__init__()
+        self.handle = handle
+        self.fn = fn
+        self.args = args
+        self._on_done = on_done
+
+    def run(self):
+        signals = self.handle.signals
+        try:
+            if self.handle.is_cancelled():
+                signals.cancelled.emit()
+                return
+            result = self.fn(self.handle, *self.args)
+            if self.handle.is_cancelled():
+                signals.cancelled.emit()
+            else:
+                signals.finished.emit(result)
+        except TaskCancelledError:
+            signals.cancelled.emit()
+        except Exception as e:
+            if self.handle.is_cancelled():
+                signals.cancelled.emit()
+            else:
+                signals.failed.emit(str(e))
+        finally:
+            self._on_done(self.handle)
+
+
+class TaskExecutor(QObject):
+    """
+    Agenda tarefas em um QThreadPool próprio.
+
+    As funções são chamadas como fn(handle, *args). Os callbacks on_result,
+    on_error, on_progress e on_cancelled rodam na thread da GUI e não são
+    chamados depois que a tarefa é cancelada.
+    """
+
+    DEFAULT_MAX_WORKERS = 4
+    DEFAULT_MAX_PENDING = 16
+
+    # Emitido com o número de tarefas pendentes sempre que ele muda
+    pending_changed = Signal(int)
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_pending=DEFAULT_MAX_PENDING, parent=None):
+        super().__init__(parent)
+        self.max_pending = max_pending
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_workers)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    @property
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, name, fn, *args, group=None, on_result=None, on_error=None,
+               on_progress=None, on_cancelled=None):
+        """Agenda uma tarefa e retorna seu TaskHandle."""
+        signals = TaskSignals()
+        handle = TaskHandle(next(self._ids), name, group, signals)
+
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                raise TaskQueueFullError(
+                    f"Limite de {self.max_pending} tarefas pendentes atingido."
+                )
+            self._pending[handle.task_id] = handle
+            pending = len(self._pending)
+
+        def unless_cancelled(callback):
+            def deliver(*values):
+                if not handle.is_cancelled():
+                    callback(*values)
+            return deliver
+
+        if on_result:
+            signals.finished.connect(unless_cancelled(on_result))
+        if on_error:
+            signals.failed.connect(unless_cancelled(on_error))
+        if on_progress:
+            signals.progress.connect(unless_cancelled(on_progress))
+        if on_cancelled:
+            signals.cancelled.connect(on_cancelled)
+
+        self.pending_changed.emit(pending)
+        self._pool.start(Task(handle, fn, args, self._task_done))
+        return handle
+
+    def _task_done(self, handle):
+        with self._lock:
+            self._pending.pop(handle.task_id, None)
+            pending = len(self._pending)
+        self.pending_changed.emit(pending)
+
+    def cancel(self, task_id):
+        with self._lock:
+            handle = self._pending.get(task_id)
+        if handle:
+            handle.cancel()
+
+    def cancel_group(self, group):
+        """Cancela todas as tarefas pendentes de um grupo."""
+        with self._lock:
+            handles = [h for h in self._pending.values() if h.group == group]
+        for handle in handles:
+            handle.cancel()
+
+    def cancel_all(self):
+        with self._lock:
+            handles = list(self._pending.values())
+        for handle in handles:
+            handle.cancel()
+
+    def wait_for_done(self, msecs=-1):
+        """Bloqueia até que todas as tarefas terminem (útil no encerramento e nos testes)."""
+        return self._pool.waitForDone(msecs)
+
+
+def stream_ai_response(handle, openai_client, prompt):
+    """Tarefa: consome OpenAIClient.stream_response e reporta cada pedaço como progresso."""
+    parts = []
+    stream = openai_client.stream_response(prompt)
+    try:
+        for delta in stream:
+            handle.raise_if_cancelled()
+            parts.append(delta)
+            handle.report_progress(delta)
+    finally:
+        stream.close()
+    return "".join(parts).strip()
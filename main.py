@@ -1,8 +1,10 @@
 from PySide6.QtWidgets import QApplication
 from gui.main_window import MainWindow
+from utils.telemetry import enable_file_export
 import sys
 
 if __name__ == "__main__":
+    enable_file_export()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
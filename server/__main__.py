@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço da Gysin IA: atende várias sessões pela API local HTTP/WebSocket.
+
+Uso:
+    python -m server --port 8765 --max-concurrent 16 --per-session-limit 1
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from server.assistant_service import (
+    DEFAULT_MAX_CONCURRENT, DEFAULT_MAX_QUEUE, DEFAULT_QUEUE_TIMEOUT, AssistantService
+)
+from server.http_api import DEFAULT_HOST, DEFAULT_PORT, run_server
+from utils.telemetry import enable_file_export
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-concurrent", type=int, default=DEFAULT_MAX_CONCURRENT,
+                        help="respostas simultâneas no serviço (e conexões no pool da API)")
+    parser.add_argument("--per-session-limit", type=int, default=1, help="respostas simultâneas por sessão")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, help="pedidos aguardando vaga")
+    parser.add_argument("--queue-timeout", type=float, default=DEFAULT_QUEUE_TIMEOUT,
+                        help="espera máxima por uma vaga (s)")
+    args = parser.parse_args()
+
+    enable_file_export()
+    service = AssistantService(max_concurrent=args.max_concurrent, per_session_limit=args.per_session_limit,
+                               max_queue=args.max_queue, queue_timeout=args.queue_timeout)
+    try:
+        asyncio.run(run_server(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Assistant Service
+
+Serviço assíncrono (asyncio) com a lógica de resposta da Gysin IA — LLM,
+mapeamento de idioma e síntese de voz — para várias sessões no mesmo processo.
+Cada sessão tem o seu histórico (um OpenAIClient com memória própria), e todas
+compartilham um único pool de conexões HTTP com a API.
+
+Controle de admissão: no máximo max_concurrent respostas em andamento no
+serviço e per_session_limit por sessão. Pedidos além disso esperam na fila
+(até max_queue pedidos, por no máximo queue_timeout segundos); fora desses
+limites, são recusados com ServiceOverloadedError ou SessionBusyError.
+
+As chamadas bloqueantes (SDK da OpenAI e TTS) rodam em threads; os pedaços
+da resposta e os áudios de cada frase são entregues como eventos:
+    {"type": "start", "session_id": ..., "request_id": ...}
+    {"type": "text", "delta": ...}
+    {"type": "audio", "index": n, "language_code": ..., "data": <bytes>}
+    {"type": "error", "message": ...}
+    {"type": "done", "text": <resposta completa>}
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.languages import DEFAULT_LANGUAGE_CODE, language_code_for
+from utils.telemetry import get_telemetry
+from utils.tts_pipeline import SentenceSegmenter
+
+DEFAULT_MAX_CONCURRENT = 16
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_QUEUE_TIMEOUT = 10.0
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_SESSION_TTL = 30 * 60  # Sessões ociosas por mais de 30 minutos podem ser descartadas
+
+
+class SessionNotFoundError(KeyError):
+    """Lançada quando a sessão não existe (ou já expirou)."""
+
+
+class SessionBusyError(RuntimeError):
+    """Lançada quando a sessão já atingiu o limite de respostas simultâneas."""
+
+
+class ServiceOverloadedError(RuntimeError):
+    """Lançada quando o serviço está no limite de sessões ou a fila de espera está cheia."""
+
+
+def default_client_factory(http_client):
+    from api.openai_client import OpenAIClient
+
+    return OpenAIClient(http_client=http_client)
+
+
+def default_synthesize(text, language_code):
+    from utils.tts_pipeline import google_synthesize
+
+    return google_synthesize(text, language_code)
+
+
+class Session:
+    """Estado de uma sessão: cliente (com o histórico da conversa) e contadores."""
+
+    def __init__(self, session_id, client):
+        self.session_id = session_id
+        self.client = client
+        self.created_at = time.monotonic()
+        self.last_active = self.created_at
+        self.active = 0
+        self.requests = 0
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def to_dict(self):
+        return {"session_id": self.session_id, "active": self.active, "requests": self.requests}
+
+
+class Reply:
+    """
+    Uma resposta admitida pelo serviço. Itere events() para receber os eventos;
+    cancel() interrompe a geração e a síntese pendentes. A vaga no serviço é
+    liberada quando os eventos terminam, quando o iterador é fechado ou, se
+    events() nunca foi iterado, em close().
+    """
+
+    def __init__(self, service, session, request_id, text, audio):
+        self.service = service
+        self.session = session
+        self.request_id = request_id
+        self.text = text
+        self.audio = audio
+        self._cancel_event = threading.Event()
+        self._language_code = None
+        self._audio_index = 0
+        self._started = False
+        self._released = False
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def close(self):
+        """Cancela a resposta; se os eventos nunca foram iterados, libera a vaga."""
+        self.cancel()
+        if not self._started:
+            self._release()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    async def events(self):
+        self._started = True
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        telemetry = get_telemetry()
+        span = telemetry.span("service.reply", session=self.session.session_id, audio=self.audio)
+        start = time.perf_counter()
+        producer = None
+        pending_audio = []  # (frase, código de idioma, future), na ordem das frases
+        try:
+            yield {"type": "start", "session_id": self.session.session_id, "request_id": self.request_id}
+            producer = loop.run_in_executor(self.service._llm_executor, self._produce_text, loop, queue)
+            segmenter = SentenceSegmenter()
+            parts = []
+            while True:
+                delta = await queue.get()
+                if delta is None:
+                    break
+                if isinstance(delta, Exception):
+                    yield {"type": "error", "message": str(delta)}
+                    break
+                if not parts:
+                    telemetry.record("service.first_text", time.perf_counter() - start)
+                parts.append(delta)
+                yield {"type": "text", "delta": delta}
+                if self.audio:
+                    for sentence in segmenter.feed(delta):
+                        pending_audio.append(self._synthesize(loop, sentence))
+                    # Entrega os áudios já prontos, na ordem das frases, sem esperar os demais
+                    while pending_audio and pending_audio[0][2].done():
+                        yield self._audio_event(*pending_audio.pop(0))
+            if self.audio and not self.is_cancelled():
+                for sentence in segmenter.flush():
+                    pending_audio.append(self._synthesize(loop, sentence))
+            while pending_audio and not self.is_cancelled():
+                sentence, language_code, future = pending_audio.pop(0)
+                await asyncio.wait([future])
+                yield self._audio_event(sentence, language_code, future)
+            if not self.is_cancelled():
+                yield {"type": "done", "text": "".join(parts).strip()}
+        finally:
+            span.set_attribute("cancelled", self.is_cancelled())
+            self.cancel()
+            for _, _, future in pending_audio:
+                future.cancel()
+            if producer is not None:
+                # A thread do LLM encerra no próximo pedaço e fecha o streaming
+                await asyncio.wait([producer])
+            span.end()
+            self._release()
+
+    def _synthesize(self, loop, sentence):
+        """Agenda a síntese da frase; o idioma da resposta é resolvido pela primeira frase."""
+        if self._language_code is None:
+            self._language_code = language_code_for(sentence) or DEFAULT_LANGUAGE_CODE
+        future = loop.run_in_executor(self.service._tts_executor, self.service.synthesize, sentence,
+                                      self._language_code)
+        return sentence, self._language_code, future
+
+    def _audio_event(self, sentence, language_code, future):
+        index = self._audio_index
+        self._audio_index += 1
+        try:
+            data = future.result()
+        except Exception as e:
+            print(f"Erro na síntese de voz: {e}")
+            return {"type": "error", "message": f"Erro na síntese de voz: {e}", "index": index}
+        return {"type": "audio", "index": index, "language_code": language_code, "text": sentence, "data": data}
+
+    def _produce_text(self, loop, queue):
+        """Thread do LLM: consome o streaming e entrega cada pedaço ao loop do asyncio."""
+        def put(item):
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        try:
+            stream = self.session.client.stream_response(self.text)
+            try:
+                for delta in stream:
+                    if self.is_cancelled():
+                        break
+                    put(delta)
+            finally:
+                stream.close()
+        except Exception as e:
+            print(f"Erro ao obter resposta da IA: {e}")
+            put(e)
+        finally:
+            put(None)
+
+    def _release(self):
+        if not self._released:
+            self._released = True
+            self.service._release(self.session)
+
+
+class AssistantService:
+    """
+    Sessões e admissão de pedidos do assistente. Use a partir de um único loop
+    do asyncio (por exemplo, o do servidor HTTP em server.http_api).
+
+    client_factory(http_client) cria o cliente de uma sessão (padrão: um
+    OpenAIClient que usa o pool compartilhado); synthesize(text, language_code)
+    retorna o áudio de uma frase (padrão: Google Cloud TTS com cache).
+    """
+
+    def __init__(self, client_factory=default_client_factory, synthesize=default_synthesize,
+                 max_concurrent=DEFAULT_MAX_CONCURRENT, per_session_limit=1, max_queue=DEFAULT_MAX_QUEUE,
+                 queue_timeout=DEFAULT_QUEUE_TIMEOUT, max_sessions=DEFAULT_MAX_SESSIONS,
+                 session_ttl=DEFAULT_SESSION_TTL, tts_parallel=None, http_client=None):
+        from api.http_transport import TransportConfig, create_http_client
+
+        self.client_factory = client_factory
+        self.synthesize = synthesize
+        self.max_concurrent = max_concurrent
+        self.per_session_limit = per_session_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        # Um único pool para todas as sessões, com uma conexão por resposta simultânea
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or create_http_client(
+            TransportConfig(max_connections=max_concurrent, max_keepalive_connections=max_concurrent)
+        )
+        self._llm_executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="service-llm")
+        self._tts_executor = ThreadPoolExecutor(max_workers=tts_parallel or max_concurrent,
+                                                thread_name_prefix="service-tts")
+        self._sessions = {}
+        self._slots = None
+        self._active = 0
+        self._waiting = 0
+        self._completed = 0
+        self._rejected = 0
+        self._requests = 0
+
+    def _get_slots(self):
+        # Criado no loop em uso (o serviço pode ser construído fora dele)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        return self._slots
+
+    async def create_session(self):
+        """Cria uma sessão e retorna o seu id. Descarta sessões ociosas se o limite foi atingido."""
+        if len(self._sessions) >= self.max_sessions:
+            self.expire_sessions()
+        if len(self._sessions) >= self.max_sessions:
+            self._rejected += 1
+            raise ServiceOverloadedError("limite de sessões atingido")
+        loop = asyncio.get_running_loop()
+        client = await loop.run_in_executor(self._llm_executor, self.client_factory, self.http_client)
+        session = Session(uuid.uuid4().hex, client)
+        self._sessions[session.session_id] = session
+        return session.session_id
+
+    def get_session(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionNotFoundError(session_id)
+        return session
+
+    def close_session(self, session_id):
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            raise SessionNotFoundError(session_id)
+
+    def clear_history(self, session_id):
+        """Esquece o histórico da conversa da sessão (ex.: ao reabrir uma conversa antiga)."""
+        session = self.get_session(session_id)
+        session.client.memory.clear()
+        session.touch()
+
+    def expire_sessions(self, now=None):
+        """Descarta as sessões sem respostas em andamento e ociosas há mais de session_ttl segundos."""
+        now = time.monotonic() if now is None else now
+        expired = [s.session_id for s in self._sessions.values()
+                   if not s.active and now - s.last_active > self.session_ttl]
+        for session_id in expired:
+            del self._sessions[session_id]
+        return len(expired)
+
+    async def start_reply(self, session_id, text, audio=False):
+        """
+        Admite um pedido e retorna a Reply; aguarda na fila se o serviço estiver
+        no limite. Lança SessionNotFoundError, SessionBusyError ou
+        ServiceOverloadedError antes de qualquer evento ser gerado.
+        """
+        session = self.get_session(session_id)
+        if session.active >= self.per_session_limit:
+            self._rejected += 1
+            raise SessionBusyError("a sessão já tem uma resposta em andamento")
+        if self._active + self._waiting >= self.max_concurrent + self.max_queue:
+            self._rejected += 1
+            raise ServiceOverloadedError("fila de espera cheia")
+
+        session.active += 1
+        session.touch()
+        self._waiting += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._get_slots().acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            session.active -= 1
+            self._rejected += 1
+            raise ServiceOverloadedError("tempo de espera na fila esgotado")
+        except BaseException:
+            session.active -= 1
+            raise
+        finally:
+            self._waiting -= 1
+        get_telemetry().record("service.queue_wait", time.perf_counter() - start)
+
+        self._active += 1
+        self._requests += 1
+        session.requests += 1
+        return Reply(self, session, self._requests, text, audio)
+
+    def _release(self, session):
+        session.active -= 1
+        session.touch()
+        self._active -= 1
+        self._completed += 1
+        self._get_slots().release()
+
+    def stats(self):
+        return {
+            "sessions": len(self._sessions),
+            "active": self._active,
+            "waiting": self._waiting,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "max_concurrent": self.max_concurrent,
+            "per_session_limit": self.per_session_limit,
+        }
+
+    def close(self):
+        self._sessions.clear()
+        self._llm_executor.shutdown(wait=False, cancel_futures=True)
+        self._tts_executor.shutdown(wait=False, cancel_futures=True)
+        if self._owns_http_client:
+            self.http_client.close()
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: HTTP API
+
+API local (HTTP/1.1 e WebSocket, só com a biblioteca padrão) do serviço de
+assistente (server.assistant_service):
+
+    GET    /health                          estado do servidor
+    GET    /v1/stats                        sessões, respostas ativas, fila e latências
+    POST   /v1/sessions                     cria uma sessão -> {"session_id": ...}
+    DELETE /v1/sessions/<id>                encerra a sessão
+    DELETE /v1/sessions/<id>/history        esquece o histórico da conversa
+    POST   /v1/sessions/<id>/messages       {"text": ..., "audio": false} -> eventos em NDJSON
+    GET    /v1/sessions/<id>/ws             WebSocket: envia {"type": "message", "text": ...,
+                                            "audio": false} ou {"type": "cancel"} e recebe
+                                            os eventos (um JSON por mensagem)
+
+Os eventos são os do serviço, com o áudio em base64 no campo "data". Pedidos
+recusados pelo controle de admissão retornam 429 (sessão ocupada) ou 503
+(serviço no limite, com Retry-After); no WebSocket, viram eventos "error".
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import asyncio
+import base64
+import json
+import re
+
+from server import websocket
+from server.assistant_service import ServiceOverloadedError, SessionBusyError, SessionNotFoundError
+from utils.telemetry import get_telemetry
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1024 * 1024  # 1 MB
+RETRY_AFTER_SECONDS = 1
+
+REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 429: "Too Many Requests",
+    503: "Service Unavailable",
+}
+
+SESSION_PATH = re.compile(r"^/v1/sessions/([0-9a-f]+)(/history|/messages|/ws)?$")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class Request:
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "JSON inválido")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "o corpo deve ser um objeto JSON")
+        return data
+
+    @property
+    def keep_alive(self):
+        return self.headers.get("connection", "").lower() != "close"
+
+
+def event_to_json(event):
+    """Serializa um evento do serviço; o áudio (bytes) vai em base64."""
+    if isinstance(event.get("data"), (bytes, bytearray)):
+        event = dict(event, data=base64.b64encode(event["data"]).decode("ascii"))
+    return json.dumps(event, ensure_ascii=False)
+
+
+def admission_error(error):
+    """Converte os erros do serviço em respostas HTTP."""
+    if isinstance(error, SessionNotFoundError):
+        return HTTPError(404, "sessão não encontrada")
+    if isinstance(error, SessionBusyError):
+        return HTTPError(429, str(error))
+    return HTTPError(503, str(error), {"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+
+async def read_request(reader):
+    """Lê uma requisição HTTP/1.1 (None se o cliente fechou a conexão)."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(413, "cabeçalhos muito grandes")
+    request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+    try:
+        method, path, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "linha de requisição inválida")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length") or 0)
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "corpo muito grande")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method, path.split("?", 1)[0], headers, body)
+
+
+class AssistantHTTPServer:
+    """
+    Servidor HTTP/WebSocket do serviço de assistente. Use start()/close() dentro
+    de um loop do asyncio, ou run_server() para rodar até ser interrompido.
+    """
+
+    def __init__(self, service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.service = service
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    keep_alive = await self._dispatch(request, reader, writer)
+                except HTTPError as e:
+                    await self._send_json(writer, e.status, {"error": str(e)}, e.headers, keep_alive=False)
+                    keep_alive = False
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        except Exception as e:
+            print(f"Erro no servidor do assistente: {e}")
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request, reader, writer):
+        """Atende a requisição e retorna se a conexão continua aberta."""
+        method, path = request.method, request.path
+        if path == "/health" and method == "GET":
+            return await self._send_json(writer, 200, {"status": "ok"}, keep_alive=request.keep_alive)
+        if path == "/v1/stats" and method == "GET":
+            stats = dict(self.service.stats(), latency={
+                name: stage for name, stage in get_telemetry().summary().items() if name.startswith("service.")
+            })
+            return await self._send_json(writer, 200, stats, keep_alive=request.keep_alive)
+        if path == "/v1/sessions" and method == "POST":
+            try:
+                session_id = await self.service.create_session()
+            except ServiceOverloadedError as e:
+                raise admission_error(e)
+            return await self._send_json(writer, 201, {"session_id": session_id}, keep_alive=request.keep_alive)
+
+        match = SESSION_PATH.match(path)
+        if not match:
+            raise HTTPError(404, "rota não encontrada")
+        session_id, action = match.groups()
+        try:
+            if action is None and method == "DELETE":
+                self.service.close_session(session_id)
+                return await self._send_json(writer, 204, None, keep_alive=request.keep_alive)
+            if action == "/history" and method == "DELETE":
+                self.service.clear_history(session_id)
+                return await self._send_json(writer, 204, None, keep_alive=request.keep_alive)
+            if action == "/messages" and method == "POST":
+                return await self._stream_messages(request, writer, session_id)
+            if action == "/ws" and method == "GET":
+                self.service.get_session(session_id)
+                await self._serve_websocket(request, reader, writer, session_id)
+                return False
+        except (SessionNotFoundError, SessionBusyError, ServiceOverloadedError) as e:
+            raise admission_error(e)
+        raise HTTPError(405, "método não permitido")
+
+    async def _send_json(self, writer, status, data, headers=None, keep_alive=True):
+        body = b"" if data is None else json.dumps(data, ensure_ascii=False).encode("utf-8")
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+        if data is not None:
+            head += [f"Content-Length: {len(body)}", "Content-Type: application/json; charset=utf-8"]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+        return keep_alive
+
+    async def _stream_messages(self, request, writer, session_id):
+        """Responde com os eventos da resposta em NDJSON, em chunked transfer encoding."""
+        data = request.json()
+        text = str(data.get("text") or "").strip()
+        if not text:
+            raise HTTPError(400, "campo 'text' vazio")
+        reply = await self.service.start_reply(session_id, text, audio=bool(data.get("audio")))
+        events = reply.events()
+        try:
+            writer.write((
+                "HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson; charset=utf-8\r\n"
+                "Transfer-Encoding: chunked\r\nCache-Control: no-cache\r\n"
+                + ("Connection: keep-alive\r\n\r\n" if request.keep_alive else "Connection: close\r\n\r\n")
+            ).encode("latin-1"))
+            async for event in events:
+                line = (event_to_json(event) + "\n").encode("utf-8")
+                writer.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except ConnectionError:
+            # Cliente desconectado: interrompe a geração e libera a vaga
+            reply.cancel()
+            return False
+        finally:
+            await events.aclose()
+            reply.close()
+        return request.keep_alive
+
+    async def _serve_websocket(self, request, reader, writer, session_id):
+        key = request.headers.get("sec-websocket-key")
+        if request.headers.get("upgrade", "").lower() != "websocket" or not key:
+            raise HTTPError(400, "requisição de upgrade para WebSocket inválida")
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {websocket.accept_key(key)}\r\n\r\n"
+        ).encode("ascii"))
+        await writer.drain()
+
+        ws = websocket.WebSocket(reader, writer)
+        current = None  # (Reply, tarefa que envia os eventos)
+        try:
+            while True:
+                message = await ws.receive()
+                if message is None:
+                    break
+                try:
+                    data = json.loads(message)
+                except (TypeError, ValueError):
+                    await ws.send_text(json.dumps({"type": "error", "message": "JSON inválido"}))
+                    continue
+                if data.get("type") == "cancel":
+                    if current:
+                        current[0].cancel()
+                    continue
+                if data.get("type") != "message" or not str(data.get("text") or "").strip():
+                    await ws.send_text(json.dumps({"type": "error", "message": "mensagem inválida"}))
+                    continue
+                try:
+                    reply = await self.service.start_reply(session_id, str(data["text"]).strip(),
+                                                           audio=bool(data.get("audio")))
+                except (SessionNotFoundError, SessionBusyError, ServiceOverloadedError) as e:
+                    error = admission_error(e)
+                    await ws.send_text(json.dumps({"type": "error", "status": error.status, "message": str(error)},
+                                                  ensure_ascii=False))
+                    continue
+                current = (reply, asyncio.ensure_future(self._send_events(ws, reply)))
+        finally:
+            if current:
+                current[0].cancel()
+                await asyncio.wait([current[1]])
+            await ws.close()
+
+    async def _send_events(self, ws, reply):
+        events = reply.events()
+        try:
+            async for event in events:
+                await ws.send_text(event_to_json(event))
+        except ConnectionError:
+            reply.cancel()
+        finally:
+            await events.aclose()
+            reply.close()
+
+
+async def run_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Inicia o servidor e atende até ser interrompido."""
+    server = await AssistantHTTPServer(service, host, port).start()
+    print(f"Serviço da Gysin IA em http://{server.host}:{server.port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        service.close()
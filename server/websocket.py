@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: WebSocket
+
+Implementação mínima do protocolo WebSocket (RFC 6455) sobre os streams do
+asyncio, sem dependências externas: handshake, quadros de texto e binários,
+mensagens fragmentadas, ping/pong e fechamento. Serve ao servidor
+(server.http_api) e, com connect(), a clientes e testes.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_MESSAGE_BYTES = 1024 * 1024  # 1 MB
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+CLOSE_NORMAL = 1000
+CLOSE_PROTOCOL_ERROR = 1002
+CLOSE_TOO_BIG = 1009
+
+
+class WebSocketClosed(ConnectionError):
+    """Lançada ao enviar por uma conexão WebSocket já fechada."""
+
+
+def accept_key(key):
+    """Valor do cabeçalho Sec-WebSocket-Accept para a chave enviada pelo cliente."""
+    return base64.b64encode(hashlib.sha1((key + GUID).encode("ascii")).digest()).decode("ascii")
+
+
+def encode_frame(opcode, payload, mask=False):
+    """Monta um quadro final (FIN) com o opcode e o payload; clientes devem mascarar."""
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack("!H", length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack("!Q", length)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = _apply_mask(payload, key)
+    return bytes(header) + payload
+
+
+def _apply_mask(payload, key):
+    # XOR com a chave repetida, feito sobre inteiros grandes (bem mais rápido que byte a byte)
+    repeated = (key * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(len(payload), "big")
+
+
+async def read_frame(reader, max_bytes=MAX_MESSAGE_BYTES):
+    """Lê um quadro e retorna (fin, opcode, payload). Lança ValueError se passar de max_bytes."""
+    first, second = await reader.readexactly(2)
+    fin = bool(first & 0x80)
+    opcode = first & 0x0F
+    masked = bool(second & 0x80)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if length > max_bytes:
+        raise ValueError("quadro maior que o limite")
+    key = await reader.readexactly(4) if masked else None
+    payload = await reader.readexactly(length)
+    if key:
+        payload = _apply_mask(payload, key)
+    return fin, opcode, payload
+
+
+class WebSocket:
+    """
+    Conexão WebSocket já estabelecida. receive() retorna a próxima mensagem
+    (str para texto, bytes para binário) ou None quando a conexão é fechada;
+    pings são respondidos automaticamente.
+    """
+
+    def __init__(self, reader, writer, mask=False, max_bytes=MAX_MESSAGE_BYTES):
+        self.reader = reader
+        self.writer = writer
+        self.mask = mask
+        self.max_bytes = max_bytes
+        self.closed = False
+        self._send_lock = asyncio.Lock()
+
+    async def receive(self):
+        message = bytearray()
+        message_opcode = None
+        while True:
+            try:
+                fin, opcode, payload = await read_frame(self.reader, self.max_bytes - len(message))
+            except ValueError:
+                await self.close(CLOSE_TOO_BIG)
+                return None
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.closed = True
+                return None
+            if opcode == OP_PING:
+                await self._send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                await self.close(CLOSE_NORMAL)
+                return None
+            if opcode != OP_CONTINUATION:
+                message_opcode = opcode
+            elif message_opcode is None:
+                await self.close(CLOSE_PROTOCOL_ERROR)
+                return None
+            message += payload
+            if fin:
+                data = bytes(message)
+                return data.decode("utf-8") if message_opcode == OP_TEXT else data
+
+    async def send_text(self, text):
+        await self._send_frame(OP_TEXT, text.encode("utf-8"))
+
+    async def send_bytes(self, data):
+        await self._send_frame(OP_BINARY, bytes(data))
+
+    async def _send_frame(self, opcode, payload):
+        if self.closed:
+            raise WebSocketClosed("conexão WebSocket fechada")
+        async with self._send_lock:
+            self.writer.write(encode_frame(opcode, payload, self.mask))
+            await self.writer.drain()
+
+    async def close(self, code=CLOSE_NORMAL):
+        if self.closed:
+            return
+        try:
+            await self._send_frame(OP_CLOSE, struct.pack("!H", code))
+        except ConnectionError:
+            pass
+        self.closed = True
+        self.writer.close()
+
+
+async def connect(host, port, path):
+    """Abre uma conexão WebSocket de cliente (usada pelos testes e por clientes Python)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    writer.write((
+        f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+    ).encode("ascii"))
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in header_lines if ": " in line)
+    if status_line.split(" ")[1:2] != ["101"] or headers.get("Sec-WebSocket-Accept") != accept_key(key):
+        writer.close()
+        raise ConnectionError(f"handshake WebSocket recusado: {status_line}")
+    return WebSocket(reader, writer, mask=True)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Fake Backends
+
+Backends locais e plugáveis para testes e testes de carga sem rede nem
+dispositivos de áudio: síntese de voz (TTS), reconhecimento de fala (STT),
+microfone e saída de áudio falsos, com latência e falhas sorteadas a partir
+de distribuições configuráveis. O LLM falso é o FakeOpenAIServer.
+
+As distribuições são descritas por texto, por exemplo:
+    "0.2" ou "fixed:0.2"      sempre 0,2 s
+    "uniform:0.1:0.5"         uniforme entre 0,1 e 0,5 s
+    "lognormal:0.3:0.5"       log-normal com mediana 0,3 s e sigma 0,5
+    "exponential:0.2"         exponencial com média 0,2 s
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import io
+import math
+import random
+import threading
+import time
+import wave
+
+from utils.playback import decode_wav
+from utils.speech_recognition import StreamingRecognizer
+
+
+class Distribution:
+    """Distribuição de atrasos (em segundos) criada a partir de uma descrição em texto."""
+
+    KINDS = ("fixed", "uniform", "lognormal", "exponential")
+
+    def __init__(self, spec, rng=None):
+        self.spec = str(spec)
+        parts = self.spec.split(":")
+        if len(parts) == 1:
+            parts = ["fixed"] + parts
+        self.kind, params = parts[0], [float(value) for value in parts[1:]]
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2, "exponential": 1}.get(self.kind)
+        if expected is None or len(params) != expected:
+            raise ValueError(f"Distribuição inválida: {self.spec!r} (use {', '.join(self.KINDS)})")
+        self.params = params
+        self._random = rng or random.Random()
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return self._random.uniform(*self.params)
+            if self.kind == "lognormal":
+                median, sigma = self.params
+                return self._random.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+            mean = self.params[0]
+            return self._random.expovariate(1 / mean) if mean > 0 else 0.0
+
+    __call__ = sample
+
+    def __repr__(self):
+        return f"Distribution({self.spec!r})"
+
+
+def silent_wav(seconds, sample_rate=16000):
+    """WAV mono de 16 bits com silêncio."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+class FakeTTS:
+    """
+    Síntese falsa: espera um atraso sorteado de latency e retorna um WAV de
+    silêncio com seconds_per_char segundos por caractere; falha (RuntimeError)
+    com probabilidade failure_rate. synthesize_batch() atende várias frases com
+    um único atraso. calls conta as chamadas ao backend (frases ou lotes),
+    texts registra cada frase sintetizada e batch_sizes, o tamanho de cada lote.
+    """
+
+    def __init__(self, latency="0", failure_rate=0.0, seconds_per_char=0.06, sample_rate=16000, rng=None):
+        self._random = rng or random.Random()
+        self.latency = latency if isinstance(latency, Distribution) else Distribution(latency, self._random)
+        self.failure_rate = failure_rate
+        self.seconds_per_char = seconds_per_char
+        self.sample_rate = sample_rate
+        self.calls = 0
+        self.texts = []
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, language_code, voice=None):
+        return self._call([text], language_code)[0]
+
+    def synthesize_batch(self, texts, language_code, voice=None):
+        with self._lock:
+            self.batch_sizes.append(len(texts))
+        return self._call(texts, language_code)
+
+    def _call(self, texts, language_code):
+        with self._lock:
+            self.calls += 1
+            self.texts += [(text, language_code) for text in texts]
+            failed = self._random.random() < self.failure_rate
+        time.sleep(self.latency.sample())
+        if failed:
+            raise RuntimeError("falha simulada na síntese de voz")
+        return [silent_wav(len(text) * self.seconds_per_char, self.sample_rate) for text in texts]
+
+
+def fake_microphone(seconds, sample_rate=16000, chunk_ms=100, time_scale=1.0):
+    """
+    Gera blocos PCM de silêncio como o MicrophoneStream, no ritmo real da fala
+    multiplicado por time_scale (0 entrega tudo de uma vez).
+    """
+    chunk_samples = int(sample_rate * chunk_ms / 1000)
+    for _ in range(max(1, int(seconds * 1000 / chunk_ms))):
+        if time_scale:
+            time.sleep(chunk_ms / 1000 * time_scale)
+        yield b"\x00\x00" * chunk_samples
+
+
+class FakeSpeechRecognizer(StreamingRecognizer):
+    """
+    Reconhecedor falso: consome os blocos de áudio, emite uma transcrição parcial
+    a cada partial_every blocos e, depois do último bloco, espera um atraso
+    sorteado de latency (a finalização do serviço) antes de retornar uma das
+    frases de transcripts. Falha (RuntimeError) com probabilidade failure_rate.
+    """
+
+    def __init__(self, transcripts, latency="0", failure_rate=0.0, partial_every=5, rng=None):
+        self._random = rng or random.Random()
+        self.transcripts = list(transcripts)
+        self.latency = latency if isinstance(latency, Distribution) else Distribution(latency, self._random)
+        self.failure_rate = failure_rate
+        self.partial_every = partial_every
+        self._lock = threading.Lock()
+
+    def recognize(self, chunks, sample_rate, on_partial=None):
+        with self._lock:
+            transcript = self._random.choice(self.transcripts)
+            failed = self._random.random() < self.failure_rate
+        words = transcript.split()
+        for i, _ in enumerate(chunks, 1):
+            if on_partial and i % self.partial_every == 0:
+                on_partial(" ".join(words[:min(len(words), i // self.partial_every)]))
+        time.sleep(self.latency.sample())
+        if failed:
+            raise RuntimeError("falha simulada no reconhecimento de fala")
+        return transcript
+
+
+class NullSink:
+    """
+    Saída de áudio falsa para o AudioPlayback: decodifica o WAV de verdade e
+    "toca" pelo tempo do áudio multiplicado por time_scale. on_start(clip), se
+    informado, é chamado quando cada áudio começa.
+    """
+
+    def __init__(self, time_scale=1.0, on_start=None):
+        self.time_scale = time_scale
+        self.on_start = on_start
+        self.played = 0
+
+    def prepare(self, data):
+        return decode_wav(data)
+
+    def play(self, clip, should_stop):
+        if self.on_start:
+            self.on_start(clip)
+        deadline = time.perf_counter() + clip.duration * self.time_scale
+        while time.perf_counter() < deadline:
+            if should_stop():
+                return
+            time.sleep(min(0.01, max(0.0, deadline - time.perf_counter())))
+        self.played += 1
+
+    def discard(self, clip):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+    def close(self):
+        pass
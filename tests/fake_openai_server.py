@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: FakeOpenAIServer
+
+Servidor HTTP local que imita a API compatível com OpenAI, usado pelos testes
+para exercitar o OpenAIClient sem acesso à rede.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import base64
+import hashlib
+import json
+import random
+import re
+import struct
+import threading
+import time
+import sys
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """Ignora desconexões do cliente (ex.: após um timeout), que são esperadas nos testes."""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeOpenAIServer:
+    """
+    Servidor falso com os endpoints /v1/chat/completions (normal e em streaming),
+    /v1/embeddings (vetor determinístico de saco de palavras), /v1/models e
+    /v1/images/generations (PNGs de cor sólida derivada do prompt, servidos em
+    /files/<nome>.png ou em base64; image_delay atrasa a geração).
+
+    latency atrasa todas as respostas; fail_next(n, status) faz as próximas n
+    requisições falharem com o status indicado (ex.: 429 ou 503), para testar
+    novas tentativas. connections conta as conexões TCP abertas pelos clientes.
+
+    Para testes de carga, latency, first_chunk_delay e chunk_delay também
+    aceitam uma função sem argumentos que sorteia o atraso a cada requisição, e
+    failure_rate faz uma fração aleatória das requisições falhar com
+    failure_status.
+
+    model_profiles define atrasos por modelo ({"gpt-4": {"first_chunk_delay":
+    ..., "chunk_delay": ...}}), para testar o roteamento entre modelos rápidos e
+    lentos; aborted_streams conta os streams interrompidos pelo cliente.
+
+    rate_limit_requests e rate_limit_tokens impõem cotas por minuto, como a
+    API real (tokens estimados pelo corpo mais o max_tokens; rajada de
+    rate_limit_burst segundos de cota): as respostas trazem os cabeçalhos
+    x-ratelimit-*, e quem passa da cota recebe 429 com Retry-After.
+    rate_limited conta esses 429.
+
+    Use como gerenciador de contexto:
+
+        with FakeOpenAIServer(reply="Olá mundo") as server:
+            client = OpenAIClient(api_key="test", base_url=server.base_url)
+    """
+
+    def __init__(self, reply="Olá! Eu sou a Gysin IA.", chunk_delay=0.0, first_chunk_delay=0.0, latency=0.0,
+                 failure_rate=0.0, failure_status=503, seed=None, image_delay=0.0, model_profiles=None,
+                 rate_limit_requests=None, rate_limit_tokens=None, rate_limit_burst=60.0):
+        self.reply = reply
+        self.rate_limited = 0
+        self._quotas = {}  # tipo -> [limite por minuto, capacidade, nível, última atualização]
+        for kind, limit in (("requests", rate_limit_requests), ("tokens", rate_limit_tokens)):
+            if limit:
+                capacity = limit / 60.0 * rate_limit_burst
+                self._quotas[kind] = [limit, capacity, capacity, time.monotonic()]
+        self.model_profiles = model_profiles or {}
+        self.aborted_streams = 0
+        self.image_delay = image_delay
+        self.images = {}  # nome do arquivo -> PNG
+        self.chunk_delay = chunk_delay
+        self.first_chunk_delay = first_chunk_delay
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self._random = random.Random(seed)
+        self.requests = []
+        self.connections = 0
+        self._failures = []
+        self._lock = threading.Lock()
+        self._httpd = QuietHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def fail_next(self, count, status=503, retry_after=None):
+        """Faz as próximas `count` requisições falharem com `status`."""
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * count)
+
+    def _pop_failure(self):
+        with self._lock:
+            if self._failures:
+                return self._failures.pop(0)
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                return self.failure_status, None
+            return None
+
+    def _take_quota(self, body_size, body):
+        """
+        Consome a cota da requisição. Retorna (permitida, cabeçalhos de limite);
+        quando negada, Retry-After indica quando haverá cota.
+        """
+        costs = {"requests": 1, "tokens": body_size // 4 + (body.get("max_tokens") or 0)}
+        headers = {}
+        retry_after = 0.0
+        with self._lock:
+            now = time.monotonic()
+            for kind, quota in self._quotas.items():
+                limit, capacity, level, updated = quota
+                quota[2] = min(capacity, level + (now - updated) * limit / 60.0)
+                quota[3] = now
+                cost = min(costs[kind], capacity)
+                if quota[2] < cost:
+                    retry_after = max(retry_after, (cost - quota[2]) / (limit / 60.0))
+            allowed = retry_after == 0.0
+            for kind, (limit, capacity, level, _) in self._quotas.items():
+                if allowed:
+                    level = self._quotas[kind][2] = level - min(costs[kind], capacity)
+                headers[f"x-ratelimit-limit-{kind}"] = str(limit)
+                headers[f"x-ratelimit-remaining-{kind}"] = str(max(0, int(level)))
+                headers[f"x-ratelimit-reset-{kind}"] = f"{max(0.0, capacity - level) / (limit / 60.0):.3f}s"
+            if not allowed:
+                self.rate_limited += 1
+                headers["Retry-After"] = f"{retry_after:.3f}"
+        return allowed, headers
+
+    @staticmethod
+    def _delay(value):
+        """Atraso fixo ou sorteado (quando value é uma função)."""
+        return value() if callable(value) else value
+
+    def _model_delay(self, model, name):
+        """Atraso `name` do perfil do modelo, ou o valor geral do servidor."""
+        return self._delay(self.model_profiles.get(model, {}).get(name, getattr(self, name)))
+
+    def tokens(self):
+        """Divide a resposta em pedaços semelhantes aos tokens da API."""
+        words = self.reply.split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    @staticmethod
+    def png(width, height, color):
+        """PNG RGB de cor sólida, montado só com zlib e struct."""
+        def chunk(kind, data):
+            return struct.pack("!I", len(data)) + kind + data + struct.pack("!I", zlib.crc32(kind + data))
+
+        row = b"\x00" + bytes(color) * width
+        return (b"\x89PNG\r\n\x1a\n"
+                + chunk(b"IHDR", struct.pack("!IIBBBBB", width, height, 8, 2, 0, 0, 0))
+                + chunk(b"IDAT", zlib.compress(row * height))
+                + chunk(b"IEND", b""))
+
+    def _generate_images(self, body):
+        time.sleep(self._delay(self.image_delay))
+        width, height = (int(value) for value in body.get("size", "1024x1024").split("x"))
+        data = []
+        for i in range(body.get("n", 1)):
+            digest = hashlib.sha256(f"{body.get('prompt')}|{i}".encode("utf-8")).digest()
+            image = self.png(width, height, digest[:3])
+            if body.get("response_format") == "b64_json":
+                data.append({"b64_json": base64.b64encode(image).decode("ascii")})
+            else:
+                name = f"{digest.hex()[:16]}-{width}x{height}.png"
+                with self._lock:
+                    self.images[name] = image
+                host, port = self._httpd.server_address[:2]
+                data.append({"url": f"http://{host}:{port}/files/{name}"})
+        return {"created": int(time.time()), "data": data}
+
+    @staticmethod
+    def embedding(text, dimensions=64):
+        """Vetor determinístico de saco de palavras: textos com as mesmas palavras ficam próximos."""
+        vector = [0.0] * dimensions
+        for word in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(word.encode("utf-8")) % dimensions] += 1.0
+        return vector
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_GET(self):
+                self._rate_limit_headers = {}
+                server.requests.append({"path": self.path, "body": None})
+                if self.path.endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [{"id": "gpt-4", "object": "model"}]})
+                elif self.path.startswith("/files/") and self.path[len("/files/"):] in server.images:
+                    image = server.images[self.path[len("/files/"):]]
+                    self.send_response(200)
+                    self.send_header("Content-Type", "image/png")
+                    self.send_header("Content-Length", str(len(image)))
+                    self.end_headers()
+                    self.wfile.write(image)
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                server.requests.append({"path": self.path, "body": body})
+                time.sleep(server._delay(server.latency))
+
+                self._rate_limit_headers = {}
+                if server._quotas:
+                    allowed, self._rate_limit_headers = server._take_quota(length, body)
+                    if not allowed:
+                        self._send_json(429, {"error": {"message": "Rate limit reached", "type": "requests"}})
+                        return
+
+                failure = server._pop_failure()
+                if failure:
+                    status, retry_after = failure
+                    headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+                    self._send_json(status, {"error": {"message": f"erro simulado {status}"}}, headers)
+                    return
+
+                if self.path.endswith("/chat/completions"):
+                    if body.get("stream"):
+                        self._stream_chat(body)
+                    else:
+                        self._complete_chat(body)
+                elif self.path.endswith("/images/generations"):
+                    self._send_json(200, server._generate_images(body))
+                elif self.path.endswith("/embeddings"):
+                    self._send_json(200, {
+                        "object": "list",
+                        "model": body.get("model"),
+                        "data": [{"object": "embedding", "index": 0,
+                                  "embedding": server.embedding(body.get("input", ""))}],
+                        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+                    })
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                for name, value in {**self._rate_limit_headers, **(headers or {})}.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _complete_chat(self, body):
+                model = body.get("model")
+                time.sleep(server._model_delay(model, "first_chunk_delay")
+                           + sum(server._model_delay(model, "chunk_delay") for _ in server.tokens()))
+                self._send_json(200, {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "gpt-4"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": server.reply},
+                        "finish_reason": "stop",
+                    }],
+                })
+
+            def _stream_chat(self, body):
+                self.send_response(200)
+                for name, value in self._rate_limit_headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                model = body.get("model")
+                time.sleep(server._model_delay(model, "first_chunk_delay"))
+                try:
+                    for token in server.tokens():
+                        self._write_event({
+                            "id": "chatcmpl-fake",
+                            "object": "chat.completion.chunk",
+                            "created": int(time.time()),
+                            "model": body.get("model", "gpt-4"),
+                            "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                        })
+                        time.sleep(server._model_delay(model, "chunk_delay"))
+                    self._write_event({
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": body.get("model", "gpt-4"),
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    })
+                    self._write_chunk(b"data: [DONE]\n\n")
+                    self._write_chunk(b"")
+                except (BrokenPipeError, ConnectionResetError):
+                    # Cliente fechou o stream (ex.: chamada de reserva cancelada)
+                    with server._lock:
+                        server.aborted_streams += 1
+
+            def _write_event(self, payload):
+                self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
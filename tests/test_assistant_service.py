@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import httpx
+import pytest
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import utils.telemetry as telemetry_module
+from api.assistant_client import AssistantServiceClient
+from api.openai_client import OpenAIClient
+from server import websocket
+from server.assistant_service import AssistantService, ServiceOverloadedError, SessionBusyError
+from server.http_api import AssistantHTTPServer
+from tests.fake_backends import FakeTTS
+from tests.fake_openai_server import FakeOpenAIServer
+from utils.playback import decode_wav
+from utils.telemetry import Telemetry
+
+REPLY = "Claro, posso ajudar. Amanhã vai fazer sol!"
+
+
+def make_service(fake, **kwargs):
+    return AssistantService(
+        client_factory=lambda http_client: OpenAIClient(api_key="test", base_url=fake.base_url,
+                                                        http_client=http_client),
+        synthesize=FakeTTS(seconds_per_char=0.001).synthesize, **kwargs
+    )
+
+
+class ServerThread:
+    """Roda o servidor do assistente em um loop do asyncio em segundo plano."""
+
+    def __init__(self, service):
+        self.service = service
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.server = self.call(AssistantHTTPServer(service, port=0).start())
+        self.base_url = f"http://127.0.0.1:{self.server.port}"
+
+    def call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(5)
+
+    def stop(self):
+        self.call(self.server.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(2)
+        self.service.close()
+
+
+@pytest.fixture
+def telemetry(monkeypatch):
+    telemetry = Telemetry()
+    monkeypatch.setattr(telemetry_module, "_default_telemetry", telemetry)
+    return telemetry
+
+
+def test_http_api_streams_text_and_audio_and_keeps_history(telemetry):
+    with FakeOpenAIServer(reply=REPLY) as fake:
+        server = ServerThread(make_service(fake))
+        try:
+            with httpx.Client() as http_client:
+                client = AssistantServiceClient(server.base_url, http_client=http_client)
+                events = list(client.stream_events("Vai fazer sol amanhã?", audio=True))
+                assert "".join(client.stream_response("E depois de amanhã?")) == REPLY
+                client.memory.clear()
+                "".join(client.stream_response("Obrigado!"))
+                stats = http_client.get(f"{server.base_url}/v1/stats").json()
+        finally:
+            server.stop()
+
+    types = [event["type"] for event in events]
+    assert types[0] == "start" and types[-1] == "done"
+    assert "".join(event["delta"] for event in events if event["type"] == "text") == REPLY
+    audio = [event for event in events if event["type"] == "audio"]
+    assert [event["text"] for event in audio] == ["Claro, posso ajudar.", "Amanhã vai fazer sol!"]
+    assert [event["index"] for event in audio] == [0, 1]
+    assert audio[0]["language_code"] == "pt-BR"
+    assert decode_wav(audio[0]["data"]).duration > 0
+
+    # O segundo pedido leva o histórico da sessão; depois de clear(), não
+    messages = [request["body"]["messages"] for request in fake.requests if "messages" in request["body"]]
+    assert len(messages[1]) == 4 and messages[1][-1]["content"] == "E depois de amanhã?"
+    assert len(messages[2]) == 2
+    assert stats["sessions"] == 1 and stats["completed"] == 3 and stats["active"] == 0
+    assert stats["latency"]["service.reply"]["count"] == 3
+
+
+def test_sessions_are_served_concurrently(telemetry):
+    with FakeOpenAIServer(reply=REPLY, first_chunk_delay=0.3) as fake:
+        server = ServerThread(make_service(fake, max_concurrent=8))
+        try:
+            with httpx.Client() as http_client:
+                clients = [AssistantServiceClient(server.base_url, http_client=http_client) for _ in range(4)]
+                replies = [None] * len(clients)
+
+                def ask(i):
+                    replies[i] = "".join(clients[i].stream_response(f"Pergunta {i}"))
+
+                start = time.perf_counter()
+                threads = [threading.Thread(target=ask, args=(i,)) for i in range(len(clients))]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - start
+        finally:
+            server.stop()
+
+    assert replies == [REPLY] * 4
+    assert len({client.session_id for client in clients}) == 4
+    # Um pedido por vez levaria 4 x 0,3 s
+    assert elapsed < 0.9
+
+
+def test_admission_control_limits_sessions_and_the_service(telemetry):
+    async def scenario(service):
+        first = await service.create_session()
+        second = await service.create_session()
+        reply = await service.start_reply(first, "Olá")
+        with pytest.raises(SessionBusyError):
+            await service.start_reply(first, "Outra pergunta")
+        # Serviço sem vagas e fila de espera cheia: recusa imediatamente
+        with pytest.raises(ServiceOverloadedError):
+            await service.start_reply(second, "Olá")
+        events = [event async for event in reply.events()]
+        # Vaga liberada: o pedido da outra sessão é admitido
+        other = await service.start_reply(second, "Olá")
+        other.close()
+        return events, service.stats()
+
+    with FakeOpenAIServer(reply=REPLY) as fake:
+        service = make_service(fake, max_concurrent=1, max_queue=0)
+        try:
+            events, stats = asyncio.run(scenario(service))
+        finally:
+            service.close()
+
+    assert events[-1] == {"type": "done", "text": REPLY}
+    assert stats["rejected"] == 2 and stats["active"] == 0 and stats["waiting"] == 0
+
+
+def test_websocket_streams_events_and_rejects_a_second_message(telemetry):
+    async def conversation(port, session_id):
+        ws = await websocket.connect("127.0.0.1", port, f"/v1/sessions/{session_id}/ws")
+        await ws.send_text(json.dumps({"type": "message", "text": "Olá"}))
+        await ws.send_text(json.dumps({"type": "message", "text": "Olá de novo"}))
+        events = []
+        while not events or events[-1]["type"] != "done":
+            events.append(json.loads(await ws.receive()))
+        await ws.close()
+        return events
+
+    with FakeOpenAIServer(reply=REPLY, chunk_delay=0.01) as fake:
+        server = ServerThread(make_service(fake))
+        try:
+            session_id = httpx.post(f"{server.base_url}/v1/sessions").json()["session_id"]
+            events = asyncio.run(conversation(server.server.port, session_id))
+            missing = httpx.post(f"{server.base_url}/v1/sessions/abc123/messages", json={"text": "Olá"})
+        finally:
+            server.stop()
+
+    errors = [event for event in events if event["type"] == "error"]
+    assert errors and errors[0]["status"] == 429
+    assert "".join(event["delta"] for event in events if event["type"] == "text") == REPLY
+    assert missing.status_code == 404
@@ -0,0 +1,91 @@
+import os
+import sys
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.conversation import ConversationMemory, estimate_tokens
+from api.openai_client import OpenAIClient
+from tests.fake_openai_server import FakeOpenAIServer
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def fake_summarizer(previous_summary, messages):
+    """Resumo determinístico e curto: guarda só a primeira palavra de cada mensagem."""
+    firsts = " ".join(m["content"].split()[0] for m in messages)
+    return (previous_summary + " " + firsts).strip()[-200:]
+
+
+def test_estimate_tokens_grows_with_text():
+    assert estimate_tokens("") == 0
+    assert 0 < estimate_tokens("Olá, tudo bem?") < estimate_tokens("Olá, tudo bem? " * 10)
+
+
+def test_history_is_included_in_order():
+    memory = ConversationMemory("Sistema.", count_tokens=word_count)
+    memory.add_turn("Meu nome é Ana.", "Prazer, Ana!")
+
+    messages = memory.build_messages("Qual é o meu nome?")
+
+    assert [m["role"] for m in messages] == ["system", "user", "assistant", "user"]
+    assert messages[1]["content"] == "Meu nome é Ana."
+    assert messages[-1]["content"] == "Qual é o meu nome?"
+
+
+def test_request_stays_within_token_budget():
+    memory = ConversationMemory("Sistema.", token_budget=60, count_tokens=word_count)
+    for i in range(50):
+        memory.add_turn(f"pergunta {i} " * 3, f"resposta {i} " * 3)
+
+    messages = memory.build_messages("última pergunta")
+
+    assert memory.estimate_request_tokens(messages) <= 60
+    assert messages[1]["role"] == "user"
+    assert messages[-2]["content"].startswith("resposta 49")
+
+
+def test_old_turns_are_folded_into_cached_summary():
+    calls = []
+
+    def summarizer(previous_summary, messages):
+        calls.append(len(messages))
+        return fake_summarizer(previous_summary, messages)
+
+    memory = ConversationMemory("Sistema.", summary_threshold=40, keep_recent=2,
+                                summarizer=summarizer, count_tokens=word_count, background=False)
+    for i in range(10):
+        memory.add_turn(f"pergunta número {i}", f"resposta número {i}")
+
+    assert calls
+    assert memory.history_tokens <= 40 + 2 * 7
+    assert memory.summary
+    system = memory.build_messages("oi")[0]["content"]
+    assert "Resumo da conversa" in system
+    assert memory.summary in system
+
+
+def test_summarizer_failure_keeps_history():
+    def broken(previous_summary, messages):
+        raise RuntimeError("API fora do ar")
+
+    memory = ConversationMemory("Sistema.", summary_threshold=10, keep_recent=2,
+                                summarizer=broken, count_tokens=word_count, background=False)
+    for i in range(5):
+        memory.add_turn(f"pergunta {i}", f"resposta {i}")
+
+    assert len(memory) == 10
+    assert memory.summary == ""
+
+
+def test_client_sends_previous_turns():
+    with FakeOpenAIServer(reply="Prazer, Ana!") as server:
+        client = OpenAIClient(api_key="test", base_url=server.base_url)
+        client.get_response("Meu nome é Ana.")
+        list(client.stream_response("Qual é o meu nome?"))
+
+    sent = server.requests[-1]["body"]["messages"]
+    assert [m["content"] for m in sent[1:]] == ["Meu nome é Ana.", "Prazer, Ana!", "Qual é o meu nome?"]
+    assert len(client.memory) == 4
@@ -0,0 +1,112 @@
+import os
+import sys
+import threading
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.conversation_store import ConversationStore, build_fts_query
+
+
+def make_store(tmp_path, **kwargs):
+    return ConversationStore(str(tmp_path / "conversations.sqlite3"), **kwargs)
+
+
+def test_messages_are_written_in_batches_with_wal(tmp_path):
+    store = make_store(tmp_path, batch_size=100, flush_interval=5.0)
+    session = store.new_session()
+    for i in range(250):
+        store.add_message(session, "Você", f"mensagem {i}", "pt")
+    store.flush()
+
+    assert store.count_messages(session) == 250
+    assert store.batches_written <= 4
+    assert store._query("PRAGMA journal_mode")[0][0] == "wal"
+    store.close()
+
+
+def test_language_is_detected_by_the_writer_thread(tmp_path):
+    threads = []
+
+    def detect(text):
+        threads.append(threading.current_thread().name)
+        return "en" if "hello" in text else "pt"
+
+    store = make_store(tmp_path, language_detector=detect)
+    session = store.new_session()
+    store.add_message(session, "Você", "hello there")
+    store.add_message(session, "Você", "olá", "es")
+    messages = store.load_messages(session)
+
+    assert [m["language"] for m in messages] == ["en", "es"]
+    assert threads == ["conversation-store"]
+    store.close()
+
+
+def test_search_matches_prefixes_without_accents(tmp_path):
+    store = make_store(tmp_path)
+    session = store.new_session()
+    store.add_message(session, "Você", "Qual é a previsão do tempo em São Paulo?", "pt")
+    store.add_message(session, "Gysin IA", "Amanhã faz sol em São Paulo.", "pt")
+    store.add_message(session, "Você", "Me conte uma piada", "pt")
+
+    results = store.search("previsao sao")
+    assert [r["text"] for r in results] == ["Qual é a previsão do tempo em São Paulo?"]
+    assert "[previsão]" in results[0]["snippet"]
+    assert results[0]["language"] == "pt"
+    assert len(store.search("paul")) == 2
+    assert store.search("!!!") == []
+    store.close()
+
+
+def test_fts_query_escapes_operators():
+    assert build_fts_query('sol AND "chuva" OR -vento') == '"sol"* "AND"* "chuva"* "OR"* "vento"*'
+
+
+def test_load_messages_pages_backwards(tmp_path):
+    store = make_store(tmp_path)
+    session = store.new_session()
+    other = store.new_session()
+    for i in range(10):
+        store.add_message(session, "Você", f"mensagem {i}")
+        store.add_message(other, "Você", f"outra {i}")
+
+    last_page = store.load_messages(session, limit=4)
+    previous_page = store.load_messages(session, before_id=last_page[0]["id"], limit=4)
+
+    assert [m["text"] for m in last_page] == [f"mensagem {i}" for i in range(6, 10)]
+    assert [m["text"] for m in previous_page] == [f"mensagem {i}" for i in range(2, 6)]
+    assert store.sessions()[0]["messages"] == 10
+    store.close()
+
+
+def test_history_survives_reopening(tmp_path):
+    store = make_store(tmp_path)
+    session = store.new_session("Primeira conversa")
+    store.add_message(session, "Você", "olá")
+    store.add_message(session, "Gysin IA", "oi!")
+    store.add_message(session, "Você", "tudo bem?")
+    store.close()
+
+    store = make_store(tmp_path)
+    assert store.recent_inputs(10) == ["olá", "tudo bem?"]
+    assert store.sessions()[0]["title"] == "Primeira conversa"
+    store.close()
+
+
+def test_new_sessions_are_written_with_the_batch(tmp_path):
+    store = make_store(tmp_path, flush_interval=5.0)
+    session = store.new_session("Nova conversa")
+    store.add_message(session, "Você", "olá", "pt")
+
+    # Nada foi gravado ainda: sem flush, a leitura não espera a thread de gravação
+    assert store.load_messages(session, flush=False) == []
+    assert store.count_messages(session, flush=False) == 0
+    assert [m["text"] for m in store.load_messages(session)] == ["olá"]
+    store.close()
+
+    store = make_store(tmp_path)
+    # Os ids continuam depois das sessões já gravadas
+    assert store.new_session() == session + 1
+    assert store.sessions()[-1]["title"] == "Nova conversa"
+    store.close()
@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import pytest
+
+from api.http_transport import LatencyMetrics, RetryTransport, TransportConfig, percentile
+from api.openai_client import OpenAIClient
+from tests.fake_openai_server import FakeOpenAIServer
+
+
+def fast_retry_config(**overrides):
+    options = dict(max_retries=3, backoff_base=0.01, backoff_max=0.05)
+    options.update(overrides)
+    return TransportConfig(**options)
+
+
+def make_client(server, **overrides):
+    return OpenAIClient(api_key="test", base_url=server.base_url,
+                        transport_config=fast_retry_config(**overrides))
+
+
+def test_retries_transient_5xx_and_succeeds():
+    with FakeOpenAIServer(reply="Recuperado.") as server:
+        server.fail_next(2, status=503)
+        client = make_client(server)
+
+        assert client.get_response("Olá") == "Recuperado."
+        stats = client.metrics.summary()["/v1/chat/completions"]
+
+    assert stats["calls"] == 1
+    assert stats["retries"] == 2
+    assert stats["errors"] == 0
+
+
+def test_respects_retry_after_on_429():
+    with FakeOpenAIServer(reply="Ok.") as server:
+        server.fail_next(1, status=429, retry_after=0.2)
+        client = make_client(server, backoff_max=1.0)
+
+        start = time.perf_counter()
+        assert client.get_response("Olá") == "Ok."
+        elapsed = time.perf_counter() - start
+
+    assert elapsed >= 0.2
+
+
+def test_gives_up_after_max_retries():
+    with FakeOpenAIServer() as server:
+        server.fail_next(10, status=503)
+        client = make_client(server, max_retries=2)
+
+        assert client.get_response("Olá") == OpenAIClient.ERROR_MESSAGE
+        stats = client.metrics.summary()["/v1/chat/completions"]
+
+    assert len(server.requests) == 3
+    assert stats["errors"] == 1
+
+
+def test_does_not_repeat_posts_the_server_may_have_processed():
+    with FakeOpenAIServer() as server:
+        server.fail_next(1, status=500)
+        client = make_client(server)
+
+        assert client.get_response("Olá") == OpenAIClient.ERROR_MESSAGE
+
+    assert len(server.requests) == 1
+
+
+def test_only_connection_failures_are_retried_for_posts():
+    class DroppingTransport(httpx.BaseTransport):
+        def __init__(self, error):
+            self.error = error
+            self.calls = 0
+
+        def handle_request(self, request):
+            self.calls += 1
+            raise self.error("falha simulada", request=request)
+
+    for method, error, calls in [("POST", httpx.RemoteProtocolError, 1), ("POST", httpx.ConnectError, 3),
+                                 ("GET", httpx.RemoteProtocolError, 3)]:
+        inner = DroppingTransport(error)
+        transport = RetryTransport(inner, fast_retry_config(max_retries=2), LatencyMetrics(), sleep=lambda _: None)
+        with pytest.raises(error):
+            transport.handle_request(httpx.Request(method, "http://127.0.0.1/v1/chat/completions"))
+        assert inner.calls == calls, (method, error)
+
+
+def test_does_not_retry_client_errors():
+    with FakeOpenAIServer() as server:
+        server.fail_next(1, status=400)
+        client = make_client(server)
+
+        assert client.get_response("Olá") == OpenAIClient.ERROR_MESSAGE
+
+    assert len(server.requests) == 1
+
+
+def test_per_call_timeout():
+    with FakeOpenAIServer(latency=0.5) as server:
+        client = make_client(server, max_retries=0)
+
+        start = time.perf_counter()
+        assert client.get_response("Olá", timeout=0.1) == OpenAIClient.ERROR_MESSAGE
+        assert time.perf_counter() - start < 0.45
+
+
+def test_connections_are_pooled_and_warm_up_opens_them_early():
+    with FakeOpenAIServer(reply="Oi.") as server:
+        client = OpenAIClient(api_key="test", base_url=server.base_url,
+                              transport_config=fast_retry_config(), warm_up=True)
+        client.warm_up_thread.join(2)
+        assert server.requests[0]["path"] == "/v1/models"
+        assert server.connections == 1
+
+        for _ in range(5):
+            client.get_response("Olá")
+        list(client.stream_response("Olá"))
+
+    assert server.connections == 1
+
+
+def test_latency_metrics_are_recorded_per_endpoint():
+    with FakeOpenAIServer(latency=0.05) as server:
+        client = make_client(server)
+        for _ in range(4):
+            client.get_response("Olá")
+        stats = client.metrics.summary()["/v1/chat/completions"]
+
+    assert stats["calls"] == 4
+    assert 0.05 <= stats["p50"] <= stats["p95"] <= stats["max"]
+
+
+def test_backoff_uses_full_jitter_within_ceiling():
+    transport = RetryTransport(httpx.HTTPTransport(), TransportConfig(backoff_base=0.5, backoff_max=2.0),
+                               LatencyMetrics())
+    delays = [transport.backoff_delay(3) for _ in range(200)]
+
+    assert all(0 <= delay <= 2.0 for delay in delays)
+    assert len(set(delays)) > 1
+    assert transport.backoff_delay(0, retry_after=30) == 2.0
+
+
+def test_percentile():
+    assert percentile([], 0.5) is None
+    assert percentile([3, 1, 2], 0.5) == 2
+    assert percentile([1, 2, 3, 4], 0.95) == pytest.approx(3.85)
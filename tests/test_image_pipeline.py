@@ -0,0 +1,105 @@
+import os
+import sys
+import threading
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PySide6.QtGui import QImage
+
+from api.openai_client import OpenAIClient
+from tests.fake_openai_server import FakeOpenAIServer
+from utils.image_cache import ImageCache
+from utils.image_pipeline import ImagePipeline
+
+
+def image_requests(fake):
+    return [request for request in fake.requests if request["path"].endswith("/images/generations")]
+
+
+def downloads(fake):
+    return [request for request in fake.requests if request["path"].startswith("/files/")]
+
+
+def make_pipeline(fake, cache):
+    client = OpenAIClient(api_key="test", base_url=fake.base_url)
+    return ImagePipeline(lambda prompt, size: client.generate_images(prompt, size=size)[0], cache=cache)
+
+
+def test_concurrent_identical_prompts_share_one_generation(tmp_path):
+    events = []
+    lock = threading.Lock()
+
+    def recorder(name):
+        def record(value):
+            with lock:
+                events.append((name, value))
+        return record
+
+    with FakeOpenAIServer(image_delay=0.2) as fake:
+        pipeline = make_pipeline(fake, ImageCache(str(tmp_path)))
+        jobs = [pipeline.submit("Um gato  astronauta", "512x512", on_thumbnail=recorder(f"thumbnail{i}"),
+                                on_image=recorder(f"image{i}")) for i in range(3)]
+        paths = [job.result(5) for job in jobs]
+        pipeline.close()
+
+    assert len({id(job) for job in jobs}) == 1 and jobs[0].subscribers == 3
+    assert len(image_requests(fake)) == 1 and len(downloads(fake)) == 1
+    assert image_requests(fake)[0]["body"]["size"] == "512x512"
+    assert len(set(paths)) == 1
+    image_path, thumbnail_path = paths[0]
+    # Todas as miniaturas chegam antes das imagens completas
+    assert [name[:-1] for name, _ in events] == ["thumbnail"] * 3 + ["image"] * 3
+    assert QImage(image_path).width() == 512
+    assert QImage(thumbnail_path).width() == 256
+    assert pipeline.stats()["deduplicated"] == 2 and pipeline.stats()["in_flight"] == 0
+
+
+def test_cached_prompts_are_served_without_calling_the_api(tmp_path):
+    with FakeOpenAIServer() as fake:
+        first = make_pipeline(fake, ImageCache(str(tmp_path))).submit("Pôr do sol na praia").result(5)
+        # Um novo processo reconstrói o cache a partir do disco
+        pipeline = make_pipeline(fake, ImageCache(str(tmp_path)))
+        received = []
+        job = pipeline.submit(" Pôr do sol  na praia", on_thumbnail=received.append, on_image=received.append)
+
+    assert job.done() and job.result() == first
+    assert received == [first[1], first[0]]
+    assert len(image_requests(fake)) == 1
+    assert pipeline.stats()["cache_hits"] == 1
+
+
+def test_failures_are_reported_and_not_cached(tmp_path):
+    errors = []
+    with FakeOpenAIServer(failure_rate=1.0, failure_status=400) as fake:
+        cache = ImageCache(str(tmp_path))
+        job = make_pipeline(fake, cache).submit("Um dragão", on_error=errors.append)
+        try:
+            job.result(5)
+        except Exception:
+            pass
+
+    assert job.state == "failed" and len(errors) == 1
+    assert cache.stats()["images"] == 0
+
+
+def test_cache_evicts_least_recently_used_images(tmp_path):
+    images = [FakeOpenAIServer.png(64, 64, bytes([i, i + 10, i + 20])) for i in (10, 40, 70)]
+    cache = ImageCache(str(tmp_path))
+    cache.put("a", images[0])
+    # Espaço para duas imagens (com miniatura) do mesmo tamanho
+    cache.max_bytes = int(2.5 * cache.stats()["bytes"])
+
+    cache.put("b", images[1])
+    cache.get("a")  # "a" passa a ser a mais recente
+    cache.put("c", images[2])
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    # Mesmo conteúdo para outro prompt: um único arquivo
+    cache.put("d", images[2])
+    assert cache.stats()["images"] == 2 and cache.stats()["prompts"] == 3
+    reloaded = ImageCache(str(tmp_path), max_bytes=cache.max_bytes)
+    assert reloaded.get("d") == cache.get("c")
+    assert reloaded.get("b") is None
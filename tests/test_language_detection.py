@@ -4,19 +4,81 @@ import sys
 # Adicione o diretório principal ao sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from gui.language_utils import detect_language
+from gui.language_utils import (
+    NGramLanguageDetector, detect_language, detect_language_langdetect, detect_languages
+)
+
+# Frases rotuladas (curtas e longas) usadas na comparação de precisão e no benchmark
+SAMPLES = [
+    ("Olá, como você está?", "pt"),
+    ("Obrigado pela ajuda!", "pt"),
+    ("Qual é a previsão do tempo para amanhã?", "pt"),
+    ("Você pode me recomendar um livro?", "pt"),
+    ("Estou com fome, vamos almoçar", "pt"),
+    ("Não entendi, pode repetir?", "pt"),
+    ("Bom dia", "pt"),
+    ("A reunião foi adiada para a próxima semana por causa da chuva.", "pt"),
+    ("Hello, how are you?", "en"),
+    ("Thanks for your help!", "en"),
+    ("What is the weather forecast for tomorrow?", "en"),
+    ("Can you recommend a good book?", "en"),
+    ("I am hungry, let's have lunch", "en"),
+    ("I didn't understand, could you repeat that?", "en"),
+    ("Good morning", "en"),
+    ("The meeting was postponed until next week because of the rain.", "en"),
+    ("Hallo, wie geht es dir?", "de"),
+    ("Danke für deine Hilfe!", "de"),
+    ("Wie ist die Wettervorhersage für morgen?", "de"),
+    ("Kannst du mir ein gutes Buch empfehlen?", "de"),
+    ("Ich habe Hunger, lass uns essen gehen", "de"),
+    ("Ich habe das nicht verstanden, kannst du es wiederholen?", "de"),
+    ("Guten Morgen", "de"),
+    ("Das Treffen wurde wegen des Regens auf nächste Woche verschoben.", "de"),
+    ("Hola, ¿cómo estás?", "es"),
+    ("¡Gracias por tu ayuda!", "es"),
+    ("¿Cuál es el pronóstico del tiempo para mañana?", "es"),
+    ("¿Puedes recomendarme un buen libro?", "es"),
+    ("Tengo hambre, vamos a comer", "es"),
+    ("No entendí, ¿puedes repetirlo?", "es"),
+    ("Buenos días", "es"),
+    ("La reunión se pospuso para la próxima semana por la lluvia.", "es"),
+]
+
+
+def accuracy(detect):
+    return sum(detect(text) == expected for text, expected in SAMPLES) / len(SAMPLES)
+
 
 def test_multilingual_input():
     inputs = [
-        "Olá, como você está?",
-        "Hello, how are you?",
-        "Hallo, wie geht es dir?",
-        "Hola, ¿cómo estás?"
+        ("Olá, como você está?", "pt"),
+        ("Hello, how are you?", "en"),
+        ("Hallo, wie geht es dir?", "de"),
+        ("Hola, ¿cómo estás?", "es"),
     ]
 
-    for text in inputs:
+    for text, expected in inputs:
         detected_lang = detect_language(text)
         print(f"Texto: {text} | Idioma detectado: {detected_lang}")
+        assert detected_lang == expected
+
+def test_ngram_detector_accuracy():
+    ngram_accuracy = accuracy(detect_language)
+    print(f"Precisão n-gramas: {ngram_accuracy:.0%} | langdetect: {accuracy(detect_language_langdetect):.0%}")
+    assert ngram_accuracy >= 0.9
+
+
+def test_detector_loaded_from_file_matches_module_detector():
+    # A comparação de velocidade com o langdetect fica em benchmarks/bench_language_detection.py
+    detector = NGramLanguageDetector.from_file()
+    assert [detector.detect(text) for text, _ in SAMPLES] == [detect_language(text) for text, _ in SAMPLES]
+
+
+def test_batch_matches_single_detection():
+    texts = [text for text, _ in SAMPLES] + ["ok", "1234", ""]
+    assert detect_languages(texts) == [detect_language(text) for text in texts]
+
 
-# Execute os testes de detecção
-test_multilingual_input()
\ No newline at end of file
+def test_short_or_letterless_text_returns_none():
+    assert detect_language("ok") is None
+    assert detect_language("12345 !!!") is None
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import utils.telemetry as telemetry_module
+from benchmarks.bench_load import run_load_test
+from tests.fake_backends import Distribution, FakeSpeechRecognizer, FakeTTS, fake_microphone
+from utils.playback import decode_wav
+
+
+def test_distribution_specs():
+    assert Distribution("0.25").sample() == 0.25
+    uniform = Distribution("uniform:0.1:0.2")
+    assert all(0.1 <= uniform.sample() <= 0.2 for _ in range(100))
+    assert Distribution("lognormal:0.3:0.5").sample() > 0
+    assert Distribution("exponential:0").sample() == 0.0
+    with pytest.raises(ValueError):
+        Distribution("normal:1:2")
+
+
+def test_fake_backends_simulate_latency_and_failures():
+    tts = FakeTTS(seconds_per_char=0.01)
+    assert decode_wav(tts.synthesize("x" * 50, "pt-BR")).duration == pytest.approx(0.5)
+    with pytest.raises(RuntimeError):
+        FakeTTS(failure_rate=1.0).synthesize("Olá", "pt-BR")
+
+    partials = []
+    recognizer = FakeSpeechRecognizer(["Olá, tudo bem com você?"], partial_every=2)
+    transcript = recognizer.recognize(fake_microphone(1.0, time_scale=0), 16000, partials.append)
+    assert transcript == "Olá, tudo bem com você?"
+    assert partials[0] == "Olá," and len(partials) == 5
+
+
+def test_load_test_runs_concurrent_sessions_offline():
+    previous = telemetry_module._default_telemetry
+    report = run_load_test(sessions=3, turns=2, time_scale=0, speech_seconds=0.3, llm_latency="0",
+                           llm_first_chunk="0.01", llm_chunk="0", stt_latency="0.01", tts_latency="0.01",
+                           seed=7)
+
+    assert report["completed"] == 6
+    assert report["errors"] == {"stt": 0, "llm": 0, "tts": 0}
+    assert report["latency"]["first_audio"]["count"] == 6
+    assert report["latency"]["first_token"]["p95"] <= report["latency"]["turn"]["max"]
+    assert report["stages"]["llm.first_token"]["count"] == 6
+    assert report["stages"]["tts.synthesize"]["count"] >= 6
+    assert report["throughput"] > 0
+    # A telemetria da aplicação não é afetada pelo teste de carga
+    assert telemetry_module._default_telemetry is previous
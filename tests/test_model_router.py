@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.hedging import first_ready
+from api.model_router import ModelRouter, ModelTier
+from api.openai_client import OpenAIClient
+from tests.fake_openai_server import FakeOpenAIServer
+
+REPLY = "Claro! Posso ajudar com isso."
+
+
+def make_router(**kwargs):
+    return ModelRouter(fast=ModelTier("fast", "fast-model", 64, 3, 200),
+                       strong=ModelTier("strong", "strong-model", 256, 4, 800), **kwargs)
+
+
+def sent_models(fake):
+    return [(request["body"]["model"], request["body"]["max_tokens"])
+            for request in fake.requests if request["path"].endswith("/chat/completions")]
+
+
+def test_prompts_are_routed_by_length_and_complexity():
+    profiles = {"fast-model": {"first_chunk_delay": 0.01}, "strong-model": {"first_chunk_delay": 0.15}}
+    with FakeOpenAIServer(reply=REPLY, model_profiles=profiles) as fake:
+        router = make_router()
+        client = OpenAIClient(api_key="test", base_url=fake.base_url, router=router)
+        for prompt in ["Olá!", "Obrigado", "Explique como funciona o protocolo TCP, passo a passo."]:
+            assert "".join(client.stream_response(prompt)) == REPLY
+        assert client.get_response("def soma(a, b):\n    return a + b") == REPLY
+        assert client.get_response("Oi", max_tokens=20) == REPLY
+
+    models = sent_models(fake)
+    assert [model for model, _ in models] == ["fast-model", "fast-model", "strong-model", "strong-model",
+                                              "fast-model"]
+    # O orçamento de tokens acompanha o nível e o tamanho do prompt; o explícito prevalece
+    assert models[0][1] < 100 and models[2][1] >= 256 and models[4][1] == 20
+    stats = router.stats()
+    assert stats["tiers"]["fast"]["decisions"] == 3 and stats["tiers"]["strong"]["decisions"] == 2
+    assert stats["reasons"]["strong:código ou cálculo"] == 1
+    assert stats["tiers"]["fast"]["first_token_p50"] < stats["tiers"]["strong"]["first_token_p50"]
+
+
+def test_slow_primary_is_hedged_and_the_loser_is_cancelled():
+    # Aquecimento rápido; depois a principal demora e a reserva responde logo
+    delays = iter([0.02] * 5 + [1.0] + [0.02] * 10)
+    profiles = {"fast-model": {"first_chunk_delay": lambda: next(delays), "chunk_delay": 0.02}}
+    with FakeOpenAIServer(reply=REPLY, model_profiles=profiles) as fake:
+        router = make_router(hedging=True, hedge_min_samples=5, max_hedge_ratio=0.5)
+        client = OpenAIClient(api_key="test", base_url=fake.base_url, router=router)
+        for _ in range(5):
+            "".join(client.stream_response("Olá"))
+
+        start = time.perf_counter()
+        reply = "".join(client.stream_response("Olá"))
+        elapsed = time.perf_counter() - start
+
+        deadline = time.time() + 3
+        while fake.aborted_streams == 0 and time.time() < deadline:
+            time.sleep(0.05)
+
+    assert reply == REPLY
+    assert elapsed < 0.8
+    assert len(sent_models(fake)) == 7
+    assert fake.aborted_streams == 1
+    tier = router.stats()["tiers"]["fast"]
+    assert tier["hedged"] == 1 and tier["hedge_wins"] == 1 and tier["requests"] == 6
+
+
+def test_get_response_uses_hedged_streaming_when_enabled():
+    with FakeOpenAIServer(reply="  Resposta completa.  ") as fake:
+        router = make_router(hedging=True)
+        client = OpenAIClient(api_key="test", base_url=fake.base_url, router=router)
+        assert client.get_response("Olá") == "Resposta completa."
+
+    assert fake.requests[-1]["body"]["stream"] is True
+    assert router.stats()["tiers"]["fast"]["total_p50"] is not None
+
+
+def test_first_ready_without_delay_does_not_hedge_and_propagates_errors():
+    opened = []
+
+    def open_stream():
+        opened.append(1)
+        return iter(["a", "b"])
+
+    attempt, hedged = first_ready(open_stream, hedge_after=1.0)
+    assert list(attempt.chunks()) == ["a", "b"] and not hedged and len(opened) == 1
+
+    def failing():
+        raise ConnectionError("falhou")
+
+    with pytest.raises(ConnectionError):
+        first_ready(failing, hedge_after=1.0)
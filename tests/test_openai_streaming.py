@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.http_transport import TransportConfig
+from api.openai_client import OpenAIClient
+from tests.fake_openai_server import FakeOpenAIServer
+
+
+def test_stream_response_yields_deltas_in_order():
+    with FakeOpenAIServer(reply="Olá, eu sou a Gysin IA.") as server:
+        client = OpenAIClient(api_key="test", base_url=server.base_url)
+        deltas = list(client.stream_response("Olá"))
+
+    assert len(deltas) > 1
+    assert "".join(deltas) == "Olá, eu sou a Gysin IA."
+    assert server.requests[0]["body"]["stream"] is True
+
+
+def test_first_delta_arrives_before_full_reply():
+    reply = " ".join(["palavra"] * 20)
+    with FakeOpenAIServer(reply=reply, chunk_delay=0.05) as server:
+        client = OpenAIClient(api_key="test", base_url=server.base_url)
+        start = time.perf_counter()
+        stream = client.stream_response("Conte uma história")
+        next(stream)
+        time_to_first_token = time.perf_counter() - start
+        list(stream)
+        total_time = time.perf_counter() - start
+
+    assert time_to_first_token < total_time / 4
+
+
+def test_stream_response_returns_error_message_when_server_is_unreachable():
+    client = OpenAIClient(api_key="test", base_url="http://127.0.0.1:9/v1",
+                          transport_config=TransportConfig(max_retries=0, connect_timeout=1))
+
+    assert list(client.stream_response("Olá")) == [OpenAIClient.ERROR_MESSAGE]
+
+
+def test_get_response_against_fake_server():
+    with FakeOpenAIServer(reply="  Resposta completa.  ") as server:
+        client = OpenAIClient(api_key="test", base_url=server.base_url)
+        assert client.get_response("Olá") == "Resposta completa."
@@ -0,0 +1,244 @@
+import io
+import os
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.playback import AudioPlayback, PCMSink, decode_wav
+from utils.tts_pipeline import SpeechPipeline
+
+
+class FakeSink:
+    """Saída falsa: cada byte do áudio "toca" por seconds_per_byte e prepare leva prepare_delay."""
+
+    def __init__(self, seconds_per_byte=0.001, prepare_delay=0.0):
+        self.seconds_per_byte = seconds_per_byte
+        self.prepare_delay = prepare_delay
+        self.events = []
+        self.played = []
+        self.discarded = []
+        self.volume = None
+        self._lock = threading.Lock()
+
+    def _log(self, event, data):
+        with self._lock:
+            self.events.append((event, data, time.perf_counter()))
+
+    def prepare(self, data):
+        if data == b"corrompido":
+            raise ValueError("áudio inválido")
+        time.sleep(self.prepare_delay)
+        self._log("prepared", data)
+        return data
+
+    def play(self, data, should_stop):
+        self._log("start", data)
+        deadline = time.perf_counter() + self.seconds_per_byte * len(data)
+        while time.perf_counter() < deadline:
+            if should_stop():
+                self._log("stopped", data)
+                return
+            time.sleep(0.001)
+        self.played.append(data)
+        self._log("end", data)
+
+    def discard(self, data):
+        self.discarded.append(data)
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def close(self):
+        pass
+
+    def time_of(self, event, data):
+        return next(t for e, d, t in self.events if e == event and d == data)
+
+
+def make_wav(samples, rate=16000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.asarray(samples, dtype=np.int16).tobytes())
+    return buffer.getvalue()
+
+
+def test_clips_from_several_producers_play_in_order():
+    sink = FakeSink(seconds_per_byte=0.0005)
+    playback = AudioPlayback(sink)
+    items = []
+
+    def producer(name):
+        for i in range(5):
+            items.append(playback.enqueue(f"{name}{i}".encode() * 4, group=name))
+
+    threads = [threading.Thread(target=producer, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert playback.wait_until_idle(5)
+    assert all(item.status == "done" for item in items)
+    assert len(sink.played) == 10
+    for name in ("a", "b"):
+        own = [clip for clip in sink.played if clip.startswith(name.encode())]
+        assert own == [f"{name}{i}".encode() * 4 for i in range(5)]
+    playback.close()
+
+
+def test_next_clip_is_prepared_while_current_plays():
+    sink = FakeSink(seconds_per_byte=0.002, prepare_delay=0.05)
+    playback = AudioPlayback(sink)
+    first = playback.enqueue(b"x" * 100)
+    second = playback.enqueue(b"y" * 10)
+
+    assert second.wait(5)
+    # O segundo áudio ficou pronto antes de o primeiro terminar e começou sem esperar prepare
+    assert sink.time_of("prepared", b"y" * 10) < sink.time_of("end", b"x" * 100)
+    assert sink.time_of("start", b"y" * 10) - sink.time_of("end", b"x" * 100) < 0.02
+    assert first.status == second.status == "done"
+    assert playback.stats()["max_gap"] < 0.02
+    playback.close()
+
+
+def test_skip_and_stop_by_group():
+    sink = FakeSink(seconds_per_byte=0.01)
+    playback = AudioPlayback(sink)
+    speech = [playback.enqueue(b"fala%d" % i * 10, group="speech") for i in range(3)]
+    chime = playback.enqueue(b"aviso", group="system")
+
+    while speech[0].status != "playing":
+        time.sleep(0.005)
+    playback.stop(group="speech")
+
+    assert chime.wait(5)
+    assert [item.status for item in speech] == ["skipped"] * 3
+    assert chime.status == "done"
+    assert sink.played == [b"aviso"]
+
+    clip = playback.enqueue(b"longo" * 100)
+    while clip.status != "playing":
+        time.sleep(0.005)
+    playback.skip()
+    assert clip.wait(2) and clip.status == "skipped"
+    playback.close()
+
+
+def test_failed_clip_reports_error_and_queue_continues():
+    sink = FakeSink(seconds_per_byte=0)
+    playback = AudioPlayback(sink)
+    errors = []
+    bad = playback.enqueue(b"corrompido", on_error=errors.append)
+    good = playback.enqueue(b"ok")
+
+    assert good.wait(2)
+    assert bad.status == "failed" and errors == ["áudio inválido"]
+    assert good.status == "done"
+    playback.close()
+
+
+def test_volume_and_blocking_play():
+    sink = FakeSink(seconds_per_byte=0.01)
+    playback = AudioPlayback(sink, volume=150)
+    assert sink.volume == 100
+    playback.set_volume(40)
+    assert sink.volume == 40
+
+    stop_at = time.perf_counter() + 0.05
+    assert not playback.play(b"z" * 100, should_stop=lambda: time.perf_counter() > stop_at)
+    assert playback.play(b"z")
+    playback.close()
+
+
+class RecordingStream:
+    def __init__(self, sample_width, channels, rate):
+        self.format = (sample_width, channels, rate)
+        self.data = bytearray()
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+
+    def close(self):
+        self.closed = True
+
+
+def test_pcm_sink_writes_consecutive_clips_to_one_stream():
+    streams = []
+
+    def open_stream(*audio_format):
+        streams.append(RecordingStream(*audio_format))
+        return streams[-1]
+
+    sink = PCMSink(open_stream=open_stream, chunk_frames=256)
+    playback = AudioPlayback(sink)
+    first, second = np.arange(1000, dtype=np.int16), np.full(700, 1000, dtype=np.int16)
+    playback.enqueue(make_wav(first))
+    item = playback.enqueue(make_wav(second))
+    assert item.wait(2)
+    assert len(streams) == 1
+    assert bytes(streams[0].data) == first.tobytes() + second.tobytes()
+
+    playback.set_volume(50)
+    assert playback.enqueue(make_wav(second)).wait(2)
+    assert np.frombuffer(bytes(streams[0].data), dtype=np.int16)[-1] == 500
+
+    playback.close()
+    assert streams[0].closed
+
+
+def test_pcm_sink_rejects_compressed_audio():
+    try:
+        decode_wav(b"ID3\x03mp3...")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("MP3 não deveria ser aceito pelo reprodutor PCM")
+    assert decode_wav(make_wav([1, 2, 3])).duration == 3 / 16000
+
+
+def test_speech_pipeline_feeds_playback_queue():
+    sink = FakeSink(seconds_per_byte=0.001)
+    playback = AudioPlayback(sink)
+    pipeline = SpeechPipeline(lambda text, language_code: text.encode("utf-8"), playback=playback)
+    pipeline.feed("Primeira frase. Segunda frase. ")
+    pipeline.finish()
+
+    assert pipeline.wait(5)
+    assert sink.played == [b"Primeira frase.", b"Segunda frase."]
+
+    other = playback.enqueue(b"x" * 200, group="system")
+    pipeline = SpeechPipeline(lambda text, language_code: text.encode("utf-8") * 20, playback=playback)
+    pipeline.feed("Um. Dois. Tres. ")
+    while not playback.pending_count:
+        time.sleep(0.005)
+    pipeline.cancel()
+    assert pipeline.wait(2)
+    assert other.wait(2) and other.status == "done"
+    playback.close()
+
+
+def test_speech_pipeline_waits_for_playback_attached_later():
+    sink = FakeSink(seconds_per_byte=0.0001)
+    synthesized = []
+    pipeline = SpeechPipeline(lambda text, language_code: synthesized.append(text) or text.encode("utf-8"))
+    pipeline.feed("Primeira frase. Segunda frase. ")
+    pipeline.finish()
+    while len(synthesized) < 2:
+        time.sleep(0.005)
+    assert not pipeline.wait(0.05)
+
+    playback = AudioPlayback(sink)
+    pipeline.attach_playback(playback)
+    assert pipeline.wait(5)
+    assert sink.played == [b"Primeira frase.", b"Segunda frase."]
+    playback.close()
@@ -0,0 +1,139 @@
+import os
+import sys
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import utils.telemetry as telemetry_module
+from api.openai_client import OpenAIClient
+from api.response_cache import ResponseCache
+from tests.fake_openai_server import FakeOpenAIServer
+from utils.telemetry import Telemetry
+
+SYSTEM = "Você é uma assistente."
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_exact_hit_ignores_case_spacing_and_final_punctuation(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    calls = []
+
+    def create():
+        calls.append(1)
+        return "Brasília."
+
+    first = cache.get_or_create("Qual é a capital do Brasil?", SYSTEM, "gpt-4", create)
+    second = cache.get_or_create("  qual é a capital do  brasil ", SYSTEM, "gpt-4", create)
+
+    assert first == second == "Brasília."
+    assert len(calls) == 1
+    assert cache.stats()["exact_hits"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_key_depends_on_model_and_system_prompt(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("Olá", SYSTEM, "gpt-4", "Oi!")
+
+    assert cache.get("Olá", SYSTEM, "gpt-4") == "Oi!"
+    assert cache.get("Olá", SYSTEM, "gpt-4o-mini") is None
+    assert cache.get("Olá", "Outro sistema.", "gpt-4") is None
+
+
+def test_similarity_lookup_respects_threshold(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), embed=FakeOpenAIServer.embedding,
+                          similarity_threshold=0.8)
+    cache.put("qual a previsão do tempo para amanhã em São Paulo", SYSTEM, "gpt-4", "Sol.")
+
+    assert cache.get("previsão do tempo para amanhã em São Paulo", SYSTEM, "gpt-4") == "Sol."
+    assert cache.get("receita de bolo de cenoura", SYSTEM, "gpt-4") is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_entries_expire_and_lru_is_evicted(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl=60, max_entries=2, clock=clock)
+    cache.put("a", SYSTEM, "gpt-4", "1")
+    clock.now += 1
+    cache.put("b", SYSTEM, "gpt-4", "2")
+    clock.now += 1
+    cache.get("a", SYSTEM, "gpt-4")  # "b" passa a ser o menos usado
+    clock.now += 1
+    cache.put("c", SYSTEM, "gpt-4", "3")
+
+    assert cache.get("b", SYSTEM, "gpt-4") is None
+    assert cache.get("a", SYSTEM, "gpt-4") == "1"
+    assert cache.stats()["evictions"] == 1
+
+    clock.now += 120
+    assert cache.get("c", SYSTEM, "gpt-4") is None
+
+
+def test_cache_persists_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    ResponseCache(path).put("Olá", SYSTEM, "gpt-4", "Oi!", latency=2.0)
+
+    cache = ResponseCache(path)
+    assert cache.get("Olá", SYSTEM, "gpt-4") == "Oi!"
+    assert cache.stats()["latency_saved"] > 1.9
+
+
+def test_client_serves_repeated_question_from_cache(tmp_path):
+    with FakeOpenAIServer(reply="Brasília.") as server:
+        client = OpenAIClient(api_key="test", base_url=server.base_url)
+        client.response_cache = ResponseCache(str(tmp_path / "cache.sqlite3"), embed=client.embed)
+
+        # Cada pergunta abre uma conversa nova: o cache só atende perguntas sem contexto
+        assert client.get_response("Qual é a capital do Brasil?") == "Brasília."
+        client.memory.clear()
+        assert list(client.stream_response("qual é a capital do brasil")) == ["Brasília."]
+        client.memory.clear()
+        assert list(client.stream_response("A capital do Brasil, qual é?")) == ["Brasília."]
+
+    chat_calls = [r for r in server.requests if r["path"].endswith("/chat/completions")]
+    assert len(chat_calls) == 1
+    assert client.response_cache.stats()["hits"] == 2
+
+
+def test_follow_up_questions_are_not_served_from_another_conversation(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    with FakeOpenAIServer(reply="Custa 10 reais.") as server:
+        first = OpenAIClient(api_key="test", base_url=server.base_url, response_cache=cache)
+        first.get_response("Quanto custa um café?")
+        first.get_response("E quanto custa?")
+
+        server.reply = "Custa 3 mil reais."
+        second = OpenAIClient(api_key="test", base_url=server.base_url, response_cache=cache)
+        second.get_response("Me fale do novo celular.")
+        assert second.get_response("E quanto custa?") == "Custa 3 mil reais."
+        assert list(second.stream_response("e quanto custa")) == ["Custa", " 3", " mil", " reais."]
+
+    chat_calls = [r for r in server.requests if r["path"].endswith("/chat/completions")]
+    assert len(chat_calls) == 5
+    # Só as perguntas que abriram cada conversa, sem contexto, foram guardadas
+    assert cache.stats()["hits"] == 0 and cache.stats()["entries"] == 2
+
+
+def test_failed_cache_lookup_falls_back_to_the_api(tmp_path, monkeypatch):
+    def failing_lookup(prompt, system_prompt, model):
+        raise TimeoutError("o embedding da pergunta demorou demais")
+
+    telemetry = Telemetry()
+    monkeypatch.setattr(telemetry_module, "_default_telemetry", telemetry)
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    cache.lookup = failing_lookup
+    with FakeOpenAIServer(reply="Resposta sem cache.") as server:
+        client = OpenAIClient(api_key="test", base_url=server.base_url, response_cache=cache)
+        assert "".join(client.stream_response("Olá")) == "Resposta sem cache."
+        client.memory.clear()
+        assert client.get_response("Olá") == "Resposta sem cache."
+
+    summary = telemetry.summary()
+    assert summary["llm.stream"]["count"] == 1 and summary["llm.stream"]["errors"] == 0
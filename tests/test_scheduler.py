@@ -0,0 +1,127 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.http_transport import TransportConfig, create_http_client
+from api.openai_client import OpenAIClient
+from api.scheduler import (BACKGROUND, INTERACTIVE, OutboundScheduler, SchedulerTimeoutError, outbound_priority,
+                           scheduled_call)
+from tests.fake_openai_server import FakeOpenAIServer
+
+REPLY = "Resposta dentro da cota."
+
+
+def run_concurrently(base_url, scheduler, count):
+    """Faz `count` chamadas simultâneas sem novas tentativas; retorna as respostas."""
+    http_client = create_http_client(TransportConfig(max_retries=0, max_connections=count), scheduler=scheduler)
+    replies = []
+
+    def call():
+        client = OpenAIClient(api_key="test", base_url=base_url, http_client=http_client)
+        replies.append(client.get_response("Olá", max_tokens=20))
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    http_client.close()
+    return replies
+
+
+def test_quota_without_scheduler_fails_with_429():
+    # 10 requisições por segundo, rajada de 5
+    with FakeOpenAIServer(reply=REPLY, rate_limit_requests=600, rate_limit_burst=0.5) as fake:
+        replies = run_concurrently(fake.base_url, OutboundScheduler(), 12)
+
+    assert fake.rate_limited > 0
+    assert replies.count(OpenAIClient.ERROR_MESSAGE) == fake.rate_limited
+
+
+def test_scheduler_applies_backpressure_instead_of_429():
+    scheduler = OutboundScheduler()
+    scheduler.configure("openai", requests_per_minute=600, hosts=("127.0.0.1",), burst_seconds=0.5)
+    with FakeOpenAIServer(reply=REPLY, rate_limit_requests=600, rate_limit_burst=0.5) as fake:
+        start = time.perf_counter()
+        replies = run_concurrently(fake.base_url, scheduler, 12)
+        elapsed = time.perf_counter() - start
+
+    assert fake.rate_limited == 0
+    assert replies == [REPLY] * 12
+    # Além da rajada, as chamadas esperaram a vez (cerca de 0,1 s cada)
+    assert elapsed >= 0.5
+    stats = scheduler.stats()["openai"]
+    assert stats["granted"] == 12 and stats["throttled"] == 0 and stats["queue_depth"] == 0
+    assert stats["max_queue_depth"] > 1
+    # Respostas do chat saem com prioridade interativa
+    assert stats["wait"]["interactive"]["count"] == 12 and stats["wait"]["interactive"]["max"] >= 0.4
+
+
+def test_interactive_calls_go_before_queued_background_work():
+    scheduler = OutboundScheduler()
+    # Uma chamada a cada 0,1 s, sem rajada
+    scheduler.configure("openai", requests_per_minute=600, burst_seconds=0.1)
+    # Um 429 pausa o provedor; enquanto isso, as chamadas entram na fila
+    scheduler.report_throttled("openai", retry_after=0.3)
+    order = []
+
+    def call(name, priority):
+        with outbound_priority(priority):
+            scheduler.acquire("openai")
+        order.append(name)
+
+    threads = []
+    for name, priority in [("imagem", BACKGROUND), ("resumo", BACKGROUND), ("chat", INTERACTIVE)]:
+        threads.append(threading.Thread(target=call, args=(name, priority)))
+        threads[-1].start()
+        time.sleep(0.03)
+    for thread in threads:
+        thread.join()
+
+    assert order == ["chat", "imagem", "resumo"]
+    stats = scheduler.stats()["openai"]
+    assert stats["max_queue_depth"] == 3 and stats["throttled"] == 1
+    assert set(stats["wait"]) == {"interactive", "background"}
+    assert stats["wait"]["interactive"]["max"] < stats["wait"]["background"]["max"]
+
+
+def test_limits_follow_response_headers():
+    scheduler = OutboundScheduler()
+    scheduler.configure("openai", requests_per_minute=6000)
+    scheduler.update_from_headers("openai", {
+        "x-ratelimit-limit-requests": "60",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "1s",
+        "x-ratelimit-limit-tokens": "1000",
+        "x-ratelimit-remaining-tokens": "900",
+    })
+    # Sem cota restante (1 requisição por segundo), a chamada não sai a tempo
+    with pytest.raises(SchedulerTimeoutError):
+        scheduler.acquire("openai", tokens=10, timeout=0.05)
+    assert scheduler.stats()["openai"]["queue_depth"] == 0
+
+    scheduler.update_from_headers("openai", {"retry-after": "0.2"}, status=429)
+    stats = scheduler.stats()["openai"]
+    assert stats["throttled"] == 1 and 0 < stats["paused_for"] <= 0.2
+
+
+def test_scheduled_call_pauses_provider_on_quota_errors():
+    class ResourceExhausted(Exception):
+        code = 429
+
+    scheduler = OutboundScheduler()
+    scheduler.configure("google_tts", requests_per_minute=1000, tokens_per_minute=150000)
+    with scheduled_call("google_tts", tokens=40, scheduler=scheduler):
+        pass
+    with pytest.raises(ResourceExhausted):
+        with scheduled_call("google_tts", tokens=40, scheduler=scheduler):
+            raise ResourceExhausted("cota esgotada")
+
+    stats = scheduler.stats()["google_tts"]
+    assert stats["granted"] == 2 and stats["throttled"] == 1 and stats["paused_for"] > 0
@@ -0,0 +1,61 @@
+import os
+import sys
+import threading
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.service_loader import ServiceLoader
+
+
+def test_services_are_created_in_background_only_after_start():
+    thread_names = []
+    loader = ServiceLoader()
+    loader.register("client", lambda: thread_names.append(threading.current_thread().name) or "cliente")
+
+    assert not loader.is_ready("client") and loader.peek("client") is None
+    loader.start()
+    assert loader.get("client", timeout=2) == "cliente"
+    assert thread_names == ["service-loader"]
+    assert loader.timings["client"] >= 0
+
+
+def test_failed_service_does_not_block_the_others():
+    failures = []
+
+    def missing_vlc():
+        raise ImportError("No module named 'vlc'")
+
+    loader = ServiceLoader(on_failed=lambda name, message: failures.append((name, message)))
+    loader.register("playback", missing_vlc)
+    loader.register("client", lambda: "cliente")
+
+    assert loader.wait_all(2)
+    assert loader.get("playback") is None
+    assert isinstance(loader.error("playback"), ImportError)
+    assert loader.get("client") == "cliente"
+    assert failures == [("playback", "No module named 'vlc'")]
+
+
+def test_on_ready_reports_created_services_only():
+    ready = []
+
+    def missing_vlc():
+        raise ImportError("No module named 'vlc'")
+
+    loader = ServiceLoader(on_ready=ready.append)
+    loader.register("playback", missing_vlc)
+    loader.register("client", lambda: "cliente")
+
+    assert loader.wait_all(2)
+    assert ready == ["client"]
+
+
+def test_get_waits_for_a_slow_service():
+    release = threading.Event()
+    loader = ServiceLoader()
+    loader.register("slow", lambda: release.wait(2) and "pronto")
+
+    assert loader.get("slow", timeout=0.05) is None
+    release.set()
+    assert loader.get("slow", timeout=2) == "pronto"
@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.audio_stream import AudioRingBuffer
+from utils.speech_recognition import StreamingRecognizer
+
+
+class FakeRecognizer(StreamingRecognizer):
+    """
+    Reconhecedor local: cada bloco contém uma palavra em UTF-8 (em vez de PCM),
+    e uma transcrição parcial é emitida a cada bloco recebido.
+    """
+
+    def __init__(self):
+        self.sample_rates = []
+
+    def recognize(self, chunks, sample_rate, on_partial=None):
+        self.sample_rates.append(sample_rate)
+        words = []
+        for chunk in chunks:
+            words.append(chunk.decode("utf-8"))
+            if on_partial:
+                on_partial(" ".join(words))
+        return " ".join(words) or None
+
+
+def produce(buffer, words, delay=0.0):
+    """Simula o callback do microfone enchendo o buffer."""
+    for word in words:
+        buffer.put(word.encode("utf-8"))
+        time.sleep(delay)
+    buffer.close()
+
+
+def test_ring_buffer_delivers_chunks_in_order_until_closed():
+    buffer = AudioRingBuffer()
+    for chunk in (b"a", b"b", b"c"):
+        buffer.put(chunk)
+    buffer.close()
+
+    assert list(buffer) == [b"a", b"b", b"c"]
+
+
+def test_ring_buffer_drops_oldest_when_full():
+    buffer = AudioRingBuffer(capacity=2)
+    for chunk in (b"a", b"b", b"c"):
+        buffer.put(chunk)
+    buffer.close()
+
+    assert list(buffer) == [b"b", b"c"]
+    assert buffer.dropped == 1
+
+
+def test_ring_buffer_ignores_chunks_after_close():
+    buffer = AudioRingBuffer()
+    buffer.close()
+    buffer.put(b"tarde demais")
+
+    assert list(buffer) == []
+
+
+def test_partials_arrive_while_audio_is_still_being_captured():
+    buffer = AudioRingBuffer()
+    recognizer = FakeRecognizer()
+    partials = []
+    capture_done = threading.Event()
+    partials_before_end = []
+
+    def on_partial(text):
+        partials.append(text)
+        if not capture_done.is_set():
+            partials_before_end.append(text)
+
+    def capture():
+        produce(buffer, ["olá", "tudo", "bem"], delay=0.05)
+        capture_done.set()
+
+    producer = threading.Thread(target=capture)
+    producer.start()
+    transcript = recognizer.recognize(buffer, 16000, on_partial=on_partial)
+    producer.join()
+
+    assert transcript == "olá tudo bem"
+    assert partials == ["olá", "olá tudo", "olá tudo bem"]
+    assert partials_before_end
+    assert recognizer.sample_rates == [16000]
+
+
+def test_silence_returns_none():
+    buffer = AudioRingBuffer()
+    buffer.close()
+
+    assert FakeRecognizer().recognize(buffer, 16000) is None
@@ -0,0 +1,126 @@
+import json
+import os
+import sys
+import threading
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import utils.telemetry as telemetry_module
+from api.openai_client import OpenAIClient
+from tests.fake_openai_server import FakeOpenAIServer
+from utils.telemetry import STATUS_ERROR, STATUS_OK, JsonlExporter, Telemetry
+
+
+def test_nested_spans_share_the_trace_and_link_to_the_parent():
+    telemetry = Telemetry()
+    trace_id = telemetry.new_trace()
+    with telemetry.span("llm.stream", model="gpt-4") as parent:
+        with telemetry.span("cache.response_lookup") as child:
+            child.set_attribute("result", "miss")
+    other_thread = []
+    thread = threading.Thread(target=lambda: other_thread.append(telemetry.record("tts.synthesize", 0.2)))
+    thread.start()
+    thread.join()
+
+    assert child.trace_id == parent.trace_id == trace_id
+    assert child.parent_id == parent.span_id
+    # Em outra thread não há span ativo: o span fica na raiz do trace ativo
+    assert other_thread[0].trace_id == trace_id and other_thread[0].parent_id is None
+
+    exported = child.to_dict()
+    assert exported["parentSpanId"] == parent.span_id
+    assert exported["attributes"] == [{"key": "result", "value": {"stringValue": "miss"}}]
+    assert exported["status"] == {"code": STATUS_OK}
+    assert int(exported["endTimeUnixNano"]) >= int(exported["startTimeUnixNano"])
+
+
+def test_summary_reports_percentiles_and_errors():
+    telemetry = Telemetry()
+    for ms in range(1, 101):
+        telemetry.record("llm.first_token", ms / 1000)
+    try:
+        with telemetry.span("llm.first_token"):
+            raise TimeoutError("sem resposta")
+    except TimeoutError:
+        pass
+    telemetry.increment("playback.errors", 2)
+
+    stage = telemetry.summary()["llm.first_token"]
+    assert stage["count"] == 101 and stage["errors"] == 1
+    assert abs(stage["p50"] - 0.0505) < 1e-9
+    assert abs(stage["p95"] - 0.09505) < 1e-9
+    assert stage["last"] == 0.1
+    assert telemetry.counters() == {"playback.errors": 2}
+
+    telemetry.reset()
+    assert telemetry.summary() == {} and telemetry.counters() == {}
+
+
+def test_jsonl_exporter_writes_otlp_spans_and_rotates(tmp_path):
+    path = str(tmp_path / "telemetry.jsonl")
+    exporter = JsonlExporter(path, max_bytes=600, flush_every=2)
+    telemetry = Telemetry(exporter)
+    for i in range(3):
+        telemetry.record("tts.synthesize", 0.1, chars=i, cached=False)
+    telemetry.record("playback.start", 0.01, error=RuntimeError("sem dispositivo"))
+    telemetry.close()
+
+    lines = []
+    for name in (path + ".1", path):
+        if os.path.exists(name):
+            with open(name, encoding="utf-8") as f:
+                lines += [json.loads(line) for line in f]
+    assert [span["name"] for span in lines] == ["tts.synthesize"] * 3 + ["playback.start"]
+    assert os.path.exists(path + ".1")
+    assert lines[2]["attributes"] == [
+        {"key": "chars", "value": {"intValue": "2"}}, {"key": "cached", "value": {"boolValue": False}}
+    ]
+    assert lines[3]["status"] == {"code": STATUS_ERROR, "message": "sem dispositivo"}
+
+
+def test_file_export_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv("TELEMETRY_PATH", raising=False)
+    monkeypatch.setattr(telemetry_module, "_default_telemetry", None)
+    assert telemetry_module.get_telemetry().exporter is None
+
+    path = tmp_path / "telemetry.jsonl"
+    monkeypatch.setenv("TELEMETRY_PATH", str(path))
+    telemetry = telemetry_module.enable_file_export()
+    telemetry.record("tts.synthesize", 0.1)
+    telemetry.close()
+    assert json.loads(path.read_text(encoding="utf-8"))["name"] == "tts.synthesize"
+
+
+def test_openai_stream_records_time_to_first_token(monkeypatch):
+    telemetry = Telemetry()
+    monkeypatch.setattr(telemetry_module, "_default_telemetry", telemetry)
+    with FakeOpenAIServer(reply="Olá, eu sou a Gysin IA.") as server:
+        client = OpenAIClient(api_key="test", base_url=server.base_url)
+        "".join(client.stream_response("Olá"))
+
+    summary = telemetry.summary()
+    assert summary["llm.first_token"]["count"] == 1
+    assert summary["llm.stream"]["count"] == 1
+    assert summary["llm.first_token"]["p50"] <= summary["llm.stream"]["p50"]
+
+
+def test_debug_panel_lists_each_stage():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    from gui.debug_panel import TelemetryPanel
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    telemetry = Telemetry()
+    telemetry.record("language_detection", 0.0002)
+    telemetry.record("llm.first_token", 0.35)
+    panel = TelemetryPanel(telemetry)
+    panel.refresh()
+
+    rows = [[panel.table.item(row, column).text() for column in range(panel.table.columnCount())]
+            for row in range(panel.table.rowCount())]
+    assert rows == [["language_detection", "1", "0", "0.2", "0.2", "0.2"],
+                    ["llm.first_token", "1", "0", "350.0", "350.0", "350.0"]]
+    panel.reset()
+    assert panel.table.rowCount() == 0
+    app.processEvents()
@@ -0,0 +1,199 @@
+import os
+import sys
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Permite rodar os testes de widgets sem display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QPoint, QSize, Qt
+from PySide6.QtGui import QColor, QImage
+from PySide6.QtWidgets import QApplication
+
+from gui.transcript import (COLOR_ROLE, IMAGE_MAX_SIZE, IMAGE_ROLE, MESSAGE_ID_ROLE, SENDER_ROLE, TranscriptModel,
+                            TranscriptView)
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def make_view(max_messages=100):
+    view = TranscriptView(max_messages=max_messages)
+    view.resize(400, 300)
+    view.show()
+    app.processEvents()
+    return view
+
+
+def test_model_exposes_sender_text_and_color():
+    model = TranscriptModel()
+    model.append_message("Você", "Olá", "#E6F3FF")
+    model.append_message("Gysin IA", "Oi!", "#F0FFF0")
+
+    index = model.index(1)
+    assert model.rowCount() == 2
+    assert index.data(Qt.DisplayRole) == "Oi!"
+    assert index.data(SENDER_ROLE) == "Gysin IA"
+    assert index.data(COLOR_ROLE) == "#F0FFF0"
+
+
+def test_model_evicts_oldest_messages_in_batches():
+    model = TranscriptModel(max_messages=10, evict_batch=4)
+    for i in range(25):
+        model.append_message("Você", f"mensagem {i}", "#E6F3FF")
+
+    assert model.rowCount() <= 10
+    assert model.evicted == 25 - model.rowCount()
+    assert model.index(model.rowCount() - 1).data() == "mensagem 24"
+    # Remetentes e cores repetidos são guardados uma única vez
+    assert len(model._senders) == 1 and len(model._colors) == 1
+
+
+def test_view_computes_each_height_once_and_follows_the_end():
+    view = make_view()
+    for i in range(30):
+        view.add_message("Você", f"mensagem {i} " * (1 + i % 5), "#E6F3FF")
+    app.processEvents()
+
+    assert view.height_computations == 30
+    scroll_bar = view.verticalScrollBar()
+    assert scroll_bar.maximum() > 0
+    assert scroll_bar.value() == scroll_bar.maximum()
+    assert view.row_at(view.viewport().height() - 1) == 29
+
+
+def test_streaming_grows_only_the_last_row():
+    view = make_view()
+    view.add_message("Você", "Conte uma história", "#E6F3FF")
+    message_id = view.begin_streaming_message("Gysin IA", "#F0FFF0")
+    offsets_before = list(view._offsets)
+    height_before = view._heights[-1]
+
+    for _ in range(5):
+        view.append_to_message(message_id, " era uma vez" * 10)
+
+    assert view.transcript_model.index(1).data().startswith(" era uma vez")
+    assert view._offsets == offsets_before
+    assert view._heights[-1] > height_before
+    assert view._total_height == view._offsets[-1] + view._heights[-1]
+
+
+def test_streaming_targets_its_message_when_rows_are_added_mid_stream():
+    view = make_view()
+    message_id = view.begin_streaming_message("Gysin IA", "#F0FFF0")
+    view.append_to_message(message_id, "Primeira parte")
+    view.add_message("Sistema", "Erro ao gerar imagem: tempo esgotado", "#444444")
+    view.append_to_message(message_id, " e o restante da resposta.")
+
+    model = view.transcript_model
+    assert model.index(0).data() == "Primeira parte e o restante da resposta."
+    assert model.index(1).data() == "Erro ao gerar imagem: tempo esgotado"
+    assert view._total_height == sum(view._heights)
+    assert view._offsets[1] == view._heights[0]
+
+
+def test_view_stays_consistent_after_eviction_and_clear():
+    view = make_view(max_messages=20)
+    for i in range(50):
+        view.add_message("Sistema", f"aviso {i}", "#444444")
+
+    assert len(view._heights) == len(view._offsets) == view.message_count() <= 20
+    assert view._total_height == sum(view._heights)
+
+    view.clear()
+    assert view.message_count() == 0
+    assert view._total_height == 0
+
+
+def test_prepending_old_page_keeps_visible_content_in_place():
+    view = make_view()
+    for i in range(30):
+        view.add_message("Você", f"recente {i}", "#E6F3FF")
+    view.scroll_to_row(10)
+    row_before = view.row_at(0)
+
+    inserted = view.prepend_messages([("Gysin IA", f"antiga {i}", "#F0FFF0") for i in range(5)])
+
+    assert inserted == 5
+    assert view.transcript_model.index(0).data() == "antiga 0"
+    assert view.row_at(0) == row_before + 5
+    assert view._total_height == sum(view._heights)
+
+
+def test_image_placeholder_thumbnail_and_full_image_share_the_same_space():
+    view = make_view(max_messages=10)
+    message_id = view.add_message("Gysin IA", "Imagem: um farol", "#F0FFF0")
+    view.add_message("Você", "Obrigado!", "#E6F3FF")
+    text_height = view._heights[0]
+
+    view.set_message_image(message_id, QSize(1024, 1024))
+    placeholder_height = view._heights[0]
+    thumbnail = QImage(256, 256, QImage.Format_RGB32)
+    thumbnail.fill(QColor("#336699"))
+    view.set_message_image(message_id, thumbnail)
+    thumbnail_height = view._heights[0]
+    full = QImage(1024, 1024, QImage.Format_RGB32)
+    full.fill(QColor("#336699"))
+    view.set_message_image(message_id, full)
+
+    assert placeholder_height > text_height
+    assert thumbnail_height == placeholder_height == view._heights[0]
+    assert view._total_height == sum(view._heights)
+    # A imagem completa é guardada já reduzida para o tamanho de exibição
+    stored = view.transcript_model.index(0).data(IMAGE_ROLE)
+    assert stored.width() <= IMAGE_MAX_SIZE.width() and stored.height() <= IMAGE_MAX_SIZE.height()
+
+    for i in range(20):
+        view.add_message("Sistema", f"aviso {i}", "#444444")
+    assert view.transcript_model._images == {}
+    assert not view.set_message_image(message_id, full)
+
+
+def test_long_session_measures_only_the_visible_rows():
+    view = make_view(max_messages=2000)
+    view.add_message("Você", "mensagem atual", "#E6F3FF")
+    computations = view.height_computations
+
+    view.prepend_messages([("Gysin IA", f"antiga {i} " * (1 + i % 7), "#F0FFF0") for i in range(1000)])
+    app.processEvents()
+
+    # Só as linhas na tela são medidas; as demais ficam com a altura estimada
+    assert view.height_computations - computations < 30
+    assert view.row_at(view.viewport().height() - 1) == 1000
+    view.scroll_to_row(500)
+    assert view.row_at(0) == 500
+    assert view.height_computations - computations < 60
+    assert view._total_height == sum(view._heights)
+
+
+def test_heights_are_cached_per_width():
+    view = make_view()
+    for i in range(10):
+        view.add_message("Você", f"mensagem {i} " * 8, "#E6F3FF")
+    narrow_heights = list(view._heights)
+
+    view.resize(700, 300)
+    app.processEvents()
+    computations = view.height_computations
+    view.resize(400, 300)
+    app.processEvents()
+
+    assert view.height_computations == computations
+    assert view._heights == narrow_heights
+
+
+def test_selected_message_can_be_copied():
+    from PySide6.QtTest import QTest
+
+    view = make_view()
+    view.add_message("Você", "Qual é a capital do Brasil?", "#E6F3FF")
+    view.add_message("Gysin IA", "Brasília.", "#F0FFF0")
+
+    QTest.mouseClick(view.viewport(), Qt.LeftButton, pos=view.viewport().rect().topLeft() + QPoint(10, 10))
+    assert view.selected_id == view.transcript_model.index(0).data(MESSAGE_ID_ROLE)
+    QTest.keyClick(view, Qt.Key_C, Qt.ControlModifier)
+    assert QApplication.clipboard().text() == "Qual é a capital do Brasil?"
+
+    assert view.copy_message(view.transcript_model.index(1).data(MESSAGE_ID_ROLE)) == "Brasília."
+    view.clear()
+    assert view.selected_id is None and view.copy_message() is None
@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.tts_cache import TTSCache
+
+
+class CountingTTS:
+    """Substitui googlecloud.text_to_speech.text_to_speech contando as chamadas."""
+
+    def __init__(self, size=100):
+        self.size = size
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, text, output_file, language_code='pt-BR'):
+        with self._lock:
+            self.calls.append((text, language_code))
+        with open(output_file, "wb") as f:
+            f.write(text.encode("utf-8").ljust(self.size, b"\0"))
+
+
+def test_hit_skips_synthesis(tmp_path):
+    cache = TTSCache(str(tmp_path))
+    tts = CountingTTS()
+
+    first = cache.get_or_synthesize("Bem-vindo ao Gysin IA!", "pt-BR", tts)
+    second = cache.get_or_synthesize("  Bem-vindo ao   Gysin IA! ", "pt-BR", tts)
+
+    assert first == second
+    assert len(tts.calls) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_key_includes_language_voice_and_audio_config():
+    key = TTSCache.make_key("Olá", "pt-BR")
+    assert key != TTSCache.make_key("Olá", "es-ES")
+    assert key != TTSCache.make_key("Olá", "pt-BR", voice="pt-BR-Wavenet-A")
+    assert key != TTSCache.make_key("Olá", "pt-BR", audio_config={"speaking_rate": 1.2})
+    assert TTSCache.make_key("Olá", "pt-BR", audio_config={"a": 1, "b": 2}) == \
+        TTSCache.make_key("Olá", "pt-BR", audio_config={"b": 2, "a": 1})
+
+
+def test_different_texts_get_different_files(tmp_path):
+    cache = TTSCache(str(tmp_path))
+    tts = CountingTTS()
+    a = cache.get_or_synthesize("Primeira resposta.", "pt-BR", tts)
+    b = cache.get_or_synthesize("Segunda resposta.", "pt-BR", tts)
+
+    assert a != b
+    assert open(a, "rb").read().startswith(b"Primeira")
+    assert open(b, "rb").read().startswith(b"Segunda")
+
+
+def test_lru_eviction_respects_size_limit(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=250)
+    tts = CountingTTS(size=100)
+
+    a = cache.get_or_synthesize("a", "pt-BR", tts)
+    b = cache.get_or_synthesize("b", "pt-BR", tts)
+    cache.get_or_synthesize("a", "pt-BR", tts)  # "a" passa a ser o mais recente
+    cache.get_or_synthesize("c", "pt-BR", tts)
+
+    assert os.path.exists(a)
+    assert not os.path.exists(b)
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 250
+
+
+def test_failed_synthesis_leaves_no_partial_file(tmp_path):
+    cache = TTSCache(str(tmp_path))
+
+    def broken_tts(text, output_file, language_code='pt-BR'):
+        with open(output_file, "wb") as f:
+            f.write(b"parcial")
+        raise RuntimeError("serviço indisponível")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_synthesize("Olá", "pt-BR", broken_tts)
+
+    assert os.listdir(tmp_path) == []
+    assert cache.stats()["entries"] == 0
+
+
+def test_index_survives_restart(tmp_path):
+    tts = CountingTTS()
+    TTSCache(str(tmp_path)).get_or_synthesize("Olá", "pt-BR", tts)
+
+    reopened = TTSCache(str(tmp_path))
+    reopened.get_or_synthesize("Olá", "pt-BR", tts)
+
+    assert len(tts.calls) == 1
+    assert reopened.stats()["hits"] == 1
+
+
+def test_stale_format_files_are_removed_on_open(tmp_path):
+    tts = CountingTTS()
+    TTSCache(str(tmp_path)).get_or_synthesize("Olá", "pt-BR", tts)
+
+    reopened = TTSCache(str(tmp_path), extension=".wav", stale_extensions=(".mp3",))
+
+    assert os.listdir(tmp_path) == []
+    assert reopened.stats()["entries"] == 0
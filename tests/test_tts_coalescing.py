@@ -0,0 +1,121 @@
+import io
+import os
+import sys
+import threading
+import wave
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.fake_backends import FakeTTS, silent_wav
+from utils.tts_cache import TTSCache
+from utils.tts_coalescing import CoalescingTTS, split_wav
+
+
+def run_concurrently(fn, args_list):
+    """Chama fn com cada conjunto de argumentos em uma thread e retorna os resultados na ordem."""
+    results = [None] * len(args_list)
+    barrier = threading.Barrier(len(args_list))
+
+    def worker(i):
+        barrier.wait()
+        results[i] = fn(*args_list[i])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(args_list))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_identical_requests_share_one_synthesis():
+    backend = FakeTTS(latency="0.1")
+    tts = CoalescingTTS(backend.synthesize)
+
+    # Variações triviais de espaço geram a mesma chave
+    results = run_concurrently(tts.synthesize, [("Olá,  tudo bem?", "pt-BR")] * 7 + [(" Olá, tudo bem? ", "pt-BR")])
+
+    assert backend.calls == 1
+    assert len(set(results)) == 1
+    stats = tts.stats()
+    assert stats["requests"] == 8 and stats["coalesced"] == 7 and stats["in_flight"] == 0
+
+
+def test_short_utterances_are_batched_per_language():
+    backend = FakeTTS(latency="0.05")
+    tts = CoalescingTTS(backend.synthesize, backend.synthesize_batch, batch_window=0.05, max_batch=4)
+    requests = [(f"Frase {i}.", "pt-BR") for i in range(6)] + [("Hello there.", "en-US")]
+
+    results = run_concurrently(tts.synthesize, requests)
+
+    assert sorted(backend.batch_sizes) == [1, 2, 4]
+    assert backend.calls == 3
+    # Cada frase recebe o seu próprio áudio
+    assert results == [silent_wav(len(text) * backend.seconds_per_char) for text, _ in requests]
+    stats = tts.stats()
+    assert stats["batches"] == 3 and stats["max_batch_size"] == 4
+    assert stats["max_queue_depth"] >= 4 and stats["queue_depth"] == 0
+    tts.close()
+
+
+def test_long_utterances_skip_the_batcher_and_failed_batches_fall_back():
+    backend = FakeTTS()
+    failing = FakeTTS(failure_rate=1.0)
+    tts = CoalescingTTS(backend.synthesize, failing.synthesize_batch, max_batch_chars=20)
+
+    long_text = "Esta frase é longa demais para esperar pelo lote."
+    assert tts.synthesize(long_text, "pt-BR") == silent_wav(len(long_text) * backend.seconds_per_char)
+    assert failing.calls == 0
+    assert tts.synthesize("Oi!", "pt-BR") == silent_wav(3 * backend.seconds_per_char)
+    assert failing.calls == 1 and tts.stats()["batch_fallbacks"] == 1
+    tts.close()
+
+
+def test_cache_hits_do_not_reach_the_backend(tmp_path):
+    backend = FakeTTS()
+    tts = CoalescingTTS(backend.synthesize, cache=TTSCache(str(tmp_path)))
+
+    first = tts.synthesize("Bem-vindo ao Gysin IA!", "pt-BR")
+    second = tts.synthesize("Bem-vindo ao Gysin IA!", "pt-BR")
+
+    assert first == second and backend.calls == 1
+    assert tts.stats()["cache_hits"] == 1
+
+
+def test_audio_config_is_part_of_the_cache_key(tmp_path):
+    cache = TTSCache(str(tmp_path), extension=".wav")
+    wav_backend, other_backend = FakeTTS(), FakeTTS()
+    wav_tts = CoalescingTTS(wav_backend.synthesize, cache=cache, audio_config={"audio_encoding": "LINEAR16"})
+    other_tts = CoalescingTTS(other_backend.synthesize, cache=cache, audio_config={"audio_encoding": "MP3"})
+
+    wav_tts.synthesize("Olá!", "pt-BR")
+    other_tts.synthesize("Olá!", "pt-BR")
+    wav_tts.synthesize("Olá!", "pt-BR")
+
+    # Cada formato tem a sua entrada: um não é servido no lugar do outro
+    assert wav_backend.calls == 1 and other_backend.calls == 1
+    assert wav_tts.stats()["cache_hits"] == 1 and cache.stats()["entries"] == 2
+
+
+def test_voice_reaches_the_single_sentence_backend():
+    voices = []
+
+    def synthesize(text, language_code, voice=None):
+        voices.append(voice)
+        return silent_wav(0.1)
+
+    CoalescingTTS(synthesize, voice="pt-BR-Wavenet-A").synthesize("Olá!", "pt-BR")
+    CoalescingTTS(synthesize).synthesize("Olá!", "pt-BR")
+
+    assert voices == ["pt-BR-Wavenet-A", None]
+
+
+def test_split_wav_cuts_at_the_boundaries():
+    segments = split_wav(silent_wav(1.0), [0.25, 0.75])
+
+    durations = []
+    for segment in segments:
+        with wave.open(io.BytesIO(segment)) as wav:
+            durations.append(wav.getnframes() / wav.getframerate())
+    assert durations == [0.25, 0.5, 0.25]
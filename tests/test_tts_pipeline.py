@@ -0,0 +1,148 @@
+import os
+import sys
+import threading
+import time
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.tts_pipeline import SentenceSegmenter, SpeechPipeline
+
+
+def test_segmenter_returns_complete_sentences_only():
+    segmenter = SentenceSegmenter()
+    assert segmenter.feed("Olá! Tudo") == ["Olá!"]
+    assert segmenter.feed(" bem? Eu sou") == ["Tudo bem?"]
+    assert segmenter.feed(" a Gysin IA.") == []
+    assert segmenter.flush() == ["Eu sou a Gysin IA."]
+    assert segmenter.flush() == []
+
+
+def test_segmenter_merges_short_fragments():
+    segmenter = SentenceSegmenter(min_chars=10)
+    assert segmenter.feed("Oi. Como vai você? ") == ["Oi. Como vai você?"]
+
+
+def test_segmenter_splits_on_newlines():
+    segmenter = SentenceSegmenter()
+    assert segmenter.feed("Lista:\n- item um\n") == ["Lista:", "- item um"]
+
+
+class RecordingBackend:
+    """TTS falso: frases mais curtas terminam antes, para testar a ordem de reprodução."""
+
+    def __init__(self, delay_per_char=0.002):
+        self.delay_per_char = delay_per_char
+        self.active = 0
+        self.max_active = 0
+        self.languages = []
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, language_code):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.languages.append(language_code)
+        time.sleep(self.delay_per_char * len(text))
+        with self._lock:
+            self.active -= 1
+        return text.encode("utf-8")
+
+
+def test_pipeline_plays_in_order_with_bounded_parallelism():
+    backend = RecordingBackend()
+    played = []
+    pipeline = SpeechPipeline(backend.synthesize, lambda audio, should_stop: played.append(audio),
+                              max_parallel=2)
+    text = "Esta é uma frase bem longa para sintetizar. Curta. Outra frase média aqui. Fim."
+    for token in text.split(" "):
+        pipeline.feed(token + " ")
+    pipeline.finish()
+
+    assert pipeline.wait(5)
+    assert [audio.decode("utf-8") for audio in played] == [
+        "Esta é uma frase bem longa para sintetizar.", "Curta.", "Outra frase média aqui.", "Fim."
+    ]
+    assert backend.max_active <= 2
+
+
+def test_pipeline_starts_playing_before_reply_finishes():
+    backend = RecordingBackend(delay_per_char=0)
+    first_played = threading.Event()
+    pipeline = SpeechPipeline(backend.synthesize, lambda audio, should_stop: first_played.set())
+
+    pipeline.feed("Primeira frase. Segunda")
+    assert first_played.wait(2)
+
+    pipeline.finish()
+    assert pipeline.wait(2)
+
+
+def test_pipeline_resolves_language_from_first_sentence():
+    backend = RecordingBackend(delay_per_char=0)
+    pipeline = SpeechPipeline(backend.synthesize, lambda audio, should_stop: None,
+                              resolve_language=lambda text: 'en-US')
+    pipeline.feed("Hello there. How are you? ")
+    pipeline.finish()
+
+    assert pipeline.wait(2)
+    assert backend.languages == ['en-US', 'en-US']
+
+
+def test_language_is_resolved_off_the_feeding_thread():
+    threads = []
+
+    def resolve(text):
+        threads.append(threading.current_thread())
+        time.sleep(0.05)  # Ex.: importação do detector
+        return 'de-DE'
+
+    backend = RecordingBackend(delay_per_char=0)
+    pipeline = SpeechPipeline(backend.synthesize, lambda audio, should_stop: None, resolve_language=resolve)
+    start = time.perf_counter()
+    pipeline.feed("Guten Tag. Wie geht es? ")
+    assert time.perf_counter() - start < 0.04
+    pipeline.finish()
+
+    assert pipeline.wait(2)
+    assert threads and threads[0] is not threading.current_thread()
+    assert backend.languages == ['de-DE', 'de-DE']
+
+
+def test_cancel_stops_playback_and_pending_synthesis():
+    backend = RecordingBackend(delay_per_char=0.01)
+    played = []
+    finished = threading.Event()
+
+    def play(audio, should_stop):
+        played.append(audio)
+        while not should_stop():
+            time.sleep(0.01)
+
+    pipeline = SpeechPipeline(backend.synthesize, play, max_parallel=1, on_finished=finished.set)
+    pipeline.feed("Um. Dois. Três. Quatro. Cinco. ")
+    while not played:
+        time.sleep(0.01)
+    pipeline.cancel()
+
+    assert finished.wait(2)
+    assert len(played) == 1
+
+
+def test_synthesis_errors_are_reported_and_skipped():
+    errors = []
+
+    def synthesize(text, language_code):
+        if text.startswith("Falha"):
+            raise RuntimeError("TTS indisponível")
+        return text
+
+    played = []
+    pipeline = SpeechPipeline(synthesize, lambda audio, should_stop: played.append(audio),
+                              on_error=errors.append)
+    pipeline.feed("Falha aqui. Depois funciona. ")
+    pipeline.finish()
+
+    assert pipeline.wait(2)
+    assert played == ["Depois funciona."]
+    assert errors == ["TTS indisponível"]
@@ -0,0 +1,131 @@
+import os
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.vad import END, Resampler, SILENCE, VoiceActivityDetector, analyze_wav, iter_wav_chunks
+
+RATE = 44100
+
+
+def noise(seconds, level=0.003, rate=RATE, seed=0):
+    """Ruído de fundo de um ambiente silencioso."""
+    return np.random.default_rng(seed).normal(0, level, int(seconds * rate))
+
+
+def voice(seconds, rate=RATE, f0=140.0):
+    """Sinal vozeado sintético: fundamental com harmônicos modulada em sílabas (~4 Hz)."""
+    t = np.arange(int(seconds * rate)) / rate
+    signal = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+    syllables = 0.55 + 0.45 * np.abs(np.sin(2 * np.pi * 2.0 * t))
+    return 0.15 * signal * syllables + noise(seconds, rate=rate, seed=1)
+
+
+def write_wav(path, samples, rate=RATE, channels=1):
+    """Grava as amostras como um WAV PCM de 16 bits (o mesmo formato do microfone)."""
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1).reshape(-1)
+    pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+    with wave.open(str(path), 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm.tobytes())
+    return str(path)
+
+
+@pytest.fixture
+def wav_fixtures(tmp_path):
+    """Gera os arquivos WAV usados pelo harness (equivalentes às gravações de referência)."""
+    return {
+        "short_utterance": write_wav(tmp_path / "short.wav",
+                                     np.concatenate([noise(0.5), voice(0.8), noise(4.0)])),
+        "long_utterance": write_wav(tmp_path / "long.wav",
+                                    np.concatenate([noise(0.4), voice(7.0), noise(2.0)])),
+        "pause_inside": write_wav(tmp_path / "pause.wav",
+                                  np.concatenate([noise(0.4), voice(1.0), noise(0.3), voice(1.0), noise(3.0)])),
+        "silence_only": write_wav(tmp_path / "silence.wav", noise(8.0)),
+        "stereo": write_wav(tmp_path / "stereo.wav",
+                            np.concatenate([noise(0.5), voice(1.0), noise(3.0)]), channels=2),
+    }
+
+
+def test_short_utterance_ends_well_before_five_seconds(wav_fixtures):
+    result = analyze_wav(wav_fixtures["short_utterance"])
+
+    assert result["speech_detected"]
+    assert result["ended_early"]
+    assert 400 <= result["speech_start_ms"] <= 700
+    assert 1100 <= result["speech_end_ms"] <= 1500
+    assert result["stopped_at_ms"] < 2500
+
+
+def test_long_utterance_is_not_cut_at_five_seconds(wav_fixtures):
+    result = analyze_wav(wav_fixtures["long_utterance"])
+
+    assert result["speech_detected"]
+    assert result["speech_end_ms"] > 7000
+
+
+def test_short_pause_does_not_end_capture(wav_fixtures):
+    result = analyze_wav(wav_fixtures["pause_inside"])
+
+    assert result["speech_end_ms"] > 2500
+
+
+def test_silence_only_times_out(wav_fixtures):
+    result = analyze_wav(wav_fixtures["silence_only"], no_speech_timeout_ms=3000)
+
+    assert not result["speech_detected"]
+    assert result["ended_early"]
+    assert 3000 <= result["stopped_at_ms"] < 3100
+
+
+def test_stereo_input_is_mixed_to_mono(wav_fixtures):
+    result = analyze_wav(wav_fixtures["stereo"])
+
+    assert result["speech_detected"]
+    assert result["ended_early"]
+
+
+def test_state_stays_end_after_ending():
+    vad = VoiceActivityDetector(no_speech_timeout_ms=100, calibration_ms=0)
+    chunk = (np.zeros(1024, dtype=np.int16)).tobytes()
+    states = [vad.process(chunk) for _ in range(10)]
+
+    assert SILENCE in states
+    assert states[-1] == END
+
+
+def test_resampler_downsamples_to_16k_and_keeps_frequency(tmp_path):
+    seconds = 1.0
+    t = np.arange(int(seconds * RATE)) / RATE
+    path = write_wav(tmp_path / "tone.wav", 0.5 * np.sin(2 * np.pi * 440 * t))
+    rate, channels, chunks = iter_wav_chunks(path)
+
+    resampler = Resampler(rate, 16000)
+    input_bytes, output = 0, []
+    for chunk in chunks:
+        input_bytes += len(chunk)
+        output.append(resampler.process(chunk))
+    output = np.frombuffer(b"".join(output), dtype=np.int16).astype(np.float64)
+
+    assert abs(output.size - 16000 * seconds) <= 2
+    assert input_bytes / (output.size * 2) > 2.7  # cerca de 3x menos dados
+    spectrum = np.abs(np.fft.rfft(output))
+    peak_hz = np.argmax(spectrum) * 16000 / output.size
+    assert abs(peak_hz - 440) < 5
+
+
+def test_resampler_removes_content_above_new_nyquist():
+    t = np.arange(RATE) / RATE
+    tone = (0.5 * np.sin(2 * np.pi * 12000 * t) * 32767).astype(np.int16).tobytes()
+    resampler = Resampler(RATE, 16000)
+    output = np.frombuffer(resampler.process(tone), dtype=np.int16).astype(np.float64) / 32767
+
+    assert np.sqrt(np.mean(output[100:] ** 2)) < 0.1
@@ -0,0 +1,120 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Adicione o diretório principal ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PySide6.QtCore import QCoreApplication
+
+from gui.workers import TaskExecutor, TaskQueueFullError, stream_ai_response
+
+app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+
+class FakeStreamingClient:
+    def __init__(self, deltas, fail=False, delay=0.0):
+        self.deltas = deltas
+        self.fail = fail
+        self.delay = delay
+
+    def stream_response(self, prompt):
+        for delta in self.deltas:
+            time.sleep(self.delay)
+            yield delta
+        if self.fail:
+            raise RuntimeError("conexão perdida")
+
+
+def wait_until(condition, timeout=5.0):
+    """Processa eventos do Qt até a condição ser satisfeita."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    app.processEvents()
+    return condition()
+
+
+def test_stream_ai_response_reports_progress_and_result():
+    executor = TaskExecutor()
+    chunks, results = [], []
+    executor.submit("llm", stream_ai_response, FakeStreamingClient(["Olá", ", ", "mundo! "]), "oi",
+                    on_progress=chunks.append, on_result=results.append)
+
+    assert wait_until(lambda: results)
+    assert chunks == ["Olá", ", ", "mundo! "]
+    assert results == ["Olá, mundo!"]
+
+
+def test_errors_are_delivered_to_on_error():
+    executor = TaskExecutor()
+    errors, results = [], []
+    executor.submit("llm", stream_ai_response, FakeStreamingClient(["Olá"], fail=True), "oi",
+                    on_result=results.append, on_error=errors.append)
+
+    assert wait_until(lambda: errors)
+    assert errors == ["conexão perdida"]
+    assert results == []
+
+
+def test_submit_does_not_block_the_caller():
+    executor = TaskExecutor()
+    release = threading.Event()
+    start = time.perf_counter()
+    executor.submit("lenta", lambda handle: release.wait(5))
+    elapsed = time.perf_counter() - start
+
+    release.set()
+    executor.wait_for_done()
+    assert elapsed < 1 / 60  # menos de um quadro
+
+
+def test_cancel_group_stops_streaming_and_suppresses_callbacks():
+    executor = TaskExecutor()
+    chunks, results, cancelled = [], [], []
+    client = FakeStreamingClient([f"{i} " for i in range(100)], delay=0.01)
+    handle = executor.submit("llm", stream_ai_response, client, "oi", group="reply",
+                             on_progress=chunks.append, on_result=results.append,
+                             on_cancelled=lambda: cancelled.append(True))
+
+    assert wait_until(lambda: chunks)
+    executor.cancel_group("reply")
+
+    assert wait_until(lambda: cancelled)
+    assert handle.is_cancelled()
+    assert results == []
+    assert len(chunks) < 100
+
+
+def test_queue_is_bounded():
+    executor = TaskExecutor(max_workers=1, max_pending=2)
+    release = threading.Event()
+    executor.submit("a", lambda handle: release.wait(5))
+    executor.submit("b", lambda handle: release.wait(5))
+
+    with pytest.raises(TaskQueueFullError):
+        executor.submit("c", lambda handle: None)
+
+    release.set()
+    executor.wait_for_done()
+    assert wait_until(lambda: executor.pending_count == 0)
+    executor.submit("d", lambda handle: None)
+    executor.wait_for_done()
+
+
+def test_task_cancelled_before_start_never_runs():
+    executor = TaskExecutor(max_workers=1)
+    release = threading.Event()
+    ran = []
+    executor.submit("bloqueante", lambda handle: release.wait(5))
+    queued = executor.submit("na fila", lambda handle: ran.append(True))
+
+    executor.cancel(queued.task_id)
+    release.set()
+    executor.wait_for_done()
+
+    assert ran == []
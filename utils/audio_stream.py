@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Audio Stream
+
+Estruturas para transportar o áudio capturado em memória, bloco a bloco,
+do microfone até o reconhecedor de fala, sem arquivos intermediários.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import collections
+import threading
+
+
+class AudioRingBuffer:
+    """
+    Buffer circular de blocos PCM entre a captura (produtor) e o reconhecedor (consumidor).
+
+    Se o consumidor atrasar além da capacidade, os blocos mais antigos são
+    descartados (e contados em dropped) para que a memória continue limitada.
+    """
+
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self.dropped = 0
+        self._chunks = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def put(self, chunk):
+        with self._condition:
+            if self._closed:
+                return
+            if len(self._chunks) >= self.capacity:
+                self._chunks.popleft()
+                self.dropped += 1
+            self._chunks.append(chunk)
+            self._condition.notify()
+
+    def close(self):
+        """Sinaliza o fim da captura; o consumidor recebe os blocos restantes e depois para."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def __iter__(self):
+        while True:
+            with self._condition:
+                while not self._chunks and not self._closed:
+                    self._condition.wait()
+                if not self._chunks:
+                    return
+                chunk = self._chunks.popleft()
+            yield chunk
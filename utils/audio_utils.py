@@ -1,40 +1,92 @@
 # Conteúdo do arquivo: C:\Servidor\Gysin-IA.v13\utils\audio_utils.py
 
+import threading
+import time
 import pyaudio
-import wave
+from utils.audio_stream import AudioRingBuffer
+from utils.vad import END, Resampler
 
-def record_audio(output_filename, duration=5):
-    """Grava áudio do microfone e salva em um arquivo WAV."""
-    chunk = 1024
-    sample_format = pyaudio.paInt16
-    channels = 1
-    rate = 44100
+# Formato de captura do microfone
+CHUNK = 1024
+SAMPLE_FORMAT = pyaudio.paInt16
+CHANNELS = 1
+RATE = 44100
+RECOGNIZER_RATE = 16000  # Taxa reduzida para o envio ao reconhecedor
 
-    p = pyaudio.PyAudio()
 
-    print("Gravando...")
+class MicrophoneStream:
+    """
+    Captura o microfone em modo callback do PyAudio e entrega os blocos PCM
+    (16 bits, mono) por um AudioRingBuffer, sem passar pelo disco.
 
-    stream = p.open(format=sample_format,
-                    channels=channels,
-                    rate=rate,
-                    frames_per_buffer=chunk,
-                    input=True)
+    A captura termina após max_duration segundos, ao chamar stop(), quando
+    should_stop() retornar True ou, se um VoiceActivityDetector for informado,
+    quando ele detectar o silêncio após a fala. Com output_rate, os blocos são
+    reamostrados (ex.: 16 kHz mono) antes de entrar no buffer; rate passa a ser
+    a taxa entregue ao consumidor.
 
-    frames = []
+        with MicrophoneStream(max_duration=5) as mic:
+            for chunk in mic:
+                ...
+    """
 
-    for _ in range(0, int(rate / chunk * duration)):
-        data = stream.read(chunk)
-        frames.append(data)
+    def __init__(self, rate=RATE, chunk=CHUNK, max_duration=5, should_stop=None, buffer_capacity=512,
+                 vad=None, output_rate=None):
+        self.input_rate = rate
+        self.rate = output_rate or rate
+        self.chunk = chunk
+        self.vad = vad
+        self._resampler = Resampler(rate, output_rate) if output_rate and output_rate != rate else None
+        self.max_duration = max_duration
+        self.should_stop = should_stop
+        self.buffer = AudioRingBuffer(buffer_capacity)
+        self._stop_event = threading.Event()
+        self._audio = None
+        self._stream = None
+        self._watcher = None
 
-    stream.stop_stream()
-    stream.close()
-    p.terminate()
+    def __enter__(self):
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=SAMPLE_FORMAT,
+                                        channels=CHANNELS,
+                                        rate=self.input_rate,
+                                        frames_per_buffer=self.chunk,
+                                        input=True,
+                                        stream_callback=self._fill_buffer)
+        print("Gravando...")
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+        return self
 
-    print("Gravação finalizada.")
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        self._watcher.join()
+        self._stream.stop_stream()
+        self._stream.close()
+        self._audio.terminate()
+        print("Gravação finalizada.")
 
-    wf = wave.open(output_filename, 'wb')
-    wf.setnchannels(channels)
-    wf.setsampwidth(p.get_sample_size(sample_format))
-    wf.setframerate(rate)
-    wf.writeframes(b''.join(frames))
-    wf.close()
\ No newline at end of file
+    def __iter__(self):
+        return iter(self.buffer)
+
+    def stop(self):
+        self._stop_event.set()
+        self.buffer.close()
+
+    def _fill_buffer(self, in_data, frame_count, time_info, status):
+        if self._stop_event.is_set():
+            return None, pyaudio.paComplete
+        self.buffer.put(self._resampler.process(in_data) if self._resampler else in_data)
+        if self.vad and self.vad.process(in_data) == END:
+            self.stop()
+            return None, pyaudio.paComplete
+        return None, pyaudio.paContinue
+
+    def _watch(self):
+        """Encerra a captura pelo tempo máximo ou pelo should_stop."""
+        deadline = time.monotonic() + self.max_duration
+        while not self._stop_event.is_set():
+            if time.monotonic() >= deadline or (self.should_stop and self.should_stop()):
+                self.stop()
+                return
+            time.sleep(0.02)
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Conversation Store
+
+Armazenamento persistente das conversas em SQLite (modo WAL). As mensagens
+são gravadas em lotes por uma thread dedicada, com idioma e horário, e
+indexadas em uma tabela FTS5 para a busca de texto completo. A leitura usa
+uma conexão própria (o WAL permite ler enquanto a thread grava) e as sessões
+antigas são carregadas em páginas, das mensagens mais recentes para as mais
+antigas.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import contextlib
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.getenv(
+    "CONVERSATION_DB_PATH", os.path.join(os.path.expanduser("~"), ".gysin_ia", "conversations.sqlite3")
+)
+
+USER_SENDER = "Você"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    title TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    sender TEXT NOT NULL,
+    text TEXT NOT NULL,
+    language TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+CREATE INDEX IF NOT EXISTS messages_sender ON messages (sender, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5 (
+    text, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+_MESSAGE_COLUMNS = "id, session_id, sender, text, language, created_at"
+_STOP = object()
+_FLUSH = object()
+_SESSION = object()  # Marca as sessões novas na fila de gravação
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _message_dict(row):
+    return dict(zip(("id", "session_id", "sender", "text", "language", "created_at"), row))
+
+
+def build_fts_query(text):
+    """Converte o texto digitado em uma consulta FTS5 segura (todas as palavras, por prefixo)."""
+    words = re.findall(r"\w+", text, re.UNICODE)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class ConversationStore:
+    """
+    Histórico persistente das conversas.
+
+    add_message apenas enfileira a mensagem: a thread de gravação junta até
+    batch_size mensagens (ou o que chegar em flush_interval segundos) em uma
+    única transação. new_session também não espera o banco: o id é reservado na
+    hora e a sessão é gravada no lote, antes das suas mensagens (um único
+    processo grava no arquivo). flush() grava o lote pendente na hora; as
+    leituras chamam flush() antes, para incluir as mensagens recém-enviadas.
+
+    language_detector(text), se informado, define o idioma das mensagens
+    enfileiradas sem idioma; a detecção roda na thread de gravação.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=50, flush_interval=0.5, language_detector=None):
+        self.path = path
+        self.language_detector = language_detector
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.batches_written = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = _connect(path)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._read_lock = threading.Lock()
+        self._session_lock = threading.Lock()
+        self._last_session_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM sessions").fetchone()[0]
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="conversation-store", daemon=True)
+        self._writer.start()
+
+    def new_session(self, title=None):
+        """Cria uma sessão e retorna o seu id; a gravação entra no lote, como as mensagens."""
+        with self._session_lock:
+            self._last_session_id += 1
+            session_id = self._last_session_id
+        self._queue.put((_SESSION, session_id, time.time(), title))
+        return session_id
+
+    def add_message(self, session_id, sender, text, language=None, created_at=None):
+        """Enfileira uma mensagem para gravação em lote."""
+        self._queue.put((session_id, sender, text, language, created_at or time.time()))
+
+    def _write_loop(self):
+        conn = _connect(self.path) if self.path != ":memory:" else self._conn
+        stop = False
+        while not stop:
+            sessions, batch, received = [], [], 0
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                received += 1
+                if item is _STOP:
+                    stop = True
+                    break
+                if item is _FLUSH:
+                    break
+                if item[0] is _SESSION:
+                    sessions.append(item[1:])
+                else:
+                    batch.append(item)
+                if len(sessions) + len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if sessions or batch:
+                self._write_batch(conn, sessions, [self._with_language(item) for item in batch])
+            for _ in range(received):
+                self._queue.task_done()
+        if conn is not self._conn:
+            conn.close()
+
+    def _with_language(self, item):
+        session_id, sender, text, language, created_at = item
+        if language is None and self.language_detector:
+            try:
+                language = self.language_detector(text)
+            except Exception as e:
+                print(f"Erro ao detectar o idioma da mensagem: {e}")
+        return session_id, sender, text, language, created_at
+
+    def _write_batch(self, conn, sessions, batch):
+        # Com ":memory:" a conexão de leitura é compartilhada e precisa do lock
+        lock = self._read_lock if conn is self._conn else contextlib.nullcontext()
+        try:
+            with lock:
+                with conn:
+                    conn.executemany("INSERT INTO sessions (id, started_at, title) VALUES (?, ?, ?)", sessions)
+                    conn.executemany(
+                        "INSERT INTO messages (session_id, sender, text, language, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)", batch
+                    )
+            self.batches_written += 1
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar mensagens no histórico: {e}")
+
+    def flush(self):
+        """Grava imediatamente as mensagens enfileiradas e aguarda a conclusão."""
+        if self._writer.is_alive():
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def _query(self, sql, params=()):
+        with self._read_lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def search(self, text, limit=20):
+        """
+        Busca mensagens pelo texto (todas as palavras, por prefixo, sem acentos),
+        das mais relevantes para as menos. Cada resultado traz um trecho com os
+        termos encontrados entre [ ].
+        """
+        query = build_fts_query(text)
+        if not query:
+            return []
+        self.flush()
+        rows = self._query(
+            "SELECT m.id, m.session_id, m.sender, m.text, m.language, m.created_at, "
+            "snippet(messages_fts, 0, '[', ']', '…', 12) "
+            "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+            "WHERE messages_fts MATCH ? ORDER BY bm25(messages_fts) LIMIT ?",
+            (query, limit)
+        )
+        results = []
+        for row in rows:
+            result = _message_dict(row[:6])
+            result["snippet"] = row[6]
+            results.append(result)
+        return results
+
+    def load_messages(self, session_id, before_id=None, limit=50, flush=True):
+        """
+        Retorna uma página de mensagens da sessão em ordem cronológica: as `limit`
+        mais recentes anteriores a before_id (ou as últimas, se before_id for None).
+        Com flush=False, lê só o que já foi gravado, sem esperar a thread de
+        gravação (por exemplo, páginas mais antigas que as já exibidas).
+        """
+        if flush:
+            self.flush()
+        if before_id is None:
+            rows = self._query(
+                f"SELECT {_MESSAGE_COLUMNS} FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, limit)
+            )
+        else:
+            rows = self._query(
+                f"SELECT {_MESSAGE_COLUMNS} FROM messages WHERE session_id = ? AND id < ? "
+                "ORDER BY id DESC LIMIT ?",
+                (session_id, before_id, limit)
+            )
+        return [_message_dict(row) for row in reversed(rows)]
+
+    def count_messages(self, session_id, first_id=None, last_id=None, flush=True):
+        """
+        Conta as mensagens da sessão com id entre first_id e last_id (inclusive);
+        flush=False conta só o que já foi gravado, como em load_messages.
+        """
+        if flush:
+            self.flush()
+        rows = self._query(
+            "SELECT COUNT(*) FROM messages WHERE session_id = ? AND id >= ? AND id <= ?",
+            (session_id, first_id if first_id is not None else 0,
+             last_id if last_id is not None else (1 << 62))
+        )
+        return rows[0][0]
+
+    def sessions(self, limit=20, offset=0):
+        """Lista as sessões, das mais recentes para as mais antigas, com o total de mensagens."""
+        self.flush()
+        rows = self._query(
+            "SELECT s.id, s.started_at, s.title, COUNT(m.id) FROM sessions s "
+            "LEFT JOIN messages m ON m.session_id = s.id "
+            "GROUP BY s.id ORDER BY s.id DESC LIMIT ? OFFSET ?",
+            (limit, offset)
+        )
+        return [dict(zip(("id", "started_at", "title", "messages"), row)) for row in rows]
+
+    def recent_inputs(self, limit=100):
+        """Retorna as últimas mensagens digitadas pelo usuário, da mais antiga para a mais recente."""
+        self.flush()
+        rows = self._query(
+            "SELECT text FROM messages WHERE sender = ? ORDER BY id DESC LIMIT ?", (USER_SENDER, limit)
+        )
+        return [row[0] for row in reversed(rows)]
+
+    def close(self):
+        """Grava as mensagens pendentes e fecha o banco."""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        with self._read_lock:
+            self._conn.close()
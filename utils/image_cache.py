@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Image Cache
+
+Cache em disco das imagens geradas. Cada imagem é endereçada pelo hash do seu
+conteúdo (imagens iguais ocupam um único arquivo) e tem uma miniatura em PNG
+ao lado, usada para exibir o resultado antes de decodificar a imagem inteira.
+Um índice em JSON liga cada pedido (prompt normalizado e tamanho) ao hash da
+imagem, de modo que prompts repetidos não voltam a chamar a API. O tamanho
+total é limitado e as imagens menos usadas recentemente são removidas primeiro
+(LRU), junto com as suas miniaturas e entradas no índice.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from utils.tts_cache import normalize_text
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "IMAGE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".gysin_ia", "image_cache")
+)
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024  # 500 MB
+THUMBNAIL_SIZE = 256
+THUMBNAIL_SUFFIX = ".thumb.png"
+INDEX_FILE = "index.json"
+
+# Assinaturas dos formatos devolvidos pelas APIs de imagem
+_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF8", ".gif"),
+    (b"RIFF", ".webp"),
+]
+
+
+def image_extension(data):
+    """Extensão do arquivo a partir dos primeiros bytes da imagem."""
+    for signature, extension in _SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    return ".img"
+
+
+def make_thumbnail(data, path, size=THUMBNAIL_SIZE):
+    """
+    Grava em path uma miniatura em PNG (lado maior com no máximo `size` pixels).
+    O Qt é importado aqui para que o cache possa ser usado sem a interface; só o
+    QImage é usado, por ser seguro fora da thread da GUI.
+    """
+    from PySide6.QtCore import Qt
+    from PySide6.QtGui import QImage
+
+    image = QImage.fromData(data)
+    if image.isNull():
+        raise ValueError("conteúdo não é uma imagem válida")
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    if not image.save(path, "PNG"):
+        raise OSError(f"não foi possível gravar a miniatura em {path}")
+
+
+class ImageCache:
+    """
+    Cache LRU de imagens geradas, limitado por tamanho em bytes (imagem mais
+    miniatura).
+
+    É seguro para uso a partir de várias threads. As gravações são atômicas
+    (arquivo temporário no mesmo diretório, depois renomeado), e a miniatura é
+    gravada antes da imagem: uma imagem presente sempre tem a sua miniatura.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, thumbnail_size=THUMBNAIL_SIZE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.thumbnail_size = thumbnail_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # hash -> (extensão, bytes), do menos para o mais recente
+        self._index = {}  # chave do pedido -> hash da imagem
+        self._total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Reconstrói o índice LRU a partir dos arquivos existentes (ordem pelo mtime)."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".tmp"):
+                # Restos de gravações interrompidas
+                os.remove(path)
+                continue
+            if name == INDEX_FILE or name.endswith(THUMBNAIL_SUFFIX):
+                continue
+            digest, extension = os.path.splitext(name)
+            thumbnail_path = os.path.join(self.cache_dir, digest + THUMBNAIL_SUFFIX)
+            if not os.path.exists(thumbnail_path):
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, digest, extension, stat.st_size + os.path.getsize(thumbnail_path)))
+        for _, digest, extension, size in sorted(files):
+            self._entries[digest] = (extension, size)
+            self._total_bytes += size
+        try:
+            with open(os.path.join(self.cache_dir, INDEX_FILE), encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        self._index = {key: digest for key, digest in index.items() if digest in self._entries}
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def make_key(prompt, size):
+        """Gera a chave (hash SHA-256) de um pedido de imagem."""
+        payload = json.dumps([normalize_text(prompt), size], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def paths_for(self, digest, extension):
+        """Retorna (caminho da imagem, caminho da miniatura)."""
+        return (os.path.join(self.cache_dir, digest + extension),
+                os.path.join(self.cache_dir, digest + THUMBNAIL_SUFFIX))
+
+    def get(self, key):
+        """Retorna (imagem, miniatura) do pedido em cache ou None, registrando acerto/falha."""
+        with self._lock:
+            digest = self._index.get(key)
+            if digest is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            paths = self.paths_for(digest, self._entries[digest][0])
+        try:
+            os.utime(paths[0])  # Mantém a ordem LRU entre execuções
+        except OSError:
+            with self._lock:
+                self._discard(digest)
+                self._save_index()
+            return None
+        return paths
+
+    def put(self, key, data):
+        """Grava a imagem (bytes) e a sua miniatura; retorna (imagem, miniatura)."""
+        digest = hashlib.sha256(data).hexdigest()
+        extension = image_extension(data)
+        paths = self.paths_for(digest, extension)
+        # Fora do lock: a miniatura decodifica a imagem inteira. Conteúdo repetido
+        # apenas regrava os mesmos arquivos.
+        self._write_atomic(paths[1], lambda temp_path: make_thumbnail(data, temp_path, self.thumbnail_size))
+        self._write_atomic(paths[0], lambda temp_path: self._write_bytes(temp_path, data))
+        with self._lock:
+            self._discard(digest, remove_files=False)
+            size = len(data) + os.path.getsize(paths[1])
+            self._entries[digest] = (extension, size)
+            self._total_bytes += size
+            self._index[key] = digest
+            self._evict(keep=digest)
+            self._save_index()
+        return paths
+
+    @staticmethod
+    def _write_bytes(path, data):
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def _write_atomic(self, path, write):
+        """Grava chamando write(temp_path) e publica o arquivo atomicamente."""
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(temp_path)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _save_index(self):
+        try:
+            payload = json.dumps(self._index).encode("utf-8")
+            self._write_atomic(os.path.join(self.cache_dir, INDEX_FILE),
+                               lambda temp_path: self._write_bytes(temp_path, payload))
+        except OSError as e:
+            print(f"Erro ao gravar o índice do cache de imagens: {e}")
+
+    def _discard(self, digest, remove_files=True):
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry[1]
+        if not remove_files:
+            return
+        for path in self.paths_for(digest, entry[0]):
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Arquivo já removido
+        self._index = {key: value for key, value in self._index.items() if value != digest}
+
+    def _evict(self, keep=None):
+        """Remove as imagens menos usadas até respeitar o limite de tamanho."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            digest = next(iter(self._entries))
+            if digest == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(digest)
+                continue
+            self._discard(digest)
+            self.evictions += 1
+
+    def stats(self):
+        """Retorna os contadores do cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "images": len(self._entries),
+                "prompts": len(self._index),
+                "bytes": self._total_bytes,
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_image_cache():
+    """Retorna o cache de imagens compartilhado pela aplicação (criado no primeiro uso)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ImageCache()
+        return _default_cache
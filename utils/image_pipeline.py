@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Image Pipeline
+
+Geração de imagens em segundo plano. Cada pedido vira um trabalho que roda em
+um pool de threads: gera a imagem (API de imagens), baixa o resultado, grava no
+ImageCache (com miniatura) e avisa quem pediu em duas etapas — primeiro a
+miniatura, depois a imagem completa —, para que a interface mostre um
+marcador, a miniatura e a imagem final sem esperar na thread da GUI.
+
+Pedidos iguais (mesmo prompt normalizado e tamanho) feitos enquanto o primeiro
+ainda está em andamento são agrupados em um único trabalho; pedidos já
+presentes no cache são atendidos sem chamar a API.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from api.http_transport import get_shared_http_client
+from utils.image_cache import get_default_image_cache
+from utils.telemetry import get_telemetry
+
+DOWNLOAD_TIMEOUT = 60.0
+
+
+def download_image(url, timeout=DOWNLOAD_TIMEOUT):
+    """Baixa a imagem gerada pelo pool de conexões compartilhado."""
+    response = get_shared_http_client().get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+
+class ImageJob:
+    """
+    Um pedido de imagem em andamento ou concluído. result() espera e retorna
+    (caminho da imagem, caminho da miniatura), ou propaga o erro.
+    """
+
+    def __init__(self, prompt, size, key):
+        self.prompt = prompt
+        self.size = size
+        self.key = key
+        self.state = "pending"  # pending, generating, downloading, done, failed
+        self.subscribers = 1
+        self.future = Future()
+        self._callbacks = []  # (on_thumbnail, on_image, on_error)
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def done(self):
+        return self.future.done()
+
+
+class ImagePipeline:
+    """
+    Pipeline de geração de imagens.
+
+    generate(prompt, size) retorna a URL da imagem ou os seus bytes; download(url)
+    retorna os bytes. Os callbacks on_thumbnail(caminho), on_image(caminho) e
+    on_error(mensagem) são chamados na thread do trabalho (ou na de quem pediu,
+    em caso de acerto no cache); a interface deve repassá-los por sinais.
+    """
+
+    def __init__(self, generate, download=download_image, cache=None, max_workers=2):
+        self.generate = generate
+        self.download = download
+        self.cache = cache or get_default_image_cache()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image")
+        self._lock = threading.Lock()
+        self._jobs = {}  # chave -> trabalho em andamento
+        self.requests = 0
+        self.deduplicated = 0
+        self.cache_hits = 0
+        self.generated = 0
+        self.failed = 0
+
+    def submit(self, prompt, size="1024x1024", on_thumbnail=None, on_image=None, on_error=None):
+        """Agenda (ou reaproveita) a geração da imagem e retorna o ImageJob."""
+        telemetry = get_telemetry()
+        key = self.cache.make_key(prompt, size)
+        callbacks = (on_thumbnail, on_image, on_error)
+        with self._lock:
+            self.requests += 1
+            job = self._jobs.get(key)
+            if job is not None:
+                # Mesmo pedido já em andamento: só acrescenta quem quer o resultado
+                job.subscribers += 1
+                job._callbacks.append(callbacks)
+                self.deduplicated += 1
+                telemetry.increment("image.deduplicated")
+                return job
+            job = ImageJob(prompt, size, key)
+            cached = self.cache.get(key)
+            if cached is None:
+                job._callbacks.append(callbacks)
+                self._jobs[key] = job
+            else:
+                self.cache_hits += 1
+        if cached is not None:
+            telemetry.increment("image.cache_hit")
+            job.state = "done"
+            job.future.set_result(cached)
+            self._notify([callbacks], cached)
+            return job
+        self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        telemetry = get_telemetry()
+        span = telemetry.span("image.job", size=job.size)
+        try:
+            job.state = "generating"
+            result = self.generate(job.prompt, job.size)
+            if isinstance(result, str):
+                job.state = "downloading"
+                with telemetry.span("image.download"):
+                    result = self.download(result)
+            paths = self.cache.put(job.key, result)
+        except Exception as e:
+            print(f"Erro ao gerar imagem: {e}")
+            span.set_error(e)
+            span.end()
+            with self._lock:
+                self.failed += 1
+                del self._jobs[job.key]
+                callbacks = list(job._callbacks)
+            job.state = "failed"
+            job.future.set_exception(e)
+            for _, _, on_error in callbacks:
+                if on_error:
+                    on_error(str(e))
+            return
+        span.end()
+        with self._lock:
+            self.generated += 1
+            # Daqui em diante, pedidos iguais são atendidos pelo cache
+            del self._jobs[job.key]
+            callbacks = list(job._callbacks)
+        job.state = "done"
+        job.future.set_result(paths)
+        self._notify(callbacks, paths)
+
+    @staticmethod
+    def _notify(callbacks, paths):
+        image_path, thumbnail_path = paths
+        for on_thumbnail, _, _ in callbacks:
+            if on_thumbnail:
+                on_thumbnail(thumbnail_path)
+        for _, on_image, _ in callbacks:
+            if on_image:
+                on_image(image_path)
+
+    def stats(self):
+        """Retorna os contadores do pipeline."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "deduplicated": self.deduplicated,
+                "cache_hits": self.cache_hits,
+                "generated": self.generated,
+                "failed": self.failed,
+                "in_flight": len(self._jobs),
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Languages
+
+Mapeamento dos idiomas detectados para os códigos usados na síntese de voz,
+compartilhado pela interface, pelo serviço de assistente e pelos benchmarks.
+O detector de n-gramas é importado só no primeiro uso, porque carrega a
+tabela de perfis na importação.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+# Mapeamento de idiomas detectados para códigos de idioma
+LANGUAGE_MAP = {
+    'pt': 'pt-BR',
+    'en': 'en-US',
+    'de': 'de-DE',
+    'es': 'es-ES'
+}
+DEFAULT_LANGUAGE_CODE = 'pt-BR'
+
+
+def detect_language(text):
+    from gui.language_utils import detect_language as detect
+
+    return detect(text)
+
+
+def language_code_for(text):
+    """Detecta o idioma do texto e retorna o código usado na síntese de voz."""
+    return LANGUAGE_MAP.get(detect_language(text), DEFAULT_LANGUAGE_CODE)
@@ -0,0 +1,531 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Playback
+
+Serviço de reprodução de áudio da aplicação. Uma única thread reproduz uma fila
+de áudios em memória (bytes), vindos de vários produtores (frases da resposta
+em voz, sons do sistema...), sem arquivos temporários. Enquanto um áudio toca,
+o próximo da fila já é preparado, para que o seguinte comece sem intervalo.
+
+A saída fica a cargo de um "sink":
+- VLCSink: uma instância e um player do VLC criados uma única vez e
+  reutilizados; os bytes chegam ao VLC por callbacks de leitura em memória.
+- PCMSink: alternativa em Python puro para áudio WAV/LINEAR16, que escreve as
+  amostras em um único stream de saída (PyAudio) mantido aberto entre os
+  áudios, de modo que áudios consecutivos saem sem nenhuma lacuna.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import ctypes
+import io
+import itertools
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.telemetry import get_telemetry
+
+# Intervalo máximo entre as verificações de interrupção durante a reprodução
+POLL_INTERVAL = 0.01
+
+QUEUED = "queued"
+PLAYING = "playing"
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class PlaybackItem:
+    """
+    Um áudio na fila de reprodução.
+
+    status passa de "queued" para "playing" e termina em "done", "skipped" ou
+    "failed" (com o erro em error). wait() aguarda o fim da reprodução.
+    """
+
+    def __init__(self, data, group=None, label=None, on_error=None):
+        self.data = data
+        self.group = group
+        self.label = label
+        self.on_error = on_error
+        self.status = QUEUED
+        self.error = None
+        self.queued_at = time.perf_counter()
+        self._prepared = None  # Future da preparação antecipada
+        self._skip_requested = False
+        self._done = threading.Event()
+
+    @property
+    def finished(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Aguarda o fim da reprodução; retorna False se o timeout expirar antes."""
+        return self._done.wait(timeout)
+
+    def _finish(self, status, error=None):
+        self.status = status
+        self.error = error
+        self.data = None  # Libera o áudio assim que ele não é mais necessário
+        self._done.set()
+
+
+class AudioPlayback:
+    """
+    Fila de reprodução compartilhada, segura para vários produtores.
+
+    enqueue() nunca bloqueia: o áudio entra na fila e é reproduzido na ordem de
+    chegada. group identifica o produtor, para que stop(group) descarte apenas
+    os áudios dele (por exemplo, cancelar a fala de uma resposta sem cortar um
+    som do sistema). Sem sink, usa o VLC e, se ele não estiver disponível, o
+    PCMSink.
+    """
+
+    def __init__(self, sink=None, volume=100):
+        self.sink = sink if sink is not None else create_default_sink()
+        self.volume = None
+        self.played = 0
+        self.skipped = 0
+        self.failed = 0
+        self.max_gap = 0.0
+        self._gap_total = 0.0
+        self._gap_count = 0
+        self._last_end = None
+        self._queue = deque()
+        self._current = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._preloader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playback-preload")
+        self._telemetry = get_telemetry()
+        self.set_volume(volume)
+        self._thread = threading.Thread(target=self._run, name="playback", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, data, group=None, label=None, on_error=None):
+        """
+        Adiciona um áudio (bytes) ao fim da fila e retorna o seu PlaybackItem.
+        on_error(message), se informado, é chamado a partir da thread de
+        reprodução caso o áudio não possa ser reproduzido.
+        """
+        item = PlaybackItem(data, group, label, on_error)
+        with self._condition:
+            if self._closed:
+                item._finish(SKIPPED)
+                return item
+            self._queue.append(item)
+            self._preload_next()
+            self._condition.notify()
+        return item
+
+    def play(self, data, should_stop=None, group=None):
+        """
+        Enfileira o áudio e aguarda o fim da reprodução (ou até should_stop()
+        retornar True, quando ele é descartado). Retorna True se tocou até o fim.
+        """
+        item = self.enqueue(data, group=group)
+        while not item.wait(POLL_INTERVAL):
+            if should_stop and should_stop():
+                self.skip(item)
+                item.wait()
+                break
+        return item.status == DONE
+
+    def skip(self, item=None):
+        """Interrompe o áudio atual (ou descarta o item informado) e segue para o próximo."""
+        with self._condition:
+            if item is None or item is self._current:
+                if self._current is not None:
+                    self._current._skip_requested = True
+            elif item in self._queue:
+                self._queue.remove(item)
+                self._drop(item)
+
+    def stop(self, group=None):
+        """Descarta os áudios na fila e interrompe o atual (apenas os do grupo, se informado)."""
+        with self._condition:
+            kept = deque()
+            for item in self._queue:
+                if group is None or item.group is group:
+                    self._drop(item)
+                else:
+                    kept.append(item)
+            self._queue = kept
+            current = self._current
+            if current is not None and (group is None or current.group is group):
+                current._skip_requested = True
+            self._preload_next()
+
+    def set_volume(self, volume):
+        """Ajusta o volume (0 a 100)."""
+        self.volume = max(0, min(100, int(volume)))
+        try:
+            self.sink.set_volume(self.volume)
+        except Exception as e:
+            print(f"Erro ao ajustar o volume: {e}")
+
+    @property
+    def pending_count(self):
+        """Quantidade de áudios na fila, incluindo o que está tocando."""
+        with self._condition:
+            return len(self._queue) + (1 if self._current is not None else 0)
+
+    def wait_until_idle(self, timeout=None):
+        """Aguarda a fila esvaziar; retorna False se o timeout expirar antes."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending_count:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(POLL_INTERVAL)
+        return True
+
+    def close(self):
+        """Interrompe a reprodução, descarta a fila e libera o dispositivo de saída."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            for item in self._queue:
+                self._drop(item)
+            self._queue.clear()
+            if self._current is not None:
+                self._current._skip_requested = True
+            self._condition.notify()
+        self._thread.join(2)
+        self._preloader.shutdown(wait=True)
+        try:
+            self.sink.close()
+        except Exception as e:
+            print(f"Erro ao fechar o reprodutor de áudio: {e}")
+
+    def stats(self):
+        """Retorna os contadores do serviço (os intervalos entre áudios em segundos)."""
+        with self._condition:
+            return {
+                "played": self.played,
+                "skipped": self.skipped,
+                "failed": self.failed,
+                "queued": len(self._queue),
+                "average_gap": self._gap_total / self._gap_count if self._gap_count else 0.0,
+                "max_gap": self.max_gap,
+            }
+
+    def _preload_next(self):
+        """Prepara antecipadamente o próximo áudio da fila (chamado com o lock)."""
+        if self._queue and self._queue[0]._prepared is None and not self._closed:
+            item = self._queue[0]
+            item._prepared = self._preloader.submit(self._prepare, item.data)
+
+    def _prepare(self, data):
+        with self._telemetry.span("playback.prepare"):
+            return self.sink.prepare(data)
+
+    def _drop(self, item):
+        """Descarta um item que não chegou a tocar (chamado com o lock)."""
+        self.skipped += 1
+        future = item._prepared
+        if future is not None:
+            future.add_done_callback(self._discard_prepared)
+        item._finish(SKIPPED)
+
+    def _discard_prepared(self, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        try:
+            self.sink.discard(future.result())
+        except Exception as e:
+            print(f"Erro ao descartar áudio preparado: {e}")
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    self._current = None
+                    return
+                item = self._current = self._queue.popleft()
+                if item._prepared is None:
+                    item._prepared = self._preloader.submit(self._prepare, item.data)
+                # O áudio seguinte é preparado enquanto este toca
+                self._preload_next()
+            try:
+                self._play_item(item)
+            finally:
+                with self._condition:
+                    self._current = None
+
+    def _play_item(self, item):
+        try:
+            prepared = item._prepared.result()
+        except Exception as e:
+            self._fail(item, e)
+            return
+        if item._skip_requested:
+            self.sink.discard(prepared)
+            with self._condition:
+                self.skipped += 1
+            item._finish(SKIPPED)
+            return
+
+        start = time.perf_counter()
+        if self._last_end is not None and item.queued_at <= self._last_end:
+            # Só conta como intervalo se o áudio já estava na fila quando o anterior acabou
+            gap = start - self._last_end
+            with self._condition:
+                self._gap_total += gap
+                self._gap_count += 1
+                self.max_gap = max(self.max_gap, gap)
+            self._telemetry.record("playback.gap", gap)
+        else:
+            # Áudio enfileirado com o player parado: do enqueue (incluindo a preparação) ao início
+            self._telemetry.record("playback.start", start - item.queued_at)
+        item.status = PLAYING
+        try:
+            self.sink.play(prepared, lambda: item._skip_requested)
+        except Exception as e:
+            self._fail(item, e)
+            return
+        finally:
+            self._last_end = time.perf_counter()
+        with self._condition:
+            if item._skip_requested:
+                self.skipped += 1
+            else:
+                self.played += 1
+        item._finish(SKIPPED if item._skip_requested else DONE)
+
+    def _fail(self, item, error):
+        print(f"Erro ao reproduzir áudio: {error}")
+        self._telemetry.increment("playback.errors")
+        with self._condition:
+            self.failed += 1
+        item._finish(FAILED, error)
+        if item.on_error:
+            item.on_error(str(error))
+
+
+class PCMClip:
+    """Amostras PCM decodificadas, prontas para escrita no stream de saída."""
+
+    def __init__(self, frames, sample_width, channels, rate):
+        self.frames = frames
+        self.sample_width = sample_width
+        self.channels = channels
+        self.rate = rate
+
+    @property
+    def format(self):
+        return self.sample_width, self.channels, self.rate
+
+    @property
+    def duration(self):
+        return len(self.frames) / (self.sample_width * self.channels * self.rate)
+
+
+def decode_wav(data):
+    """Decodifica um WAV (por exemplo, LINEAR16 do Google TTS) em memória."""
+    if not data.startswith(b"RIFF"):
+        raise ValueError("Formato de áudio não suportado pelo reprodutor PCM (use WAV/LINEAR16)")
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        return PCMClip(wav.readframes(wav.getnframes()), wav.getsampwidth(),
+                       wav.getnchannels(), wav.getframerate())
+
+
+class PyAudioOutput:
+    """Stream de saída do PyAudio (importado apenas quando necessário)."""
+
+    def __init__(self, sample_width, channels, rate):
+        import pyaudio
+
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=self._audio.get_format_from_width(sample_width),
+                                        channels=channels, rate=rate, output=True)
+
+    def write(self, data):
+        self._stream.write(data)
+
+    def close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        self._audio.terminate()
+
+
+class PCMSink:
+    """
+    Saída em Python puro para áudio PCM (WAV).
+
+    O stream de saída é aberto no primeiro áudio e mantido aberto enquanto o
+    formato (largura da amostra, canais, taxa) não mudar; as amostras são
+    escritas em blocos de chunk_frames, verificando a interrupção entre eles.
+    open_stream(sample_width, channels, rate) deve retornar um objeto com
+    write(bytes) bloqueante e close().
+    """
+
+    def __init__(self, open_stream=PyAudioOutput, chunk_frames=1024):
+        self.open_stream = open_stream
+        self.chunk_frames = chunk_frames
+        self.streams_opened = 0
+        self._volume = 1.0
+        self._stream = None
+        self._format = None
+
+    def prepare(self, data):
+        return data if isinstance(data, PCMClip) else decode_wav(data)
+
+    def play(self, clip, should_stop):
+        stream = self._stream_for(clip.format)
+        frame_bytes = clip.sample_width * clip.channels
+        step = self.chunk_frames * frame_bytes
+        view = memoryview(clip.frames)
+        for offset in range(0, len(view), step):
+            if should_stop():
+                return
+            stream.write(self._apply_volume(view[offset:offset + step], clip.sample_width))
+
+    def _stream_for(self, audio_format):
+        if self._stream is None or self._format != audio_format:
+            self._close_stream()
+            self._stream = self.open_stream(*audio_format)
+            self._format = audio_format
+            self.streams_opened += 1
+        return self._stream
+
+    def _apply_volume(self, chunk, sample_width):
+        if self._volume >= 1.0 or sample_width != 2:
+            return bytes(chunk)
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        return (samples * self._volume).astype(np.int16).tobytes()
+
+    def discard(self, clip):
+        pass
+
+    def set_volume(self, volume):
+        self._volume = volume / 100
+
+    def _close_stream(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def close(self):
+        self._close_stream()
+
+
+# Bytes dos áudios entregues ao VLC, indexados pelo ponteiro opaco dos callbacks
+_memory_streams = {}
+_memory_keys = itertools.count(1)
+_memory_callbacks = None
+
+
+def _vlc_memory_callbacks(vlc):
+    """Cria (uma única vez) os callbacks de leitura em memória do VLC."""
+    global _memory_callbacks
+    if _memory_callbacks is None:
+        @vlc.CallbackDecorators.MediaOpenCb
+        def open_cb(opaque, data_pointer, size_pointer):
+            stream = _memory_streams.get(opaque)
+            if stream is None:
+                return -1
+            stream.seek(0)
+            data_pointer.contents.value = opaque
+            size_pointer.contents.value = len(stream.getbuffer())
+            return 0
+
+        @vlc.CallbackDecorators.MediaReadCb
+        def read_cb(opaque, buffer, length):
+            stream = _memory_streams.get(opaque)
+            if stream is None:
+                return -1
+            chunk = stream.read(length)
+            ctypes.memmove(buffer, chunk, len(chunk))
+            return len(chunk)
+
+        @vlc.CallbackDecorators.MediaSeekCb
+        def seek_cb(opaque, offset):
+            stream = _memory_streams.get(opaque)
+            if stream is None:
+                return -1
+            stream.seek(offset)
+            return 0
+
+        @vlc.CallbackDecorators.MediaCloseCb
+        def close_cb(opaque):
+            pass  # Os bytes são liberados em VLCSink.discard
+
+        _memory_callbacks = (open_cb, read_cb, seek_cb, close_cb)
+    return _memory_callbacks
+
+
+class VLCSink:
+    """
+    Saída pelo VLC, com uma instância e um player criados uma única vez.
+
+    prepare() cria a mídia a partir dos bytes (sem arquivo) e play() troca a
+    mídia do mesmo player, aguardando o evento de fim em vez de consultar o
+    estado periodicamente.
+    """
+
+    def __init__(self, instance_args=("--no-video", "--quiet")):
+        import vlc
+
+        self._vlc = vlc
+        self._instance = vlc.Instance(*instance_args)
+        if self._instance is None:
+            raise RuntimeError("Não foi possível iniciar o libvlc")
+        self._player = self._instance.media_player_new()
+        self._ended = threading.Event()
+        events = self._player.event_manager()
+        for event_type in (vlc.EventType.MediaPlayerEndReached, vlc.EventType.MediaPlayerEncounteredError,
+                           vlc.EventType.MediaPlayerStopped):
+            events.event_attach(event_type, self._on_end)
+
+    def _on_end(self, event):
+        # Chamado pela thread do VLC: apenas sinaliza, sem chamar o player
+        self._ended.set()
+
+    def prepare(self, data):
+        key = next(_memory_keys)
+        _memory_streams[key] = io.BytesIO(data)
+        media = self._instance.media_new_callbacks(*_vlc_memory_callbacks(self._vlc), ctypes.c_void_p(key))
+        return key, media
+
+    def play(self, prepared, should_stop):
+        _, media = prepared
+        self._ended.clear()
+        self._player.set_media(media)
+        try:
+            if self._player.play() == -1:
+                raise RuntimeError("O VLC não conseguiu reproduzir o áudio")
+            while not self._ended.wait(POLL_INTERVAL):
+                if should_stop():
+                    self._player.stop()
+                    break
+        finally:
+            self.discard(prepared)
+
+    def discard(self, prepared):
+        key, media = prepared
+        media.release()
+        _memory_streams.pop(key, None)
+
+    def set_volume(self, volume):
+        self._player.audio_set_volume(volume)
+
+    def close(self):
+        self._player.stop()
+        self._player.release()
+        self._instance.release()
+
+
+def create_default_sink():
+    """Usa o VLC quando disponível; caso contrário, o reprodutor PCM em Python puro."""
+    try:
+        return VLCSink()
+    except Exception as e:
+        print(f"VLC indisponível ({e}); usando o reprodutor PCM.")
+        return PCMSink()
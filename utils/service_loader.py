@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Service Loader
+
+Inicialização em segundo plano dos serviços opcionais da aplicação (cliente
+da OpenAI, reprodução de áudio, perfis de idioma...). Cada serviço é criado por
+uma função registrada, em uma thread de aquecimento, depois que a janela já
+foi exibida; as importações pesadas (SDKs, NumPy, VLC) acontecem dentro dessas
+funções. Uma falha em um serviço é registrada e informada, sem impedir os
+demais nem a abertura da aplicação.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import threading
+import time
+
+
+class ServiceLoader:
+    """
+    Cria serviços registrados com register(name, factory) em uma thread própria.
+
+    get(name) aguarda o serviço ficar pronto e retorna a instância, ou None se
+    a criação falhou (o erro fica em error(name)). on_ready(name) e
+    on_failed(name, message) são chamados a partir da thread de aquecimento
+    para cada serviço criado ou que falhou; com eles, a interface não precisa
+    aguardar com get().
+    timings guarda quanto tempo (s) cada serviço levou para ser criado.
+    """
+
+    def __init__(self, on_failed=None, on_ready=None):
+        self.on_failed = on_failed
+        self.on_ready = on_ready
+        self.timings = {}
+        self._factories = []
+        self._services = {}
+        self._errors = {}
+        self._ready = {}
+        self._thread = None
+
+    def register(self, name, factory):
+        """Registra um serviço; os serviços são criados na ordem de registro."""
+        self._factories.append((name, factory))
+        self._ready[name] = threading.Event()
+
+    def start(self):
+        """Inicia a thread de aquecimento (chamadas repetidas são ignoradas)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load_all, name="service-loader", daemon=True)
+            self._thread.start()
+
+    def _load_all(self):
+        for name, factory in self._factories:
+            start = time.perf_counter()
+            try:
+                self._services[name] = factory()
+            except Exception as e:
+                print(f"Erro ao iniciar o serviço '{name}': {e}")
+                self._errors[name] = e
+                if self.on_failed:
+                    self.on_failed(name, str(e))
+            finally:
+                self.timings[name] = time.perf_counter() - start
+                self._ready[name].set()
+            if name in self._services and self.on_ready:
+                self.on_ready(name)
+
+    def get(self, name, timeout=None):
+        """
+        Retorna o serviço, aguardando a sua criação (até timeout segundos).
+        Sem start() prévio, a thread de aquecimento é iniciada aqui.
+        """
+        self.start()
+        self._ready[name].wait(timeout)
+        return self._services.get(name)
+
+    def peek(self, name):
+        """Retorna o serviço se ele já estiver pronto, sem aguardar."""
+        return self._services.get(name)
+
+    def is_ready(self, name):
+        return self._ready[name].is_set()
+
+    def error(self, name):
+        return self._errors.get(name)
+
+    def wait_all(self, timeout=None):
+        """Aguarda todos os serviços; retorna False se o timeout expirar antes."""
+        self.start()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Speech Recognition
+
+Interface de reconhecimento de fala em streaming. O áudio chega em blocos PCM
+(16 bits, mono) diretamente da captura e as transcrições parciais são
+entregues enquanto o usuário ainda está falando. O backend é plugável: a
+aplicação usa o Google Cloud Speech, e os testes usam um reconhecedor falso.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+
+class StreamingRecognizer:
+    """
+    Interface dos reconhecedores em streaming.
+
+    recognize(chunks, sample_rate, on_partial=None) consome um iterável de blocos
+    PCM, chama on_partial(texto) a cada transcrição parcial e retorna a
+    transcrição final (ou None se nada foi reconhecido).
+    """
+
+    def recognize(self, chunks, sample_rate, on_partial=None):
+        raise NotImplementedError
+
+
+class GoogleStreamingRecognizer(StreamingRecognizer):
+    """Reconhecedor baseado no streaming_recognize do Google Cloud Speech-to-Text."""
+
+    def __init__(self, language_code='pt-BR', alternative_language_codes=('en-US', 'de-DE', 'es-ES')):
+        self.language_code = language_code
+        self.alternative_language_codes = list(alternative_language_codes)
+        self._client = None
+
+    def _get_client(self):
+        from google.cloud import speech
+
+        if self._client is None:
+            self._client = speech.SpeechClient()
+        return self._client
+
+    def recognize(self, chunks, sample_rate, on_partial=None):
+        from google.cloud import speech
+
+        from api.scheduler import INTERACTIVE, scheduled_call
+
+        client = self._get_client()
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=sample_rate,
+            language_code=self.language_code,
+            alternative_language_codes=self.alternative_language_codes,
+        )
+        streaming_config = speech.StreamingRecognitionConfig(config=config, interim_results=True)
+        requests = (speech.StreamingRecognizeRequest(audio_content=chunk) for chunk in chunks)
+        final_parts = []
+        # O usuário está esperando a transcrição: a chamada tem prioridade máxima
+        with scheduled_call("google_stt", priority=INTERACTIVE):
+            responses = client.streaming_recognize(config=streaming_config, requests=requests)
+            for response in responses:
+                for result in response.results:
+                    if not result.alternatives:
+                        continue
+                    text = result.alternatives[0].transcript.strip()
+                    if result.is_final:
+                        final_parts.append(text)
+                        text = ""
+                    if on_partial:
+                        on_partial(" ".join(final_parts + [text]).strip())
+        transcript = " ".join(final_parts).strip()
+        return transcript or None
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: Telemetry
+
+Instrumentação de latência do pipeline de voz e chat: spans com duração,
+atributos e erro, medições avulsas (por exemplo, tempo até o primeiro token) e
+contadores. Cada etapa mantém as últimas amostras para o painel de desempenho
+(p50/p95) e os spans concluídos podem ser exportados, uma linha JSON por span,
+no formato de span do OTLP/JSON do OpenTelemetry.
+
+Os spans abertos com `with` na mesma thread ficam aninhados; spans de threads
+diferentes são ligados pelo trace ativo (um por pergunta do usuário, criado
+com new_trace()).
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import collections
+import json
+import os
+import threading
+import time
+
+# Arquivo usado quando a aplicação ativa a exportação (enable_file_export) sem TELEMETRY_PATH
+DEFAULT_EXPORT_PATH = os.path.join(os.path.expanduser("~"), ".gysin_ia", "telemetry.jsonl")
+DEFAULT_MAX_SAMPLES = 1000
+DEFAULT_EXPORT_MAX_BYTES = 5 * 1024 * 1024  # 5 MB
+
+# Códigos de status do OpenTelemetry
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def _new_id(n_bytes):
+    return os.urandom(n_bytes).hex()
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """
+    Uma etapa medida. Use como gerenciador de contexto (erros são registrados
+    e propagados) ou chame end() explicitamente, por exemplo em geradores.
+    """
+
+    def __init__(self, telemetry, name, trace_id, parent_id=None, attributes=None):
+        self.telemetry = telemetry
+        self.name = name
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.span_id = _new_id(8)
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.duration = None
+        self._start = time.perf_counter()
+        self._start_ns = time.time_ns()
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, error):
+        self.error = error
+
+    def end(self, duration=None):
+        """
+        Encerra o span (chamadas repetidas são ignoradas) e retorna a duração em
+        segundos; duration substitui a duração medida desde a criação.
+        """
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._start if duration is None else duration
+            self.telemetry._finish(self)
+        return self.duration
+
+    def __enter__(self):
+        self.telemetry._push(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None and self.error is None:
+            self.error = exc
+        self.telemetry._pop(self)
+        self.end()
+        return False
+
+    def to_dict(self):
+        """Representação no formato de span do OTLP/JSON."""
+        end_ns = self._start_ns + int(self.duration * 1e9)
+        status = {"code": STATUS_ERROR, "message": str(self.error)} if self.error else {"code": STATUS_OK}
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "startTimeUnixNano": str(self._start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": status,
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class JsonlExporter:
+    """
+    Grava os spans concluídos em um arquivo JSONL, em lotes (a cada flush_every
+    spans ou flush_interval segundos). Acima de max_bytes, o arquivo atual é
+    renomeado para <arquivo>.1 e um novo é iniciado.
+    """
+
+    def __init__(self, path=DEFAULT_EXPORT_PATH, max_bytes=DEFAULT_EXPORT_MAX_BYTES, flush_every=50,
+                 flush_interval=2.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, span):
+        with self._lock:
+            self._buffer.append(json.dumps(span.to_dict(), ensure_ascii=False))
+            if (len(self._buffer) >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        lines, self._buffer = self._buffer, []
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"Erro ao exportar a telemetria: {e}")
+
+    def close(self):
+        self.flush()
+
+
+class Telemetry:
+    """
+    Registro central de spans, medições e contadores. É seguro para uso a
+    partir de várias threads.
+
+    summary() retorna, por etapa: amostras, erros e as latências p50, p95 e
+    última (em segundos), calculadas sobre as últimas max_samples medições.
+    """
+
+    def __init__(self, exporter=None, max_samples=DEFAULT_MAX_SAMPLES):
+        self.exporter = exporter
+        self.max_samples = max_samples
+        self.active_trace_id = _new_id(16)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stages = {}
+        self._counters = collections.Counter()
+
+    def new_trace(self):
+        """Inicia um novo trace (por exemplo, uma pergunta do usuário) e retorna o seu id."""
+        self.active_trace_id = _new_id(16)
+        return self.active_trace_id
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _push(self, span):
+        self._stack().append(span)
+
+    def _pop(self, span):
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+
+    def span(self, name, **attributes):
+        """Cria um span filho do span ativo na thread (ou da raiz do trace ativo)."""
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        if parent is not None:
+            return Span(self, name, parent.trace_id, parent.span_id, attributes)
+        return Span(self, name, self.active_trace_id, None, attributes)
+
+    def record(self, name, seconds, error=None, **attributes):
+        """Registra uma medição feita fora de um span (terminando agora)."""
+        span = self.span(name, **attributes)
+        span._start_ns = time.time_ns() - int(seconds * 1e9)
+        span.error = error
+        span.end(seconds)
+        return span
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def _finish(self, span):
+        with self._lock:
+            stage = self._stages.get(span.name)
+            if stage is None:
+                stage = self._stages[span.name] = {
+                    "durations": collections.deque(maxlen=self.max_samples), "count": 0, "errors": 0,
+                }
+            stage["count"] += 1
+            if span.error is not None:
+                stage["errors"] += 1
+            else:
+                stage["durations"].append(span.duration)
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    def summary(self):
+        from api.http_transport import percentile
+
+        with self._lock:
+            result = {}
+            for name, stage in sorted(self._stages.items()):
+                durations = list(stage["durations"])
+                result[name] = {
+                    "count": stage["count"],
+                    "errors": stage["errors"],
+                    "p50": percentile(durations, 0.50),
+                    "p95": percentile(durations, 0.95),
+                    "last": durations[-1] if durations else None,
+                }
+            return result
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self):
+        """Descarta as amostras e os contadores (o arquivo exportado é mantido)."""
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def close(self):
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+_default_telemetry = None
+_default_telemetry_lock = threading.Lock()
+
+
+def get_telemetry():
+    """
+    Retorna a telemetria compartilhada pela aplicação (criada no primeiro uso).
+    Só exporta para arquivo se TELEMETRY_PATH estiver definido ou se o ponto de
+    entrada da aplicação chamar enable_file_export().
+    """
+    global _default_telemetry
+    with _default_telemetry_lock:
+        if _default_telemetry is None:
+            _default_telemetry = Telemetry(_open_exporter(os.getenv("TELEMETRY_PATH")))
+        return _default_telemetry
+
+
+def enable_file_export(path=None):
+    """
+    Ativa a exportação da telemetria compartilhada. O caminho vem de path, de
+    TELEMETRY_PATH ou, na falta dos dois, de DEFAULT_EXPORT_PATH; com
+    TELEMETRY_PATH vazio, nada é exportado.
+    """
+    telemetry = get_telemetry()
+    if path is None:
+        path = os.getenv("TELEMETRY_PATH", DEFAULT_EXPORT_PATH)
+    with _default_telemetry_lock:
+        if telemetry.exporter is None:
+            telemetry.exporter = _open_exporter(path)
+    return telemetry
+
+
+def _open_exporter(path):
+    if not path:
+        return None
+    try:
+        return JsonlExporter(path)
+    except OSError as e:
+        print(f"Erro ao abrir o arquivo de telemetria: {e}")
+        return None
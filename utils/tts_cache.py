@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: TTS Cache
+
+Cache em disco para os áudios sintetizados. Cada arquivo é endereçado pelo hash
+de (texto normalizado, código de idioma, voz, configuração de áudio), de modo que
+frases repetidas não voltam a chamar o serviço de síntese e respostas
+simultâneas nunca escrevem no mesmo arquivo. O tamanho total é limitado e os
+arquivos menos usados recentemente são removidos primeiro (LRU).
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from utils.telemetry import get_telemetry
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "TTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".gysin_ia", "tts_cache")
+)
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # 200 MB
+
+
+def normalize_text(text):
+    """Normaliza Unicode e espaços para que variações triviais gerem a mesma chave."""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class TTSCache:
+    """
+    Cache LRU de áudios sintetizados, limitado por tamanho em bytes.
+
+    É seguro para uso a partir de várias threads. As gravações são atômicas:
+    o áudio é escrito em um arquivo temporário no mesmo diretório e depois
+    renomeado para o caminho final.
+
+    stale_extensions lista formatos antigos: esses arquivos não são mais servidos
+    e são apagados ao abrir o cache, para não ocuparem espaço fora do limite.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, extension=".mp3",
+                 stale_extensions=()):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.stale_extensions = tuple(stale_extensions)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # chave -> tamanho em bytes, do menos para o mais recente
+        self._total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Reconstrói o índice LRU a partir dos arquivos existentes (ordem pelo mtime)."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".tmp") or (self.stale_extensions and name.endswith(self.stale_extensions)):
+                # Restos de gravações interrompidas ou áudios em um formato antigo
+                os.remove(os.path.join(self.cache_dir, name))
+                continue
+            if not name.endswith(self.extension):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            files.append((stat.st_mtime, name[:-len(self.extension)], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    @staticmethod
+    def make_key(text, language_code, voice=None, audio_config=None):
+        """Gera a chave (hash SHA-256) de uma síntese."""
+        payload = json.dumps(
+            [normalize_text(text), language_code, voice, audio_config or {}],
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def get(self, key):
+        """Retorna o caminho do áudio em cache ou None, registrando acerto/falha."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        path = self.path_for(key)
+        try:
+            os.utime(path)  # Mantém a ordem LRU entre execuções
+        except OSError:
+            with self._lock:
+                self._discard(key)
+            return None
+        return path
+
+    def put_file(self, key, write_audio):
+        """
+        Grava um novo áudio chamando write_audio(temp_path) e o publica atomicamente.
+        Retorna o caminho final.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            write_audio(temp_path)
+            final_path = self.path_for(key)
+            os.replace(temp_path, final_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        size = os.path.getsize(final_path)
+        with self._lock:
+            self._discard(key, remove_file=False)
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict(keep=key)
+        return final_path
+
+    def put_bytes(self, key, data):
+        """Grava um áudio já sintetizado (bytes) e retorna o caminho final."""
+        def write_audio(temp_path):
+            with open(temp_path, "wb") as f:
+                f.write(data)
+
+        return self.put_file(key, write_audio)
+
+    def get_or_synthesize(self, text, language_code, text_to_speech, voice=None, audio_config=None):
+        """
+        Retorna o caminho do áudio para o texto, chamando
+        text_to_speech(text, output_file, language_code=...) apenas em caso de falha no cache.
+        """
+        key = self.make_key(text, language_code, voice, audio_config)
+        with get_telemetry().span("cache.tts_lookup") as span:
+            path = self.get(key)
+            span.set_attribute("result", "hit" if path else "miss")
+        if path:
+            return path
+        return self.put_file(
+            key, lambda temp_path: text_to_speech(text, temp_path, language_code=language_code)
+        )
+
+    def _discard(self, key, remove_file=True):
+        size = self._entries.pop(key, None)
+        if size is None:
+            return
+        self._total_bytes -= size
+        if remove_file:
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass  # Arquivo já removido ou em uso pelo player
+
+    def _evict(self, keep=None):
+        """Remove os áudios menos usados até respeitar o limite de tamanho."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            if key == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(key)
+                continue
+            self._discard(key)
+            self.evictions += 1
+
+    def stats(self):
+        """Retorna os contadores do cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Retorna o cache compartilhado pela aplicação (criado no primeiro uso), com os áudios em WAV."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            # A síntese padrão (utils.tts_coalescing) produz WAV LINEAR16; os MP3 das
+            # versões anteriores não são mais servidos e são removidos
+            _default_cache = TTSCache(extension=".wav", stale_extensions=(".mp3",))
+        return _default_cache
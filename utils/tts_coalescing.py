@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: TTS Coalescing
+
+Camada entre os pedidos de fala e o serviço de síntese:
+
+- SingleFlight: pedidos simultâneos idênticos (mesmo texto normalizado,
+  idioma e voz) compartilham uma única síntese em andamento;
+- TTSBatcher: frases curtas do mesmo idioma/voz que chegam dentro de uma
+  pequena janela de tempo são sintetizadas em uma só chamada ao backend;
+- CoalescingTTS: combina as duas coisas com o cache em disco (TTSCache) e
+  expõe synthesize(text, language_code), a mesma interface de
+  google_synthesize, com métricas de fila e de tamanho dos lotes.
+
+O Google Cloud TTS não tem um endpoint de lotes; google_synthesize_batch
+junta as frases em um único SSML com <mark> e separa o áudio (LINEAR16) pelos
+instantes de cada marca. Se o lote falhar, cada frase é sintetizada sozinha,
+com a mesma configuração de áudio: todas as frases saem em WAV, qualquer que
+seja o caminho, e a configuração faz parte da chave do cache.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import io
+import threading
+import time
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from xml.sax.saxutils import escape
+
+from api.scheduler import NORMAL, scheduled_call
+from utils.telemetry import get_telemetry
+from utils.tts_cache import TTSCache
+
+DEFAULT_BATCH_WINDOW = 0.015  # segundos esperando outras frases antes de enviar o lote
+DEFAULT_MAX_BATCH = 8
+DEFAULT_MAX_BATCH_CHARS = 120  # Frases maiores não esperam pelo lote
+
+# Configuração de áudio das sínteses do Google (frases sozinhas e em lote): WAV LINEAR16
+GOOGLE_AUDIO_CONFIG = {"audio_encoding": "LINEAR16"}
+
+
+class SingleFlight:
+    """
+    Executa fn uma única vez por chave entre chamadas simultâneas: quem chega
+    enquanto a chave está em andamento espera e recebe o mesmo resultado (ou
+    a mesma exceção). do() retorna (resultado, compartilhado).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.executions += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class _BatchItem:
+    def __init__(self, text):
+        self.text = text
+        self.future = Future()
+        self.submitted_at = time.perf_counter()
+
+
+class TTSBatcher:
+    """
+    Agrupa frases por (idioma, voz). Um grupo é enviado quando a frase mais
+    antiga espera window segundos ou quando atinge max_batch frases.
+    synthesize_batch(texts, language_code, voice) retorna um áudio por texto,
+    na mesma ordem; até max_workers lotes rodam ao mesmo tempo.
+    """
+
+    def __init__(self, synthesize_batch, window=DEFAULT_BATCH_WINDOW, max_batch=DEFAULT_MAX_BATCH, max_workers=2):
+        self.synthesize_batch = synthesize_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._condition = threading.Condition()
+        self._groups = {}  # (idioma, voz) -> lista de _BatchItem, na ordem de chegada
+        self._queue_depth = 0
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-batch")
+        self.batches = 0
+        self.batched_items = 0
+        self.max_batch_size = 0
+        self.max_queue_depth = 0
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="tts-batcher", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, text, language_code, voice=None):
+        """Agenda a frase e retorna um Future com o áudio."""
+        item = _BatchItem(text)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("o agrupador de síntese foi encerrado")
+            self._groups.setdefault((language_code, voice), []).append(item)
+            self._queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queue_depth)
+            self._condition.notify()
+        return item.future
+
+    def _dispatch_loop(self):
+        while True:
+            with self._condition:
+                ready = self._take_ready()
+                while not ready:
+                    if self._closed and not self._groups:
+                        return
+                    self._condition.wait(self._time_to_next_deadline())
+                    ready = self._take_ready()
+            for group, items in ready:
+                self._executor.submit(self._run_batch, group, items)
+
+    def _take_ready(self):
+        """Retira os grupos prontos para envio (chamado com o lock)."""
+        now = time.perf_counter()
+        ready = []
+        for group in list(self._groups):
+            items = self._groups[group]
+            while items and (self._closed or len(items) >= self.max_batch
+                             or now - items[0].submitted_at >= self.window):
+                batch, items[:] = items[:self.max_batch], items[self.max_batch:]
+                ready.append((group, batch))
+                self._queue_depth -= len(batch)
+            if not items:
+                del self._groups[group]
+        return ready
+
+    def _time_to_next_deadline(self):
+        if not self._groups:
+            return None
+        oldest = min(items[0].submitted_at for items in self._groups.values())
+        return max(0.0, oldest + self.window - time.perf_counter())
+
+    def _run_batch(self, group, items):
+        language_code, voice = group
+        telemetry = get_telemetry()
+        started = time.perf_counter()
+        for item in items:
+            telemetry.record("tts.batch_wait", started - item.submitted_at)
+        with self._condition:
+            self.batches += 1
+            self.batched_items += len(items)
+            self.max_batch_size = max(self.max_batch_size, len(items))
+        try:
+            with telemetry.span("tts.batch", language=language_code, size=len(items)):
+                audios = self.synthesize_batch([item.text for item in items], language_code, voice)
+            if len(audios) != len(items):
+                raise RuntimeError(f"lote com {len(items)} frases retornou {len(audios)} áudios")
+        except Exception as e:
+            for item in items:
+                item.future.set_exception(e)
+            return
+        for item, audio in zip(items, audios):
+            item.future.set_result(audio)
+
+    def queue_depth(self):
+        with self._condition:
+            return self._queue_depth
+
+    def stats(self):
+        with self._condition:
+            return {
+                "queue_depth": self._queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "batches": self.batches,
+                "batched_items": self.batched_items,
+                "avg_batch_size": self.batched_items / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+            }
+
+    def close(self):
+        """Envia o que estiver na fila e encerra o despachante."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+
+class CoalescingTTS:
+    """
+    Síntese com cache, coalescência de pedidos idênticos e lotes de frases curtas.
+
+    synthesize(text, language_code, voice) retorna os bytes do áudio de uma frase;
+    synthesize_batch(texts, language_code, voice), se informado, sintetiza várias
+    de uma vez (frases com até max_batch_chars caracteres). cache (TTSCache),
+    se informado, guarda os áudios: acertos não passam pela fila. audio_config
+    descreve o formato produzido pelos dois backends e entra na chave do cache.
+    """
+
+    def __init__(self, synthesize, synthesize_batch=None, cache=None, voice=None, audio_config=None,
+                 batch_window=DEFAULT_BATCH_WINDOW, max_batch=DEFAULT_MAX_BATCH,
+                 max_batch_chars=DEFAULT_MAX_BATCH_CHARS):
+        self._synthesize = synthesize
+        self.cache = cache
+        self.voice = voice
+        self.audio_config = audio_config
+        self.max_batch_chars = max_batch_chars
+        self.batcher = TTSBatcher(synthesize_batch, batch_window, max_batch) if synthesize_batch else None
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.cache_hits = 0
+        self.backend_calls = 0
+        self.batch_fallbacks = 0
+
+    def synthesize(self, text, language_code):
+        with self._lock:
+            self.requests += 1
+        key = TTSCache.make_key(text, language_code, self.voice, self.audio_config)
+        audio = self._from_cache(key)
+        if audio is not None:
+            return audio
+        audio, shared = self._flight.do(key, lambda: self._synthesize_missing(key, text, language_code))
+        if shared:
+            get_telemetry().increment("tts.coalesced")
+        return audio
+
+    __call__ = synthesize
+
+    def _from_cache(self, key):
+        if self.cache is None:
+            return None
+        with get_telemetry().span("cache.tts_lookup") as span:
+            path = self.cache.get(key)
+            span.set_attribute("result", "hit" if path else "miss")
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            self.cache_hits += 1
+        return audio
+
+    def _synthesize_missing(self, key, text, language_code):
+        with self._lock:
+            self.backend_calls += 1
+        audio = None
+        if self.batcher and len(text) <= self.max_batch_chars:
+            try:
+                audio = self.batcher.submit(text, language_code, self.voice).result()
+            except Exception as e:
+                print(f"Erro na síntese em lote; sintetizando a frase sozinha: {e}")
+                with self._lock:
+                    self.batch_fallbacks += 1
+        if audio is None:
+            audio = self._synthesize(text, language_code, self.voice)
+        if self.cache is not None:
+            try:
+                self.cache.put_bytes(key, audio)
+            except OSError as e:
+                print(f"Erro ao gravar o áudio no cache: {e}")
+        return audio
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "requests": self.requests,
+                "cache_hits": self.cache_hits,
+                "coalesced": self._flight.shared,
+                "in_flight": self._flight.in_flight(),
+                "backend_calls": self.backend_calls,
+                "batch_fallbacks": self.batch_fallbacks,
+            }
+        if self.batcher:
+            stats.update(self.batcher.stats())
+        return stats
+
+    def close(self):
+        if self.batcher:
+            self.batcher.close()
+
+
+_google_tts = None
+_google_tts_lock = threading.Lock()
+
+
+def _get_google_tts():
+    """
+    Retorna (texttospeech_v1beta1, cliente), criados uma única vez, mesmo com o
+    despachante dos lotes e as threads de síntese chamando ao mesmo tempo.
+
+    A síntese passa pelo módulo do projeto, googlecloud.text_to_speech: ele é
+    carregado antes do cliente, de modo que a configuração de credenciais que
+    ele aplica vale também aqui. A versão v1beta1 da API (necessária para as
+    marcas do SSML dos lotes) é um detalhe interno deste módulo.
+    """
+    global _google_tts
+    with _google_tts_lock:
+        if _google_tts is None:
+            import googlecloud.text_to_speech  # noqa: F401
+            from google.cloud import texttospeech_v1beta1 as tts
+
+            _google_tts = (tts, tts.TextToSpeechClient())
+        return _google_tts
+
+
+def _voice_params(tts, language_code, voice):
+    return tts.VoiceSelectionParams(language_code=language_code, name=voice or "")
+
+
+def google_synthesize_single(text, language_code, voice=None):
+    """
+    Sintetiza uma frase com o Google Cloud TTS e retorna os bytes (WAV LINEAR16,
+    o mesmo formato das frases sintetizadas em lote).
+    """
+    tts, client = _get_google_tts()
+    with scheduled_call("google_tts", tokens=len(text), priority=NORMAL):
+        response = client.synthesize_speech(request=tts.SynthesizeSpeechRequest(
+            input=tts.SynthesisInput(text=text),
+            voice=_voice_params(tts, language_code, voice),
+            audio_config=tts.AudioConfig(audio_encoding=tts.AudioEncoding.LINEAR16),
+        ))
+    return response.audio_content
+
+
+def split_wav(data, boundaries):
+    """Divide um WAV nos instantes (segundos) indicados; retorna len(boundaries) + 1 WAVs."""
+    with wave.open(io.BytesIO(data), "rb") as source:
+        params = source.getparams()
+        frames = source.readframes(source.getnframes())
+    frame_size = params.sampwidth * params.nchannels
+    cuts = [0] + [min(len(frames), int(t * params.framerate) * frame_size) for t in boundaries] + [len(frames)]
+    segments = []
+    for start, end in zip(cuts, cuts[1:]):
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as target:
+            target.setparams(params)
+            target.writeframes(frames[start:max(start, end)])
+        segments.append(buffer.getvalue())
+    return segments
+
+
+def google_synthesize_batch(texts, language_code, voice=None):
+    """
+    Sintetiza várias frases em uma única chamada ao Google Cloud TTS (v1beta1):
+    as frases vão em um SSML separadas por <mark>, e o áudio LINEAR16 é dividido
+    nos instantes retornados para cada marca. Retorna um WAV por frase.
+    """
+    tts, client = _get_google_tts()
+    ssml = "<speak>" + "".join(
+        f'{escape(text)}<mark name="fim{i}"/>' for i, text in enumerate(texts)
+    ) + "</speak>"
+    with scheduled_call("google_tts", tokens=len(ssml), priority=NORMAL):
+        response = client.synthesize_speech(request=tts.SynthesizeSpeechRequest(
+            input=tts.SynthesisInput(ssml=ssml),
+            voice=_voice_params(tts, language_code, voice),
+            audio_config=tts.AudioConfig(audio_encoding=tts.AudioEncoding.LINEAR16),
+            enable_time_pointing=[tts.SynthesizeSpeechRequest.TimepointType.SSML_MARK],
+        ))
+    marks = {point.mark_name: point.time_seconds for point in response.timepoints}
+    boundaries = [marks[f"fim{i}"] for i in range(len(texts) - 1)]
+    return split_wav(response.audio_content, boundaries)
+
+
+_default_tts = None
+_default_tts_lock = threading.Lock()
+
+
+def get_default_tts():
+    """Retorna a síntese compartilhada pela aplicação (Google Cloud TTS com o cache padrão)."""
+    global _default_tts
+    with _default_tts_lock:
+        if _default_tts is None:
+            from utils.tts_cache import get_default_cache
+
+            _default_tts = CoalescingTTS(google_synthesize_single, google_synthesize_batch,
+                                         cache=get_default_cache(), audio_config=GOOGLE_AUDIO_CONFIG)
+        return _default_tts
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: TTS Pipeline
+
+Este módulo segmenta a resposta da IA em frases à medida que ela chega, sintetiza
+cada frase em paralelo (com paralelismo limitado) e reproduz os áudios na ordem
+original, para que a fala comece logo após a primeira frase. Com um serviço de
+reprodução (utils.playback), cada áudio entra na fila assim que fica pronto, e o
+próximo já está preparado quando o atual termina.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.telemetry import get_telemetry
+
+# Fim de frase: pontuação final seguida de espaço, ou quebra de linha
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])["\')\]]*\s+|\n+')
+
+
+class SentenceSegmenter:
+    """
+    Acumula pedaços de texto e devolve as frases completas.
+
+    Frases menores que min_chars são unidas à seguinte para evitar
+    chamadas de síntese para fragmentos muito curtos.
+    """
+
+    def __init__(self, min_chars=1):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text):
+        """Adiciona texto e retorna a lista de frases completas encontradas."""
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start:match.start()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        """Retorna o texto restante como última frase (se houver)."""
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return [remainder] if remainder else []
+
+
+class SpeechPipeline:
+    """
+    Estágio de síntese e reprodução em pipeline.
+
+    synthesize(text, language_code) retorna o áudio de uma frase (em qualquer
+    formato aceito por play). play(audio, should_stop) reproduz um áudio e só
+    retorna quando ele termina ou quando should_stop() retorna True.
+    Alternativamente, playback (um AudioPlayback) recebe os áudios na sua fila,
+    sem esperar o fim de um para enfileirar o seguinte; o pipeline é o grupo
+    dos seus áudios, então cancel() não afeta os de outros produtores.
+
+    O playback também pode ser informado depois, com attach_playback(): os
+    áudios continuam sendo sintetizados e esperam por ele para tocar.
+
+    resolve_language(text), se informado, é chamado uma vez com a primeira frase
+    para escolher o código de idioma de toda a resposta, em uma thread da
+    síntese (nunca na de quem chama feed()). on_error(message) e on_finished()
+    são chamados a partir da thread de reprodução.
+    """
+
+    DEFAULT_MAX_PARALLEL = 2
+
+    def __init__(self, synthesize, play=None, language_code='pt-BR', resolve_language=None,
+                 max_parallel=DEFAULT_MAX_PARALLEL, min_chars=1, on_error=None, on_finished=None,
+                 playback=None):
+        self.synthesize = synthesize
+        self.play = play
+        self.playback = playback
+        self.language_code = language_code
+        self.resolve_language = resolve_language
+        self.on_error = on_error
+        self.on_finished = on_finished
+        self._segmenter = SentenceSegmenter(min_chars=min_chars)
+        self._executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="tts")
+        self._playback_queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._output_ready = threading.Event()
+        if play is not None or playback is not None:
+            self._output_ready.set()
+        self._language_future = None
+        self._finished = False
+        self._telemetry = get_telemetry()
+        self._created_at = time.perf_counter()
+        self._first_audio_recorded = False
+        self._player_thread = threading.Thread(target=self._playback_loop, daemon=True)
+        self._player_thread.start()
+
+    def feed(self, text):
+        """Recebe um pedaço da resposta e agenda a síntese das frases completas."""
+        if self._cancel_event.is_set() or self._finished:
+            return
+        for sentence in self._segmenter.feed(text):
+            self._submit(sentence)
+
+    def finish(self):
+        """Indica que a resposta terminou; sintetiza o texto restante."""
+        if self._finished:
+            return
+        if not self._cancel_event.is_set():
+            for sentence in self._segmenter.flush():
+                self._submit(sentence)
+        self._finished = True
+        self._playback_queue.put(None)
+        self._executor.shutdown(wait=False)
+
+    def cancel(self):
+        """Interrompe a síntese pendente e a reprodução atual."""
+        self._cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.playback:
+            self.playback.stop(group=self)
+        if not self._finished:
+            self._finished = True
+            self._playback_queue.put(None)
+
+    def attach_playback(self, playback):
+        """Define o serviço de reprodução, quando ele fica pronto depois do início da resposta."""
+        self.playback = playback
+        self._output_ready.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def wait(self, timeout=None):
+        """Aguarda até que todos os áudios tenham sido reproduzidos."""
+        self._player_thread.join(timeout)
+        return not self._player_thread.is_alive()
+
+    def _submit(self, sentence):
+        if self.resolve_language and self._language_future is None:
+            # Entra na fila antes das sínteses, que aguardam o seu resultado
+            self._language_future = self._executor.submit(self._resolve_language, sentence)
+        future = self._executor.submit(self._synthesize, sentence)
+        self._playback_queue.put(future)
+
+    def _resolve_language(self, sentence):
+        try:
+            self.language_code = self.resolve_language(sentence) or self.language_code
+        except Exception as e:
+            print(f"Erro ao detectar o idioma da resposta: {e}")
+        return self.language_code
+
+    def _synthesize(self, sentence):
+        language_code = self._language_future.result() if self._language_future else self.language_code
+        with self._telemetry.span("tts.synthesize", language=language_code, chars=len(sentence)):
+            return self.synthesize(sentence, language_code)
+
+    def _playback_loop(self):
+        """Reproduz os áudios na ordem em que as frases foram recebidas."""
+        try:
+            self._play_in_order()
+        finally:
+            if self.on_finished:
+                self.on_finished()
+
+    def _play_in_order(self):
+        last_item = None
+        while True:
+            future = self._playback_queue.get()
+            if future is None or self._cancel_event.is_set():
+                if last_item is not None:
+                    self._wait_for(last_item)
+                return
+            try:
+                audio = future.result()
+            except Exception as e:
+                if future.cancelled():
+                    return
+                print(f"Erro na síntese de voz: {e}")
+                if self.on_error:
+                    self.on_error(str(e))
+                continue
+            if not self._wait_for_output():
+                return
+            if not self._first_audio_recorded:
+                # Do início da resposta até o primeiro áudio pronto para tocar
+                self._first_audio_recorded = True
+                self._telemetry.record("tts.first_audio", time.perf_counter() - self._created_at)
+            if self.playback:
+                last_item = self.playback.enqueue(audio, group=self, on_error=self.on_error)
+                continue
+            try:
+                self.play(audio, self.is_cancelled)
+            except Exception as e:
+                print(f"Erro ao reproduzir áudio: {e}")
+                if self.on_error:
+                    self.on_error(str(e))
+
+    def _wait_for_output(self):
+        """Aguarda o destino dos áudios (play ou playback); False se a resposta foi cancelada."""
+        while not self._output_ready.wait(0.05):
+            if self._cancel_event.is_set():
+                return False
+        return not self._cancel_event.is_set()
+
+    def _wait_for(self, item):
+        """Aguarda o último áudio enfileirado terminar (ou o cancelamento)."""
+        while not item.wait(0.05):
+            if self._cancel_event.is_set():
+                return
+
+
+def google_synthesize(text, language_code):
+    """
+    Sintetiza uma frase com o Google Cloud TTS e retorna o áudio (bytes).
+    Os áudios ficam no cache compartilhado, então frases repetidas não geram nova chamada;
+    pedidos simultâneos da mesma frase compartilham uma síntese e frases curtas são
+    agrupadas em lotes (utils.tts_coalescing). O player recebe os bytes em memória e
+    nunca mantém o arquivo do cache aberto.
+    """
+    from utils.tts_coalescing import get_default_tts
+
+    return get_default_tts().synthesize(text, language_code)
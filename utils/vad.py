@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo: VAD (Voice Activity Detection)
+
+Detecta o início da fala e o silêncio final em cada bloco capturado do
+microfone, para encerrar a gravação assim que o usuário para de falar, em vez
+de gravar sempre uma duração fixa. Também converte o áudio para 16 kHz mono,
+reduzindo em cerca de 3x o volume enviado ao reconhecedor.
+
+Todo o processamento é vetorizado com NumPy sobre cada bloco de 1024 amostras.
+
+Autor: Stefano Gysin - StefanoGysin@hotmail.com
+"""
+
+import wave
+
+import numpy as np
+
+SILENCE = "silence"
+SPEECH = "speech"
+END = "end"
+
+
+def pcm16_to_float(chunk, channels=1):
+    """Converte PCM de 16 bits (bytes) em amostras float32 mono no intervalo [-1, 1]."""
+    samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def float_to_pcm16(samples):
+    """Converte amostras float em PCM de 16 bits (bytes)."""
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype(np.int16).tobytes()
+
+
+def rms_dbfs(samples):
+    """Energia RMS do bloco em dBFS."""
+    rms = np.sqrt(np.mean(np.square(samples), dtype=np.float64)) if samples.size else 0.0
+    return 20.0 * np.log10(max(rms, 1e-10))
+
+
+class VoiceActivityDetector:
+    """
+    VAD por energia com piso de ruído adaptativo.
+
+    Os primeiros calibration_ms servem para medir o ruído ambiente. A fala
+    começa quando a energia fica start_margin_db acima do piso de ruído por
+    min_speech_ms, e termina após trailing_silence_ms abaixo de end_margin_db.
+    Se ninguém falar em no_speech_timeout_ms, a captura também termina.
+    process() retorna SILENCE, SPEECH ou END para cada bloco.
+    """
+
+    def __init__(self, sample_rate=44100, start_margin_db=12.0, end_margin_db=8.0,
+                 min_speech_ms=90, trailing_silence_ms=800, no_speech_timeout_ms=5000,
+                 calibration_ms=150, min_threshold_dbfs=-55.0):
+        self.sample_rate = sample_rate
+        self.start_margin_db = start_margin_db
+        self.end_margin_db = end_margin_db
+        self.min_speech_ms = min_speech_ms
+        self.trailing_silence_ms = trailing_silence_ms
+        self.no_speech_timeout_ms = no_speech_timeout_ms
+        self.calibration_ms = calibration_ms
+        self.min_threshold_dbfs = min_threshold_dbfs
+        self.reset()
+
+    def reset(self):
+        self.noise_floor_dbfs = None
+        self.speech_started = False
+        self.ended = False
+        self.elapsed_ms = 0.0
+        self.speech_start_ms = None
+        self.speech_end_ms = None
+        self._voiced_ms = 0.0
+        self._silence_ms = 0.0
+
+    def process(self, chunk, channels=1):
+        """Analisa um bloco PCM de 16 bits e retorna o estado atual."""
+        samples = pcm16_to_float(chunk, channels)
+        return self.process_samples(samples)
+
+    def process_samples(self, samples):
+        if self.ended:
+            return END
+
+        chunk_ms = 1000.0 * samples.size / self.sample_rate
+        level = rms_dbfs(samples)
+        self.elapsed_ms += chunk_ms
+
+        if self.noise_floor_dbfs is None or self.elapsed_ms <= self.calibration_ms:
+            # Calibração: o piso de ruído é o bloco mais silencioso do início
+            self.noise_floor_dbfs = level if self.noise_floor_dbfs is None else min(self.noise_floor_dbfs, level)
+            return SILENCE
+
+        start_threshold = max(self.noise_floor_dbfs + self.start_margin_db, self.min_threshold_dbfs)
+        end_threshold = max(self.noise_floor_dbfs + self.end_margin_db, self.min_threshold_dbfs)
+
+        if not self.speech_started:
+            if level >= start_threshold:
+                self._voiced_ms += chunk_ms
+                if self._voiced_ms >= self.min_speech_ms:
+                    self.speech_started = True
+                    self.speech_start_ms = self.elapsed_ms - self._voiced_ms
+                    return SPEECH
+            else:
+                self._voiced_ms = 0.0
+                # O piso de ruído só acompanha o ambiente enquanto não há fala
+                self.noise_floor_dbfs = 0.9 * self.noise_floor_dbfs + 0.1 * level
+            if self.elapsed_ms >= self.no_speech_timeout_ms:
+                self.ended = True
+                return END
+            return SILENCE
+
+        if level < end_threshold:
+            self._silence_ms += chunk_ms
+            if self._silence_ms >= self.trailing_silence_ms:
+                self.ended = True
+                self.speech_end_ms = self.elapsed_ms - self._silence_ms
+                return END
+        else:
+            self._silence_ms = 0.0
+        return SPEECH
+
+
+class Resampler:
+    """
+    Converte blocos contínuos de PCM de 16 bits para outra taxa (por padrão 16 kHz mono).
+
+    Aplica um filtro passa-baixa FIR (sinc janelado) antes da interpolação linear
+    para evitar aliasing, mantendo o estado entre blocos para não gerar
+    descontinuidades nas emendas.
+    """
+
+    def __init__(self, input_rate=44100, output_rate=16000, channels=1, taps=31):
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.channels = channels
+        self._step = input_rate / output_rate
+        cutoff = 0.45 * output_rate / input_rate  # fração da taxa de entrada
+        n = np.arange(taps) - (taps - 1) / 2
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+        self._kernel = (kernel / kernel.sum()).astype(np.float32)
+        self._history = np.zeros(taps - 1, dtype=np.float32)
+        self._position = 0.0  # posição da próxima amostra de saída, relativa ao bloco atual
+        self._last_sample = np.float32(0.0)
+
+    def process(self, chunk):
+        """Reamostra um bloco e retorna os bytes PCM de 16 bits na nova taxa."""
+        samples = pcm16_to_float(chunk, self.channels)
+        if self.input_rate == self.output_rate:
+            return float_to_pcm16(samples)
+
+        padded = np.concatenate((self._history, samples))
+        filtered = np.convolve(padded, self._kernel, mode="valid")
+        self._history = padded[-(self._kernel.size - 1):]
+
+        # Inclui a última amostra do bloco anterior (índice -1) para interpolar na emenda
+        source = np.concatenate(([self._last_sample], filtered))
+        # Só gera saídas que já têm as duas amostras vizinhas disponíveis
+        positions = np.arange(self._position, filtered.size - 1 + 1e-9, self._step)
+        output = np.interp(positions + 1, np.arange(source.size), source)
+        if positions.size:
+            self._position = positions[-1] + self._step - filtered.size
+        else:
+            self._position -= filtered.size
+        self._last_sample = filtered[-1] if filtered.size else self._last_sample
+        return float_to_pcm16(output)
+
+
+def iter_wav_chunks(path, chunk=1024):
+    """Lê um arquivo WAV em blocos de `chunk` quadros; retorna (taxa, canais, gerador)."""
+    wf = wave.open(path, 'rb')
+    rate, channels = wf.getframerate(), wf.getnchannels()
+
+    def chunks():
+        try:
+            while True:
+                data = wf.readframes(chunk)
+                if not data:
+                    return
+                yield data
+        finally:
+            wf.close()
+
+    return rate, channels, chunks()
+
+
+def analyze_wav(path, chunk=1024, **vad_options):
+    """
+    Passa um arquivo WAV pelo VAD, bloco a bloco, como se viesse do microfone.
+
+    Retorna um dicionário com o início e o fim da fala (em ms), o instante em que
+    a captura teria sido encerrada e quantos blocos foram consumidos.
+    """
+    rate, channels, chunks = iter_wav_chunks(path, chunk)
+    vad = VoiceActivityDetector(sample_rate=rate, **vad_options)
+    consumed = 0
+    state = SILENCE
+    for data in chunks:
+        consumed += 1
+        state = vad.process(data, channels)
+        if state == END:
+            break
+    return {
+        "speech_detected": vad.speech_started,
+        "speech_start_ms": vad.speech_start_ms,
+        "speech_end_ms": vad.speech_end_ms,
+        "stopped_at_ms": vad.elapsed_ms,
+        "ended_early": state == END,
+        "chunks": consumed,
+    }